@@ -8,8 +8,6 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_compress import Compress
 from flask_talisman import Talisman
 import logging
@@ -23,16 +21,13 @@ from models import db  # Use the db instance from models.py
 login_manager = LoginManager()
 csrf = CSRFProtect()
 compress = Compress()
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["2000 per day", "500 per hour"],
-    storage_uri="memory://",
-    enabled=False  # Disabled for debugging
-)
 
 
-def create_app(config_name=None):
-    """Application factory function following Flask best practices."""
+def create_app(config_name=None, **settings):
+    """Application factory function following Flask best practices.
+    
+    Keyword arguments override values of the named configuration.
+    """
     
     if config_name is None:
         config_name = os.environ.get('FLASK_ENV', 'development')
@@ -43,13 +38,14 @@ def create_app(config_name=None):
     
     # Load configuration
     app.config.from_object(config[config_name])
+    app.config.update(settings)
+    app.config_name = config_name
     
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
     compress.init_app(app)
-    limiter.init_app(app)
     
     # Configure login manager
     login_manager.login_view = 'auth.login'
@@ -139,20 +135,27 @@ def create_app(config_name=None):
 def _register_request_hooks(app):
     """Register before/after request hooks."""
     from flask import session
-    from datetime import datetime
+    from app.services.activity_tracker import init_activity_tracker
+    from app.security.rate_limiting import init_rate_limiter
+    from app.security.audit_writer import init_audit_writer
+    
+    # Per-route rate limit policies and X-RateLimit-* headers
+    init_rate_limiter(app)
+    
+    # Audit events are spooled and bulk-inserted off the request path
+    init_audit_writer(app)
+    
+    # Last-activity timestamps are buffered and flushed in bulk
+    tracker = init_activity_tracker(app, app.config.get('ACTIVITY_FLUSH_INTERVAL', 30))
     
     @app.before_request
     def update_user_activity():
-        """Update user's last activity timestamp."""
+        """Record user's last activity timestamp (write-behind)."""
         if 'user_id' in session:
-            from app.models import User
             try:
-                user = User.query.get(session['user_id'])
-                if user:
-                    user.last_activity = datetime.utcnow()
-                    db.session.commit()
+                tracker.record(int(session['user_id']))
             except Exception:
-                pass  # Don't break the request if activity update fails
+                pass  # Don't break the request if activity tracking fails
 
 
 def _setup_logging(app):
@@ -439,13 +442,90 @@ def _init_phase6_systems(app):
     # Initialize Backup Manager
     try:
         from app.recovery import init_backup_manager
-        backup_dir = os.path.join(app.instance_path, 'backups')
+        backup_dir = app.config.get('BACKUP_DIR') or os.path.join(app.instance_path, 'backups')
         db_path = os.path.join(app.instance_path, 'app.db')
-        init_backup_manager(backup_dir, db_path)
+        with app.app_context():
+            if db.engine.url.get_backend_name() == 'sqlite' and db.engine.url.database:
+                db_path = db.engine.url.database
+        init_backup_manager(
+            backup_dir, db_path,
+            compression=app.config.get('BACKUP_COMPRESSION', 'zstd'),
+            workers=app.config.get('BACKUP_WORKERS'),
+            block_pages=app.config.get('BACKUP_BLOCK_PAGES', 256),
+            step_pages=app.config.get('BACKUP_STEP_PAGES', 1024)
+        )
         app.logger.info('✓ Backup manager initialized')
     except Exception as e:
         app.logger.warning(f'Backup manager error: {e}')
     
+    # Initialize Cache (local tier, plus Redis when configured)
+    try:
+        from app.cache import init_cache
+        from app.services.stats_service import register_stats_invalidation
+        init_cache(app)
+        register_stats_invalidation()
+        app.logger.info('✓ Cache initialized')
+    except Exception as e:
+        app.logger.warning(f'Cache initialization error: {e}')
+    
+    # Initialize attachment blob storage
+    try:
+        from app.upload import init_blob_store, register_blob_release
+        storage_path = app.config.get('UPLOAD_STORAGE_PATH') or os.path.join(
+            app.root_path, '..', app.config.get('UPLOAD_FOLDER', 'uploads')
+        )
+        init_blob_store(
+            storage_path,
+            chunk_size=app.config.get('ATTACHMENT_CHUNK_SIZE', 1024 * 1024),
+            max_size=app.config.get('ATTACHMENT_MAX_SIZE', 100 * 1024 * 1024),
+            upload_ttl=app.config.get('UPLOAD_SESSION_TTL', 24 * 3600)
+        )
+        register_blob_release()
+        app.logger.info('✓ Blob storage initialized')
+    except Exception as e:
+        app.logger.warning(f'Blob storage error: {e}')
+    
+    # Initialize outbound webhook delivery
+    try:
+        from app.integrations.webhook_delivery import init_webhook_dispatcher
+        init_webhook_dispatcher(app)
+        app.logger.info('✓ Webhook delivery initialized')
+    except Exception as e:
+        app.logger.warning(f'Webhook delivery error: {e}')
+    
+    # Initialize durable background job queue
+    try:
+        from app.tasks import init_tasks
+        init_tasks(app)
+        app.logger.info('✓ Background job queue initialized')
+    except Exception as e:
+        app.logger.warning(f'Background job queue error: {e}')
+    
+    # Initialize workflow automation worker
+    try:
+        from app.automation import init_workflow_engine
+        init_workflow_engine(app)
+        app.logger.info('✓ Workflow engine initialized')
+    except Exception as e:
+        app.logger.warning(f'Workflow engine error: {e}')
+    
+    # Initialize durable timer scheduler
+    try:
+        from app.scheduling import init_scheduler
+        init_scheduler(app)
+        app.logger.info('✓ Timer scheduler initialized')
+    except Exception as e:
+        app.logger.warning(f'Timer scheduler error: {e}')
+    
+    # Initialize Search Index
+    try:
+        from app.search import init_search_index
+        index_path = app.config.get('SEARCH_INDEX_PATH') or os.path.join(app.instance_path, 'search_index.db')
+        init_search_index(index_path)
+        app.logger.info('✓ Search index initialized')
+    except Exception as e:
+        app.logger.warning(f'Search index error: {e}')
+    
     # Initialize GraphQL
     try:
         from app.api.graphql_api import init_graphql
@@ -0,0 +1,286 @@
+"""
+Face Embedding Index
+Decrypted admin face encodings kept in process memory for fast matching
+
+Each admin's verified encodings are decrypted once and stored as a
+contiguous float32 matrix (one row per enrollment), so a verification
+attempt is a single vectorized distance computation instead of a Fernet
+decrypt and a norm per enrollment. Matrices are read-only, locked into
+RAM where the OS allows it (kept out of swap) and zeroed when evicted.
+Distances are computed under the index lock and eviction wipes under the
+same lock, so a request still holding an evicted entry never reads a
+zeroed matrix; it gets None and must look the admin up again.
+
+Entries are keyed by the admin's current set of verified enrollment IDs:
+callers pass that set on every lookup, so enrollments added, deleted or
+locked by any process are noticed immediately; the TTL only bounds how
+long decrypted material lingers in memory.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENCODING_SIZE = 128
+
+# Encodings are (close to) unit length; anything far off is not a face
+PROBE_NORM_RANGE = (0.5, 1.5)
+
+_libc = None
+
+
+def _get_libc():
+    """Load libc for mlock/munlock (None where unavailable)."""
+    global _libc
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+            _libc.mlock
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def _lock_memory(array) -> bool:
+    """Keep an array's pages out of swap (best effort)."""
+    libc = _get_libc()
+    if libc is None or not array.nbytes:
+        return False
+    address = ctypes.c_void_p(array.ctypes.data)
+    return libc.mlock(address, ctypes.c_size_t(array.nbytes)) == 0
+
+
+def _unlock_memory(array):
+    libc = _get_libc()
+    if libc is not None and array.nbytes:
+        libc.munlock(ctypes.c_void_p(array.ctypes.data), ctypes.c_size_t(array.nbytes))
+
+
+class _IndexEntry:
+    """One admin's enrolled encodings."""
+
+    __slots__ = ('key', 'ids', 'labels', 'matrix', 'locked', 'loaded_at')
+
+    def __init__(self, key, ids, labels, matrix, locked):
+        self.key = key
+        self.ids = ids
+        self.labels = labels
+        self.matrix = matrix
+        self.locked = locked
+        self.loaded_at = time.monotonic()
+
+    def wipe(self):
+        """Zero the decrypted encodings and drop them (caller holds the index lock)."""
+        if self.matrix is None:
+            return
+        self.matrix.setflags(write=True)
+        self.matrix.fill(0)
+        if self.locked:
+            _unlock_memory(self.matrix)
+            self.locked = False
+        self.matrix = None
+
+
+class FaceEmbeddingIndex:
+    """Per-process cache of decrypted face encodings, one matrix per admin."""
+
+    def __init__(self, ttl: float = 300, max_admins: int = 256):
+        self.ttl = ttl
+        self.max_admins = max_admins
+        self._entries: "OrderedDict[int, _IndexEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    def lookup(self, admin_id: int, key: Tuple[int, ...],
+               loader: Callable[[], Iterable[Tuple[int, str, "object"]]]) -> Optional[_IndexEntry]:
+        """
+        Get an admin's entry, rebuilding it when the enrollment set changed.
+
+        Args:
+            admin_id: Admin user ID
+            key: IDs of the admin's currently verified enrollments
+            loader: Returns (id, label, decrypted encoding) for those enrollments
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(admin_id)
+            if entry is not None and entry.key == key and now - entry.loaded_at < self.ttl:
+                self._entries.move_to_end(admin_id)
+                self.stats['hits'] += 1
+                return entry
+
+        entry = self._build(key, loader())
+        with self._lock:
+            stale = self._entries.pop(admin_id, None)
+            if entry is not None:
+                self._entries[admin_id] = entry
+            self.stats['loads'] += 1
+            if stale is not None:
+                stale.wipe()
+            while len(self._entries) > self.max_admins:
+                self._entries.popitem(last=False)[1].wipe()
+        return entry
+
+    @staticmethod
+    def _build(key, rows) -> Optional[_IndexEntry]:
+        import numpy as np
+
+        ids, labels, vectors = [], [], []
+        for row_id, label, vector in rows:
+            if vector.shape != (ENCODING_SIZE,):
+                logger.warning(f"Skipping face encoding {row_id} with shape {vector.shape}")
+                continue
+            ids.append(row_id)
+            labels.append(label)
+            vectors.append(vector)
+        if not ids:
+            return None
+
+        matrix = np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+        locked = _lock_memory(matrix)
+        matrix.setflags(write=False)
+        return _IndexEntry(key, tuple(ids), labels, matrix, locked)
+
+    @staticmethod
+    def is_valid_probe(probe) -> bool:
+        """Whether a probe is a finite, unit-length-ish encoding of the right size."""
+        import numpy as np
+
+        probe = np.asarray(probe, dtype=np.float32)
+        if probe.shape != (ENCODING_SIZE,) or not np.isfinite(probe).all():
+            return False
+        low, high = PROBE_NORM_RANGE
+        return low <= float(np.linalg.norm(probe)) <= high
+
+    def distances(self, entry: _IndexEntry, probe) -> Optional["object"]:
+        """
+        Euclidean distance from a probe encoding to every enrolled encoding.
+
+        Returns None when the entry was evicted since it was looked up.
+        """
+        import numpy as np
+
+        probe = np.asarray(probe, dtype=np.float32)
+        with self._lock:
+            if entry.matrix is None:
+                return None
+            diff = entry.matrix - probe
+            return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+    def invalidate(self, admin_id: Optional[int] = None):
+        """Drop one admin's entry, or every entry."""
+        with self._lock:
+            if admin_id is None:
+                dropped = list(self._entries.values())
+                self._entries.clear()
+            else:
+                entry = self._entries.pop(admin_id, None)
+                dropped = [entry] if entry is not None else []
+            self.stats['invalidations'] += len(dropped)
+            for entry in dropped:
+                entry.wipe()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'admins': len(self._entries),
+                'encodings': sum(len(e.ids) for e in self._entries.values()),
+            }
+
+
+class FacePoolBusy(RuntimeError):
+    """Raised when the face worker pool is saturated or a job times out."""
+
+
+class FaceWorkerPool:
+    """
+    Bounded process pool for image decoding and face detection/encoding.
+
+    At most max_pending jobs are queued or running; further requests fail
+    fast instead of piling up behind CPU-bound HOG detection. With
+    max_workers=0 jobs run in the calling thread.
+
+    Workers are started by a fork server (spawn where unavailable) rather
+    than forked from the threaded web process. A job that times out takes
+    its worker down with it: the pool is torn down and rebuilt on next use.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: Optional[int] = None,
+                 timeout: float = 10.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending or max(1, max_workers) * 2)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mp_context():
+        methods = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            # Pools don't survive fork; build a fresh one per process
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=self._mp_context())
+                self._pid = os.getpid()
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Kill an executor's workers (a hung job never returns) and forget it."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn: Callable, *args):
+        """Run fn(*args) in a worker process and wait for the result."""
+        if self.max_workers <= 0:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise FacePoolBusy('Face processing is busy, please retry')
+        released = threading.Lock()
+
+        def release(_=None):
+            if released.acquire(blocking=False):
+                self._slots.release()
+
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+        except Exception:
+            release()
+            raise
+        future.add_done_callback(release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._discard(executor)
+            release()
+            raise FacePoolBusy('Face processing timed out')
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise FacePoolBusy('Face processing was interrupted, please retry')
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if executor is not None and self._pid == os.getpid():
+                executor.shutdown(wait=False, cancel_futures=True)
@@ -15,6 +15,8 @@ from flask import current_app
 from sqlalchemy import and_, desc
 from cryptography.fernet import Fernet
 
+from .face_index import FaceEmbeddingIndex, FacePoolBusy, FaceWorkerPool
+
 # For type hints only - these won't be imported at module load time
 if TYPE_CHECKING:
     import numpy as np
@@ -82,6 +84,11 @@ class FacialIDManager:
         self.model = "hog"  # Use HOG for speed, can use "cnn" for accuracy
         self.cipher_suite = None
         self._init_encryption()
+        self.face_index = FaceEmbeddingIndex(ttl=current_app.config.get('FACIAL_INDEX_TTL', 300))
+        self.worker_pool = FaceWorkerPool(
+            max_workers=current_app.config.get('FACIAL_POOL_WORKERS', 2),
+            timeout=current_app.config.get('FACIAL_POOL_TIMEOUT', 10.0)
+        )
 
     def _init_encryption(self):
         """Initialize encryption for facial data storage"""
@@ -121,7 +128,8 @@ class FacialIDManager:
             logger.error(f"Failed to initialize encryption: {e}", exc_info=True)
             raise FacialRecognitionError(f"Encryption initialization failed: {e}")
 
-    def capture_face_from_image(self, image_data: bytes) -> "Optional":
+    @staticmethod
+    def capture_face_from_image(image_data: bytes) -> "Optional":
         """
         Capture and extract face from image data
         
@@ -182,7 +190,8 @@ class FacialIDManager:
             logger.error(f"[CAPTURE]  Image processing failed: {e}", exc_info=True)
             raise FaceEncodingError(f"Failed to process image: {e}")
 
-    def detect_faces(self, image_array: "np.ndarray") -> List[Tuple]:
+    @staticmethod
+    def detect_faces(image_array: "np.ndarray") -> List[Tuple]:
         """
         Detect faces in image using face_recognition library.
         Uses HOG (Histogram of Oriented Gradients) model for face detection.
@@ -223,7 +232,8 @@ class FacialIDManager:
             logger.error(f"[DETECT]  Face detection error: {e}", exc_info=True)
             raise FaceEncodingError(f"Face detection failed: {e}")
 
-    def encode_face(self, image_array: "np.ndarray", 
+    @staticmethod
+    def encode_face(image_array: "np.ndarray", 
                    face_location: Optional[Tuple] = None) -> "np.ndarray":
         """
         Generate face encoding from image using face_recognition library (CNN-based ML model).
@@ -248,18 +258,19 @@ class FacialIDManager:
         logger.info(f"[ENCODE] Image shape: {image_array.shape}, dtype: {image_array.dtype}")
         
         try:
-            # Detect face locations using face_recognition library
-            logger.info("[ENCODE] Detecting faces in image...")
-            face_locations = face_recognition.face_locations(image_array, model='hog')
-            
-            if not face_locations:
-                logger.error("[ENCODE]  No face detected in image!")
-                raise FaceEncodingError("No face detected in image")
-            
-            logger.info(f"[ENCODE]  Found {len(face_locations)} face(s)")
-            
-            # Use the first face location
-            face_location = face_locations[0]
+            # Detect faces only when the caller hasn't already (HOG is the slow part)
+            if face_location is None:
+                logger.info("[ENCODE] Detecting faces in image...")
+                face_locations = face_recognition.face_locations(image_array, model='hog')
+                
+                if not face_locations:
+                    logger.error("[ENCODE]  No face detected in image!")
+                    raise FaceEncodingError("No face detected in image")
+                
+                logger.info(f"[ENCODE]  Found {len(face_locations)} face(s)")
+                
+                # Use the first face location
+                face_location = face_locations[0]
             logger.info(f"[ENCODE] Using face location: {face_location}")
             
             # Generate face encoding using face_recognition CNN model
@@ -423,6 +434,7 @@ class FacialIDManager:
             
             db.session.add(facial_data)
             db.session.commit()
+            self.face_index.invalidate(admin_id)
             
             logger.info(f"[ENROLL]  Facial ID enrolled successfully for admin {admin_id}, ID={facial_data.id}")
             
@@ -512,6 +524,7 @@ class FacialIDManager:
             
             db.session.add(facial_data)
             db.session.commit()
+            self.face_index.invalidate(admin_id)
             
             logger.info(f"Facial ID descriptor enrolled for admin {admin_id}")
             return True, {'message': 'Facial ID successfully enrolled', 'face_id': facial_data.id}
@@ -520,6 +533,82 @@ class FacialIDManager:
             logger.error(f"Facial enrollment with descriptor error: {e}")
             return False, {'error': str(e)}
 
+    def _enrolled_index(self, admin_id: int):
+        """
+        Get the admin's verified encodings from the in-memory index.
+        
+        Only the IDs of the verified enrollments are read on each attempt;
+        encodings are decrypted again only when that set changes.
+        """
+        from app import db
+        from app.models import FacialIDData
+        
+        key = tuple(row[0] for row in db.session.query(FacialIDData.id).filter_by(
+            admin_id=admin_id,
+            is_verified=True
+        ).order_by(FacialIDData.id))
+        
+        if not key:
+            self.face_index.invalidate(admin_id)
+            return None
+        
+        def load():
+            rows = db.session.query(
+                FacialIDData.id, FacialIDData.encoding_label, FacialIDData.facial_encoding
+            ).filter(FacialIDData.id.in_(key)).order_by(FacialIDData.id).all()
+            
+            encodings = []
+            for row in rows:
+                try:
+                    encodings.append((row.id, row.encoding_label, self.decrypt_encoding(row.facial_encoding)))
+                except FacialRecognitionError as e:
+                    logger.error(f"[VERIFY]  Skipping enrolled face {row.id}: {e}")
+            return encodings
+        
+        return self.face_index.lookup(admin_id, key, load)
+    
+    def _record_attempt(self, admin_id: int, best_match: Optional[Dict], is_verified: bool):
+        """Update unlock/failure counters, locking enrollments after 5 failures."""
+        from app import db
+        from app.models import FacialIDData
+        
+        now = datetime.utcnow()
+        if is_verified:
+            FacialIDData.query.filter_by(id=best_match['encoding_id']).update({
+                FacialIDData.successful_unlocks: FacialIDData.successful_unlocks + 1,
+                FacialIDData.last_unlock_at: now,
+                FacialIDData.failed_attempts: 0  # Reset failed counter
+            }, synchronize_session=False)
+        else:
+            enrolled = FacialIDData.query.filter_by(admin_id=admin_id, is_verified=True)
+            enrolled.update({
+                FacialIDData.failed_attempts: FacialIDData.failed_attempts + 1,
+                FacialIDData.last_failed_attempt_at: now
+            }, synchronize_session=False)
+            
+            # Lock if too many failed attempts
+            locked = enrolled.filter(FacialIDData.failed_attempts >= 5).update(
+                {FacialIDData.is_verified: False}, synchronize_session=False
+            )
+            if locked:
+                self.face_index.invalidate(admin_id)
+                logger.warning(
+                    f"Facial ID locked for admin {admin_id} "
+                    f"({locked} enrollment(s) reached 5 failed attempts)"
+                )
+        
+        db.session.commit()
+    
+    @staticmethod
+    def _enrollment_changed() -> Dict:
+        """Result for an attempt whose enrollments were reloaded mid-verification."""
+        return {
+            'success': False,
+            'message': 'Enrolled faces changed during verification. Please try again.',
+            'confidence': 0.0,
+            'match_count': 0
+        }
+    
     def verify_admin_face(self, admin_id: int, image_data: bytes) -> Tuple[bool, Dict]:
         """
         Verify admin identity using facial recognition
@@ -532,22 +621,14 @@ class FacialIDManager:
             Tuple of (is_verified: bool, details: dict)
         """
         try:
-            # Import here to avoid circular imports
-            from app.models import FacialIDData
-            
             logger.info(f"[VERIFY_START] ========== FACIAL VERIFICATION STARTED ==========")
             logger.info(f"[VERIFY_START] Admin ID: {admin_id}")
             logger.info(f"[VERIFY_START] Image data size: {len(image_data)} bytes")
             
             # Get enrolled facial data for admin
-            enrolled_faces = FacialIDData.query.filter_by(
-                admin_id=admin_id,
-                is_verified=True
-            ).all()
-            
-            logger.info(f"[VERIFY_START] Found {len(enrolled_faces)} enrolled verified faces for admin {admin_id}")
+            entry = self._enrolled_index(admin_id)
             
-            if not enrolled_faces:
+            if entry is None:
                 logger.warning(f"[VERIFY_START]  No enrolled faces found for admin {admin_id}")
                 return False, {
                     'success': False,
@@ -556,16 +637,12 @@ class FacialIDManager:
                     'match_count': 0
                 }
             
-            # Process verification image
-            logger.info(f"[VERIFY_PROCESS] Converting image bytes to PIL Image...")
-            verification_image = self.capture_face_from_image(image_data)
-            logger.info(f"[VERIFY_PROCESS]  Image converted, size: {verification_image.size}")
+            logger.info(f"[VERIFY_START] Found {len(entry.ids)} enrolled verified faces for admin {admin_id}")
             
-            logger.info(f"[VERIFY_PROCESS] Detecting faces in verification image...")
-            verification_locations = self.detect_faces(verification_image)
-            logger.info(f"[VERIFY_PROCESS]  Face detection complete: found {len(verification_locations)} face(s)")
+            # Decode, detect and encode in the worker pool
+            verification_encoding = self.worker_pool.run(_extract_face_encoding, image_data)
             
-            if not verification_locations:
+            if verification_encoding is None:
                 logger.error(f"[VERIFY_PROCESS]  No faces detected in verification image!")
                 return False, {
                     'success': False,
@@ -574,65 +651,43 @@ class FacialIDManager:
                     'match_count': 0
                 }
             
-            logger.info(f"[VERIFY_PROCESS] Encoding first detected face...")
-            verification_encoding = self.encode_face(
-                verification_image, 
-                verification_locations[0]
-            )
-            logger.info(f"[VERIFY_PROCESS]  Face encoding generated: shape={verification_encoding.shape if hasattr(verification_encoding, 'shape') else len(verification_encoding)}")
-            
-            # Compare against enrolled faces
-            matches = []
-            match_count = 0
-            
-            logger.info(f"[VERIFY] Comparing against {len(enrolled_faces)} enrolled face(s)")
+            if not self.face_index.is_valid_probe(verification_encoding):
+                logger.error(f"[VERIFY_PROCESS]  Degenerate face encoding rejected")
+                return False, {
+                    'success': False,
+                    'message': 'Invalid face encoding. Please try again.',
+                    'confidence': 0.0,
+                    'match_count': 0
+                }
             
-            for idx, facial_data in enumerate(enrolled_faces, 1):
-                try:
-                    logger.info(f"[VERIFY] Processing enrolled face {idx}/{len(enrolled_faces)} (ID={facial_data.id}, label={facial_data.encoding_label})...")
-                    
-                    # Decrypt enrolled encoding
-                    enrolled_encoding = self.decrypt_encoding(
-                        facial_data.facial_encoding
-                    )
-                    
-                    # Compare encodings using Euclidean distance (face_recognition library standard)
-                    np = _get_numpy()
-                    distance = np.linalg.norm(enrolled_encoding - verification_encoding)
-                    
-                    # SECURITY FIX: Use stricter tolerance for biometric authentication
-                    # Default 0.6 was too lenient and allowed false positives
-                    # New strict tolerance 0.4 requires much closer face match
-                    # Lower tolerance = stricter (more secure)
-                    # 0.4 = highly secure for biometric authentication
-                    # This rejects unknown/different faces more reliably
-                    tolerance = 0.4  # STRICT TOLERANCE - was 0.6 (too lenient)
-                    is_match = distance <= tolerance
-                    
-                    # Convert distance to confidence percentage
-                    # distance 0.0 = perfect match (100% confidence)
-                    # distance 0.4 = borderline match (0% confidence)
-                    # distance > 0.4 = no match (0% confidence)
-                    confidence = max(0.0, 1.0 - (distance / tolerance))
-                    
-                    matches.append({
-                        'encoding_id': facial_data.id,
-                        'label': facial_data.encoding_label,
-                        'distance': float(distance),
-                        'confidence': float(confidence),
-                        'is_match': is_match
-                    })
-                    
-                    logger.info(f"[VERIFY]  Face {idx} comparison: distance={distance:.4f}, confidence={confidence:.2%}, match={is_match}, tolerance={tolerance}")
-                    
-                    if is_match:
-                        match_count += 1
-                        logger.info(f"[VERIFY]  MATCH found! ({match_count} match(es) so far)")
-                        
-                except Exception as e:
-                    logger.error(f"[VERIFY]  Error comparing encoding {idx} (ID={facial_data.id}): {e}", exc_info=True)
-                    continue
-
+            # SECURITY FIX: Use stricter tolerance for biometric authentication
+            # Default 0.6 was too lenient and allowed false positives
+            # New strict tolerance 0.4 requires much closer face match
+            # Lower tolerance = stricter (more secure)
+            # 0.4 = highly secure for biometric authentication
+            # This rejects unknown/different faces more reliably
+            tolerance = 0.4  # STRICT TOLERANCE - was 0.6 (too lenient)
+            
+            # Compare against all enrolled faces at once using Euclidean distance
+            # (face_recognition library standard)
+            distances = self.face_index.distances(entry, verification_encoding)
+            if distances is None:
+                return False, self._enrollment_changed()
+            
+            # Convert distance to confidence percentage
+            # distance 0.0 = perfect match (100% confidence)
+            # distance 0.4 = borderline match (0% confidence)
+            # distance > 0.4 = no match (0% confidence)
+            matches = [{
+                'encoding_id': encoding_id,
+                'label': label,
+                'distance': float(distance),
+                'confidence': max(0.0, 1.0 - float(distance) / tolerance),
+                'is_match': bool(distance <= tolerance)
+            } for encoding_id, label, distance in zip(entry.ids, entry.labels, distances)]
+            
+            logger.info(f"[VERIFY] Compared against {len(matches)} enrolled face(s), "
+                        f"best distance={float(distances.min()):.4f}")
             
             # Require at least one match with MINIMUM confidence threshold
             # confidence < 50% = not confident enough, reject
@@ -647,34 +702,10 @@ class FacialIDManager:
             is_verified = match_count > 0
             best_match = max(valid_matches, key=lambda x: x['confidence']) if valid_matches else None
             
+            self._record_attempt(admin_id, best_match, is_verified)
             if is_verified:
-                # Update successful unlock
-                best_match_data = FacialIDData.query.get(best_match['encoding_id'])
-                if best_match_data:
-                    best_match_data.successful_unlocks += 1
-                    best_match_data.last_unlock_at = datetime.utcnow()
-                    best_match_data.failed_attempts = 0  # Reset failed counter
-                    from app import db
-                    db.session.commit()
-                
                 logger.info(f"Facial verification successful for admin {admin_id}")
             else:
-                # Update failed attempt
-                for facial_data in enrolled_faces:
-                    facial_data.failed_attempts += 1
-                    facial_data.last_failed_attempt_at = datetime.utcnow()
-                    
-                    # Lock if too many failed attempts
-                    if facial_data.failed_attempts >= 5:
-                        facial_data.is_verified = False
-                        logger.warning(
-                            f"Facial ID locked for admin {admin_id} "
-                            f"due to {facial_data.failed_attempts} failed attempts"
-                        )
-                
-                from app import db
-                db.session.commit()
-                
                 logger.warning(f"Facial verification failed for admin {admin_id}")
             
             return is_verified, {
@@ -683,11 +714,11 @@ class FacialIDManager:
                           else 'Face not recognized',
                 'confidence': float(best_match['confidence']) if best_match else 0.0,
                 'match_count': match_count,
-                'total_attempts': len(enrolled_faces),
+                'total_attempts': len(matches),
                 'matches': matches
             }
             
-        except FaceEncodingError as e:
+        except (FaceEncodingError, FacePoolBusy) as e:
             logger.error(f"Face verification failed: {e}")
             return False, {
                 'success': False,
@@ -716,17 +747,12 @@ class FacialIDManager:
             Tuple of (is_verified: bool, details: dict)
         """
         try:
-            from app.models import FacialIDData
-            import json
             numpy = _get_numpy()
             
             # Get enrolled facial data for admin
-            enrolled_faces = FacialIDData.query.filter_by(
-                admin_id=admin_id,
-                is_verified=True
-            ).all()
+            entry = self._enrolled_index(admin_id)
             
-            if not enrolled_faces:
+            if entry is None:
                 return False, {
                     'success': False,
                     'message': 'No enrolled faces found for this admin',
@@ -736,72 +762,44 @@ class FacialIDManager:
             
             # Convert descriptor array to numpy array
             verification_descriptor = numpy.array(descriptor_array, dtype=numpy.float32)
+            if verification_descriptor.shape != (128,):
+                return False, {
+                    'success': False,
+                    'message': 'Invalid descriptor dimensions. Expected 128-dimensional array.',
+                    'confidence': 0.0,
+                    'match_count': 0
+                }
+            if not self.face_index.is_valid_probe(verification_descriptor):
+                return False, {
+                    'success': False,
+                    'message': 'Invalid descriptor. Expected a normalized face descriptor.',
+                    'confidence': 0.0,
+                    'match_count': 0
+                }
             
-            # Compare against enrolled face descriptors
-            matches = []
-            match_count = 0
-            
-            for facial_data in enrolled_faces:
-                try:
-                    # Get stored descriptor (should be JSON)
-                    if facial_data.face_descriptor:
-                        stored_descriptor = json.loads(facial_data.face_descriptor)
-                        stored_descriptor = numpy.array(stored_descriptor, dtype=numpy.float32)
-                        
-                        # Calculate Euclidean distance between descriptors
-                        distance = numpy.linalg.norm(verification_descriptor - stored_descriptor)
-                        
-                        # Face-api.js uses 0.5 as threshold for high confidence
-                        is_match = distance <= 0.5
-                        confidence = max(0.0, 1.0 - (distance / 2.0))  # Convert distance to confidence
-                        
-                        matches.append({
-                            'encoding_id': facial_data.id,
-                            'label': facial_data.encoding_label,
-                            'distance': float(distance),
-                            'confidence': float(min(1.0, confidence)),
-                            'is_match': is_match
-                        })
-                        
-                        if is_match:
-                            match_count += 1
-                            
-                except Exception as e:
-                    logger.error(f"Error comparing descriptor for facial data {facial_data.id}: {e}")
-                    continue
+            # Euclidean distance to every enrolled descriptor at once
+            distances = self.face_index.distances(entry, verification_descriptor)
+            if distances is None:
+                return False, self._enrollment_changed()
+            
+            # Face-api.js uses 0.5 as threshold for high confidence
+            matches = [{
+                'encoding_id': encoding_id,
+                'label': label,
+                'distance': float(distance),
+                'confidence': float(min(1.0, max(0.0, 1.0 - float(distance) / 2.0))),
+                'is_match': bool(distance <= 0.5)
+            } for encoding_id, label, distance in zip(entry.ids, entry.labels, distances)]
+            match_count = sum(1 for m in matches if m['is_match'])
             
             # Require at least one match
             is_verified = match_count > 0
             best_match = max(matches, key=lambda x: x['confidence']) if matches else None
             
+            self._record_attempt(admin_id, best_match, is_verified)
             if is_verified:
-                # Update successful unlock
-                best_match_data = FacialIDData.query.get(best_match['encoding_id'])
-                if best_match_data:
-                    best_match_data.successful_unlocks += 1
-                    best_match_data.last_unlock_at = datetime.utcnow()
-                    best_match_data.failed_attempts = 0  # Reset failed counter
-                    from app import db
-                    db.session.commit()
-                
                 logger.info(f"Facial verification successful (descriptor) for admin {admin_id}")
             else:
-                # Update failed attempt
-                for facial_data in enrolled_faces:
-                    facial_data.failed_attempts += 1
-                    facial_data.last_failed_attempt_at = datetime.utcnow()
-                    
-                    # Lock if too many failed attempts
-                    if facial_data.failed_attempts >= 5:
-                        facial_data.is_verified = False
-                        logger.warning(
-                            f"Facial ID locked for admin {admin_id} "
-                            f"due to {facial_data.failed_attempts} failed attempts"
-                        )
-                
-                from app import db
-                db.session.commit()
-                
                 logger.warning(f"Facial verification failed (descriptor) for admin {admin_id}")
             
             return is_verified, {
@@ -810,7 +808,7 @@ class FacialIDManager:
                           else 'Face not recognized',
                 'confidence': float(best_match['confidence']) if best_match else 0.0,
                 'match_count': match_count,
-                'total_attempts': len(enrolled_faces),
+                'total_attempts': len(matches),
                 'matches': matches
             }
             
@@ -839,6 +837,7 @@ class FacialIDManager:
             
             deleted = FacialIDData.query.filter_by(admin_id=admin_id).delete()
             db.session.commit()
+            self.face_index.invalidate(admin_id)
             
             logger.info(f"Deleted {deleted} facial ID records for admin {admin_id}")
             return True
@@ -935,6 +934,19 @@ class FacialIDManager:
             return 0
 
 
+def _extract_face_encoding(image_data: bytes) -> "Optional":
+    """
+    Decode an image and encode its first face (None if no face is found).
+    
+    Runs in the face worker pool, so it must stay a module-level function.
+    """
+    image_array = FacialIDManager.capture_face_from_image(image_data)
+    face_locations = FacialIDManager.detect_faces(image_array)
+    if not face_locations:
+        return None
+    return FacialIDManager.encode_face(image_array, face_locations[0])
+
+
 # Create global instance (lazy loaded)
 _facial_id_manager_instance = None
 
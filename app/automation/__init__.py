@@ -2,6 +2,8 @@
 
 from app.automation.workflow import (
     workflow_engine,
+    init_workflow_engine,
+    get_workflow_engine,
     WorkflowEngine,
     Workflow,
     Trigger,
@@ -12,6 +14,8 @@ from app.automation.workflow import (
 
 __all__ = [
     'workflow_engine',
+    'init_workflow_engine',
+    'get_workflow_engine',
     'WorkflowEngine',
     'Workflow',
     'Trigger',
@@ -1,14 +1,44 @@
-"""Workflow Automation Engine - Drag-drop automation with triggers and actions"""
+"""Workflow Automation Engine - Drag-drop automation with triggers and actions
 
+Workflows are compiled when they are added: their conditions become a list
+of predicate closures, and each workflow is filed in an index under its
+trigger type and the value of one discriminating condition (project, status
+or priority). An event only evaluates the workflows filed under its own
+values plus those with no discriminating condition, so a status change
+touches a handful of rules however many tenants have automation set up.
+
+Events raised by requests are queued with dispatch() and run in batches on
+a background thread; execution summaries are kept in a bounded ring buffer
+and bulk-inserted into workflow_execution.
+
+Workflows live in the memory of the worker that created them. Events raised
+away from a request (timers fire on one worker only) are broadcast() over
+the fanout bus so each worker dispatches them to its own workflows.
+"""
+
+import atexit
+import itertools
 import logging
-from typing import Dict, List, Optional, Callable, Any
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Callable, Any, Tuple
 from dataclasses import dataclass, asdict
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 from enum import Enum
 import json
 
 logger = logging.getLogger(__name__)
 
+PRIORITY_ORDER = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+# Condition fields a workflow can be indexed by, most selective first
+INDEX_FIELDS = ('project_id', 'status', 'priority')
+
+# Condition aliases accepted from the API
+CONDITION_ALIASES = {'project': 'project_id'}
+
 
 class TriggerType(Enum):
     """Types of automation triggers"""
@@ -91,6 +121,23 @@ class Workflow:
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Workflow':
+        """Rebuild a workflow from to_dict() output"""
+        trigger = data['trigger']
+        return cls(
+            id=data['id'],
+            name=data['name'],
+            description=data.get('description', ''),
+            trigger=Trigger(id=trigger['id'], type=TriggerType(trigger['type']),
+                            conditions=trigger.get('conditions', {})),
+            actions=[Action(id=a['id'], type=ActionType(a['type']), params=a.get('params', {}))
+                     for a in data.get('actions', [])],
+            is_enabled=data.get('is_enabled', True),
+            created_at=datetime.fromisoformat(data['created_at']) if data.get('created_at') else None,
+            updated_at=datetime.fromisoformat(data['updated_at']) if data.get('updated_at') else None,
+        )
 
 
 class TriggerValidator:
@@ -110,8 +157,7 @@ class TriggerValidator:
         actual_priority = issue.get('priority')
         
         if condition.get('is_higher_than', False):
-            priority_order = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-            return priority_order.get(actual_priority, 0) >= priority_order.get(expected_priority, 0)
+            return PRIORITY_ORDER.get(actual_priority, 0) >= PRIORITY_ORDER.get(expected_priority, 0)
         
         return actual_priority == expected_priority
     
@@ -138,23 +184,91 @@ class TriggerValidator:
         
         return True
     
+    @staticmethod
+    def normalize_conditions(conditions: Dict) -> Dict:
+        """Resolve condition aliases (e.g. project -> project_id)"""
+        return {CONDITION_ALIASES.get(key, key): value for key, value in (conditions or {}).items()}
+    
+    @staticmethod
+    def index_keys(conditions: Dict) -> Tuple[Optional[str], List[Any]]:
+        """
+        Pick the condition a workflow is indexed by.
+        
+        Returns:
+            (field, values): the workflow matches only events whose field has
+            one of values; (None, []) files it under the trigger's wildcard bucket
+        """
+        for field in INDEX_FIELDS:
+            if field not in conditions or conditions[field] is None:
+                continue
+            value = conditions[field]
+            if field == 'priority' and conditions.get('is_higher_than', False):
+                floor = PRIORITY_ORDER.get(value, 0)
+                return field, [p for p, rank in PRIORITY_ORDER.items() if rank >= floor]
+            return field, [value]
+        return None, []
+    
+    @staticmethod
+    def compile(conditions: Dict, skip: Optional[str] = None) -> Callable[[Dict], bool]:
+        """
+        Compile a condition dict into a single predicate over event data.
+        
+        Args:
+            conditions: Normalized trigger conditions
+            skip: Field already guaranteed by the index lookup
+        """
+        checks: List[Callable[[Dict], bool]] = []
+        
+        for key, value in conditions.items():
+            if key == skip:
+                continue
+            if key == 'status':
+                checks.append(lambda event, v=value: event.get('status') == v)
+            elif key == 'project_id':
+                checks.append(lambda event, v=_index_value(value): _index_value(event.get('project_id')) == v)
+            elif key == 'priority':
+                if conditions.get('is_higher_than', False):
+                    floor = PRIORITY_ORDER.get(value, 0)
+                    checks.append(lambda event, f=floor: PRIORITY_ORDER.get(event.get('priority'), 0) >= f)
+                else:
+                    checks.append(lambda event, v=value: event.get('priority') == v)
+            elif key == 'days_open':
+                checks.append(lambda event, v=value: _days_open(event) >= v)
+        
+        if not checks:
+            return lambda event: True
+        if len(checks) == 1:
+            return checks[0]
+        return lambda event: all(check(event) for check in checks)
+    
     @staticmethod
     def validate_trigger(trigger: Trigger, event_data: Dict) -> bool:
         """Check if trigger conditions are met"""
-        conditions = trigger.conditions
-        
-        for condition_key, condition_value in conditions.items():
-            if condition_key == 'status':
-                if not TriggerValidator.validate_issue_status_condition(event_data, {'status': condition_value}):
-                    return False
-            elif condition_key == 'priority':
-                if not TriggerValidator.validate_priority_condition(event_data, {'priority': condition_value}):
-                    return False
-            elif condition_key == 'days_open':
-                if not TriggerValidator.validate_time_condition(event_data, {'days': condition_value}):
-                    return False
-        
-        return True
+        return TriggerValidator.compile(TriggerValidator.normalize_conditions(trigger.conditions))(event_data)
+
+
+def _index_value(value: Any) -> Optional[str]:
+    """Key for an indexed condition value (project ids arrive as int or str)"""
+    return None if value is None else str(value)
+
+
+def _days_open(event: Dict) -> int:
+    created_at = event.get('created_at')
+    if not created_at:
+        return -1
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return (datetime.now() - created_at).days
+
+
+@dataclass
+class CompiledWorkflow:
+    """Workflow with its conditions compiled, as filed in the trigger index"""
+    workflow: Workflow
+    predicate: Callable[[Dict], bool]
+    field: Optional[str]
+    keys: List[Optional[str]]
+    seq: int
 
 
 class ActionExecutor:
@@ -252,11 +366,21 @@ class ActionExecutor:
     
     @staticmethod
     def _webhook_call(params: Dict, context: Dict) -> Dict:
-        """Call webhook"""
+        """Queue a webhook POST for the delivery worker (committed with the caller's transaction)"""
+        from flask import has_app_context
+        from app.integrations.webhook_delivery import get_webhook_dispatcher
+        
+        dispatcher = get_webhook_dispatcher() if has_app_context() else None
+        queued = dispatcher is not None and bool(params.get('url'))
+        if queued:
+            dispatcher.send(params['url'], params.get('event', 'automation'),
+                            {'params': params.get('payload', {}), 'context': context})
+        
         return {
             'action': 'webhook_call',
             'url': params.get('url'),
             'method': params.get('method', 'POST'),
+            'queued': queued,
         }
     
     @staticmethod
@@ -272,11 +396,59 @@ class ActionExecutor:
 class WorkflowEngine:
     """Main workflow automation engine"""
     
-    def __init__(self):
+    def __init__(self, history_size: int = 1000, batch_size: int = 200,
+                 flush_interval: float = 0.2, max_pending: int = 10000):
+        """
+        Initialize workflow engine.
+        
+        Args:
+            history_size: Executions kept in memory for get_execution_history()
+            batch_size: Events run (and summaries inserted) per worker batch
+            flush_interval: Maximum seconds a dispatched event waits
+            max_pending: Queued events before the oldest are dropped
+        """
         self.workflows: Dict[str, Workflow] = {}
         self.trigger_validator = TriggerValidator()
         self.action_executor = ActionExecutor()
-        self.execution_history: List[Dict] = []
+        self.execution_history: deque = deque(maxlen=history_size)
+        
+        self.app = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        
+        # trigger type -> (field, value) or None -> workflow id -> compiled workflow
+        self._index: Dict[TriggerType, Dict[Optional[Tuple[str, str]], Dict[str, CompiledWorkflow]]] = {}
+        self._compiled: Dict[str, CompiledWorkflow] = {}
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        
+        self._queue: deque = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        
+        self.stats = {
+            'events': 0,
+            'candidates': 0,
+            'matched': 0,
+            'executions': 0,
+            'batches': 0,
+            'dropped': 0,
+            'persisted': 0,
+            'errors': 0,
+        }
+    
+    def init_app(self, app, async_dispatch: bool = True) -> None:
+        """Bind the engine to an app; without async_dispatch events run inline"""
+        self.shutdown()
+        self.app = app if async_dispatch else None
+        self._stop.clear()
+    
+    # ------------------------------------------------------------------
+    # Workflows and the trigger index
+    # ------------------------------------------------------------------
     
     def create_workflow(self, name: str, description: str, trigger: Trigger, 
                        actions: List[Action]) -> Workflow:
@@ -290,51 +462,226 @@ class WorkflowEngine:
             actions=actions,
         )
         
-        self.workflows[workflow.id] = workflow
+        self.add_workflow(workflow)
         logger.info(f"Workflow created: {workflow.id} - {name}")
         
         return workflow
     
+    def add_workflow(self, workflow: Workflow) -> None:
+        """Register (or re-register after editing) a workflow and compile its trigger"""
+        conditions = self.trigger_validator.normalize_conditions(workflow.trigger.conditions)
+        field, values = self.trigger_validator.index_keys(conditions)
+        
+        with self._lock:
+            previous = self._compiled.get(workflow.id)
+            self._unindex(workflow.id)
+            self.workflows[workflow.id] = workflow
+            self._compiled[workflow.id] = CompiledWorkflow(
+                workflow=workflow,
+                predicate=self.trigger_validator.compile(conditions, skip=field),
+                field=field,
+                keys=[_index_value(v) for v in values],
+                seq=previous.seq if previous else next(self._seq),
+            )
+            if workflow.is_enabled:
+                self._reindex(workflow.id)
+        
+        self._listen()
+        if workflow.trigger.type == TriggerType.SCHEDULED:
+            self._arm_schedule(workflow)
+    
+    @staticmethod
+    def _arm_schedule(workflow: Workflow, remove: bool = False) -> None:
+        """
+        Give a SCHEDULED workflow a repeating timer (interval_seconds, or
+        check_daily), carrying its definition for the worker that fires it.
+        The caller commits.
+        """
+        from app.scheduling import schedule_timer
+        
+        conditions = workflow.trigger.conditions
+        interval = conditions.get('interval_seconds') or (86400 if conditions.get('check_daily') else None)
+        fire_at = None
+        if not remove and workflow.is_enabled and interval:
+            fire_at = datetime.utcnow() + timedelta(seconds=int(interval))
+        schedule_timer(f'workflow:{workflow.id}', 'workflow', fire_at,
+                       {'workflow_id': workflow.id, 'workflow': workflow.to_dict()},
+                       interval=int(interval) if interval else None)
+    
+    def _reindex(self, workflow_id: str) -> None:
+        compiled = self._compiled[workflow_id]
+        buckets = self._index.setdefault(compiled.workflow.trigger.type, {})
+        
+        if compiled.field is None:
+            buckets.setdefault(None, {})[workflow_id] = compiled
+        for key in compiled.keys:
+            buckets.setdefault((compiled.field, key), {})[workflow_id] = compiled
+    
+    def _unindex(self, workflow_id: str) -> None:
+        compiled = self._compiled.get(workflow_id)
+        if compiled is None:
+            return
+        buckets = self._index.get(compiled.workflow.trigger.type, {})
+        
+        for bucket_key in [None] + [(compiled.field, key) for key in compiled.keys]:
+            bucket = buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.pop(workflow_id, None)
+                if not bucket:
+                    del buckets[bucket_key]
+    
     def enable_workflow(self, workflow_id: str) -> bool:
         """Enable a workflow"""
-        if workflow_id in self.workflows:
-            self.workflows[workflow_id].is_enabled = True
-            return True
-        return False
+        with self._lock:
+            workflow = self.workflows.get(workflow_id)
+            if workflow is None:
+                return False
+            workflow.is_enabled = True
+            self._unindex(workflow_id)
+            self._reindex(workflow_id)
+        
+        if workflow.trigger.type == TriggerType.SCHEDULED:
+            self._arm_schedule(workflow)
+        return True
     
     def disable_workflow(self, workflow_id: str) -> bool:
         """Disable a workflow"""
-        if workflow_id in self.workflows:
-            self.workflows[workflow_id].is_enabled = False
-            return True
-        return False
+        with self._lock:
+            workflow = self.workflows.get(workflow_id)
+            if workflow is None:
+                return False
+            workflow.is_enabled = False
+            self._unindex(workflow_id)
+        
+        if workflow.trigger.type == TriggerType.SCHEDULED:
+            self._arm_schedule(workflow)
+        return True
+    
+    def candidates(self, trigger_type: TriggerType, event_data: Dict) -> List[CompiledWorkflow]:
+        """Workflows whose trigger type and indexed condition fit the event, in creation order"""
+        with self._lock:
+            buckets = self._index.get(trigger_type)
+            if not buckets:
+                return []
+            
+            found = dict(buckets.get(None, {}))
+            for field in INDEX_FIELDS:
+                value = event_data.get(field)
+                if value is not None:
+                    found.update(buckets.get((field, _index_value(value)), {}))
+        
+        return sorted(found.values(), key=lambda compiled: compiled.seq)
+    
+    # ------------------------------------------------------------------
+    # Triggering
+    # ------------------------------------------------------------------
     
     def trigger_workflow(self, trigger_type: TriggerType, event_data: Dict) -> List[Dict]:
-        """Trigger matching workflows"""
-        results = []
+        """Run matching workflows now and return their executions"""
+        results = self._run(trigger_type, event_data)
+        self._persist(results)
+        return results
+    
+    def dispatch(self, trigger_type: TriggerType, event_data: Dict) -> bool:
+        """
+        Queue an event for the background worker.
         
-        for workflow in self.workflows.values():
-            if not workflow.is_enabled:
-                continue
-            
-            if workflow.trigger.type != trigger_type:
-                continue
-            
-            # Check if trigger conditions match
-            if not self.trigger_validator.validate_trigger(workflow.trigger, event_data):
+        Events no workflow could match are discarded without queueing; without
+        a worker (see init_app) the event runs inline.
+        
+        Returns:
+            bool: True if the event was queued or run
+        """
+        with self._lock:
+            if not self._index.get(trigger_type):
+                return False
+        
+        if self.app is None:
+            self.trigger_workflow(trigger_type, event_data)
+            return True
+        
+        with self._cond:
+            if len(self._queue) >= self.max_pending:
+                self._queue.popleft()
+                self.stats['dropped'] += 1
+            self._queue.append((trigger_type, dict(event_data)))
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        
+        self._start()
+        return True
+    
+    def broadcast(self, trigger_type: TriggerType, event_data: Dict) -> bool:
+        """
+        Dispatch an event on every worker, reaching workflows created on any of them.
+        
+        Falls back to dispatch() on this worker when there is no fanout bus.
+        """
+        from app.websocket.fanout import get_fanout_bus
+        
+        bus = get_fanout_bus()
+        if bus is None:
+            return self.dispatch(trigger_type, event_data)
+        bus.signal('automation', {'trigger': trigger_type.value, 'event': event_data})
+        return True
+    
+    def _listen(self) -> None:
+        """Receive broadcast events once this worker holds a workflow"""
+        from app.websocket.fanout import get_fanout_bus
+        
+        bus = get_fanout_bus()
+        if bus is not None:
+            bus.on_signal('automation', self._on_broadcast)
+    
+    def _on_broadcast(self, data: Dict) -> None:
+        self.dispatch(TriggerType(data['trigger']), data['event'])
+    
+    def run_scheduled(self, workflow_id: str, definition: Optional[Dict] = None) -> bool:
+        """
+        Run a SCHEDULED workflow when its timer fires.
+        
+        Args:
+            workflow_id: Workflow ID
+            definition: The workflow's to_dict(), used when it was created on another worker
+        
+        Returns:
+            bool: False if the workflow is unknown here and no definition was given
+        """
+        workflow = self.workflows.get(workflow_id)
+        if workflow is None and definition is not None:
+            workflow = Workflow.from_dict(definition)
+        if workflow is None:
+            return False
+        
+        if workflow.is_enabled:
+            self._persist([self._execute_workflow(workflow, {
+                'workflow_id': workflow_id,
+                'scheduled_at': datetime.utcnow().isoformat(),
+            }, TriggerType.SCHEDULED)])
+        return True
+    
+    def _run(self, trigger_type: TriggerType, event_data: Dict) -> List[Dict]:
+        candidates = self.candidates(trigger_type, event_data)
+        self.stats['events'] += 1
+        self.stats['candidates'] += len(candidates)
+        
+        results = []
+        for compiled in candidates:
+            if not compiled.workflow.is_enabled or not compiled.predicate(event_data):
                 continue
-            
-            # Execute workflow actions
-            execution = self._execute_workflow(workflow, event_data)
-            results.append(execution)
+            self.stats['matched'] += 1
+            results.append(self._execute_workflow(compiled.workflow, event_data, trigger_type))
         
         return results
     
-    def _execute_workflow(self, workflow: Workflow, context: Dict) -> Dict:
+    def _execute_workflow(self, workflow: Workflow, context: Dict,
+                          trigger_type: Optional[TriggerType] = None) -> Dict:
         """Execute a workflow"""
+        started = time.perf_counter()
         execution = {
             'workflow_id': workflow.id,
             'workflow_name': workflow.name,
+            'trigger_type': (trigger_type or workflow.trigger.type).value,
             'triggered_at': datetime.now().isoformat(),
             'actions_executed': [],
             'success': True,
@@ -347,11 +694,113 @@ class WorkflowEngine:
             if not result.get('success'):
                 execution['success'] = False
         
+        execution['duration_ms'] = round((time.perf_counter() - started) * 1000, 3)
         self.execution_history.append(execution)
+        self.stats['executions'] += 1
         logger.info(f"Workflow executed: {workflow.id}")
         
         return execution
     
+    def _persist(self, executions: List[Dict]) -> None:
+        """Insert execution summaries (and commit the actions' session work)"""
+        from flask import has_app_context
+        
+        if not executions or not has_app_context():
+            return
+        
+        from sqlalchemy import insert
+        from app.models import WorkflowExecution, db
+        
+        rows = [{
+            'workflow_id': execution['workflow_id'],
+            'workflow_name': execution['workflow_name'][:200],
+            'trigger_type': execution['trigger_type'],
+            'success': execution['success'],
+            'actions_executed': len(execution['actions_executed']),
+            'actions_failed': sum(1 for r in execution['actions_executed'] if not r.get('success')),
+            'duration_ms': execution['duration_ms'],
+            'triggered_at': datetime.fromisoformat(execution['triggered_at']),
+        } for execution in executions]
+        
+        try:
+            db.session.execute(insert(WorkflowExecution), rows)
+            db.session.commit()
+            self.stats['persisted'] += len(rows)
+        except Exception as e:
+            db.session.rollback()
+            self.stats['errors'] += 1
+            logger.error(f"Workflow execution summaries not saved: {e}")
+    
+    # ------------------------------------------------------------------
+    # Background worker
+    # ------------------------------------------------------------------
+    
+    def flush(self) -> int:
+        """
+        Run all queued events.
+        
+        Returns:
+            Number of events run
+        """
+        processed = 0
+        while True:
+            with self._cond:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if not batch:
+                return processed
+            
+            with self.app.app_context():
+                executions = []
+                for trigger_type, event_data in batch:
+                    try:
+                        executions.extend(self._run(trigger_type, event_data))
+                    except Exception as e:
+                        self.stats['errors'] += 1
+                        logger.error(f"Workflow event failed: {e}")
+                self._persist(executions)
+            
+            self.stats['batches'] += 1
+            processed += len(batch)
+    
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._worker, name='workflow-engine', daemon=True)
+            self._thread.start()
+    
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                if len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            if not self._stop.is_set():
+                self.flush()
+    
+    def shutdown(self) -> None:
+        """Stop the worker and run what is still queued."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self._thread = None
+        if self.app is not None:
+            self.flush()
+    
+    def get_stats(self) -> Dict:
+        """Get engine statistics"""
+        with self._lock:
+            indexed = sum(len(bucket) for buckets in self._index.values() for bucket in buckets.values())
+        return {
+            **self.stats,
+            'workflows': len(self.workflows),
+            'index_entries': indexed,
+            'pending': len(self._queue),
+            'history': len(self.execution_history),
+        }
+    
     def get_workflows(self) -> List[Workflow]:
         """Get all workflows"""
         return list(self.workflows.values())
@@ -362,14 +811,22 @@ class WorkflowEngine:
     
     def delete_workflow(self, workflow_id: str) -> bool:
         """Delete workflow"""
-        if workflow_id in self.workflows:
-            del self.workflows[workflow_id]
-            return True
-        return False
+        with self._lock:
+            workflow = self.workflows.pop(workflow_id, None)
+            if workflow is not None:
+                self._unindex(workflow_id)
+                del self._compiled[workflow_id]
+        
+        if workflow is None:
+            return False
+        if workflow.trigger.type == TriggerType.SCHEDULED:
+            self._arm_schedule(workflow, remove=True)
+        return True
     
     def get_execution_history(self, limit: int = 100) -> List[Dict]:
-        """Get workflow execution history"""
-        return self.execution_history[-limit:]
+        """Get recent workflow executions (the last history_size are kept)"""
+        history = list(self.execution_history)
+        return history[-limit:] if limit > 0 else []
     
     def get_workflow_templates(self) -> List[Dict]:
         """Get predefined workflow templates"""
@@ -421,3 +878,26 @@ class WorkflowEngine:
 
 # Global workflow engine instance
 workflow_engine = WorkflowEngine()
+
+
+def init_workflow_engine(app) -> WorkflowEngine:
+    """Configure the global workflow engine for the app."""
+    workflow_engine.batch_size = app.config.get('WORKFLOW_BATCH_SIZE', 200)
+    workflow_engine.flush_interval = app.config.get('WORKFLOW_FLUSH_INTERVAL_MS', 200) / 1000
+    workflow_engine.max_pending = app.config.get('WORKFLOW_MAX_PENDING', 10000)
+    history_size = app.config.get('WORKFLOW_HISTORY_SIZE', 1000)
+    if workflow_engine.execution_history.maxlen != history_size:
+        workflow_engine.execution_history = deque(workflow_engine.execution_history, maxlen=history_size)
+    
+    workflow_engine.init_app(app, async_dispatch=app.config.get('WORKFLOW_ASYNC', True))
+    return workflow_engine
+
+
+def get_workflow_engine() -> WorkflowEngine:
+    """Get workflow engine instance."""
+    return workflow_engine
+
+
+@atexit.register
+def _flush_on_exit():
+    workflow_engine.shutdown()
@@ -7,16 +7,25 @@ from .redis_cache import (
     RedisCache,
     init_cache,
     get_cache,
+    get_tiered_cache,
     cache_result,
     CacheKeys,
+    CacheTags,
     CacheInvalidator
 )
+from .local_cache import LocalCache
+from .tiered_cache import TieredCache, make_cache_key
 
 __all__ = [
     'RedisCache',
     'init_cache',
     'get_cache',
+    'get_tiered_cache',
     'cache_result',
     'CacheKeys',
-    'CacheInvalidator'
+    'CacheTags',
+    'CacheInvalidator',
+    'LocalCache',
+    'TieredCache',
+    'make_cache_key'
 ]
@@ -0,0 +1,81 @@
+# app/cache/codecs.py
+"""
+Serialization codecs for cached values.
+JSON is portable, pickle handles arbitrary Python objects, msgpack is compact and fast.
+"""
+
+import json
+import pickle
+from typing import Any, Dict
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+class JSONCodec:
+    """JSON codec (portable, human readable)."""
+
+    name = 'json'
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, default=str).encode('utf-8')
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return json.loads(data)
+
+
+class PickleCodec:
+    """Pickle codec (any picklable object, Python-only)."""
+
+    name = 'pickle'
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class MsgpackCodec:
+    """MessagePack codec (compact binary, JSON-compatible types)."""
+
+    name = 'msgpack'
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True, default=str)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+CODECS: Dict[str, Any] = {
+    'json': JSONCodec,
+    'pickle': PickleCodec,
+}
+
+if MSGPACK_AVAILABLE:
+    CODECS['msgpack'] = MsgpackCodec
+
+
+def get_codec(name: str = 'pickle'):
+    """
+    Get codec by name.
+
+    Falls back to pickle when msgpack is requested but not installed.
+    """
+    if name == 'msgpack' and not MSGPACK_AVAILABLE:
+        return PickleCodec
+
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown cache codec: {name}")
+    return codec
@@ -0,0 +1,178 @@
+# app/cache/local_cache.py
+"""
+In-process LRU/TTL cache.
+Bounded by entry count and approximate byte size so long-running workers stay flat.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+class LocalCache:
+    """Thread-safe LRU cache with per-entry TTL and size limits."""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: int = 60):
+        """
+        Initialize local cache.
+
+        Args:
+            max_entries: Maximum number of cached entries
+            max_bytes: Maximum total (approximate) size of cached values
+            default_ttl: Default time to live in seconds
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        # key -> (value, expires_at, size, tags); order is LRU -> MRU
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get cached value, or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            value, expires_at = entry[0], entry[1]
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, size: Optional[int] = None,
+            tags: Iterable[str] = ()) -> bool:
+        """
+        Set cache value.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live in seconds (default_ttl if None)
+            size: Size in bytes if already known (e.g. encoded length)
+            tags: Tags the entry can be invalidated by (e.g. 'project:42')
+
+        Returns:
+            False if the value alone exceeds max_bytes and was not cached
+        """
+        size = size if size is not None else self.estimate_size(value)
+        if size > self.max_bytes:
+            return False
+
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+
+        tags = frozenset(tags)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            self.stats['sets'] += 1
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Delete cache key."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def delete_tag(self, tag: str) -> int:
+        """Delete every entry registered under a tag."""
+        with self._lock:
+            keys = self._tag_index.pop(tag, set())
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+            return len(keys)
+
+    def clear(self) -> int:
+        """Remove all entries."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._tag_index.clear()
+            self._bytes = 0
+            return count
+
+    def purge_expired(self) -> int:
+        """Drop all expired entries (for periodic sweeps)."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e[1] <= now]
+            for key in expired:
+                self._remove(key)
+            self.stats['expirations'] += len(expired)
+            return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'tags': len(self._tag_index),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self.stats['hits'] / lookups * 100, 1) if lookups else 0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def _remove(self, key: str) -> None:
+        _, _, size, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """Approximate the memory footprint of a value (one container level deep)."""
+        size = sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            size += sum(sys.getsizeof(v) for v in value)
+        return size
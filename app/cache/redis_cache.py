@@ -5,18 +5,25 @@ Provides centralized caching for queries, computations, and session data.
 """
 
 import redis
-import json
-import pickle
+import inspect
+import uuid
 from functools import wraps
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, List, Optional
 import logging
 
+from .codecs import get_codec
+from .local_cache import LocalCache
+from .tiered_cache import TieredCache, make_cache_key
+
 logger = logging.getLogger('cache')
 
 
 class RedisCache:
     """Redis cache manager with connection pooling and error handling."""
     
+    # Minimum lifetime of a tag set, refreshed on every tagged write
+    TAG_TTL = 86400
+    
     def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, 
                  decode_responses: bool = True, socket_timeout: int = 5):
         """
@@ -71,18 +78,13 @@ class RedisCache:
             key: Cache key
             value: Value to cache
             ttl: Time to live in seconds (default: 1 hour)
-            serializer: 'json' or 'pickle'
+            serializer: 'json', 'pickle' or 'msgpack'
         """
         if not self.client:
             return False
         
         try:
-            if serializer == 'json':
-                serialized = json.dumps(value)
-            else:
-                serialized = pickle.dumps(value)
-            
-            self.client.setex(key, ttl, serialized)
+            self.client.setex(key, ttl, get_codec(serializer).dumps(value))
             return True
         except Exception as e:
             logger.error(f"Cache SET error for key '{key}': {str(e)}")
@@ -94,7 +96,7 @@ class RedisCache:
         
         Args:
             key: Cache key
-            serializer: 'json' or 'pickle'
+            serializer: 'json', 'pickle' or 'msgpack'
         """
         if not self.client:
             return None
@@ -104,14 +106,19 @@ class RedisCache:
             if value is None:
                 return None
             
-            if serializer == 'json':
-                return json.loads(value)
-            else:
-                return pickle.loads(value)
+            return get_codec(serializer).loads(value)
         except Exception as e:
             logger.error(f"Cache GET error for key '{key}': {str(e)}")
             return None
     
+    def set_raw(self, key: str, data: bytes, ttl: int = 3600) -> None:
+        """Set pre-encoded bytes (errors propagate to the caller)."""
+        self.client.setex(key, ttl, data)
+    
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """Get raw stored bytes (errors propagate to the caller)."""
+        return self.client.get(key)
+    
     def delete(self, key: str) -> bool:
         """Delete cache key."""
         if not self.client:
@@ -124,25 +131,94 @@ class RedisCache:
             logger.error(f"Cache DELETE error for key '{key}': {str(e)}")
             return False
     
-    def clear(self, pattern: str = '*') -> int:
+    def clear(self, pattern: str = '*', batch_size: int = 500) -> int:
         """
         Clear cache by pattern.
         
+        Walks the keyspace incrementally with SCAN and frees keys with UNLINK in
+        batches, so large keyspaces never block the server the way KEYS does.
+        Prefer tag invalidation (invalidate_tag) for routine invalidation.
+        
         Args:
             pattern: Key pattern (e.g., 'projects:*')
+            batch_size: Keys per SCAN page / UNLINK call
         """
         if not self.client:
             return 0
         
         try:
-            keys = self.client.keys(pattern)
-            if keys:
-                self.client.delete(*keys)
-            return len(keys)
+            count = 0
+            batch = []
+            for key in self.client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    count += self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                count += self.client.unlink(*batch)
+            return count
         except Exception as e:
             logger.error(f"Cache CLEAR error for pattern '{pattern}': {str(e)}")
             return 0
     
+    @staticmethod
+    def tag_key(tag: str) -> str:
+        """Redis set holding the keys registered under a tag."""
+        return f"tag:{tag}"
+    
+    def set_raw_tagged(self, key: str, data: bytes, ttl: int, tags) -> None:
+        """
+        Set pre-encoded bytes and register the key under each tag in one round trip.
+        
+        Each write pushes the tag set's expiry out to at least TAG_TTL, so
+        abandoned tags clean themselves up while live ones outlast their
+        members (errors propagate to the caller).
+        """
+        tag_ttl = max(ttl, self.TAG_TTL)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.setex(key, ttl, data)
+        for tag in tags:
+            tag_key = self.tag_key(tag)
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, tag_ttl)
+        pipe.execute()
+    
+    def invalidate_tag(self, tag: str, batch_size: int = 500) -> int:
+        """
+        Delete every key registered under a tag.
+        
+        Cost is proportional to the number of entries carrying the tag; the
+        tag set is walked with SSCAN and members are freed with UNLINK in batches.
+        """
+        if not self.client:
+            return 0
+        
+        tag_key = self.tag_key(tag)
+        try:
+            # Rename first so entries tagged while we drain land in a fresh set; the
+            # name is unique so concurrent invalidations never drain (or clobber)
+            # each other's set, and it keeps the tag's TTL if we die mid-drain
+            draining = f"{tag_key}:draining:{uuid.uuid4().hex}"
+            try:
+                self.client.rename(tag_key, draining)
+            except redis.ResponseError:
+                return 0  # No such tag
+            
+            count = 0
+            batch = []
+            for key in self.client.sscan_iter(draining, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    count += self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                count += self.client.unlink(*batch)
+            self.client.unlink(draining)
+            return count
+        except Exception as e:
+            logger.error(f"Cache tag invalidation error for '{tag}': {str(e)}")
+            return 0
+    
     def get_or_set(self, key: str, callback: Callable, ttl: int = 3600) -> Any:
         """
         Get value from cache or compute and cache.
@@ -187,71 +263,113 @@ class RedisCache:
             logger.info("Redis connection closed")
 
 
-def cache_result(ttl: int = 3600, key_prefix: str = None):
+def cache_result(ttl: int = 3600, key_prefix: str = None, tags: Iterable[str] = ()):
     """
-    Decorator to cache function results.
+    Decorator to cache function results keyed by their arguments.
+    
+    Arguments are bound to the signature and hashed, so the function must take
+    JSON-like values or ORM rows (hashed by primary key). Calls with other
+    argument types bypass the cache. Cached values are shared and must be
+    treated as read-only; results of None are not cached.
     
     Args:
         ttl: Time to live in seconds
         key_prefix: Custom key prefix (uses function name if not provided)
+        tags: Invalidation tag templates formatted with the call's arguments,
+              e.g. ['project:{project_id}']
     """
     def decorator(func: Callable) -> Callable:
+        prefix = key_prefix or f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+        
+        def build_key(*args, **kwargs) -> str:
+            return make_cache_key(prefix, func, args, kwargs)
+        
+        def build_tags(args, kwargs) -> List[str]:
+            if not tags:
+                return []
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return [tag.format(**bound.arguments) for tag in tags]
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Build cache key
-            prefix = key_prefix or f"{func.__module__}.{func.__name__}"
-            # Simple cache key - doesn't include args for demo
-            cache_key = prefix
-            
-            # Try cache first
-            if hasattr(cache_result, '_cache') and cache_result._cache:
-                cached = cache_result._cache.get(cache_key)
-                if cached is not None:
-                    logger.debug(f"Cache HIT: {cache_key}")
-                    return cached
+            cache = get_tiered_cache()
+            if cache is None:
+                return func(*args, **kwargs)
             
-            # Compute result
-            result = func(*args, **kwargs)
+            try:
+                cache_key = build_key(*args, **kwargs)
+                entry_tags = build_tags(args, kwargs)
+            except TypeError as e:
+                logger.debug(f"Cache BYPASS for {prefix}: {str(e)}")
+                return func(*args, **kwargs)
             
-            # Store in cache
-            if hasattr(cache_result, '_cache') and cache_result._cache:
-                cache_result._cache.set(cache_key, result, ttl)
-                logger.debug(f"Cache SET: {cache_key} (TTL: {ttl}s)")
-            
-            return result
+            return cache.get_or_set(cache_key, lambda: func(*args, **kwargs), ttl, tags=entry_tags)
+        
+        def invalidate(*args, **kwargs) -> bool:
+            """Drop the cached result for these arguments."""
+            cache = get_tiered_cache()
+            if cache is None:
+                return False
+            return cache.delete(build_key(*args, **kwargs))
         
+        wrapper.cache_key = build_key
+        wrapper.invalidate = invalidate
         return wrapper
     return decorator
 
 
-# Global cache instance
+# Global cache instances
 _cache_instance: Optional[RedisCache] = None
+_tiered_cache: Optional[TieredCache] = None
 
 
 def init_cache(app, host: str = 'localhost', port: int = 6379):
-    """Initialize cache system in Flask app."""
-    global _cache_instance
+    """
+    Initialize cache system in Flask app.
     
-    host = app.config.get('REDIS_HOST', host)
-    port = app.config.get('REDIS_PORT', port)
+    The per-worker local tier is always available; Redis is added behind it
+    when CACHE_REDIS_ENABLED is set and the server is reachable.
+    """
+    global _cache_instance, _tiered_cache
+    
+    host = app.config.get('REDIS_HOST') or host
+    port = app.config.get('REDIS_PORT') or port
     
-    _cache_instance = RedisCache(host=host, port=port)
-    _cache_instance.connect()
+    _cache_instance = RedisCache(host=host, port=port, decode_responses=False)
+    if app.config.get('CACHE_REDIS_ENABLED', True):
+        _cache_instance.connect()
+    
+    local = LocalCache(
+        max_entries=app.config.get('CACHE_LOCAL_MAX_ENTRIES', 10000),
+        max_bytes=app.config.get('CACHE_LOCAL_MAX_BYTES', 64 * 1024 * 1024),
+        default_ttl=app.config.get('CACHE_LOCAL_TTL', 30)
+    )
+    _tiered_cache = TieredCache(
+        local=local,
+        remote=_cache_instance,
+        codec=app.config.get('CACHE_CODEC', 'pickle'),
+        local_ttl=app.config.get('CACHE_LOCAL_TTL', 30)
+    )
     
     # Store on app for access
     app.redis_cache = _cache_instance
-    
-    # Store reference for decorator
-    cache_result._cache = _cache_instance
+    app.cache = _tiered_cache
     
     return _cache_instance
 
 
 def get_cache() -> Optional[RedisCache]:
-    """Get global cache instance."""
+    """Get global Redis cache instance."""
     return _cache_instance
 
 
+def get_tiered_cache() -> Optional[TieredCache]:
+    """Get global two-tier cache instance."""
+    return _tiered_cache
+
+
 # Cache key generators
 class CacheKeys:
     """Standard cache key patterns."""
@@ -288,57 +406,62 @@ class CacheKeys:
 
 
 # Cache invalidation helpers
+class CacheTags:
+    """Standard invalidation tags."""
+    
+    @staticmethod
+    def project(project_id: int) -> str:
+        """Everything derived from a project's data (issues, stats, analytics)."""
+        return f"project:{project_id}"
+    
+    @staticmethod
+    def user(user_id: int) -> str:
+        """Everything derived from a user's data (projects, dashboard, stats)."""
+        return f"user:{user_id}"
+    
+    @staticmethod
+    def team_projects(team_id: int) -> str:
+        """Project-access sets of a team's members (projects joining or leaving the team)."""
+        return f"team:{team_id}:projects"
+    
+    @staticmethod
+    def stats(table: str) -> str:
+        """Dashboard aggregates over a whole table ('project', 'user', 'team', 'issue')."""
+        return f"stats:{table}"
+
+
 class CacheInvalidator:
-    """Handle cache invalidation for related data."""
+    """
+    Handle cache invalidation for related data.
+    
+    Entries are registered under tags when cached (see cache_result), so an
+    invalidation only touches entries carrying that tag: an issue edit in one
+    project no longer evicts other projects' caches or global search results.
+    """
     
     @staticmethod
-    def invalidate_project(project_id: int):
-        """Invalidate all caches related to a project."""
-        cache = get_cache()
+    def invalidate_tags(*tags: str) -> int:
+        """Invalidate every cached entry registered under any of the tags."""
+        cache = get_tiered_cache()
         if not cache:
-            return
-        
-        # Clear project-related caches
-        patterns = [
-            f"project:{project_id}:*",
-            f"search:*",  # Clear search cache too
-        ]
+            return 0
         
-        for pattern in patterns:
-            count = cache.clear(pattern)
-            if count > 0:
-                logger.debug(f"Invalidated {count} cache entries matching: {pattern}")
+        count = cache.invalidate_tags(*tags)
+        if count > 0:
+            logger.debug(f"Invalidated {count} cache entries tagged: {', '.join(tags)}")
+        return count
     
     @staticmethod
-    def invalidate_user(user_id: int):
+    def invalidate_project(project_id: int) -> int:
+        """Invalidate all caches related to a project."""
+        return CacheInvalidator.invalidate_tags(CacheTags.project(project_id))
+    
+    @staticmethod
+    def invalidate_user(user_id: int) -> int:
         """Invalidate all caches related to a user."""
-        cache = get_cache()
-        if not cache:
-            return
-        
-        patterns = [
-            f"user:{user_id}:*",
-            f"dashboard:{user_id}:*"
-        ]
-        
-        for pattern in patterns:
-            count = cache.clear(pattern)
-            if count > 0:
-                logger.debug(f"Invalidated {count} cache entries matching: {pattern}")
+        return CacheInvalidator.invalidate_tags(CacheTags.user(user_id))
     
     @staticmethod
-    def invalidate_issue(project_id: int):
+    def invalidate_issue(project_id: int) -> int:
         """Invalidate caches when issue changes."""
-        cache = get_cache()
-        if not cache:
-            return
-        
-        patterns = [
-            f"project:{project_id}:issues:*",
-            f"project:{project_id}:stats",
-        ]
-        
-        for pattern in patterns:
-            count = cache.clear(pattern)
-            if count > 0:
-                logger.debug(f"Invalidated {count} cache entries matching: {pattern}")
+        return CacheInvalidator.invalidate_tags(CacheTags.project(project_id), CacheTags.stats('issue'))
@@ -0,0 +1,274 @@
+# app/cache/tiered_cache.py
+"""
+Two-tier cache: a bounded per-worker LocalCache in front of the shared RedisCache.
+Provides stable argument hashing for memoization and single-flight get_or_set.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .codecs import get_codec
+from .local_cache import LocalCache
+
+logger = logging.getLogger('cache')
+
+
+def normalize_argument(value: Any) -> Any:
+    """
+    Convert a function argument into a stable, JSON-serializable form.
+
+    ORM rows hash by class and primary key. Types without a stable
+    representation raise TypeError rather than falling back to repr(),
+    which would embed memory addresses and silently never hit.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return normalize_argument(value.value)
+    if isinstance(value, dict):
+        return {str(k): normalize_argument(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [normalize_argument(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((normalize_argument(v) for v in value), key=repr)
+    if hasattr(value, '__table__') and hasattr(value, 'id'):
+        return f"{type(value).__name__}:{value.id}"
+    raise TypeError(f"Cannot build cache key from argument of type {type(value).__name__}")
+
+
+def make_cache_key(prefix: str, func: Callable, args: tuple, kwargs: dict) -> str:
+    """
+    Build a stable cache key for a call.
+
+    Arguments are bound to the function signature with defaults applied, so
+    f(1), f(1, days=30) and f(project_id=1) share one key.
+    """
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = {k: v for k, v in bound.arguments.items() if k not in ('self', 'cls')}
+    except (TypeError, ValueError):
+        arguments = {'args': list(args), 'kwargs': kwargs}
+
+    payload = json.dumps(normalize_argument(arguments), sort_keys=True, separators=(',', ':'))
+    digest = hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+class _Flight:
+    """An in-progress computation that concurrent callers wait on."""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TieredCache:
+    """Local LRU/TTL tier in front of an optional Redis tier."""
+
+    def __init__(self, local: Optional[LocalCache] = None, remote=None,
+                 codec: str = 'pickle', local_ttl: int = 30, lock_timeout: float = 10.0):
+        """
+        Initialize tiered cache.
+
+        Args:
+            local: In-process cache tier
+            remote: Connected RedisCache (None for local-only)
+            codec: Serialization codec for the remote tier ('pickle', 'msgpack', 'json')
+            local_ttl: Upper bound on how long a value lives in the local tier
+            lock_timeout: Max seconds to wait for another caller computing the same key
+        """
+        self.local = local or LocalCache()
+        self.remote = remote if remote is not None and remote.client is not None else None
+        self.codec = get_codec(codec)
+        self.local_ttl = local_ttl
+        self.lock_timeout = lock_timeout
+
+        self._inflight: Dict[str, _Flight] = {}
+        self._inflight_lock = threading.Lock()
+
+        self.stats = {
+            'remote_hits': 0,
+            'remote_misses': 0,
+            'remote_errors': 0,
+            'computes': 0,
+            'coalesced': 0
+        }
+
+    def get(self, key: str, tags: Iterable[str] = ()) -> Optional[Any]:
+        """
+        Get cached value from the local tier, then Redis.
+
+        Values are shared between callers and must be treated as read-only.
+        Tags are re-attached when a Redis hit is copied into the local tier.
+        """
+        value = self.local.get(key)
+        if value is not None or self.remote is None:
+            return value
+
+        try:
+            data = self.remote.get_raw(key)
+        except Exception as e:
+            self.stats['remote_errors'] += 1
+            logger.error(f"Remote cache GET error for key '{key}': {str(e)}")
+            return None
+
+        if data is None:
+            self.stats['remote_misses'] += 1
+            return None
+
+        self.stats['remote_hits'] += 1
+        value = self.codec.loads(data)
+        self.local.set(key, value, ttl=self.local_ttl, size=len(data), tags=tags)
+        return value
+
+    def set(self, key: str, value: Any, ttl: int = 3600, tags: Iterable[str] = ()) -> bool:
+        """Set value in both tiers, registering it under the given invalidation tags."""
+        try:
+            data = self.codec.dumps(value)
+        except Exception as e:
+            logger.error(f"Cache encode error for key '{key}': {str(e)}")
+            return False
+
+        tags = tuple(tags)
+        self.local.set(key, value, ttl=min(ttl, self.local_ttl), size=len(data), tags=tags)
+
+        if self.remote is not None:
+            try:
+                if tags:
+                    self.remote.set_raw_tagged(key, data, ttl, tags)
+                else:
+                    self.remote.set_raw(key, data, ttl)
+            except Exception as e:
+                self.stats['remote_errors'] += 1
+                logger.error(f"Remote cache SET error for key '{key}': {str(e)}")
+                return False
+
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Delete key from both tiers."""
+        self.local.delete(key)
+        if self.remote is not None:
+            return self.remote.delete(key)
+        return True
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Drop every entry registered under any of the tags.
+
+        The local tier of this worker is cleared immediately; other workers'
+        local copies age out within local_ttl.
+        """
+        count = 0
+        for tag in tags:
+            local_count = self.local.delete_tag(tag)
+            remote_count = self.remote.invalidate_tag(tag) if self.remote is not None else 0
+            count += max(local_count, remote_count)
+        return count
+
+    def get_or_set(self, key: str, callback: Callable, ttl: int = 3600,
+                   tags: Iterable[str] = ()) -> Any:
+        """
+        Get value from cache or compute and cache it, computing at most once.
+
+        Concurrent callers in this process wait for a single in-flight
+        computation. Across workers a short Redis lock lets one worker compute
+        while the others poll for its result.
+        """
+        tags = tuple(tags)
+        value = self.get(key, tags)
+        if value is not None:
+            return value
+
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not is_leader:
+            self.stats['coalesced'] += 1
+            if flight.event.wait(self.lock_timeout) and flight.error is None:
+                return flight.value
+            # Leader failed or is stuck: compute without coordination
+            return callback()
+
+        try:
+            flight.value = self._compute(key, callback, ttl, tags)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.event.set()
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _compute(self, key: str, callback: Callable, ttl: int, tags: tuple) -> Any:
+        lock_key = f"lock:{key}"
+        token = None
+
+        if self.remote is not None:
+            token = uuid.uuid4().hex
+            try:
+                acquired = self.remote.client.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000))
+            except Exception:
+                acquired = True
+                token = None
+
+            if not acquired:
+                value = self._wait_for_remote(key, tags)
+                if value is not None:
+                    return value
+                token = None
+
+        try:
+            self.stats['computes'] += 1
+            value = callback()
+            if value is not None:
+                self.set(key, value, ttl, tags)
+            return value
+        finally:
+            if token is not None:
+                try:
+                    if self.remote.get_raw(lock_key) in (token, token.encode()):
+                        self.remote.delete(lock_key)
+                except Exception:
+                    pass
+
+    def _wait_for_remote(self, key: str, tags: tuple) -> Optional[Any]:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self.get(key, tags)
+            if value is not None:
+                self.stats['coalesced'] += 1
+                return value
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters for both tiers."""
+        return {
+            'local': self.local.get_stats(),
+            'remote': {
+                'connected': self.remote is not None,
+                'codec': self.codec.name,
+                **self.stats
+            }
+        }
@@ -171,19 +171,9 @@ class QueryOptimizer:
     @staticmethod
     def get_user_stats(user_id):
         """Get user statistics in single query."""
-        from sqlalchemy import func
+        from app.services.stats_service import StatsService
         
-        stats = {
-            'total_issues_assigned': Issue.query.filter_by(assignee_id=user_id).count(),
-            'total_issues_created': Issue.query.filter_by(created_by=user_id).count(),
-            'total_projects': Project.query.filter_by(owner_id=user_id).count(),
-            'total_updates': ProgressUpdate.query.filter_by(user_id=user_id).count(),
-            'completed_issues': Issue.query.filter_by(
-                assignee_id=user_id, 
-                status='completed'
-            ).count(),
-        }
-        return stats
+        return StatsService.get_user_stats(user_id).to_dict()
     
     @staticmethod
     def get_project_stats(project_id):
@@ -7,7 +7,8 @@ Provides integrations with Slack, GitHub, Jira, and other services.
 from .slack_integration import SlackIntegration
 from .github_integration import GitHubIntegration
 from .jira_integration import JiraIntegration
-from .webhook_manager import WebhookManager
+from .webhook_manager import WebhookManager, WebhookEvent
+from .webhook_delivery import WebhookDispatcher, init_webhook_dispatcher, get_webhook_dispatcher
 from .sync_manager import SyncManager
 
 # Global instances
@@ -22,6 +23,10 @@ __all__ = [
     'GitHubIntegration',
     'JiraIntegration',
     'WebhookManager',
+    'WebhookEvent',
+    'WebhookDispatcher',
+    'init_webhook_dispatcher',
+    'get_webhook_dispatcher',
     'SyncManager',
     'slack_integration',
     'github_integration',
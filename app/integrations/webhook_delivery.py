@@ -0,0 +1,757 @@
+# app/integrations/webhook_delivery.py
+"""
+Webhook Delivery
+Durable outbound webhook delivery through a transactional outbox.
+
+Requests only add a webhook_outbox row, in the same transaction as the
+change it describes. A background worker (one asyncio loop per process)
+fans each event out to its subscribers with a single INSERT ... SELECT,
+claims due deliveries under a lease, and POSTs them over pooled keep-alive
+connections, coalescing the pending events of an endpoint into one request.
+Failed deliveries are retried with exponential backoff; a host that keeps
+failing trips its circuit breaker and is skipped until it cools down.
+
+Bodies are signed the way WebhookManager.verify_signature checks them: the
+hex HMAC-SHA256 of the body under the endpoint secret, sent as
+X-Webhook-Signature. Delivery is at-least-once; receivers should dedupe on
+the delivery ids in the body.
+
+Destinations must be public: URLs whose host resolves to a loopback,
+private, link-local or otherwise non-global address are refused when they
+are registered and again when the worker connects, after DNS resolution.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import ssl
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from sqlalchemy import bindparam, delete, exists, insert, literal, or_, select, update
+
+logger = logging.getLogger(__name__)
+
+
+def sign_payload(secret: str, payload: Union[str, bytes]) -> str:
+    """Hex HMAC-SHA256 signature of a webhook body."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+
+def is_public_address(address: str) -> bool:
+    """Whether an IP address is globally routable (not loopback, private, link-local...)."""
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_destination(url: str, allow_private: bool = False) -> Tuple[str, str, int]:
+    """
+    Validate a webhook URL and return its host key.
+
+    Raises ValueError for unsupported URLs and, unless allow_private, for
+    hosts resolving to non-public addresses. A host that does not resolve
+    yet is accepted; the worker checks it again when it connects.
+    """
+    key = HTTPPool.host_key(url)
+    if not allow_private:
+        try:
+            infos = socket.getaddrinfo(key[1], key[2], type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            return key
+        if not all(is_public_address(info[4][0]) for info in infos):
+            raise ValueError(f"Webhook URL does not resolve to a public address: {url}")
+    return key
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after the cooldown lets one probe through."""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if self._probing else 'open'
+
+    def allow(self, now: float) -> bool:
+        """Whether a request may be sent now."""
+        if self.opened_at is None:
+            return True
+        if self._probing or now < self.opened_at + self.cooldown:
+            return False
+        self._probing = True
+        return True
+
+    def retry_at(self, now: float) -> float:
+        """Monotonic time when the breaker will next let a request through."""
+        return max(now, (self.opened_at or now) + self.cooldown)
+
+    def record(self, success: bool, now: float) -> None:
+        self._probing = False
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = now
+
+
+class HTTPPool:
+    """
+    Minimal asyncio HTTP/1.1 client with per-host keep-alive connections.
+
+    At most per_host requests run against one host and max_connections in
+    total; idle connections are reused for the next request to the host.
+    Unless allow_private, connections go only to public addresses.
+    """
+
+    def __init__(self, per_host: int = 8, max_connections: int = 200, timeout: float = 10.0,
+                 stats: Optional[Dict] = None, allow_private: bool = False):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.allow_private = allow_private
+        self.stats = stats if stats is not None else {}
+        self.stats.setdefault('connections', 0)
+        self.stats.setdefault('requests', 0)
+
+        self._limit = asyncio.Semaphore(max_connections)
+        self._host_limits: Dict[Tuple, asyncio.Semaphore] = {}
+        self._idle: Dict[Tuple, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._ssl: Optional[ssl.SSLContext] = None
+
+    @staticmethod
+    def host_key(url: str) -> Tuple[str, str, int]:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Unsupported webhook URL: {url}")
+        return parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80)
+
+    async def post(self, url: str, body: bytes, headers: Dict[str, str]) -> int:
+        """POST a body and return the response status."""
+        key = self.host_key(url)
+        host_limit = self._host_limits.setdefault(key, asyncio.Semaphore(self.per_host))
+
+        parts = urlsplit(url)
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        host = parts.netloc.rsplit('@', 1)[-1]
+        lines = [f'POST {target} HTTP/1.1', f'Host: {host}', f'Content-Length: {len(body)}',
+                 'Connection: keep-alive']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        async with self._limit, host_limit:
+            return await asyncio.wait_for(self._send(key, request), self.timeout)
+
+    async def _send(self, key: Tuple, request: bytes) -> int:
+        idle = self._idle.setdefault(key, [])
+        while True:
+            reused = bool(idle)
+            reader, writer = idle.pop() if reused else await self._connect(key)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await self._read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                writer.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; use a new one
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+
+            self.stats['requests'] += 1
+            if keep_alive:
+                idle.append((reader, writer))
+            else:
+                writer.close()
+            return status
+
+    async def _connect(self, key: Tuple):
+        scheme, host, port = key
+        if scheme == 'https' and self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        tls = {'ssl': self._ssl, 'server_hostname': host} if scheme == 'https' else {}
+        address = host
+        if not self.allow_private:
+            # Connect to the vetted address itself, so a second lookup cannot rebind
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addresses = [info[4][0] for info in infos]
+            if not addresses or not all(is_public_address(a) for a in addresses):
+                raise ConnectionRefusedError(f'{host} does not resolve to a public address')
+            address = addresses[0]
+        self.stats['connections'] += 1
+        return await asyncio.open_connection(address, port, **tls)
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bool]:
+        """Read a response, discarding its body. Returns (status, reusable)."""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by server')
+        version, status = status_line.split(b' ', 2)[:2]
+        status = int(status)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        keep_alive = version == b'HTTP/1.1' and headers.get('connection') != 'close'
+
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                await reader.readexactly(size + 2)
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif status >= 200 and status not in (204, 304):
+            # Body runs to end of stream
+            await reader.read()
+            keep_alive = False
+
+        return status, keep_alive
+
+    async def close(self) -> None:
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+class WebhookDispatcher:
+    """Outbox fan-out and the background delivery worker."""
+
+    USER_AGENT = 'ProjectFlow-Webhooks/1.0'
+
+    def __init__(self, app, concurrency: int = 200, per_host: int = 8, batch_size: int = 500,
+                 coalesce_max: int = 50, max_attempts: int = 8, backoff_base: float = 2.0,
+                 backoff_max: float = 3600.0, timeout: float = 10.0, poll_interval: float = 0.5,
+                 lease_seconds: int = 60, breaker_threshold: int = 5, breaker_cooldown: float = 60.0,
+                 retention_days: int = 7, allow_private: bool = False):
+        """
+        Initialize webhook dispatcher.
+
+        Args:
+            app: Flask app whose database holds the outbox
+            concurrency: Maximum requests in flight
+            per_host: Maximum requests in flight (and pooled connections) per host
+            batch_size: Deliveries claimed per round
+            coalesce_max: Events sent to one endpoint in a single request
+            max_attempts: Attempts before a delivery is marked failed
+            backoff_base: Seconds before the first retry; doubles per attempt
+            backoff_max: Longest wait between attempts
+            timeout: Seconds allowed per request
+            poll_interval: Seconds the worker idles when there is nothing to do
+            lease_seconds: How long a claimed delivery is reserved for this worker
+            breaker_threshold: Consecutive failures that open a host's circuit
+            breaker_cooldown: Seconds an open circuit waits before a probe
+            retention_days: Finished deliveries older than this are purged
+            allow_private: Deliver to loopback, private and link-local addresses
+        """
+        self.app = app
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.batch_size = batch_size
+        self.coalesce_max = coalesce_max
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.retention_days = retention_days
+        self.allow_private = allow_private
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._secrets: Dict[str, Optional[str]] = {}  # encrypted -> plaintext
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._last_purge = 0.0
+        self.autostart = False
+
+        self.stats = {
+            'events': 0,
+            'fanned_out': 0,
+            'delivered': 0,
+            'retried': 0,
+            'failed': 0,
+            'deferred': 0,
+            'coalesced': 0,
+            'connections': 0,
+            'requests': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Endpoints and events
+    # ------------------------------------------------------------------
+
+    def add_endpoint(self, endpoint_id: str, url: str, event: str, secret: Optional[str] = None):
+        """Create or replace a subscription."""
+        from app.models import WebhookEndpoint, db
+
+        check_destination(url, self.allow_private)
+        endpoint = WebhookEndpoint.query.get(endpoint_id) or WebhookEndpoint(id=endpoint_id)
+        endpoint.url = url
+        endpoint.event = event
+        endpoint.secret = secret
+        endpoint.active = True
+        db.session.add(endpoint)
+        db.session.commit()
+        return endpoint
+
+    def set_endpoint_active(self, endpoint_id: str, active: bool) -> bool:
+        from app.models import WebhookEndpoint, db
+
+        updated = WebhookEndpoint.query.filter_by(id=endpoint_id).update({'active': active})
+        db.session.commit()
+        return bool(updated)
+
+    def remove_endpoint(self, endpoint_id: str) -> bool:
+        from app.models import WebhookDelivery, WebhookEndpoint, db
+
+        WebhookDelivery.query.filter_by(endpoint_id=endpoint_id, status='pending').delete()
+        removed = WebhookEndpoint.query.filter_by(id=endpoint_id).delete()
+        db.session.commit()
+        return bool(removed)
+
+    def enqueue(self, event: str, payload: Dict):
+        """
+        Add an event for all its subscribers to the current transaction.
+
+        The caller commits, so the event is published exactly when the
+        change it describes is; subscribers are resolved by the worker.
+        """
+        from app.models import WebhookOutbox, db
+
+        row = WebhookOutbox(event=event, payload=json.dumps(payload, default=str))
+        db.session.add(row)
+        self.stats['events'] += 1
+        self._notify()
+        return row
+
+    def enqueue_many(self, event: str, payloads: List[Dict]) -> int:
+        """Add many events of one type to the current transaction in one executemany."""
+        from app.models import WebhookOutbox, db
+
+        if not payloads:
+            return 0
+        now = datetime.utcnow()
+        db.session.execute(
+            insert(WebhookOutbox.__table__),
+            [{'event': event, 'payload': json.dumps(payload, default=str), 'created_at': now}
+             for payload in payloads]
+        )
+        self.stats['events'] += len(payloads)
+        self._notify()
+        return len(payloads)
+
+    def send(self, url: str, event: str, payload: Dict, endpoint_id: Optional[str] = None):
+        """Queue one event for a single URL in the current transaction (caller commits)."""
+        from app.models import WebhookDelivery, WebhookOutbox, db
+
+        check_destination(url, self.allow_private)
+        row = WebhookOutbox(event=event, payload=json.dumps(payload, default=str), claimed_by='direct')
+        db.session.add(row)
+        db.session.flush()
+        db.session.add(WebhookDelivery(event_id=row.id, endpoint_id=endpoint_id, url=url))
+        self.stats['events'] += 1
+        self._notify()
+        return row
+
+    # ------------------------------------------------------------------
+    # Outbox processing
+    # ------------------------------------------------------------------
+
+    def fan_out(self) -> int:
+        """
+        Expand unclaimed outbox events into one delivery per active subscriber.
+
+        Returns:
+            int: Deliveries created
+        """
+        from app.models import WebhookDelivery, WebhookEndpoint, WebhookOutbox, db
+
+        outbox = WebhookOutbox.__table__
+        endpoints = WebhookEndpoint.__table__
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+
+        with db.engine.begin() as conn:
+            batch = select(outbox.c.id).where(outbox.c.claimed_by.is_(None))\
+                .order_by(outbox.c.id).limit(self.batch_size)
+            claimed = conn.execute(
+                update(outbox)
+                .where(outbox.c.id.in_(batch.scalar_subquery()), outbox.c.claimed_by.is_(None))
+                .values(claimed_by=token)
+            ).rowcount
+            if not claimed:
+                return 0
+
+            subscribers = select(
+                outbox.c.id, endpoints.c.id, endpoints.c.url,
+                literal('pending'), literal(0), literal(now), literal(now)
+            ).select_from(outbox.join(endpoints, endpoints.c.event == outbox.c.event))\
+                .where(outbox.c.claimed_by == token, endpoints.c.active.is_(True))
+            created = conn.execute(
+                insert(WebhookDelivery.__table__).from_select(
+                    ['event_id', 'endpoint_id', 'url', 'status', 'attempts', 'next_attempt_at', 'created_at'],
+                    subscribers
+                )
+            ).rowcount
+
+        self.stats['fanned_out'] += created
+        return created
+
+    def _claim(self, now: datetime) -> List[Dict]:
+        """Lease due deliveries to this worker, oldest first."""
+        from app.models import WebhookDelivery, WebhookEndpoint, WebhookOutbox, db
+
+        deliveries = WebhookDelivery.__table__
+        outbox = WebhookOutbox.__table__
+        endpoints = WebhookEndpoint.__table__
+        lease = uuid.uuid4().hex
+        due = (
+            deliveries.c.status == 'pending',
+            deliveries.c.next_attempt_at <= now,
+            or_(deliveries.c.leased_until.is_(None), deliveries.c.leased_until < now)
+        )
+
+        with db.engine.begin() as conn:
+            batch = select(deliveries.c.id).where(*due)\
+                .order_by(deliveries.c.next_attempt_at, deliveries.c.id).limit(self.batch_size)
+            conn.execute(
+                update(deliveries)
+                .where(deliveries.c.id.in_(batch.scalar_subquery()), *due)
+                .values(lease_owner=lease, leased_until=now + timedelta(seconds=self.lease_seconds))
+            )
+            rows = conn.execute(
+                select(
+                    deliveries.c.id, deliveries.c.event_id, deliveries.c.endpoint_id, deliveries.c.url,
+                    deliveries.c.attempts, outbox.c.event, outbox.c.payload, outbox.c.created_at,
+                    endpoints.c.secret_encrypted
+                ).select_from(
+                    deliveries.join(outbox, outbox.c.id == deliveries.c.event_id)
+                    .outerjoin(endpoints, endpoints.c.id == deliveries.c.endpoint_id)
+                ).where(deliveries.c.lease_owner == lease).order_by(deliveries.c.event_id)
+            ).mappings().all()
+
+        return [dict(row) for row in rows]
+
+    def _secret(self, encrypted: Optional[str]) -> Optional[str]:
+        if not encrypted:
+            return None
+        if encrypted not in self._secrets:
+            from app.models import decrypt_field
+            self._secrets[encrypted] = decrypt_field(encrypted)
+        return self._secrets[encrypted]
+
+    @staticmethod
+    def _body(batch: List[Dict]) -> str:
+        """JSON body for a batch; stored payloads are embedded without re-encoding."""
+        events = ','.join(
+            '{"id":%d,"delivery_id":%d,"event":%s,"created_at":%s,"payload":%s}' % (
+                row['event_id'], row['id'], json.dumps(row['event']),
+                json.dumps(row['created_at'].isoformat() if row['created_at'] else None), row['payload']
+            )
+            for row in batch
+        )
+        return '{"events":[%s]}' % events
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return self._breakers[host]
+
+    async def _send_batch(self, pool: HTTPPool, batch: List[Dict]):
+        """
+        POST one coalesced batch.
+
+        Returns:
+            Tuple of (batch, outcome); outcome is None when the host's circuit
+            is open, else (success, response status, error)
+        """
+        url = batch[0]['url']
+        breaker = self._breaker(url)
+        if not breaker.allow(time.monotonic()):
+            return batch, None
+
+        body = self._body(batch)
+        events = {row['event'] for row in batch}
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': self.USER_AGENT,
+            'X-Webhook-Event': events.pop() if len(events) == 1 else 'batch',
+            'X-Webhook-Delivery': str(batch[0]['id']),
+        }
+        secret = self._secret(batch[0]['secret_encrypted'])
+        if secret:
+            headers['X-Webhook-Signature'] = sign_payload(secret, body)
+
+        status = None
+        try:
+            status = await pool.post(url, body.encode(), headers)
+            success = 200 <= status < 300
+            error = None if success else f'HTTP {status}'
+        except (asyncio.TimeoutError, OSError, ValueError) as e:
+            success = False
+            error = f'{type(e).__name__}: {e}'.rstrip(': ')
+
+        # Client errors are the endpoint rejecting the event, not the host failing
+        host_failed = not success and (status is None or status >= 500 or status == 429)
+        breaker.record(not host_failed, time.monotonic())
+        return batch, (success, status, error)
+
+    async def _deliver(self, pool: HTTPPool, rows: List[Dict]):
+        groups: Dict[Tuple, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault((row['endpoint_id'], row['url']), []).append(row)
+
+        batches = [
+            group[i:i + self.coalesce_max]
+            for group in groups.values()
+            for i in range(0, len(group), self.coalesce_max)
+        ]
+        self.stats['coalesced'] += len(rows) - len(batches)
+        return await asyncio.gather(*(self._send_batch(pool, batch) for batch in batches))
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds to wait after the given number of failed attempts (with jitter)."""
+        delay = self.backoff_base * (2 ** (attempts - 1))
+        return min(self.backoff_max, delay * random.uniform(1.0, 1.2))
+
+    def _record(self, outcomes, now: datetime) -> None:
+        """Write the result of every attempt in one executemany."""
+        from app.models import WebhookDelivery, db
+
+        deliveries = WebhookDelivery.__table__
+        clock = time.monotonic()
+        params = []
+
+        for batch, outcome in outcomes:
+            if outcome is None:
+                retry_at = now + timedelta(seconds=self._breaker(batch[0]['url']).retry_at(clock) - clock)
+                for row in batch:
+                    params.append({'_id': row['id'], '_status': 'pending', '_attempts': row['attempts'],
+                                   '_next': retry_at, '_response': None, '_error': 'Circuit open',
+                                   '_delivered': None})
+                self.stats['deferred'] += len(batch)
+                continue
+
+            success, status, error = outcome
+            for row in batch:
+                attempts = row['attempts'] + 1
+                if success:
+                    state, next_at, delivered_at = 'delivered', now, now
+                    self.stats['delivered'] += 1
+                elif attempts >= self.max_attempts:
+                    state, next_at, delivered_at = 'failed', now, None
+                    self.stats['failed'] += 1
+                else:
+                    state, next_at, delivered_at = 'pending', now + timedelta(seconds=self.backoff(attempts)), None
+                    self.stats['retried'] += 1
+                params.append({'_id': row['id'], '_status': state, '_attempts': attempts, '_next': next_at,
+                               '_response': status, '_error': error and error[:500], '_delivered': delivered_at})
+
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(deliveries).where(deliveries.c.id == bindparam('_id')).values(
+                    status=bindparam('_status'),
+                    attempts=bindparam('_attempts'),
+                    next_attempt_at=bindparam('_next'),
+                    response_status=bindparam('_response'),
+                    last_error=bindparam('_error'),
+                    delivered_at=bindparam('_delivered'),
+                    lease_owner=None,
+                    leased_until=None
+                ),
+                params
+            )
+
+    def purge(self, before: Optional[datetime] = None) -> int:
+        """
+        Remove finished deliveries, and events with none left, older than a cutoff.
+
+        Returns:
+            int: Deliveries removed
+        """
+        from app.models import WebhookDelivery, WebhookOutbox, db
+
+        before = before or datetime.utcnow() - timedelta(days=self.retention_days)
+        deliveries = WebhookDelivery.__table__
+        outbox = WebhookOutbox.__table__
+
+        with db.engine.begin() as conn:
+            removed = conn.execute(
+                delete(deliveries).where(deliveries.c.status != 'pending', deliveries.c.created_at < before)
+            ).rowcount
+            conn.execute(
+                delete(outbox).where(
+                    outbox.c.claimed_by.isnot(None), outbox.c.created_at < before,
+                    ~exists().where(deliveries.c.event_id == outbox.c.id)
+                )
+            )
+        return removed
+
+    async def _round(self, pool: HTTPPool) -> int:
+        """Fan out new events, then attempt one batch of due deliveries."""
+        with self.app.app_context():
+            self.fan_out()
+            rows = self._claim(datetime.utcnow())
+        if not rows:
+            return 0
+
+        outcomes = await self._deliver(pool, rows)
+        with self.app.app_context():
+            self._record(outcomes, datetime.utcnow())
+        return len(rows)
+
+    def _new_pool(self) -> HTTPPool:
+        return HTTPPool(self.per_host, self.concurrency, self.timeout, stats=self.stats,
+                        allow_private=self.allow_private)
+
+    def run_once(self) -> int:
+        """
+        Run one fan-out and delivery round in the calling thread.
+
+        Returns:
+            int: Deliveries attempted
+        """
+        async def main():
+            pool = self._new_pool()
+            try:
+                return await self._round(pool)
+            finally:
+                await pool.close()
+
+        return asyncio.run(main())
+
+    # ------------------------------------------------------------------
+    # Background worker
+    # ------------------------------------------------------------------
+
+    def _notify(self) -> None:
+        if self.autostart:
+            # Threads do not survive a fork; restart in the child on first use
+            self.start()
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start the delivery worker (again, after a fork)."""
+        self.autostart = True
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()),
+                                        name='webhook-delivery', daemon=True)
+        self._thread.start()
+
+    async def _run(self) -> None:
+        pool = self._new_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            while not self._stop.is_set():
+                try:
+                    attempted = await self._round(pool)
+                    if time.monotonic() - self._last_purge > 3600:
+                        self._last_purge = time.monotonic()
+                        with self.app.app_context():
+                            self.purge()
+                except Exception as e:
+                    logger.error(f"Webhook delivery round failed: {e}")
+                    attempted = 0
+
+                if not attempted:
+                    await loop.run_in_executor(None, self._wake.wait, self.poll_interval)
+                    self._wake.clear()
+        finally:
+            await pool.close()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the worker; undelivered events stay in the outbox."""
+        self.autostart = False
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_stats(self) -> Dict:
+        """Get dispatcher statistics."""
+        return {
+            **self.stats,
+            'worker_running': self._thread is not None and self._thread.is_alive(),
+            'open_circuits': [host for host, b in self._breakers.items() if b.state != 'closed']
+        }
+
+
+# Global webhook dispatcher instance
+_webhook_dispatcher: Optional[WebhookDispatcher] = None
+
+
+def init_webhook_dispatcher(app) -> WebhookDispatcher:
+    """Initialize the webhook dispatcher for the app, stopping any previous one."""
+    global _webhook_dispatcher
+
+    if _webhook_dispatcher is not None:
+        _webhook_dispatcher.shutdown()
+
+    _webhook_dispatcher = WebhookDispatcher(
+        app,
+        concurrency=app.config.get('WEBHOOK_CONCURRENCY', 200),
+        per_host=app.config.get('WEBHOOK_PER_HOST', 8),
+        batch_size=app.config.get('WEBHOOK_BATCH_SIZE', 500),
+        coalesce_max=app.config.get('WEBHOOK_COALESCE_MAX', 50),
+        max_attempts=app.config.get('WEBHOOK_MAX_ATTEMPTS', 8),
+        backoff_base=app.config.get('WEBHOOK_BACKOFF_BASE', 2.0),
+        backoff_max=app.config.get('WEBHOOK_BACKOFF_MAX', 3600.0),
+        timeout=app.config.get('WEBHOOK_TIMEOUT', 10.0),
+        breaker_threshold=app.config.get('WEBHOOK_BREAKER_THRESHOLD', 5),
+        breaker_cooldown=app.config.get('WEBHOOK_BREAKER_COOLDOWN', 60.0),
+        retention_days=app.config.get('WEBHOOK_RETENTION_DAYS', 7),
+        allow_private=app.config.get('WEBHOOK_ALLOW_PRIVATE', False)
+    )
+    if app.config.get('WEBHOOK_WORKER', True):
+        _webhook_dispatcher.start()
+    return _webhook_dispatcher
+
+
+def get_webhook_dispatcher() -> Optional[WebhookDispatcher]:
+    """Get webhook dispatcher instance."""
+    return _webhook_dispatcher
@@ -1,13 +1,18 @@
 """Webhook management for integrations."""
 
-import logging
-import hashlib
 import hmac
+import logging
+import uuid
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
 
+from flask import has_app_context
+
+from .webhook_delivery import check_destination, get_webhook_dispatcher, sign_payload
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,16 +37,42 @@ class Webhook:
     created_at: str = None
     deliveries: int = 0
     failures: int = 0
+    
+    def to_dict(self) -> Dict:
+        """Serialize without the secret."""
+        return {
+            'id': self.id,
+            'url': self.url,
+            'event': self.event.value,
+            'active': self.active,
+            'created_at': self.created_at,
+            'deliveries': self.deliveries,
+            'failures': self.failures
+        }
 
 
 class WebhookManager:
-    """Manages webhooks for integrations."""
+    """
+    Manages webhooks for integrations.
+    
+    Subscriptions are stored in the webhook_endpoint table, which every
+    worker reads, so a webhook registered on one worker can be listed,
+    tested and deleted on any other. HTTP delivery goes through the outbox
+    worker in webhook_delivery; nothing is sent from the calling request.
+    """
+    
+    DELIVERY_LOG_SIZE = 1000
     
     def __init__(self):
         """Initialize webhook manager."""
         self.webhooks: Dict[str, Webhook] = {}
         self.handlers: Dict[WebhookEvent, List[Callable]] = {}
-        self.delivery_log: List[Dict] = []
+        self.delivery_log: deque = deque(maxlen=self.DELIVERY_LOG_SIZE)
+    
+    @staticmethod
+    def _dispatcher():
+        """Delivery dispatcher, when running inside the app."""
+        return get_webhook_dispatcher() if has_app_context() else None
     
     def register_webhook(self, url: str, event: WebhookEvent,
                         secret: str = None) -> Webhook:
@@ -56,7 +87,10 @@ class WebhookManager:
         Returns:
             Webhook instance
         """
-        webhook_id = f"webhook_{int(datetime.now().timestamp() * 1000)}"
+        dispatcher = self._dispatcher()
+        # Raises ValueError for URLs the worker cannot or must not deliver to
+        check_destination(url, dispatcher.allow_private if dispatcher is not None else False)
+        webhook_id = f"webhook_{uuid.uuid4().hex}"
         
         webhook = Webhook(
             id=webhook_id,
@@ -67,10 +101,48 @@ class WebhookManager:
         )
         
         self.webhooks[webhook_id] = webhook
+        
+        if dispatcher is not None:
+            dispatcher.add_endpoint(webhook_id, url, event.value, webhook.secret)
         logger.info(f"Webhook registered: {webhook_id}")
         
         return webhook
     
+    def get_webhook(self, webhook_id: str) -> Optional[Webhook]:
+        """Get a webhook, wherever it was registered."""
+        if not has_app_context():
+            return self.webhooks.get(webhook_id)
+        
+        from app.models import WebhookEndpoint
+        
+        endpoint = WebhookEndpoint.query.get(webhook_id)
+        return self._from_endpoint(endpoint) if endpoint is not None else None
+    
+    def list_webhooks(self) -> List[Webhook]:
+        """List webhooks registered on any worker."""
+        if not has_app_context():
+            return list(self.webhooks.values())
+        
+        from app.models import WebhookEndpoint
+        
+        return [self._from_endpoint(endpoint)
+                for endpoint in WebhookEndpoint.query.order_by(WebhookEndpoint.created_at)]
+    
+    def _from_endpoint(self, endpoint) -> Webhook:
+        """Webhook for a stored endpoint, with this worker's delivery counts."""
+        local = self.webhooks.get(endpoint.id)
+        return Webhook(
+            id=endpoint.id,
+            url=endpoint.url,
+            event=WebhookEvent._value2member_map_.get(endpoint.event, WebhookEvent.CUSTOM),
+            secret=endpoint.secret,
+            active=endpoint.active,
+            created_at=local.created_at if local else
+            (endpoint.created_at.isoformat() if endpoint.created_at else None),
+            deliveries=local.deliveries if local else 0,
+            failures=local.failures if local else 0
+        )
+    
     def _generate_secret(self) -> str:
         """Generate secure webhook secret."""
         import secrets
@@ -103,18 +175,30 @@ class WebhookManager:
         Returns:
             True if valid
         """
-        if webhook_id not in self.webhooks:
+        webhook = self.get_webhook(webhook_id)
+        if webhook is None:
             return False
         
-        webhook = self.webhooks[webhook_id]
-        expected_sig = hmac.new(
-            webhook.secret.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        expected_sig = sign_payload(webhook.secret, payload)
         
         return hmac.compare_digest(expected_sig, signature)
     
+    def publish(self, event: WebhookEvent, payload: Dict) -> bool:
+        """
+        Queue an event for every active subscriber.
+        
+        The event joins the current database transaction; the caller commits.
+        
+        Returns:
+            True if the event was queued
+        """
+        dispatcher = self._dispatcher()
+        if dispatcher is None:
+            return False
+        
+        dispatcher.enqueue(event.value, payload)
+        return True
+    
     async def deliver(self, webhook_id: str, payload: Dict) -> Dict:
         """
         Deliver webhook payload.
@@ -126,12 +210,19 @@ class WebhookManager:
         Returns:
             Delivery result
         """
-        if webhook_id not in self.webhooks:
+        webhook = self.get_webhook(webhook_id)
+        if webhook is None:
             return {'status': 'error', 'message': 'Webhook not found'}
-        
-        webhook = self.webhooks[webhook_id]
+        # Delivery counts are kept per worker
+        webhook = self.webhooks.setdefault(webhook_id, webhook)
         
         try:
+            # POST to the webhook URL from the delivery worker (caller commits)
+            dispatcher = self._dispatcher()
+            queued = dispatcher is not None and webhook.active
+            if queued:
+                dispatcher.send(webhook.url, webhook.event.value, payload, endpoint_id=webhook_id)
+            
             # Execute handlers
             results = []
             if webhook.event in self.handlers:
@@ -148,14 +239,14 @@ class WebhookManager:
             delivery = {
                 'webhook_id': webhook_id,
                 'timestamp': datetime.now().isoformat(),
-                'status': 'delivered',
+                'status': 'queued' if queued else 'delivered',
                 'handlers': len(results)
             }
             
             self.delivery_log.append(delivery)
             logger.info(f"Webhook delivered: {webhook_id}")
             
-            return {'status': 'delivered', 'handlers_executed': len(results)}
+            return {'status': delivery['status'], 'handlers_executed': len(results)}
         
         except Exception as e:
             webhook.failures += 1
@@ -164,27 +255,34 @@ class WebhookManager:
     
     def deactivate_webhook(self, webhook_id: str) -> bool:
         """Deactivate webhook."""
-        if webhook_id in self.webhooks:
+        found = webhook_id in self.webhooks
+        if found:
             self.webhooks[webhook_id].active = False
-            return True
-        return False
+        dispatcher = self._dispatcher()
+        if dispatcher is not None:
+            found = dispatcher.set_endpoint_active(webhook_id, False) or found
+        return found
     
     def delete_webhook(self, webhook_id: str) -> bool:
         """Delete webhook."""
-        if webhook_id in self.webhooks:
-            del self.webhooks[webhook_id]
-            return True
-        return False
+        found = self.webhooks.pop(webhook_id, None) is not None
+        dispatcher = self._dispatcher()
+        if dispatcher is not None:
+            found = dispatcher.remove_endpoint(webhook_id) or found
+        return found
     
     def get_stats(self) -> Dict:
         """Get webhook manager statistics."""
+        webhooks = self.list_webhooks()
         total_deliveries = sum(w.deliveries for w in self.webhooks.values())
         total_failures = sum(w.failures for w in self.webhooks.values())
+        dispatcher = get_webhook_dispatcher()
         
         return {
-            'total_webhooks': len(self.webhooks),
-            'active_webhooks': sum(1 for w in self.webhooks.values() if w.active),
+            'total_webhooks': len(webhooks),
+            'active_webhooks': sum(1 for w in webhooks if w.active),
             'total_deliveries': total_deliveries,
             'total_failures': total_failures,
-            'events_handled': len(self.handlers)
+            'events_handled': len(self.handlers),
+            'delivery': dispatcher.get_stats() if dispatcher else None
         }
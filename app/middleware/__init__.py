@@ -9,10 +9,18 @@ from .auth import (
     permission_required,
     project_access_required,
     api_auth_required,
+    api_admin_required,
     rate_limit_check,
     owner_or_admin_required,
     issue_access_required
 )
+from .principal import (
+    Principal,
+    get_principal,
+    get_current_user,
+    accessible_project_ids,
+    invalidate_project_access
+)
 
 __all__ = [
     'login_required',
@@ -22,7 +30,13 @@ __all__ = [
     'permission_required',
     'project_access_required',
     'api_auth_required',
+    'api_admin_required',
     'rate_limit_check',
     'owner_or_admin_required',
-    'issue_access_required'
+    'issue_access_required',
+    'Principal',
+    'get_principal',
+    'get_current_user',
+    'accessible_project_ids',
+    'invalidate_project_access'
 ]
@@ -90,6 +90,16 @@ def _has_permission(user_role, permission):
     return user_role in PERMISSIONS[permission]
 
 
+def _current_principal():
+    """Get the request principal; a session whose user no longer exists is cleared."""
+    from .principal import get_principal
+    
+    principal = get_principal()
+    if principal is None:
+        session.clear()
+    return principal
+
+
 def login_required(f):
     """
     Decorator to require authenticated session.
@@ -124,12 +134,14 @@ def admin_required(f):
             flash(message or 'Please log in to continue', 'warning')
             return redirect(url_for('auth.login'))
         
-        user_role = session.get('role')
+        principal = _current_principal()
+        if principal is None:
+            return redirect(url_for('auth.login'))
         
-        if user_role not in ['admin', 'super_admin']:
+        if principal.role not in ['admin', 'super_admin']:
             log_security_event(
                 'UNAUTHORIZED_ACCESS_ATTEMPT',
-                user_id=session.get('user_id'),
+                user_id=principal.id,
                 details=f'Attempted admin access to: {request.endpoint}',
                 severity='WARNING'
             )
@@ -153,12 +165,14 @@ def manager_required(f):
             flash(message or 'Please log in to continue', 'warning')
             return redirect(url_for('auth.login'))
         
-        user_role = session.get('role')
+        principal = _current_principal()
+        if principal is None:
+            return redirect(url_for('auth.login'))
         
-        if user_role not in ['admin', 'super_admin', 'manager']:
+        if principal.role not in ['admin', 'super_admin', 'manager']:
             log_security_event(
                 'UNAUTHORIZED_ACCESS_ATTEMPT',
-                user_id=session.get('user_id'),
+                user_id=principal.id,
                 details=f'Attempted manager access to: {request.endpoint}',
                 severity='WARNING'
             )
@@ -184,13 +198,15 @@ def role_required(*required_roles):
                 flash(message or 'Please log in to continue', 'warning')
                 return redirect(url_for('auth.login'))
             
-            user_role = session.get('role')
+            principal = _current_principal()
+            if principal is None:
+                return redirect(url_for('auth.login'))
             
-            if user_role not in required_roles:
+            if principal.role not in required_roles:
                 log_security_event(
                     'UNAUTHORIZED_ACCESS_ATTEMPT',
-                    user_id=session.get('user_id'),
-                    details=f'Role {user_role} attempted access requiring {required_roles}',
+                    user_id=principal.id,
+                    details=f'Role {principal.role} attempted access requiring {required_roles}',
                     severity='WARNING'
                 )
                 flash('You do not have permission to access this resource', 'error')
@@ -217,13 +233,15 @@ def permission_required(permission):
                 flash(message or 'Please log in to continue', 'warning')
                 return redirect(url_for('auth.login'))
             
-            user_role = session.get('role')
+            principal = _current_principal()
+            if principal is None:
+                return redirect(url_for('auth.login'))
             
-            if not _has_permission(user_role, permission):
+            if not principal.can(permission):
                 log_security_event(
                     'PERMISSION_DENIED',
-                    user_id=session.get('user_id'),
-                    details=f'Permission {permission} denied for role {user_role}',
+                    user_id=principal.id,
+                    details=f'Permission {permission} denied for role {principal.role}',
                     severity='WARNING'
                 )
                 flash('You do not have permission for this action', 'error')
@@ -243,7 +261,7 @@ def project_access_required(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        from app.models import User, Project
+        from app.models import Project, db
         
         is_valid, message = _check_session_valid()
         
@@ -255,24 +273,25 @@ def project_access_required(f):
         if not project_id:
             abort(400)
         
-        user = User.query.get(session['user_id'])
-        project = Project.query.get_or_404(project_id)
+        principal = _current_principal()
+        if principal is None:
+            return redirect(url_for('auth.login'))
         
-        # Admins and super_admins have access to all projects
-        if user.role in ['admin', 'super_admin']:
+        # Team members see their team's projects and managers the projects
+        # they created (cached per user); admins every project that exists
+        project_ids = principal.project_ids
+        if project_ids is not None and project_id in project_ids:
             return f(*args, **kwargs)
         
-        # Managers can access projects they manage
-        if user.role == 'manager' and project.created_by == user.id:
-            return f(*args, **kwargs)
+        if db.session.get(Project, project_id) is None:
+            abort(404)
         
-        # Team members can access their team's projects
-        if user.team_id and project.team_id == user.team_id:
+        if project_ids is None:
             return f(*args, **kwargs)
         
         log_security_event(
             'PROJECT_ACCESS_DENIED',
-            user_id=user.id,
+            user_id=principal.id,
             details=f'Attempted access to project {project_id}',
             severity='WARNING'
         )
@@ -308,6 +327,33 @@ def api_auth_required(f):
     return decorated_function
 
 
+def api_admin_required(f):
+    """
+    Decorator for API endpoints restricted to admin or super_admin.
+    Answers with JSON errors instead of redirecting to the login page.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        is_valid, message = _check_session_valid()
+        principal = _current_principal() if is_valid else None
+        
+        if principal is None:
+            return {'error': 'Authentication required', 'code': 'UNAUTHORIZED'}, 401
+        
+        if principal.role not in ['admin', 'super_admin']:
+            log_security_event(
+                'UNAUTHORIZED_ACCESS_ATTEMPT',
+                user_id=principal.id,
+                details=f'Attempted admin API access to: {request.endpoint}',
+                severity='WARNING'
+            )
+            return {'error': 'Administrator access required', 'code': 'FORBIDDEN'}, 403
+        
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
+
 def rate_limit_check(max_requests=100, window_seconds=60):
     """
     Decorator factory for rate limiting specific endpoints.
@@ -359,11 +405,13 @@ def owner_or_admin_required(model_class, id_param='id', owner_field='created_by'
             if not resource_id:
                 abort(400)
             
-            user_role = session.get('role')
-            user_id = session.get('user_id')
+            principal = _current_principal()
+            if principal is None:
+                return redirect(url_for('auth.login'))
+            user_id = principal.id
             
             # Admins bypass ownership check
-            if user_role in ['admin', 'super_admin']:
+            if principal.is_admin:
                 return f(*args, **kwargs)
             
             # Check ownership
@@ -397,7 +445,7 @@ def issue_access_required(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        from app.models import User, Project, Issue
+        from app.models import Project, Issue, db
         
         is_valid, message = _check_session_valid()
         
@@ -411,43 +459,38 @@ def issue_access_required(f):
         if not project_id or not issue_id:
             abort(400)
         
-        user = User.query.get(session['user_id'])
-        project = Project.query.get_or_404(project_id)
+        principal = _current_principal()
+        if principal is None:
+            return redirect(url_for('auth.login'))
+        
         issue = Issue.query.get_or_404(issue_id)
         
         # Verify issue belongs to project
         if issue.project_id != project_id:
             log_security_event(
                 'IDOR_ATTEMPT',
-                user_id=user.id,
+                user_id=principal.id,
                 details=f'Issue {issue_id} does not belong to project {project_id}',
                 severity='WARNING'
             )
             abort(404)
         
-        # Admins have access to all
-        if user.role in ['admin', 'super_admin']:
-            return f(*args, **kwargs)
+        # Admins, team members and managing creators (cached project set)
+        has_access = principal.can_access_project(project_id)
         
-        # Check project access
-        has_access = False
+        # Issue assignee or reporter
+        if not has_access:
+            has_access = issue.assignee_id == principal.id or issue.reporter_id == principal.id
         
         # Project creator
-        if project.created_by == user.id:
-            has_access = True
-        
-        # Team member
-        elif user.team_id and project.team_id == user.team_id:
-            has_access = True
-        
-        # Issue assignee or reporter
-        elif issue.assignee_id == user.id or issue.reporter_id == user.id:
-            has_access = True
+        if not has_access:
+            project = db.session.get(Project, project_id)
+            has_access = project is not None and project.created_by == principal.id
         
         if not has_access:
             log_security_event(
                 'ACCESS_DENIED',
-                user_id=user.id,
+                user_id=principal.id,
                 details=f'Attempted access to issue {issue_id} in project {project_id}',
                 severity='WARNING'
             )
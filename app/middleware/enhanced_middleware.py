@@ -8,7 +8,6 @@ import time
 import functools
 from datetime import datetime, timedelta
 from flask import request, session, g, abort, jsonify
-from collections import defaultdict
 import json
 
 # Setup audit logger
@@ -46,12 +45,11 @@ class RequestLogger:
 
 
 class RateLimiter:
-    """Rate limiting for API endpoints and sensitive routes."""
+    """Rate limiting for API endpoints and sensitive routes (per-minute and per-hour)."""
     
     def __init__(self, default_limit_per_minute=60, default_limit_per_hour=3600):
         self.default_limit_per_minute = default_limit_per_minute
         self.default_limit_per_hour = default_limit_per_hour
-        self.request_counts = defaultdict(lambda: {'minute': [], 'hour': []})
         self.logger = logging.getLogger('rate_limit')
     
     def get_client_identifier(self, request):
@@ -66,51 +64,39 @@ class RateLimiter:
         
         return request.remote_addr
     
-    def is_rate_limited(self, identifier, endpoint=None, limit_per_minute=None, limit_per_hour=None):
-        """Check if request should be rate limited."""
-        now = datetime.utcnow()
-        minute_ago = now - timedelta(minutes=1)
-        hour_ago = now - timedelta(hours=1)
+    def _policies(self, limit_per_minute=None, limit_per_hour=None):
+        from app.security.rate_limiting import RateLimit
         
         limit_per_minute = limit_per_minute or self.default_limit_per_minute
         limit_per_hour = limit_per_hour or self.default_limit_per_hour
-        
-        # Clean old entries
-        self.request_counts[identifier]['minute'] = [
-            ts for ts in self.request_counts[identifier]['minute'] 
-            if ts > minute_ago
-        ]
-        self.request_counts[identifier]['hour'] = [
-            ts for ts in self.request_counts[identifier]['hour'] 
-            if ts > hour_ago
+        return [
+            RateLimit(limit_per_minute, 60, f'mw:{limit_per_minute}/60'),
+            RateLimit(limit_per_hour, 3600, f'mw:{limit_per_hour}/3600')
         ]
+    
+    def is_rate_limited(self, identifier, endpoint=None, limit_per_minute=None, limit_per_hour=None):
+        """Check if request should be rate limited (one atomic check of both windows)."""
+        from app.security.rate_limiting import get_rate_limit_engine, most_restrictive
         
-        # Check limits
-        minute_count = len(self.request_counts[identifier]['minute'])
-        hour_count = len(self.request_counts[identifier]['hour'])
+        results = get_rate_limit_engine().hit(identifier, self._policies(limit_per_minute, limit_per_hour))
+        g.rate_limit = most_restrictive(results)
         
-        if minute_count >= limit_per_minute or hour_count >= limit_per_hour:
-            self.logger.warning(f"Rate limit exceeded for {identifier}: {minute_count}/min, {hour_count}/hour")
+        if not g.rate_limit.allowed:
+            self.logger.warning(f"Rate limit exceeded for {identifier}: "
+                                f"{results[0].remaining} left/min, {results[1].remaining} left/hour")
             return True
         
-        # Record this request
-        self.request_counts[identifier]['minute'].append(now)
-        self.request_counts[identifier]['hour'].append(now)
-        
         return False
     
     def get_limits(self, identifier):
         """Get current limits for identifier."""
-        now = datetime.utcnow()
-        minute_ago = now - timedelta(minutes=1)
-        hour_ago = now - timedelta(hours=1)
+        from app.security.rate_limiting import get_rate_limit_engine
         
-        minute_count = len([ts for ts in self.request_counts[identifier]['minute'] if ts > minute_ago])
-        hour_count = len([ts for ts in self.request_counts[identifier]['hour'] if ts > hour_ago])
+        minute, hour = get_rate_limit_engine().peek(identifier, self._policies())
         
         return {
-            'requests_this_minute': minute_count,
-            'requests_this_hour': hour_count,
+            'requests_this_minute': minute.limit - minute.remaining,
+            'requests_this_hour': hour.limit - hour.remaining,
             'limit_per_minute': self.default_limit_per_minute,
             'limit_per_hour': self.default_limit_per_hour
         }
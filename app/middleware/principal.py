@@ -0,0 +1,135 @@
+# app/middleware/principal.py
+"""
+Request Principal
+The signed-in user, resolved once per request.
+
+The first decorator or view that needs the current user loads the User row
+into g.principal together with its role level, a permission bitset and
+(lazily) the set of project IDs the user may open. The project set is kept
+in the tiered cache under a key that includes the user's role and team, so
+a role or team change simply starts a new cache entry; projects moving
+between teams invalidate the team's entries by tag.
+"""
+
+from typing import FrozenSet, Optional
+
+from flask import g, has_request_context, session
+
+from app.cache import CacheTags, get_tiered_cache
+
+from .auth import PERMISSIONS, ROLE_HIERARCHY
+
+ADMIN_ROLES = ('admin', 'super_admin')
+
+# One bit per permission, and each role's permissions OR-ed into a mask
+PERMISSION_BITS = {name: 1 << index for index, name in enumerate(PERMISSIONS)}
+ROLE_PERMISSION_MASKS = {
+    role: sum(bit for name, bit in PERMISSION_BITS.items() if role in PERMISSIONS[name])
+    for role in ROLE_HIERARCHY
+}
+
+PROJECT_ACCESS_TTL = 300
+
+
+def accessible_project_ids(user) -> Optional[FrozenSet[int]]:
+    """
+    IDs of the projects a user can open (None: every project).
+
+    Team members see their team's projects and managers also see projects
+    they created.
+    """
+    if user.role in ADMIN_ROLES:
+        return None
+
+    def load():
+        from sqlalchemy import or_
+        from app.models import Project, db
+
+        conditions = []
+        if user.team_id:
+            conditions.append(Project.team_id == user.team_id)
+        if user.role == 'manager':
+            conditions.append(Project.created_by == user.id)
+        if not conditions:
+            return []
+        return [row[0] for row in db.session.query(Project.id).filter(or_(*conditions)).all()]
+
+    cache = get_tiered_cache()
+    if cache is None:
+        return frozenset(load())
+
+    key = f"acl:projects:{user.id}:{user.role}:{user.team_id or 0}"
+    tags = [CacheTags.user(user.id)]
+    if user.team_id:
+        tags.append(CacheTags.team_projects(user.team_id))
+    return frozenset(cache.get_or_set(key, load, PROJECT_ACCESS_TTL, tags=tags))
+
+
+class Principal:
+    """The current user with precomputed authorization data."""
+
+    __slots__ = ('user', 'id', 'role', 'role_level', 'team_id', 'permissions', '_project_ids')
+
+    _UNSET = object()
+
+    def __init__(self, user):
+        self.user = user
+        self.id = user.id
+        self.role = user.role
+        self.role_level = ROLE_HIERARCHY.get(user.role, 0)
+        self.team_id = user.team_id
+        self.permissions = ROLE_PERMISSION_MASKS.get(user.role, 0)
+        self._project_ids = self._UNSET
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role in ADMIN_ROLES
+
+    def can(self, permission: str) -> bool:
+        """Check a permission from the PERMISSIONS matrix."""
+        return bool(self.permissions & PERMISSION_BITS.get(permission, 0))
+
+    def has_role_level(self, minimum_role: str) -> bool:
+        return self.role_level >= ROLE_HIERARCHY.get(minimum_role, 100)
+
+    @property
+    def project_ids(self) -> Optional[FrozenSet[int]]:
+        """Accessible project IDs (None: every project)."""
+        if self._project_ids is self._UNSET:
+            self._project_ids = accessible_project_ids(self.user)
+        return self._project_ids
+
+    def can_access_project(self, project_id: int) -> bool:
+        project_ids = self.project_ids
+        return project_ids is None or project_id in project_ids
+
+
+def get_principal() -> Optional[Principal]:
+    """Get the signed-in user's principal, loading it on first use in the request."""
+    if not has_request_context():
+        return None
+    user_id = session.get('user_id')
+    # Keyed on the session's user so a login or logout mid-request reloads
+    if 'principal' not in g or g.principal_user_id != user_id:
+        from app.models import User, db
+
+        user = db.session.get(User, user_id) if user_id else None
+        g.principal = Principal(user) if user is not None else None
+        g.principal_user_id = user_id
+    return g.principal
+
+
+def get_current_user():
+    """Get the signed-in User row (loaded at most once per request)."""
+    principal = get_principal()
+    return principal.user if principal is not None else None
+
+
+def invalidate_project_access(*team_ids, user_id: Optional[int] = None) -> int:
+    """Drop cached project sets after projects change team or owner."""
+    from app.cache import CacheInvalidator
+
+    tags = [CacheTags.team_projects(team_id) for team_id in team_ids if team_id]
+    if user_id:
+        tags.append(CacheTags.user(user_id))
+    return CacheInvalidator.invalidate_tags(*tags) if tags else 0
@@ -1,11 +1,16 @@
 """ML Pipeline Infrastructure - Model Management and Feature Engineering"""
 
 import os
+import sys
+import time
 import pickle
-import json
 import logging
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Sequence, Tuple, Any, Optional
 import numpy as np
 from functools import wraps
 import hashlib
@@ -16,11 +21,20 @@ logger = logging.getLogger(__name__)
 class FeatureEngineer:
     """Extract and engineer features from project data"""
     
+    # Fixed column order of the feature matrix for each data type
+    PROJECT_FEATURES = ('age_days', 'team_size', 'issue_count', 'completion_rate',
+                        'avg_issue_duration', 'activity_score')
+    USER_FEATURES = ('account_age_days', 'project_count', 'issue_count', 'avg_response_time',
+                     'completion_rate', 'collaboration_score')
+    ISSUE_FEATURES = ('priority', 'age_days', 'duration_days', 'assignee_count',
+                      'comment_count', 'attachment_count', 'is_overdue')
+    
     @staticmethod
-    def extract_project_features(project: Dict) -> Dict[str, float]:
+    def extract_project_features(project: Dict, now: datetime = None) -> Dict[str, float]:
         """Extract ML features from project data"""
+        now = now or datetime.now()
         return {
-            'age_days': (datetime.now() - project.get('created_at', datetime.now())).days,
+            'age_days': (now - project.get('created_at', now)).days,
             'team_size': len(project.get('members', [])),
             'issue_count': len(project.get('issues', [])),
             'completion_rate': project.get('completion_rate', 0.0),
@@ -29,10 +43,11 @@ class FeatureEngineer:
         }
     
     @staticmethod
-    def extract_user_features(user: Dict) -> Dict[str, float]:
+    def extract_user_features(user: Dict, now: datetime = None) -> Dict[str, float]:
         """Extract ML features from user data"""
+        now = now or datetime.now()
         return {
-            'account_age_days': (datetime.now() - user.get('created_at', datetime.now())).days,
+            'account_age_days': (now - user.get('created_at', now)).days,
             'project_count': user.get('project_count', 0),
             'issue_count': user.get('issue_count', 0),
             'avg_response_time': user.get('avg_response_time', 0.0),
@@ -41,9 +56,10 @@ class FeatureEngineer:
         }
     
     @staticmethod
-    def extract_issue_features(issue: Dict) -> Dict[str, float]:
+    def extract_issue_features(issue: Dict, now: datetime = None) -> Dict[str, float]:
         """Extract ML features from issue data"""
-        created_at = issue.get('created_at', datetime.now())
+        now = now or datetime.now()
+        created_at = issue.get('created_at', now)
         closed_at = issue.get('closed_at')
         
         if isinstance(created_at, str):
@@ -51,11 +67,11 @@ class FeatureEngineer:
         if isinstance(closed_at, str) and closed_at:
             closed_at = datetime.fromisoformat(closed_at)
         
-        duration = (closed_at - created_at).days if closed_at else (datetime.now() - created_at).days
+        duration = (closed_at - created_at).days if closed_at else (now - created_at).days
         
         return {
-            'priority': self._priority_to_score(issue.get('priority', 'medium')),
-            'age_days': (datetime.now() - created_at).days,
+            'priority': FeatureEngineer._priority_to_score(issue.get('priority', 'medium')),
+            'age_days': (now - created_at).days,
             'duration_days': max(duration, 0),
             'assignee_count': len(issue.get('assignees', [])),
             'comment_count': len(issue.get('comments', [])),
@@ -63,6 +79,36 @@ class FeatureEngineer:
             'is_overdue': 1 if issue.get('status') != 'closed' and duration > 14 else 0,
         }
     
+    @staticmethod
+    def get_schema(data_type: str) -> Optional[Tuple[str, ...]]:
+        """Get the feature column names for a data type"""
+        return {
+            'project': FeatureEngineer.PROJECT_FEATURES,
+            'user': FeatureEngineer.USER_FEATURES,
+            'issue': FeatureEngineer.ISSUE_FEATURES,
+        }.get(data_type)
+    
+    @staticmethod
+    def build_feature_matrix(data_type: str, data_list: List[Dict], now: datetime = None) -> np.ndarray:
+        """
+        Build a 2-D feature matrix, one row per item, columns in schema order.
+        
+        Raises:
+            ValueError: If the data type has no feature schema
+        """
+        schema = FeatureEngineer.get_schema(data_type)
+        if schema is None:
+            raise ValueError(f"Unknown data type: {data_type}")
+        
+        extract = getattr(FeatureEngineer, f'extract_{data_type}_features')
+        now = now or datetime.now()
+        
+        matrix = np.empty((len(data_list), len(schema)), dtype=np.float64)
+        for i, data in enumerate(data_list):
+            features = extract(data, now)
+            matrix[i] = [features[name] for name in schema]
+        return matrix
+    
     @staticmethod
     def _priority_to_score(priority: str) -> float:
         """Convert priority to numeric score"""
@@ -70,87 +116,375 @@ class FeatureEngineer:
         return scores.get(priority.lower(), 2.0)
 
 
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Estimate the memory footprint of a cached value in bytes"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None or _depth > 3:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v, _depth + 1) for v in value)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + estimate_size(vars(value), _depth + 1)
+    return sys.getsizeof(value)
+
+
+class BoundedCache:
+    """Thread-safe LRU cache with per-entry TTL and a byte budget"""
+    
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None, sweep_interval: float = 60.0,
+                 name: str = 'cache'):
+        """
+        Initialize bounded cache.
+        
+        Args:
+            max_entries: Maximum number of entries
+            max_bytes: Maximum estimated size of all entries
+            ttl_seconds: Default entry lifetime (None: no expiry)
+            sweep_interval: Seconds between background expiry sweeps (0: none)
+            name: Name used for the sweeper thread
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.name = name
+        
+        # key -> (value, expires_at, size); ordered least recently used first
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self._sweeper: Optional[threading.Thread] = None
+        self.bytes = 0
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'rejected': 0,
+        }
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a live entry and mark it recently used"""
+        with self._lock:
+            return self._get(key, time.monotonic(), default)
+    
+    def _get(self, key: str, now: float, default: Any) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return default
+        
+        value, expires_at, _ = entry
+        if expires_at is not None and now >= expires_at:
+            self._remove(key)
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return default
+        
+        self._data.move_to_end(key)
+        self.stats['hits'] += 1
+        return value
+    
+    def get_many(self, keys: List[str]) -> Tuple[List[Any], np.ndarray]:
+        """
+        Look up many keys under one lock acquisition.
+        
+        Returns:
+            Tuple of (values, hit mask); values are None where the mask is False
+        """
+        missing = object()
+        values = [None] * len(keys)
+        hits = np.zeros(len(keys), dtype=bool)
+        
+        with self._lock:
+            now = time.monotonic()
+            for i, key in enumerate(keys):
+                value = self._get(key, now, missing)
+                if value is not missing:
+                    values[i] = value
+                    hits[i] = True
+        
+        return values, hits
+    
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None,
+            size: Optional[int] = None) -> bool:
+        """
+        Store an entry, evicting least recently used entries to stay in budget.
+        
+        Returns:
+            bool: False if the entry alone exceeds the byte budget
+        """
+        self.set_many([(key, value)], ttl_seconds, [size] if size is not None else None)
+        return key in self._data
+    
+    def set_many(self, items: List[Tuple[str, Any]], ttl_seconds: Optional[float] = None,
+                 sizes: Optional[List[int]] = None) -> None:
+        """Store many entries with one expiry"""
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        
+        with self._lock:
+            expires_at = time.monotonic() + ttl if ttl is not None else None
+            for i, (key, value) in enumerate(items):
+                size = sizes[i] if sizes is not None else estimate_size(value)
+                if key in self._data:
+                    self._remove(key)
+                if size > self.max_bytes:
+                    self.stats['rejected'] += 1
+                    continue
+                
+                self._data[key] = (value, expires_at, size)
+                self.bytes += size
+            
+            while self._data and (len(self._data) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, _, size) = self._data.popitem(last=False)
+                self.bytes -= size
+                self.stats['evictions'] += 1
+        
+        if self._sweeper is None:
+            self._start_sweeper()
+    
+    def _remove(self, key: str) -> None:
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+    
+    def delete(self, key: str) -> bool:
+        """Remove an entry"""
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._remove(key)
+            return True
+    
+    def delete_matching(self, pattern: str) -> int:
+        """Remove entries whose key contains pattern"""
+        with self._lock:
+            keys = [k for k in self._data if pattern in k]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+    
+    def sweep(self) -> int:
+        """Remove expired entries"""
+        with self._lock:
+            now = time.monotonic()
+            expired = [k for k, (_, expires_at, _) in self._data.items()
+                       if expires_at is not None and now >= expires_at]
+            for key in expired:
+                self._remove(key)
+            self.stats['expirations'] += len(expired)
+            return len(expired)
+    
+    def _start_sweeper(self) -> None:
+        if self.sweep_interval <= 0 or self.ttl_seconds is None:
+            return
+        
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            
+            # Hold only a weak reference so dropped caches stop their sweeper
+            ref = weakref.ref(self)
+            interval = self.sweep_interval
+            stop = threading.Event()
+            
+            def run():
+                while not stop.wait(interval):
+                    cache = ref()
+                    if cache is None:
+                        return
+                    cache.sweep()
+                    del cache
+            
+            self._sweeper = threading.Thread(target=run, name=f'{self.name}-sweep', daemon=True)
+            self._sweeper.start()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            }
+
+
 class ModelCache:
-    """In-memory and disk cache for ML models"""
+    """In-memory and disk cache for ML models
     
-    def __init__(self, cache_dir: str = '/tmp/ml_models'):
+    Models are pickled with their NumPy buffers written out of band as .npy
+    files, which are memory-mapped on load so every worker process shares
+    the same read-only pages.
+    """
+    
+    def __init__(self, cache_dir: str = '/tmp/ml_models', max_entries: int = 32,
+                 max_bytes: int = 512 * 1024 * 1024, ttl_hours: int = 24):
         self.cache_dir = cache_dir
-        self.memory_cache: Dict[str, Any] = {}
+        self.memory_cache = BoundedCache(
+            max_entries=max_entries, max_bytes=max_bytes,
+            ttl_seconds=ttl_hours * 3600, sweep_interval=300, name='model-cache'
+        )
+        self.mapped_bytes: Dict[str, int] = {}
         os.makedirs(cache_dir, exist_ok=True)
     
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+    
     def get(self, key: str) -> Optional[Any]:
         """Get cached model or data"""
         # Check memory cache first
-        if key in self.memory_cache:
-            return self.memory_cache[key]
+        value = self.memory_cache.get(key)
+        if value is not None:
+            return value
         
         # Check disk cache
-        cache_file = os.path.join(self.cache_dir, f"{key}.pkl")
+        cache_file = self._path(key, '.pkl')
         if os.path.exists(cache_file):
             try:
-                with open(cache_file, 'rb') as f:
-                    data = pickle.load(f)
-                self.memory_cache[key] = data
-                return data
+                value, resident, mapped = self._load(key)
+                self.memory_cache.set(key, value, size=resident)
+                self.mapped_bytes[key] = mapped
+                return value
             except Exception as e:
                 logger.error(f"Cache read error for {key}: {e}")
         
         return None
     
+    def _load(self, key: str) -> Tuple[Any, int, int]:
+        """Load a model, memory-mapping its array buffers"""
+        with open(self._path(key, '.pkl'), 'rb') as f:
+            payload = f.read()
+        
+        buffers = []
+        
+        def mapped_buffers():
+            for i in itertools.count():
+                buffer = np.load(self._path(key, f'.buf{i}.npy'), mmap_mode='r')
+                buffers.append(buffer)
+                yield buffer
+        
+        value = pickle.loads(payload, buffers=mapped_buffers())
+        return value, len(payload), sum(b.nbytes for b in buffers)
+    
     def set(self, key: str, value: Any, ttl_hours: int = 24) -> None:
         """Cache model or data"""
-        self.memory_cache[key] = value
+        buffers: List[pickle.PickleBuffer] = []
+        try:
+            payload = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        except Exception as e:
+            logger.error(f"Cache write error for {key}: {e}")
+            self.memory_cache.set(key, value, ttl_seconds=ttl_hours * 3600)
+            return
+        
+        size = len(payload) + sum(b.raw().nbytes for b in buffers)
+        self.memory_cache.set(key, value, ttl_seconds=ttl_hours * 3600, size=size)
+        self.mapped_bytes.pop(key, None)
         
         try:
-            cache_file = os.path.join(self.cache_dir, f"{key}.pkl")
-            with open(cache_file, 'wb') as f:
-                pickle.dump(value, f)
+            for i, buffer in enumerate(buffers):
+                self._write(self._path(key, f'.buf{i}.npy'),
+                            lambda f, b=buffer: np.save(f, np.frombuffer(b.raw(), dtype=np.uint8)))
+            self._write(self._path(key, '.pkl'), lambda f: f.write(payload))
         except Exception as e:
             logger.error(f"Cache write error for {key}: {e}")
     
+    @staticmethod
+    def _write(path: str, writer) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            writer(f)
+        os.replace(tmp_path, path)
+    
     def clear(self, pattern: str = None) -> None:
         """Clear cache"""
         if pattern:
-            keys_to_delete = [k for k in self.memory_cache if pattern in k]
-            for key in keys_to_delete:
-                del self.memory_cache[key]
+            self.memory_cache.delete_matching(pattern)
+            for key in [k for k in self.mapped_bytes if pattern in k]:
+                del self.mapped_bytes[key]
         else:
             self.memory_cache.clear()
+            self.mapped_bytes.clear()
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            **self.memory_cache.get_stats(),
+            'mapped_bytes': sum(self.mapped_bytes.values()),
+        }
 
 
 class PredictionCache:
     """Cache for predictions with TTL"""
     
-    def __init__(self, ttl_hours: int = 1):
+    def __init__(self, ttl_hours: int = 1, max_entries: int = 100000,
+                 max_bytes: int = 64 * 1024 * 1024):
         self.ttl = timedelta(hours=ttl_hours)
-        self.cache: Dict[str, Tuple[Any, datetime]] = {}
+        self.cache = BoundedCache(
+            max_entries=max_entries, max_bytes=max_bytes,
+            ttl_seconds=self.ttl.total_seconds(), sweep_interval=60, name='prediction-cache'
+        )
     
     def get(self, key: str) -> Optional[Any]:
         """Get cached prediction"""
-        if key in self.cache:
-            value, expiry = self.cache[key]
-            if datetime.now() < expiry:
-                return value
-            else:
-                del self.cache[key]
-        return None
+        return self.cache.get(key)
     
     def set(self, key: str, value: Any) -> None:
         """Cache prediction"""
-        self.cache[key] = (value, datetime.now() + self.ttl)
+        self.cache.set(key, value)
+    
+    def get_many(self, keys: List[str]) -> Tuple[List[Any], np.ndarray]:
+        """
+        Look up many predictions at once.
+        
+        Returns:
+            Tuple of (values, hit mask); values are None where the mask is False
+        """
+        return self.cache.get_many(keys)
+    
+    def set_many(self, items: List[Tuple[str, Any]]) -> None:
+        """Cache many predictions with one expiry"""
+        self.cache.set_many(items)
     
     def invalidate(self, pattern: str = None) -> None:
         """Invalidate cache entries"""
         if pattern:
-            keys_to_delete = [k for k in self.cache if pattern in k]
-            for key in keys_to_delete:
-                del self.cache[key]
+            self.cache.delete_matching(pattern)
         else:
             self.cache.clear()
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        return self.cache.get_stats()
 
 
 class ModelManager:
-    """Manage ML model lifecycle"""
+    """Manage ML model lifecycle
+    
+    Models with a ``predict`` method (scikit-learn style) or a truthy
+    ``supports_batch`` attribute are given a whole feature matrix; other
+    callables are called once per item with its feature dict.
+    """
     
     def __init__(self):
         self.models: Dict[str, Any] = {}
@@ -211,6 +545,64 @@ class ModelManager:
             logger.error(f"Prediction error for {model_name}: {e}")
             return None
     
+    @staticmethod
+    def supports_batch(model: Any) -> bool:
+        """Whether a model scores a feature matrix in one call"""
+        return hasattr(model, 'predict') or bool(getattr(model, 'supports_batch', False))
+    
+    def predict_batch(self, model_name: str, features: np.ndarray,
+                      cache_keys: List[str] = None,
+                      feature_names: Optional[Sequence[str]] = None) -> List[Any]:
+        """
+        Predict every row of a feature matrix, in a single call for batch models.
+        
+        Rows whose cache key is already in the prediction cache are filtered
+        out first, so only misses reach the model. Models without batch
+        support get each row as a dict keyed by ``feature_names``.
+        """
+        results: List[Any] = [None] * len(features)
+        misses = np.ones(len(features), dtype=bool)
+        
+        if cache_keys is not None:
+            cached, hits = self.prediction_cache.get_many(cache_keys)
+            for i in np.flatnonzero(hits):
+                results[i] = cached[i]
+            misses = ~hits
+        
+        miss_rows = np.flatnonzero(misses)
+        if not len(miss_rows):
+            return results
+        
+        model = self.get_model(model_name)
+        if not model:
+            logger.error(f"Model not found: {model_name}")
+            return results
+        
+        try:
+            if hasattr(model, 'predict'):
+                predicted = model.predict(features[miss_rows])
+            elif self.supports_batch(model):
+                predicted = model(features[miss_rows])
+            else:
+                if feature_names is None:
+                    raise ValueError('feature_names are required for models without batch support')
+                predicted = [model(dict(zip(feature_names, row.tolist()))) for row in features[miss_rows]]
+            predicted = predicted.tolist() if isinstance(predicted, np.ndarray) else list(predicted)
+        except Exception as e:
+            logger.error(f"Batch prediction error for {model_name}: {e}")
+            return results
+        
+        for i, prediction in zip(miss_rows, predicted):
+            results[i] = prediction
+        
+        if cache_keys is not None:
+            self.prediction_cache.set_many([
+                (cache_keys[i], prediction)
+                for i, prediction in zip(miss_rows, predicted) if prediction is not None
+            ])
+        
+        return results
+    
     def get_model_info(self, name: str) -> Dict:
         """Get model metadata"""
         return {
@@ -224,10 +616,11 @@ class ModelManager:
 class MLPipeline:
     """Main ML pipeline for project management"""
     
-    def __init__(self):
+    def __init__(self, batch_size: int = 4096):
         self.model_manager = ModelManager()
         self.feature_engineer = FeatureEngineer()
         self.prediction_cache = PredictionCache(ttl_hours=2)
+        self.batch_size = batch_size
     
     def initialize(self) -> None:
         """Initialize ML pipeline"""
@@ -246,29 +639,56 @@ class MLPipeline:
     
     def predict(self, model_name: str, data: Dict, data_type: str = 'project') -> Optional[Any]:
         """Make prediction on data"""
-        # Extract features
-        features = self.extract_features(data_type, data)
+        return self.batch_predict(model_name, [data], data_type)[0]
+    
+    def batch_predict(self, model_name: str, data_list: List[Dict], data_type: str = 'project',
+                      chunk_size: int = None) -> List[Any]:
+        """
+        Make predictions on multiple data points.
         
-        # Create cache key
-        feature_hash = hashlib.md5(json.dumps(features, sort_keys=True).encode()).hexdigest()
-        cache_key = f"{model_name}_{feature_hash}"
+        Items are scored chunk_size rows at a time (default: batch_size),
+        with one model call per chunk.
+        """
+        if self.feature_engineer.get_schema(data_type) is None:
+            logger.error(f"Unknown data type for prediction: {data_type}")
+            return [None] * len(data_list)
+        
+        chunk_size = chunk_size or self.batch_size
+        now = datetime.now()
         
-        # Use model manager to predict (with caching)
-        return self.model_manager.predict(model_name, features, cache_key)
-    
-    def batch_predict(self, model_name: str, data_list: List[Dict], data_type: str = 'project') -> List[Any]:
-        """Make predictions on multiple data points"""
         predictions = []
-        for data in data_list:
-            pred = self.predict(model_name, data, data_type)
-            predictions.append(pred)
+        for start in range(0, len(data_list), chunk_size):
+            features = self.feature_engineer.build_feature_matrix(
+                data_type, data_list[start:start + chunk_size], now
+            )
+            predictions.extend(self.predict_matrix(
+                model_name, features, self.feature_engineer.get_schema(data_type)
+            ))
         return predictions
     
+    def predict_matrix(self, model_name: str, features: np.ndarray,
+                       feature_names: Optional[Sequence[str]] = None) -> List[Any]:
+        """Predict every row of a feature matrix, scoring identical rows once"""
+        if not len(features):
+            return []
+        
+        unique, inverse = np.unique(features, axis=0, return_inverse=True)
+        cache_keys = [
+            f"{model_name}_{hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()}"
+            for row in unique
+        ]
+        
+        predictions = self.model_manager.predict_batch(model_name, unique, cache_keys, feature_names)
+        return [predictions[i] for i in inverse.reshape(-1)]
+    
     def get_pipeline_stats(self) -> Dict:
         """Get pipeline statistics"""
         return {
             'models_loaded': len(self.model_manager.models),
             'cache_entries': len(self.model_manager.prediction_cache.cache),
+            'model_cache': self.model_manager.model_cache.get_stats(),
+            'prediction_cache': self.model_manager.prediction_cache.get_stats(),
+            'batch_size': self.batch_size,
             'feature_engineer': 'ready',
             'initialized_at': datetime.now().isoformat(),
         }
@@ -1,11 +1,15 @@
 """Smart Recommendations Engine - Content and Collaborative Filtering"""
 
 import logging
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
 from datetime import datetime
 import statistics
 
+from app.ml.similarity_index import IssueSimilarityIndex, UserIssueMatrix
+
 logger = logging.getLogger(__name__)
 
 
@@ -71,36 +75,52 @@ class ContentBasedRecommender:
         
         return min(similarity, 1.0)
     
-    def recommend_similar_issues(self, issue: Dict, all_issues: List[Dict], top_n: int = 5) -> List[Recommendation]:
-        """Recommend similar issues"""
-        recommendations = []
-        issue_features = self.extract_issue_features(issue)
-        
-        similarities = []
-        for other_issue in all_issues:
-            if other_issue['id'] == issue['id']:
-                continue
-            
-            other_features = self.extract_issue_features(other_issue)
-            similarity = self.calculate_similarity(issue_features, other_features)
-            similarities.append((other_issue, similarity))
+    # Candidate-set indexes kept between calls, least recently used dropped first
+    MAX_SCOPED_INDEXES = 16
+    
+    def __init__(self, index: Optional[IssueSimilarityIndex] = None):
+        self.index = index or IssueSimilarityIndex()
+        self._scoped: 'OrderedDict[Any, IssueSimilarityIndex]' = OrderedDict()
+        self._scoped_lock = threading.Lock()
+    
+    def _scoped_index(self, scope) -> IssueSimilarityIndex:
+        """Index for one scope (project), evicting the least recently used"""
+        with self._scoped_lock:
+            index = self._scoped.pop(scope, None) or IssueSimilarityIndex()
+            self._scoped[scope] = index
+            while len(self._scoped) > self.MAX_SCOPED_INDEXES:
+                self._scoped.popitem(last=False)
+            return index
+    
+    def recommend_similar_issues(self, issue: Dict, all_issues: Optional[List[Dict]] = None,
+                                 top_n: int = 5) -> List[Recommendation]:
+        """Recommend similar issues
         
-        # Sort by similarity and get top N
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        ``all_issues`` are the candidates. They are synced into an index
+        kept per project of ``issue`` (unchanged issues are skipped, issues
+        no longer passed are dropped), so it never outgrows the last
+        candidate set. Without it every explicitly indexed issue is a
+        candidate.
+        """
+        if all_issues is not None:
+            index = self._scoped_index(issue.get('project_id'))
+            matches = index.most_similar_among(issue, all_issues, top_n=top_n, min_score=0.3)
+        else:
+            matches = self.index.most_similar(issue, top_n=top_n, min_score=0.3)
         
-        for other_issue, similarity in similarities[:top_n]:
-            if similarity > 0.3:  # Minimum threshold
-                rec = Recommendation(
-                    id=other_issue['id'],
-                    title=other_issue.get('title', ''),
-                    description=f"Similar issue with {similarity*100:.0f}% match",
-                    type='similar_issue',
-                    confidence_score=similarity,
-                    reason="Content-based similarity",
-                    metadata={'original_issue_id': issue['id']},
-                    timestamp=datetime.now(),
-                )
-                recommendations.append(rec)
+        recommendations = []
+        for other_issue, similarity in matches:
+            rec = Recommendation(
+                id=other_issue['id'],
+                title=other_issue.get('title', ''),
+                description=f"Similar issue with {similarity*100:.0f}% match",
+                type='similar_issue',
+                confidence_score=similarity,
+                reason="Content-based similarity",
+                metadata={'original_issue_id': issue['id']},
+                timestamp=datetime.now(),
+            )
+            recommendations.append(rec)
         
         return recommendations
     
@@ -144,57 +164,16 @@ class CollaborativeRecommender:
     """Collaborative filtering recommendations"""
     
     @staticmethod
-    def build_user_issue_matrix(users: List[Dict], issues: List[Dict]) -> Dict:
-        """Build user-issue interaction matrix"""
-        matrix = {}
-        
-        for user in users:
-            user_id = user['id']
-            matrix[user_id] = {}
-            
-            # Track issues user has worked on
-            for issue in issues:
-                assignees = set(issue.get('assignees', []))
-                if user_id in assignees:
-                    # Score: time spent, comments, resolution
-                    score = 1.0
-                    if issue.get('status') == 'closed':
-                        score += 0.5
-                    if issue.get('comment_count', 0) > 0:
-                        score += 0.3
-                    
-                    matrix[user_id][issue['id']] = score
-        
-        return matrix
+    def build_user_issue_matrix(users: List[Dict], issues: List[Dict]) -> UserIssueMatrix:
+        """Build sparse user-issue interaction matrix"""
+        return UserIssueMatrix.from_issues(users, issues)
     
-    def find_similar_users(self, user_id: str, user_issue_matrix: Dict, top_n: int = 5) -> List[Tuple[str, float]]:
-        """Find similar users based on issue work"""
-        if user_id not in user_issue_matrix:
-            return []
+    def find_similar_users(self, user_id: str, user_issue_matrix, top_n: int = 5) -> List[Tuple[str, float]]:
+        """Find similar users based on issue work (Jaccard over worked-on issues)"""
+        if isinstance(user_issue_matrix, dict):
+            user_issue_matrix = UserIssueMatrix.from_dict(user_issue_matrix)
         
-        user_issues = set(user_issue_matrix[user_id].keys())
-        if not user_issues:
-            return []
-        
-        similarities = []
-        for other_user_id, other_issues in user_issue_matrix.items():
-            if other_user_id == user_id:
-                continue
-            
-            other_issue_set = set(other_issues.keys())
-            if not other_issue_set:
-                continue
-            
-            # Jaccard similarity
-            overlap = len(user_issues & other_issue_set)
-            union = len(user_issues | other_issue_set)
-            similarity = overlap / union if union > 0 else 0
-            
-            if similarity > 0:
-                similarities.append((other_user_id, similarity))
-        
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:top_n]
+        return user_issue_matrix.most_similar_users(user_id, top_n=top_n)
     
     def recommend_team_members(self, user_id: str, project_type: str, all_users: List[Dict], 
                               user_issue_matrix: Dict, top_n: int = 5) -> List[Recommendation]:
@@ -202,10 +181,11 @@ class CollaborativeRecommender:
         recommendations = []
         
         similar_users = self.find_similar_users(user_id, user_issue_matrix, top_n=10)
+        users_by_id = {u['id']: u for u in all_users}
         
         # Get unique users who specialize in this project type
         for other_user_id, similarity in similar_users:
-            user = next((u for u in all_users if u['id'] == other_user_id), None)
+            user = users_by_id.get(other_user_id)
             if not user:
                 continue
             
@@ -263,6 +243,14 @@ class RecommendationEngine:
         
         return recommendations
     
+    def index_issues(self, issues: List[Dict]) -> int:
+        """Add or update issues in the similarity index"""
+        return self.content_recommender.index.add_issues(issues)
+    
+    def remove_issue(self, issue_id) -> bool:
+        """Remove an issue from the similarity index"""
+        return self.content_recommender.index.remove_issue(issue_id)
+    
     def get_project_recommendations(self, project: Dict, 
                                    template_library: List[Dict] = None) -> Dict[str, List[Recommendation]]:
         """Get all recommendations for a project"""
@@ -0,0 +1,419 @@
+"""Similarity Index - Vectorized nearest-neighbour search for recommendations
+
+Issues are encoded as sparse feature vectors (priority, type, tags,
+components and TF-IDF of the title) stored column-wise as NumPy posting
+arrays, so scoring one issue against every other is a handful of array
+gathers instead of a Python loop. User-issue interactions are kept as a
+CSR matrix with its CSC transpose for vectorized Jaccard between users.
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_STOP_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with',
+    'is', 'it', 'be', 'as', 'at', 'by', 'from', 'when', 'not', 'no'
+}
+
+
+def tokenize_title(title: str) -> List[str]:
+    """Lowercase word tokens of a title without stop words"""
+    return [t for t in _TOKEN_RE.findall((title or '').lower()) if t not in _STOP_WORDS and len(t) > 1]
+
+
+class _Postings:
+    """Rows (and weights) per feature, frozen into NumPy arrays on first read"""
+
+    __slots__ = ('rows', 'weights', '_arrays')
+
+    def __init__(self):
+        self.rows: List[int] = []
+        self.weights: List[float] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def add(self, row: int, weight: float = 1.0) -> None:
+        self.rows.append(row)
+        self.weights.append(weight)
+        self._arrays = None
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.rows, dtype=np.int64),
+                            np.asarray(self.weights, dtype=np.float32))
+        return self._arrays
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class IssueSimilarityIndex:
+    """Incrementally maintained sparse index of issue feature vectors
+
+    Similarity keeps the weighting of the original content recommender
+    (exact priority/type match, Jaccard on tags and components) and adds
+    cosine similarity of TF-IDF title vectors.
+    """
+
+    WEIGHTS = {
+        'priority': 0.2,
+        'type': 0.3,
+        'tags': 0.2,
+        'components': 0.25,
+        'title': 0.05,
+    }
+
+    # Rebuild when this fraction of rows are stale versions of updated/removed issues
+    COMPACT_RATIO = 0.25
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._postings: Dict[Tuple[str, Any], _Postings] = defaultdict(_Postings)
+        self._row_ids: List[Any] = []
+        self._row_of: Dict[Any, int] = {}
+        self._fingerprints: Dict[Any, tuple] = {}
+        self._issues: Dict[Any, Dict] = {}
+        self._alive: List[bool] = []
+        self._set_sizes = {'tags': [], 'components': []}
+        self._term_df: Dict[str, int] = defaultdict(int)
+        self._dead = 0
+        self._doc_count: Optional[int] = None
+        self._arrays = None
+
+    @staticmethod
+    def _fingerprint(issue: Dict) -> tuple:
+        return (
+            issue.get('priority', 'medium'),
+            issue.get('type', 'bug'),
+            tuple(sorted(set(issue.get('tags', [])))),
+            tuple(sorted(set(issue.get('components', [])))),
+            issue.get('title', ''),
+        )
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def __contains__(self, issue_id):
+        return issue_id in self._row_of
+
+    def _idf(self, term: str) -> float:
+        n = self._doc_count if self._doc_count is not None else len(self._row_of)
+        return math.log((n + 1) / (self._term_df.get(term, 0) + 1)) + 1.0
+
+    def add_issue(self, issue: Dict) -> bool:
+        """Add or update an issue; returns False if it was already indexed unchanged"""
+        fingerprint = self._fingerprint(issue)
+
+        with self._lock:
+            issue_id = issue['id']
+            if self._fingerprints.get(issue_id) == fingerprint:
+                return False
+
+            if issue_id in self._row_of:
+                self._remove_row(issue_id)
+
+            self._insert(issue_id, fingerprint)
+            return True
+
+    def _insert(self, issue_id, fingerprint: tuple, count_terms: bool = True) -> None:
+        priority, issue_type, tags, components, title = fingerprint
+        row = len(self._row_ids)
+        self._row_ids.append(issue_id)
+        self._alive.append(True)
+        self._row_of[issue_id] = row
+        self._fingerprints[issue_id] = fingerprint
+        self._issues[issue_id] = {'id': issue_id, 'title': title}
+
+        self._postings[('priority', priority)].add(row)
+        self._postings[('type', issue_type)].add(row)
+        for tag in tags:
+            self._postings[('tags', tag)].add(row)
+        for component in components:
+            self._postings[('components', component)].add(row)
+        self._set_sizes['tags'].append(len(tags))
+        self._set_sizes['components'].append(len(components))
+
+        # Title TF-IDF, L2-normalized with the idf known at insertion time
+        counts = defaultdict(int)
+        for term in tokenize_title(title):
+            counts[term] += 1
+        if count_terms:
+            for term in counts:
+                self._term_df[term] += 1
+        weights = {term: tf * self._idf(term) for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for term, weight in weights.items():
+            self._postings[('title', term)].add(row, weight / norm)
+
+        self._arrays = None
+
+    def add_issues(self, issues: Iterable[Dict]) -> int:
+        """Add or update many issues; returns the number (re)indexed"""
+        changed = sum(1 for issue in issues if self.add_issue(issue))
+        self._maybe_compact()
+        return changed
+
+    def retain(self, issue_ids: Iterable[Any]) -> int:
+        """Remove every issue not in ``issue_ids``; returns the number removed"""
+        keep = set(issue_ids)
+        with self._lock:
+            gone = [issue_id for issue_id in self._row_of if issue_id not in keep]
+            for issue_id in gone:
+                self._remove_row(issue_id)
+            self._maybe_compact()
+            return len(gone)
+
+    def remove_issue(self, issue_id) -> bool:
+        """Remove an issue from the index"""
+        with self._lock:
+            if issue_id not in self._row_of:
+                return False
+            self._remove_row(issue_id)
+            self._maybe_compact()
+            return True
+
+    def _remove_row(self, issue_id) -> None:
+        row = self._row_of.pop(issue_id)
+        self._alive[row] = False
+        self._dead += 1
+        fingerprint = self._fingerprints.pop(issue_id)
+        self._issues.pop(issue_id, None)
+        for term in set(tokenize_title(fingerprint[4])):
+            self._term_df[term] -= 1
+        self._arrays = None
+
+    def _maybe_compact(self) -> None:
+        with self._lock:
+            if self._dead and self._dead > self.COMPACT_RATIO * len(self._row_ids):
+                self.compact()
+
+    def compact(self) -> None:
+        """Rebuild postings without stale rows, re-weighting titles with current idf"""
+        with self._lock:
+            live = list(self._fingerprints.items())
+            self._reset()
+
+            for _, fingerprint in live:
+                for term in set(tokenize_title(fingerprint[4])):
+                    self._term_df[term] += 1
+
+            self._doc_count = len(live)
+            try:
+                for issue_id, fingerprint in live:
+                    self._insert(issue_id, fingerprint, count_terms=False)
+            finally:
+                self._doc_count = None
+
+    def _row_arrays(self) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        if self._arrays is None:
+            self._arrays = (
+                np.asarray(self._alive, dtype=bool),
+                {name: np.asarray(sizes, dtype=np.float32) for name, sizes in self._set_sizes.items()},
+            )
+        return self._arrays
+
+    def score(self, issue: Dict) -> np.ndarray:
+        """Similarity of ``issue`` to every indexed row (dead rows score -1)"""
+        priority, issue_type, tags, components, title = self._fingerprint(issue)
+
+        with self._lock:
+            alive, set_sizes = self._row_arrays()
+            scores = np.zeros(len(alive), dtype=np.float32)
+
+            for name, value in (('priority', priority), ('type', issue_type)):
+                postings = self._postings.get((name, value))
+                if postings:
+                    rows, _ = postings.arrays()
+                    scores[rows] += self.WEIGHTS[name]
+
+            for name, values in (('tags', tags), ('components', components)):
+                if not values:
+                    continue
+                overlap = np.zeros(len(alive), dtype=np.float32)
+                for value in values:
+                    postings = self._postings.get((name, value))
+                    if postings:
+                        rows, _ = postings.arrays()
+                        overlap[rows] += 1
+                union = set_sizes[name] + len(values) - overlap
+                jaccard = np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+                scores += self.WEIGHTS[name] * jaccard
+
+            counts = defaultdict(int)
+            for term in tokenize_title(title):
+                counts[term] += 1
+            query = {term: tf * self._idf(term) for term, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in query.values())) or 1.0
+            for term, weight in query.items():
+                postings = self._postings.get(('title', term))
+                if postings:
+                    rows, row_weights = postings.arrays()
+                    scores[rows] += self.WEIGHTS['title'] * (weight / norm) * row_weights
+
+            scores[~alive] = -1.0
+            return scores
+
+    def most_similar(self, issue: Dict, top_n: int = 5, min_score: float = 0.0,
+                     candidate_ids: Optional[Iterable[Any]] = None) -> List[Tuple[Dict, float]]:
+        """Top-N most similar indexed issues as (issue summary, score)
+
+        ``candidate_ids`` restricts the search to those issues (e.g. one project).
+        """
+        with self._lock:
+            scores = self.score(issue)
+            if candidate_ids is not None:
+                rows = [self._row_of[i] for i in candidate_ids if i in self._row_of]
+                allowed = np.zeros(len(scores), dtype=bool)
+                allowed[rows] = True
+                scores[~allowed] = -1.0
+
+            own_row = self._row_of.get(issue.get('id'))
+            if own_row is not None:
+                scores[own_row] = -1.0
+
+            candidates = np.flatnonzero(scores > min_score)
+            if len(candidates) > top_n:
+                top = np.argpartition(-scores[candidates], top_n - 1)[:top_n]
+                candidates = candidates[top]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+            return [(self._issues[self._row_ids[row]], float(min(scores[row], 1.0))) for row in candidates]
+
+    def most_similar_among(self, issue: Dict, candidates: Iterable[Dict], top_n: int = 5,
+                           min_score: float = 0.0) -> List[Tuple[Dict, float]]:
+        """Sync the index to exactly ``candidates`` and rank them, as one step
+
+        The lock is held from sync to ranking, so concurrent callers with
+        other candidate sets neither prune nor see each other's issues.
+        """
+        candidates = list(candidates)
+        with self._lock:
+            self.add_issues(candidates)
+            self.retain(candidate['id'] for candidate in candidates)
+            return self.most_similar(issue, top_n=top_n, min_score=min_score)
+
+    def get_stats(self) -> Dict:
+        """Get index statistics"""
+        with self._lock:
+            return {
+                'issues': len(self._row_of),
+                'rows': len(self._row_ids),
+                'stale_rows': self._dead,
+                'features': len(self._postings),
+                'postings': sum(len(p) for p in self._postings.values()),
+            }
+
+
+class UserIssueMatrix:
+    """Sparse user x issue interaction matrix in CSR form (with its CSC transpose)"""
+
+    def __init__(self, user_ids: List[Any], issue_ids: List[Any],
+                 entries: Iterable[Tuple[int, int, float]]):
+        """
+        Args:
+            user_ids: Row labels
+            issue_ids: Column labels
+            entries: (row, column, score) triples
+        """
+        self.user_ids = list(user_ids)
+        self.issue_ids = list(issue_ids)
+        self.user_index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+
+        entries = list(entries)
+        rows = np.fromiter((e[0] for e in entries), dtype=np.int64, count=len(entries))
+        cols = np.fromiter((e[1] for e in entries), dtype=np.int64, count=len(entries))
+        data = np.fromiter((e[2] for e in entries), dtype=np.float32, count=len(entries))
+
+        self.indptr, self.indices, self.data = self._compress(rows, cols, data, len(self.user_ids))
+        self.t_indptr, self.t_indices, _ = self._compress(cols, rows, data, len(self.issue_ids))
+        self.row_nnz = np.diff(self.indptr)
+
+    @staticmethod
+    def _compress(rows, cols, data, n_rows):
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return indptr, cols[order], data[order]
+
+    @classmethod
+    def from_issues(cls, users: List[Dict], issues: List[Dict]) -> 'UserIssueMatrix':
+        """Build from issue assignees in one pass over the issues (O(users + nnz))"""
+        user_ids = [user['id'] for user in users]
+        user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+
+        entries = []
+        for col, issue in enumerate(issues):
+            # Score: time spent, comments, resolution
+            score = 1.0
+            if issue.get('status') == 'closed':
+                score += 0.5
+            if issue.get('comment_count', 0) > 0:
+                score += 0.3
+            for assignee in set(issue.get('assignees', [])):
+                row = user_index.get(assignee)
+                if row is not None:
+                    entries.append((row, col, score))
+
+        return cls(user_ids, [issue['id'] for issue in issues], entries)
+
+    @classmethod
+    def from_dict(cls, matrix: Dict[Any, Dict[Any, float]]) -> 'UserIssueMatrix':
+        """Build from the legacy {user_id: {issue_id: score}} mapping"""
+        issue_index: Dict[Any, int] = {}
+        entries = []
+        for row, (user_id, issues) in enumerate(matrix.items()):
+            for issue_id, score in issues.items():
+                col = issue_index.setdefault(issue_id, len(issue_index))
+                entries.append((row, col, score))
+        return cls(list(matrix), list(issue_index), entries)
+
+    def row(self, user_id) -> Dict[Any, float]:
+        """One user's interactions as {issue_id: score}"""
+        i = self.user_index.get(user_id)
+        if i is None:
+            return {}
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return {self.issue_ids[c]: float(v) for c, v in zip(self.indices[start:end], self.data[start:end])}
+
+    def to_dict(self) -> Dict[Any, Dict[Any, float]]:
+        """Legacy {user_id: {issue_id: score}} mapping"""
+        return {user_id: self.row(user_id) for user_id in self.user_ids}
+
+    def jaccard(self, user_id) -> np.ndarray:
+        """Jaccard similarity of one user's issue set to every user's"""
+        i = self.user_index.get(user_id)
+        overlap = np.zeros(len(self.user_ids), dtype=np.float32)
+        if i is None or self.row_nnz[i] == 0:
+            return overlap
+
+        cols = self.indices[self.indptr[i]:self.indptr[i + 1]]
+        # Users sharing each of this user's issues, gathered from the CSC transpose
+        starts, ends = self.t_indptr[cols], self.t_indptr[cols + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        overlap += np.bincount(self.t_indices[positions], minlength=len(self.user_ids)).astype(np.float32)
+
+        union = self.row_nnz[i] + self.row_nnz - overlap
+        return np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+
+    def most_similar_users(self, user_id, top_n: int = 5) -> List[Tuple[Any, float]]:
+        """Top-N users by Jaccard similarity of worked-on issues"""
+        scores = self.jaccard(user_id)
+        i = self.user_index.get(user_id)
+        if i is not None:
+            scores[i] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')][:top_n]
+        return [(self.user_ids[c], float(scores[c])) for c in candidates]
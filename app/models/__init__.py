@@ -16,10 +16,20 @@ from models import (
     IssueLink,
     Comment,
     Attachment,
+    Blob,
+    UploadSession,
     IssueWatcher,
     WorkflowTransition,
+    ProjectStatusSnapshot,
     ProjectUpdate,
     AuditLog,
+    WebhookEndpoint,
+    WebhookOutbox,
+    WebhookDelivery,
+    WorkflowExecution,
+    ScheduledTimer,
+    SchedulerLease,
+    BackgroundJob,
     RecentItem,
     StarredItem,
     FacialIDData,
@@ -39,10 +49,20 @@ __all__ = [
     'IssueLink',
     'Comment',
     'Attachment',
+    'Blob',
+    'UploadSession',
     'IssueWatcher',
     'WorkflowTransition',
+    'ProjectStatusSnapshot',
     'ProjectUpdate',
     'AuditLog',
+    'WebhookEndpoint',
+    'WebhookOutbox',
+    'WebhookDelivery',
+    'WorkflowExecution',
+    'ScheduledTimer',
+    'SchedulerLease',
+    'BackgroundJob',
     'RecentItem',
     'StarredItem',
     'FacialIDData',
@@ -2,6 +2,13 @@
 """
 Batch operations system for efficient bulk processing.
 Supports create, update, delete operations with transaction management.
+
+Handlers come in two forms. A single handler gets one operation. A bulk
+handler gets a chunk of consecutive operations of the same resource and
+type, and turns them into a few set-based statements (UPDATE ... WHERE id
+IN (...), executemany inserts). Bulk handlers never commit. The processor
+commits each chunk, or the whole batch when atomic=True, and then runs the
+side effects the handlers registered for after the commit.
 """
 
 import logging
@@ -102,12 +109,19 @@ class BatchResult:
         }
 
 
+# Outcome of one operation: (success, error, result)
+Outcome = Tuple[bool, Optional[str], Optional[Dict]]
+
+
 class BatchProcessor:
     """Processes batch operations with error handling and rollback."""
     
+    DEFAULT_CHUNK_SIZE = 500
+    
     def __init__(self):
         """Initialize batch processor."""
         self.operations_registry: Dict[str, Dict[OperationType, Callable]] = {}
+        self.bulk_registry: Dict[str, Dict[OperationType, Tuple[Callable, int]]] = {}
         self.validators: Dict[str, Callable] = {}
         self.hooks: Dict[str, List[Callable]] = {
             'before_batch': [],
@@ -124,6 +138,24 @@ class BatchProcessor:
         self.operations_registry[resource_type][operation_type] = handler
         logger.debug(f"Registered operation: {resource_type}/{operation_type.value}")
     
+    def register_bulk_operation(self, resource_type: str, operation_type: OperationType,
+                                handler: Callable, chunk_size: Optional[int] = None):
+        """
+        Register the set-based form of an operation.
+        
+        The handler is called as handler(operations, on_commit) with up to
+        chunk_size operations. It must return one (success, error, result)
+        outcome per operation, in order; nothing is written for a failed
+        operation. It runs its statements in the current session without
+        committing, and raises only when the chunk as a whole failed. Side
+        effects that must wait for the commit (cache invalidation, realtime
+        pushes, automation) are passed to on_commit.
+        """
+        self.bulk_registry.setdefault(resource_type, {})[operation_type] = (
+            handler, chunk_size or self.DEFAULT_CHUNK_SIZE
+        )
+        logger.debug(f"Registered bulk operation: {resource_type}/{operation_type.value}")
+    
     def register_validator(self, resource_type: str, validator: Callable):
         """Register data validator."""
         self.validators[resource_type] = validator
@@ -164,10 +196,75 @@ class BatchProcessor:
             logger.error(f"Operation execution error: {e}")
             return False, str(e), None
     
+    def _bulk_handler(self, operation: BatchOperation) -> Optional[Tuple[Callable, int]]:
+        return self.bulk_registry.get(operation.resource_type, {}).get(operation.operation_type)
+    
+    def _segments(self, operations: List[BatchOperation]):
+        """Split operations into runs of the same bulk-capable kind, and singles."""
+        i = 0
+        while i < len(operations):
+            bulk = self._bulk_handler(operations[i])
+            j = i + 1
+            if bulk is not None:
+                kind = (operations[i].resource_type, operations[i].operation_type)
+                while j < len(operations) and \
+                        (operations[j].resource_type, operations[j].operation_type) == kind:
+                    j += 1
+            yield bulk, operations[i:j]
+            i = j
+    
+    def _run_hooks(self, hook_type: str, *args):
+        for hook in self.hooks[hook_type]:
+            try:
+                hook(*args)
+            except Exception as e:
+                logger.error(f"{hook_type} hook error: {e}")
+    
+    @staticmethod
+    def _run_after_commit(callbacks: List[Callable]):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"After-commit side effect failed: {e}")
+        callbacks.clear()
+    
+    def _execute_bulk(self, handler: Callable, chunk: List[BatchOperation],
+                      on_commit: List[Callable]) -> Tuple[Optional[List[Outcome]], Optional[str]]:
+        """
+        Run one chunk through a bulk handler.
+        
+        Returns:
+            Tuple of (outcomes, error); outcomes is None when the handler
+            raised, in which case the session has been rolled back
+        """
+        from app.models import db
+        
+        callbacks: List[Callable] = []
+        try:
+            outcomes = handler(chunk, callbacks.append)
+            if len(outcomes) != len(chunk):
+                raise RuntimeError(f"Bulk handler returned {len(outcomes)} outcomes for {len(chunk)} operations")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Bulk operation error: {e}")
+            return None, str(e)
+        on_commit.extend(callbacks)
+        return outcomes, None
+    
     def execute_batch(self, operations: List[BatchOperation], atomic: bool = False) -> BatchResult:
         """
         Execute batch of operations.
         
+        Runs of consecutive operations with a bulk handler are executed a
+        chunk at a time. Without atomic, each chunk commits by itself, and a
+        failed chunk falls back to the single handler, one operation at a
+        time, if there is one. With atomic, bulk work commits once at the
+        end and is rolled back entirely if any operation fails. Single
+        handlers commit on their own, so pending bulk work is committed
+        before one runs; a failure after that point only rolls back the
+        bulk work that came later.
+        
         Args:
             operations: List of operations to execute
             atomic: If True, fail entire batch on first error
@@ -181,69 +278,125 @@ class BatchProcessor:
         logger.info(f"Starting batch {batch_id} with {len(operations)} operations")
         
         # Execute before hooks
-        for hook in self.hooks['before_batch']:
-            try:
-                hook(batch_id, operations)
-            except Exception as e:
-                logger.error(f"Before hook error: {e}")
+        self._run_hooks('before_batch', batch_id, operations)
         
-        # Execute operations
-        for i, operation in enumerate(operations):
-            logger.debug(f"Executing operation {i+1}/{len(operations)}: {operation.operation_type.value}")
-            
-            # Before operation hook
-            for hook in self.hooks['before_operation']:
-                try:
-                    hook(operation)
-                except Exception as e:
-                    logger.error(f"Before operation hook error: {e}")
+        executed: List[BatchOperation] = []
+        uncommitted: List[BatchOperation] = []  # bulk work awaiting the atomic commit
+        on_commit: List[Callable] = []
+        failed = False
+        
+        def finish(operation: BatchOperation, outcome: Outcome) -> bool:
+            success, error, op_result = outcome
+            operation.status = "success" if success else "failed"
+            operation.result = op_result if success else None
+            operation.error = None if success else error
+            executed.append(operation)
+            if not success:
+                logger.warning(f"Operation {len(executed)} failed: {error}")
+            return success
+        
+        for bulk, segment in self._segments(operations):
+            for operation in segment:
+                self._run_hooks('before_operation', operation)
             
-            # Validate operation
-            is_valid, error_msg = self._validate_operation(operation)
-            if not is_valid:
-                operation.status = "failed"
-                operation.error = f"Validation failed: {error_msg}"
-                result.add_operation(operation)
-                
+            # Validate operations
+            valid = []
+            for operation in segment:
+                is_valid, error_msg = self._validate_operation(operation)
+                if is_valid:
+                    valid.append(operation)
+                    continue
+                finish(operation, (False, f"Validation failed: {error_msg}", None))
                 if atomic:
-                    logger.warning(f"Atomic batch failed at operation {i}")
+                    failed = True
                     break
-                continue
             
-            # Execute operation
-            success, error, op_result = self._execute_operation(operation)
-            
-            if success:
-                operation.status = "success"
-                operation.result = op_result
-                logger.info(f"Operation {i+1} succeeded")
-            else:
-                operation.status = "failed"
-                operation.error = error
-                logger.warning(f"Operation {i+1} failed: {error}")
+            if not failed and bulk is not None:
+                from app.models import db
                 
-                if atomic:
-                    logger.warning(f"Atomic batch failed at operation {i}")
-                    break
+                handler, chunk_size = bulk
+                for start in range(0, len(valid), chunk_size):
+                    chunk = valid[start:start + chunk_size]
+                    outcomes, error = self._execute_bulk(handler, chunk, on_commit)
+                    
+                    if atomic:
+                        if outcomes is None:
+                            outcomes = [(False, error, None)] * len(chunk)
+                        for operation, outcome in zip(chunk, outcomes):
+                            if not finish(operation, outcome):
+                                failed = True
+                                break
+                            uncommitted.append(operation)
+                        if failed:
+                            break
+                        continue
+                    
+                    if outcomes is not None:
+                        db.session.commit()
+                        self._run_after_commit(on_commit)
+                        for operation, outcome in zip(chunk, outcomes):
+                            finish(operation, outcome)
+                        continue
+                    
+                    # The chunk failed as a whole; isolate the bad operation
+                    on_commit.clear()
+                    for operation in chunk:
+                        if operation.operation_type in self.operations_registry.get(operation.resource_type, {}):
+                            finish(operation, self._execute_operation(operation))
+                            continue
+                        single, error = self._execute_bulk(handler, [operation], on_commit)
+                        if single is None:
+                            finish(operation, (False, error, None))
+                            continue
+                        db.session.commit()
+                        self._run_after_commit(on_commit)
+                        finish(operation, single[0])
+            elif not failed:
+                if uncommitted and valid:
+                    # Single handlers commit on their own, which would commit
+                    # pending bulk work too; commit it now so it is reported
+                    # as done and its side effects run
+                    from app.models import db
+                    
+                    db.session.commit()
+                    self._run_after_commit(on_commit)
+                    uncommitted.clear()
+                for operation in valid:
+                    logger.debug(f"Executing operation {len(executed)+1}/{len(operations)}: {operation.operation_type.value}")
+                    if not finish(operation, self._execute_operation(operation)) and atomic:
+                        failed = True
+                        break
             
-            result.add_operation(operation)
+            for operation in segment:
+                if operation.status != "pending":
+                    self._run_hooks('after_operation', operation)
             
-            # After operation hook
-            for hook in self.hooks['after_operation']:
-                try:
-                    hook(operation)
-                except Exception as e:
-                    logger.error(f"After operation hook error: {e}")
+            if failed:
+                logger.warning(f"Atomic batch failed at operation {len(executed) - 1}")
+                break
+        
+        if uncommitted:
+            from app.models import db
+            if failed:
+                db.session.rollback()
+                on_commit.clear()
+                for operation in uncommitted:
+                    operation.status = "skipped"
+                    operation.result = None
+                    operation.error = "Rolled back: atomic batch failed"
+            else:
+                db.session.commit()
+                self._run_after_commit(on_commit)
+        
+        position = {id(operation): i for i, operation in enumerate(operations)}
+        for operation in sorted(executed, key=lambda op: position[id(op)]):
+            result.add_operation(operation)
         
         # Complete batch
         result.complete()
         
         # Execute after hooks
-        for hook in self.hooks['after_batch']:
-            try:
-                hook(batch_id, result)
-            except Exception as e:
-                logger.error(f"After hook error: {e}")
+        self._run_hooks('after_batch', batch_id, result)
         
         logger.info(f"Batch {batch_id} completed: {result.successful} success, {result.failed} failed")
         
@@ -258,6 +411,10 @@ def init_batch_processor() -> BatchProcessor:
     """Initialize batch processor."""
     global _batch_processor
     _batch_processor = BatchProcessor()
+    
+    from .issue_operations import register_issue_operations
+    register_issue_operations(_batch_processor)
+    
     logger.info("✓ Batch processor initialized")
     return _batch_processor
 
@@ -0,0 +1,389 @@
+# app/operations/issue_operations.py
+"""
+Issue batch operations.
+
+Single handlers go through IssueService one issue at a time. Bulk handlers
+update or delete a chunk of issues with a few set-based statements:
+operations that set the same values share one UPDATE ... WHERE id IN (...),
+and workflow transitions, webhook events and deadline timers are written
+with one executemany each. Everything that IssueService does after its
+commit (analytics snapshots, search index, cache, realtime, automation,
+the security log) runs once per chunk after the processor commits.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import case, delete, func, insert, select, update
+
+from .batch import BatchOperation, BatchProcessor, OperationType
+
+logger = logging.getLogger('batch')
+
+CLOSED_STATUSES = ('done', 'closed')
+
+# Columns loaded for each issue in a chunk; enough for the webhook and
+# realtime summaries, analytics state and deadline timers
+ISSUE_COLUMNS = ('id', 'key', 'title', 'project_id', 'status', 'priority', 'issue_type',
+                 'assignee_id', 'story_points', 'time_spent', 'due_date', 'created_at', 'updated_at')
+
+
+def _issue_id(operation: BatchOperation) -> Optional[int]:
+    try:
+        return int(operation.id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_issues(ids) -> Dict[int, SimpleNamespace]:
+    from app.models import Issue, db
+
+    issues = Issue.__table__
+    rows = db.session.execute(
+        select(*(issues.c[name] for name in ISSUE_COLUMNS)).where(issues.c.id.in_(set(ids)))
+    ).mappings()
+    return {row['id']: SimpleNamespace(**row) for row in rows}
+
+
+def _update_values(data: Dict) -> Dict:
+    """Validated column values for an update, as IssueService.update_issue applies them."""
+    from app.utils.security import sanitize_input
+    from app.utils.validators import (
+        validate_date, validate_float, validate_integer,
+        validate_issue_type, validate_priority, validate_status
+    )
+
+    values = {}
+    if 'title' in data:
+        values['title'] = sanitize_input(data['title'])
+    if 'description' in data:
+        values['description'] = sanitize_input(data['description'], allow_html=True) or None
+    if 'status' in data:
+        validate_status(data['status'])
+        values['status'] = data['status']
+    if 'priority' in data:
+        validate_priority(data['priority'])
+        values['priority'] = data['priority']
+    if 'issue_type' in data:
+        validate_issue_type(data['issue_type'])
+        values['issue_type'] = data['issue_type']
+    if 'assignee_id' in data:
+        values['assignee_id'] = int(data['assignee_id']) if data['assignee_id'] else None
+    if 'story_points' in data:
+        values['story_points'] = validate_integer(data['story_points'], 'story_points', min_value=1, max_value=100)
+    if 'time_estimate' in data:
+        values['time_estimate'] = validate_float(data['time_estimate'], 'time_estimate', min_value=0)
+    if 'time_spent' in data:
+        values['time_spent'] = validate_float(data['time_spent'], 'time_spent', min_value=0)
+    if 'due_date' in data:
+        values['due_date'] = validate_date(data['due_date'], 'due_date')
+    if 'sprint_id' in data:
+        values['sprint_id'] = int(data['sprint_id']) if data['sprint_id'] else None
+    if 'epic_id' in data:
+        values['epic_id'] = int(data['epic_id']) if data['epic_id'] else None
+    return values
+
+
+def _log_bulk(event_type: str, issues_by_user: Dict, verb: str, severity: str = 'INFO'):
+    """One security log entry per acting user instead of one per issue."""
+    from app.utils.security import log_security_event
+
+    for user_id, keys in issues_by_user.items():
+        preview = ', '.join(keys[:20]) + (f' (+{len(keys) - 20} more)' if len(keys) > 20 else '')
+        log_security_event(
+            event_type,
+            user_id=user_id,
+            details=f'{verb} {len(keys)} issues: {preview}',
+            severity=severity
+        )
+
+
+def _queue_webhooks(action: str, summaries: List[Dict]):
+    from app.integrations.webhook_delivery import get_webhook_dispatcher
+
+    dispatcher = get_webhook_dispatcher()
+    if dispatcher is not None:
+        dispatcher.enqueue_many('issue', [{'action': action, 'issue': s} for s in summaries])
+
+
+def _search_index_call(method: str, *args):
+    from app.search.index import get_search_index
+
+    index = get_search_index()
+    if index is None:
+        return
+    try:
+        getattr(index, method)(*args)
+    except Exception as e:
+        logging.getLogger('search').warning(f'Search index update failed: {str(e)}')
+
+
+def bulk_update_issues(operations: List[BatchOperation], on_commit: Callable) -> List:
+    """
+    Apply a chunk of issue updates with one UPDATE per distinct set of values.
+
+    Operations on an issue already changed earlier in the chunk are applied
+    in a later pass, so they see its new state (e.g. for transitions).
+    """
+    from app.cache import CacheInvalidator
+    from app.models import Issue, WorkflowTransition, db, encrypt_field
+    from app.scheduling import schedule_issue_deadline
+    from app.services.analytics_service import AnalyticsService
+    from app.services.issue_service import IssueService
+    from app.utils.validators import ValidationError
+
+    issues = Issue.__table__
+    now = datetime.utcnow()
+    outcomes: List = [None] * len(operations)
+    ids = [_issue_id(op) for op in operations]
+    rows = _load_issues(i for i in ids if i is not None)
+
+    before_states = {}  # issue id -> analytics state before the chunk
+    touched: Dict[int, SimpleNamespace] = {}
+    transitions, webhooks = [], []
+    text_changed, deadlines = set(), set()
+    status_changes, assigned = [], []
+    by_user = defaultdict(list)
+
+    pending = list(range(len(operations)))
+    while pending:
+        wave, later, seen = [], [], set()
+        for i in pending:
+            (later if ids[i] in seen else wave).append(i)
+            seen.add(ids[i])
+
+        groups = defaultdict(list)
+        for i in wave:
+            row = rows.get(ids[i])
+            if row is None:
+                outcomes[i] = (False, 'Issue not found', None)
+                continue
+            try:
+                values = _update_values(operations[i].data)
+            except (ValidationError, ValueError, TypeError) as e:
+                outcomes[i] = (False, str(e), None)
+                continue
+            groups[tuple(sorted(values.items()))].append(i)
+
+        for key, members in groups.items():
+            values = dict(key)
+            statement = {name: value for name, value in values.items() if name != 'description'}
+            if 'description' in values:
+                description = values['description']
+                statement['description_encrypted'] = encrypt_field(description) if description else None
+            new_status = values.get('status')
+            if new_status in CLOSED_STATUSES:
+                statement['closed_at'] = case((issues.c.status.in_(CLOSED_STATUSES), issues.c.closed_at), else_=now)
+            elif new_status is not None:
+                statement['closed_at'] = case((issues.c.status == new_status, issues.c.closed_at), else_=None)
+            statement['updated_at'] = now
+
+            db.session.execute(
+                update(issues).where(issues.c.id.in_([ids[i] for i in members])).values(**statement)
+            )
+
+            for i in members:
+                row = rows[ids[i]]
+                user_id = operations[i].metadata.get('user_id')
+                before_states.setdefault(row.id, AnalyticsService.issue_state(row))
+                old_status, old_assignee, had_due = row.status, row.assignee_id, row.due_date
+
+                for name, value in values.items():
+                    if name in ISSUE_COLUMNS:
+                        setattr(row, name, value)
+                row.updated_at = now
+
+                if new_status is not None and new_status != old_status:
+                    transitions.append({'issue_id': row.id, 'from_status': old_status,
+                                        'to_status': new_status, 'user_id': user_id, 'timestamp': now})
+                    status_changes.append((row, old_status))
+                if 'assignee_id' in values and row.assignee_id != old_assignee and row.assignee_id:
+                    assigned.append(row)
+                if 'title' in values or 'description' in values:
+                    text_changed.add(row.id)
+                if ('due_date' in values or row.status != old_status) and (row.due_date or had_due):
+                    deadlines.add(row.id)
+
+                touched[row.id] = row
+                summary = IssueService._issue_summary(row)
+                webhooks.append(summary)
+                by_user[user_id].append(row.key)
+                outcomes[i] = (True, None, summary)
+
+        pending = later
+
+    if transitions:
+        db.session.execute(insert(WorkflowTransition.__table__), transitions)
+    _queue_webhooks('updated', webhooks)
+    for issue_id in deadlines:
+        schedule_issue_deadline(touched[issue_id])
+
+    if touched:
+        changed = list(touched.values())
+        on_commit(lambda: AnalyticsService.record_issue_changes(
+            (row.project_id, before_states[row.id], AnalyticsService.issue_state(row)) for row in changed
+        ))
+        on_commit(lambda: [CacheInvalidator.invalidate_issue(p) for p in {row.project_id for row in changed}])
+        on_commit(lambda: _search_index_call(
+            'update_issue_fields_many', [row for row in changed if row.id not in text_changed]
+        ))
+        if text_changed:
+            on_commit(lambda: [_search_index_call('index_issue', issue)
+                               for issue in Issue.query.filter(Issue.id.in_(text_changed))])
+        on_commit(lambda: [IssueService._publish_realtime('updated', row.project_id, row.id, row)
+                           for row in changed])
+        on_commit(lambda: [IssueService._dispatch_automation('ISSUE_STATUS_CHANGED', row, from_status=old)
+                           for row, old in status_changes])
+        on_commit(lambda: [IssueService._dispatch_automation('ISSUE_ASSIGNED', row) for row in assigned])
+        on_commit(lambda: _log_bulk('ISSUE_UPDATED', by_user, 'Bulk updated'))
+
+    return outcomes
+
+
+def bulk_delete_issues(operations: List[BatchOperation], on_commit: Callable) -> List:
+    """Delete a chunk of issues, their comments, attachments, links and history."""
+    from app.cache import CacheInvalidator
+    from app.scheduling import cancel_timers
+    from app.services.analytics_service import AnalyticsService
+    from app.services.issue_service import IssueService
+
+    ids = [_issue_id(op) for op in operations]
+    rows = _load_issues(i for i in ids if i is not None)
+    outcomes: List = []
+    deleted: Dict[int, SimpleNamespace] = {}
+    by_user = defaultdict(list)
+
+    for operation, issue_id in zip(operations, ids):
+        row = rows.get(issue_id)
+        if row is None or issue_id in deleted:
+            outcomes.append((False, 'Issue not found', None))
+            continue
+        deleted[issue_id] = row
+        by_user[operation.metadata.get('user_id')].append(row.key)
+        outcomes.append((True, None, {'id': row.id, 'key': row.key}))
+
+    if not deleted:
+        return outcomes
+
+    removed = list(deleted.values())
+    _queue_webhooks('deleted', [IssueService._issue_summary(row) for row in removed])
+    cancel_timers([f'issue_deadline:{row.id}' for row in removed if row.due_date])
+    released = _release_attachment_blobs(list(deleted))
+    _delete_issue_rows(list(deleted))
+
+    on_commit(lambda: AnalyticsService.record_issue_changes(
+        (row.project_id, AnalyticsService.issue_state(row), None) for row in removed
+    ))
+    on_commit(lambda: [CacheInvalidator.invalidate_issue(p) for p in {row.project_id for row in removed}])
+    on_commit(lambda: _search_index_call('remove_issues', list(deleted)))
+    on_commit(lambda: [IssueService._publish_realtime('deleted', row.project_id, row.id) for row in removed])
+    on_commit(lambda: _log_bulk('ISSUE_DELETED', by_user, 'Bulk deleted', severity='WARNING'))
+    if released:
+        on_commit(lambda: _remove_blob_files(released))
+    return outcomes
+
+
+def _release_attachment_blobs(ids: List[int]) -> List[str]:
+    """
+    Drop the blob references held by the issues' attachments.
+
+    The attachment rows go with the generic foreign key sweep, which the
+    ORM flush hook does not see, so references are released here in the
+    same transaction, grouped per blob.
+
+    Returns:
+        list: Digests of blobs left unreferenced
+    """
+    from app.models import Attachment, db
+    from app.upload.storage import BlobStore
+
+    attachments = Attachment.__table__
+    counts = dict(db.session.execute(
+        select(attachments.c.blob_id, func.count())
+        .where(attachments.c.issue_id.in_(ids), attachments.c.blob_id.isnot(None))
+        .group_by(attachments.c.blob_id)
+    ).all())
+    return BlobStore.release_blobs(counts)
+
+
+def _remove_blob_files(digests: List[str]):
+    from app.upload import get_blob_store
+
+    store = get_blob_store()
+    if store is not None:
+        for sha256 in digests:
+            store.remove_unreferenced(sha256)
+
+
+def _delete_issue_rows(ids: List[int]):
+    """
+    Delete issues and the rows that reference them.
+
+    Foreign keys declared ON DELETE CASCADE are deleted and nullable ones
+    cleared explicitly, since SQLite does not enforce them by default.
+    Subtasks are detached rather than deleted, as the ORM does.
+    """
+    from app.models import Issue, db
+
+    issues = Issue.__table__
+    for table in db.metadata.sorted_tables:
+        for fk in table.foreign_keys:
+            if fk.column is not issues.c.id:
+                continue
+            column = fk.parent
+            if table is issues or (fk.ondelete or '').upper() != 'CASCADE':
+                if column.nullable:
+                    db.session.execute(update(table).where(column.in_(ids)).values({column.name: None}))
+            else:
+                db.session.execute(delete(table).where(column.in_(ids)))
+    db.session.execute(delete(issues).where(issues.c.id.in_(ids)))
+
+
+def create_issue(operation: BatchOperation) -> Dict:
+    """Create one issue through IssueService."""
+    from app.services.issue_service import IssueService
+
+    data = dict(operation.data)
+    project_id = data.pop('project_id', None)
+    title = data.pop('title', None)
+    data.setdefault('reporter_id', operation.metadata.get('user_id'))
+    success, issue, message = IssueService.create_issue(project_id, title, **data)
+    if not success:
+        raise ValueError(message)
+    return IssueService._issue_summary(issue)
+
+
+def update_issue(operation: BatchOperation) -> Dict:
+    """Update one issue through IssueService."""
+    from app.services.issue_service import IssueService
+
+    issue_id = _issue_id(operation)
+    success, issue, message = IssueService.update_issue(
+        issue_id, operation.data, updated_by=operation.metadata.get('user_id')
+    )
+    if not success:
+        raise ValueError(message)
+    return IssueService._issue_summary(issue)
+
+
+def delete_issue(operation: BatchOperation) -> Dict:
+    """Delete one issue through IssueService."""
+    from app.services.issue_service import IssueService
+
+    issue_id = _issue_id(operation)
+    success, message = IssueService.delete_issue(issue_id, deleted_by=operation.metadata.get('user_id'))
+    if not success:
+        raise ValueError(message)
+    return {'id': issue_id}
+
+
+def register_issue_operations(processor: BatchProcessor):
+    """Register the issue handlers on a batch processor."""
+    processor.register_operation('issue', OperationType.CREATE, create_issue)
+    processor.register_operation('issue', OperationType.UPDATE, update_issue)
+    processor.register_operation('issue', OperationType.DELETE, delete_issue)
+    processor.register_bulk_operation('issue', OperationType.UPDATE, bulk_update_issues)
+    processor.register_bulk_operation('issue', OperationType.DELETE, bulk_delete_issues)
@@ -92,10 +92,17 @@ class BackgroundSyncManager:
         Args:
             schedule: SyncSchedule instance
         """
+        from app.scheduling import schedule_timer
+        
         self.schedules[schedule.id] = schedule
         schedule.next_sync = (
             datetime.now() + timedelta(seconds=schedule.interval)
         ).isoformat()
+        # A no-op at import time; the scheduler arms default schedules itself.
+        # The caller commits.
+        schedule_timer(f'sync:{schedule.id}', 'sync',
+                       datetime.utcnow() + timedelta(seconds=schedule.interval),
+                       {'schedule_id': schedule.id, 'tag': schedule.tag}, interval=schedule.interval)
         logger.info(f"Registered sync schedule: {schedule.name}")
     
     def register_sync_handler(self, tag: str, handler: Callable) -> None:
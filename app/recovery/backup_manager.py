@@ -2,18 +2,32 @@
 """
 Advanced backup and recovery system.
 Supports incremental backups, scheduling, encryption, and point-in-time recovery.
+
+Backups are taken online with SQLite's backup API and stored as compressed
+page blocks plus a manifest of block hashes (see page_backup); incremental
+and differential backups store only the blocks that changed.
 """
 
 import logging
 import json
 import gzip
+import os
 import shutil
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 from enum import Enum
 import hashlib
-import sqlite3
+
+from .page_backup import (
+    block_hash,
+    copy_into,
+    get_codec,
+    parallel_map,
+    read_blocks,
+    read_frame,
+    snapshot_database,
+)
 
 logger = logging.getLogger('backup')
 
@@ -75,25 +89,51 @@ class BackupMetadata:
             'notes': self.notes,
             'error_message': self.error_message
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BackupMetadata':
+        """Rebuild metadata saved by to_dict()."""
+        meta = cls(data['backup_id'], BackupType(data['backup_type']))
+        meta.status = BackupStatus(data['status'])
+        meta.created_at = datetime.fromisoformat(data['created_at'])
+        if data.get('completed_at'):
+            meta.completed_at = datetime.fromisoformat(data['completed_at'])
+        for name in ('size_bytes', 'file_count', 'database_size_bytes', 'checksum', 'parent_backup_id',
+                     'encrypted', 'compression', 'retention_days', 'notes', 'error_message'):
+            if name in data:
+                setattr(meta, name, data[name])
+        return meta
 
 
 class BackupManager:
     """Manages database and file backups."""
     
-    def __init__(self, backup_dir: str = "backups", db_path: str = "instance/app.db"):
+    def __init__(self, backup_dir: str = "backups", db_path: str = "instance/app.db",
+                 compression: str = "zstd", workers: Optional[int] = None,
+                 block_pages: int = 256, step_pages: int = 1024):
         """
         Initialize backup manager.
         
         Args:
             backup_dir: Directory to store backups
             db_path: Path to application database
+            compression: Block compression ('zstd', or 'gzip'; zstd falls
+                         back to gzip when zstandard is not installed)
+            workers: Threads for hashing, compression and verification
+            block_pages: Database pages per incremental block
+            step_pages: Pages copied per online backup step
         """
         self.backup_dir = Path(backup_dir)
-        self.backup_dir.mkdir(exist_ok=True)
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
         
         self.db_path = Path(db_path)
         self.metadata_file = self.backup_dir / "backups.json"
         
+        self.codec = get_codec(compression)
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.block_pages = block_pages
+        self.step_pages = step_pages
+        
         self.backups: Dict[str, BackupMetadata] = {}
         self.last_full_backup_id: Optional[str] = None
         
@@ -109,12 +149,7 @@ class BackupManager:
                     self.last_full_backup_id = data.get('last_full_backup_id')
                     
                     for backup_id, metadata in data.get('backups', {}).items():
-                        meta = BackupMetadata(backup_id, BackupType[metadata['backup_type'].upper()])
-                        meta.status = BackupStatus[metadata['status'].upper()]
-                        meta.size_bytes = metadata.get('size_bytes', 0)
-                        meta.checksum = metadata.get('checksum', '')
-                        meta.parent_backup_id = metadata.get('parent_backup_id')
-                        self.backups[backup_id] = meta
+                        self.backups[backup_id] = BackupMetadata.from_dict(metadata)
                 
                 logger.info(f"Loaded metadata for {len(self.backups)} backups")
             except Exception as e:
@@ -130,8 +165,10 @@ class BackupManager:
                 }
             }
             
-            with open(self.metadata_file, 'w') as f:
+            tmp_file = self.metadata_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
                 json.dump(data, f, indent=2)
+            os.replace(tmp_file, self.metadata_file)
             
             logger.debug("Metadata saved")
         except Exception as e:
@@ -142,11 +179,59 @@ class BackupManager:
         sha256_hash = hashlib.sha256()
         
         with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+            for byte_block in iter(lambda: f.read(1024 * 1024), b""):
                 sha256_hash.update(byte_block)
         
         return sha256_hash.hexdigest()
     
+    # ------------------------------------------------------------------
+    # Backup files
+    # ------------------------------------------------------------------
+    
+    def _manifest_path(self, backup_id: str) -> Path:
+        return self.backup_dir / f"{backup_id}.manifest.json"
+    
+    def _archive_path(self, backup_id: str, compression: str) -> Path:
+        return self.backup_dir / f"{backup_id}.blocks.{get_codec(compression).extension}"
+    
+    def _legacy_path(self, backup_id: str) -> Path:
+        """Whole-file gzip written by earlier versions."""
+        return self.backup_dir / f"{backup_id}.db.gz"
+    
+    def _backup_files(self, backup_id: str) -> List[Path]:
+        return [p for p in self.backup_dir.glob(f"{backup_id}.*") if p.name != self.metadata_file.name]
+    
+    def _load_manifest(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        path = self._manifest_path(backup_id)
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    def _chain(self, backup_id: str) -> List[str]:
+        """Backup ids from backup_id back to its full backup."""
+        chain = []
+        current = backup_id
+        while current is not None and current in self.backups and current not in chain:
+            chain.append(current)
+            current = self.backups[current].parent_backup_id
+        return chain
+    
+    def _latest_backup_id(self, full_only: bool = False) -> Optional[str]:
+        usable = (BackupStatus.COMPLETED, BackupStatus.VERIFIED)
+        candidates = [
+            meta for meta in self.backups.values()
+            if meta.status in usable and self._manifest_path(meta.backup_id).exists()
+            and (not full_only or meta.backup_type == BackupType.FULL)
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda m: m.created_at).backup_id
+    
+    # ------------------------------------------------------------------
+    # Creating backups
+    # ------------------------------------------------------------------
+    
     def create_full_backup(self, notes: str = "") -> Tuple[bool, str, Optional[BackupMetadata]]:
         """
         Create full backup of database and application files.
@@ -154,35 +239,93 @@ class BackupManager:
         Returns:
             Tuple of (success, message, metadata)
         """
-        backup_id = f"backup_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_full"
-        metadata = BackupMetadata(backup_id, BackupType.FULL)
+        return self.create_backup(BackupType.FULL, notes)
+    
+    def create_incremental_backup(self, notes: str = "") -> Tuple[bool, str, Optional[BackupMetadata]]:
+        """Back up the blocks changed since the latest backup of any type."""
+        return self.create_backup(BackupType.INCREMENTAL, notes)
+    
+    def create_differential_backup(self, notes: str = "") -> Tuple[bool, str, Optional[BackupMetadata]]:
+        """Back up the blocks changed since the latest full backup."""
+        return self.create_backup(BackupType.DIFFERENTIAL, notes)
+    
+    def create_backup(self, backup_type: BackupType = BackupType.FULL,
+                      notes: str = "") -> Tuple[bool, str, Optional[BackupMetadata]]:
+        """
+        Create a backup without blocking database writers.
+        
+        Incremental and differential backups store only the blocks whose
+        hash differs from their parent's manifest; without a compatible
+        parent a full backup is taken instead.
+        
+        Returns:
+            Tuple of (success, message, metadata)
+        """
+        if not self.db_path.exists():
+            return False, "Database file not found", None
+        
+        parent_id = None
+        if backup_type != BackupType.FULL:
+            parent_id = self._latest_backup_id(full_only=backup_type == BackupType.DIFFERENTIAL)
+            if parent_id is None:
+                backup_type = BackupType.FULL
+        
+        backup_id = f"backup_{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{backup_type.value}"
+        metadata = BackupMetadata(backup_id, backup_type)
         metadata.notes = notes
+        metadata.compression = self.codec.name
+        metadata.status = BackupStatus.IN_PROGRESS
+        
+        snapshot = self.backup_dir / f"{backup_id}.snapshot"
+        archive = self._archive_path(backup_id, self.codec.name)
         
         try:
-            metadata.status = BackupStatus.IN_PROGRESS
+            page_size = snapshot_database(self.db_path, snapshot, self.step_pages)
+            block_size = page_size * self.block_pages
             
-            # Backup database
-            if not self.db_path.exists():
-                return False, "Database file not found", None
+            base_hashes: List[str] = []
+            if parent_id is not None:
+                parent = self._load_manifest(parent_id)
+                if parent and parent['block_size'] == block_size:
+                    base_hashes = parent['blocks']
+                    metadata.parent_backup_id = parent_id
+                else:
+                    metadata.backup_type = BackupType.FULL
             
-            backup_file = self.backup_dir / f"{backup_id}.db.gz"
+            hashes, stored, checksum = self._write_archive(snapshot, archive, block_size, base_hashes)
             
-            with open(self.db_path, 'rb') as f_in:
-                with gzip.open(backup_file, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+            manifest = {
+                'backup_id': backup_id,
+                'parent_backup_id': metadata.parent_backup_id,
+                'compression': self.codec.name,
+                'page_size': page_size,
+                'block_size': block_size,
+                'database_size': snapshot.stat().st_size,
+                'blocks': hashes,
+                'stored': {str(index): location for index, location in stored.items()}
+            }
+            tmp_manifest = self._manifest_path(backup_id).with_suffix('.tmp')
+            with open(tmp_manifest, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_manifest, self._manifest_path(backup_id))
             
             # Calculate metadata
-            metadata.database_size_bytes = self.db_path.stat().st_size
-            metadata.size_bytes = backup_file.stat().st_size
-            metadata.checksum = self._calculate_checksum(backup_file)
+            metadata.database_size_bytes = manifest['database_size']
+            metadata.size_bytes = archive.stat().st_size
+            metadata.file_count = len(stored)
+            metadata.checksum = checksum
             metadata.completed_at = datetime.utcnow()
             metadata.status = BackupStatus.COMPLETED
             
             self.backups[backup_id] = metadata
-            self.last_full_backup_id = backup_id
+            if metadata.backup_type == BackupType.FULL:
+                self.last_full_backup_id = backup_id
             
             self._save_metadata()
-            logger.info(f"Full backup created: {backup_id} ({metadata.size_bytes} bytes)")
+            logger.info(
+                f"{metadata.backup_type.value.capitalize()} backup created: {backup_id} "
+                f"({len(stored)}/{len(hashes)} blocks, {metadata.size_bytes} bytes)"
+            )
             
             return True, f"Backup created: {backup_id}", metadata
         
@@ -191,9 +334,87 @@ class BackupManager:
             metadata.error_message = str(e)
             self.backups[backup_id] = metadata
             self._save_metadata()
+            if archive.exists():
+                archive.unlink()
             
             logger.error(f"Backup failed: {e}")
             return False, f"Backup failed: {e}", None
+        
+        finally:
+            if snapshot.exists():
+                snapshot.unlink()
+    
+    def _write_archive(self, snapshot: Path, archive: Path, block_size: int,
+                       base_hashes: List[str]) -> Tuple[List[str], Dict[int, Tuple[int, int]], str]:
+        """
+        Hash every block of the snapshot and store the changed ones.
+        
+        Returns:
+            Tuple of (all block hashes, {block index: (offset, length)} of
+            stored frames, archive checksum)
+        """
+        codec = self.codec
+        
+        def process(item):
+            index, data = item
+            digest = block_hash(data)
+            if index < len(base_hashes) and base_hashes[index] == digest:
+                return digest, None
+            return digest, codec.compress(data)
+        
+        hashes: List[str] = []
+        stored: Dict[int, Tuple[int, int]] = {}
+        checksum = hashlib.sha256()
+        offset = 0
+        
+        with open(archive, 'wb') as out:
+            results = parallel_map(process, read_blocks(snapshot, block_size), self.workers)
+            for index, (digest, frame) in enumerate(results):
+                hashes.append(digest)
+                if frame is None:
+                    continue
+                out.write(frame)
+                checksum.update(frame)
+                stored[index] = (offset, len(frame))
+                offset += len(frame)
+        
+        return hashes, stored, checksum.hexdigest()
+    
+    # ------------------------------------------------------------------
+    # Restoring and verifying
+    # ------------------------------------------------------------------
+    
+    def _materialize(self, backup_id: str, dest: Path) -> None:
+        """Rebuild the database image of a backup from its chain."""
+        chain = self._chain(backup_id)
+        manifests = [self._load_manifest(bid) for bid in chain]
+        if any(m is None for m in manifests) or manifests[-1]['parent_backup_id'] is not None:
+            raise ValueError(f"Backup chain of {backup_id} is incomplete")
+        
+        head = manifests[0]
+        codecs = [get_codec(m['compression'], fallback=False) for m in manifests]
+        fds = [os.open(self._archive_path(bid, m['compression']), os.O_RDONLY)
+               for bid, m in zip(chain, manifests)]
+        
+        def load(index):
+            # The newest backup that stored this block holds its content
+            for fd, codec, manifest in zip(fds, codecs, manifests):
+                location = manifest['stored'].get(str(index))
+                if location is not None:
+                    data = codec.decompress(read_frame(fd, *location))
+                    if block_hash(data) != head['blocks'][index]:
+                        raise ValueError(f"Block {index} of {backup_id} is corrupt")
+                    return data
+            raise ValueError(f"Block {index} of {backup_id} is missing")
+        
+        try:
+            with open(dest, 'wb') as out:
+                for data in parallel_map(load, range(len(head['blocks'])), self.workers):
+                    out.write(data)
+                out.truncate(head['database_size'])
+        finally:
+            for fd in fds:
+                os.close(fd)
     
     def restore_backup(self, backup_id: str) -> Tuple[bool, str]:
         """
@@ -205,23 +426,29 @@ class BackupManager:
         if backup_id not in self.backups:
             return False, f"Backup not found: {backup_id}"
         
-        metadata = self.backups[backup_id]
-        backup_file = self.backup_dir / f"{backup_id}.db.gz"
-        
-        if not backup_file.exists():
+        legacy = self._legacy_path(backup_id)
+        if not self._manifest_path(backup_id).exists() and not legacy.exists():
             return False, "Backup file not found"
         
+        restored = self.backup_dir / f"{backup_id}.restore"
+        
         try:
+            if legacy.exists():
+                with gzip.open(legacy, 'rb') as f_in:
+                    with open(restored, 'wb') as f_out:
+                        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+            else:
+                self._materialize(backup_id, restored)
+            
             # Create safety backup first
             if self.db_path.exists():
                 safety_backup = self.db_path.with_suffix('.backup')
-                shutil.copy2(self.db_path, safety_backup)
+                snapshot_database(self.db_path, safety_backup, self.step_pages)
                 logger.info(f"Safety backup created: {safety_backup}")
             
-            # Restore from backup
-            with gzip.open(backup_file, 'rb') as f_in:
-                with open(self.db_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+            # Restore through the backup API so open connections see a
+            # consistent switch instead of a file rewritten under them
+            copy_into(restored, self.db_path)
             
             logger.info(f"Database restored from {backup_id}")
             return True, f"Successfully restored from {backup_id}"
@@ -229,11 +456,18 @@ class BackupManager:
         except Exception as e:
             logger.error(f"Restore failed: {e}")
             return False, f"Restore failed: {e}"
+        
+        finally:
+            if restored.exists():
+                restored.unlink()
     
     def verify_backup(self, backup_id: str) -> Tuple[bool, str]:
         """
         Verify backup integrity.
         
+        Checks the archive checksum, then decompresses and re-hashes every
+        stored block in parallel, and confirms the parent chain is present.
+        
         Returns:
             Tuple of (valid, message)
         """
@@ -241,20 +475,40 @@ class BackupManager:
             return False, "Backup not found"
         
         metadata = self.backups[backup_id]
-        backup_file = self.backup_dir / f"{backup_id}.db.gz"
+        manifest = self._load_manifest(backup_id)
+        legacy = self._legacy_path(backup_id)
         
-        if not backup_file.exists():
+        if manifest is None and not legacy.exists():
             return False, "Backup file not found"
         
         try:
-            # Verify checksum
-            current_checksum = self._calculate_checksum(backup_file)
-            if current_checksum != metadata.checksum:
-                return False, "Checksum mismatch"
-            
-            # Try to open as gzip
-            with gzip.open(backup_file, 'rb') as f:
-                f.read(1)  # Read first byte to verify
+            if manifest is None:
+                if self._calculate_checksum(legacy) != metadata.checksum:
+                    return False, "Checksum mismatch"
+                with gzip.open(legacy, 'rb') as f:
+                    f.read(1)  # Read first byte to verify
+            else:
+                archive = self._archive_path(backup_id, manifest['compression'])
+                if self._calculate_checksum(archive) != metadata.checksum:
+                    return False, "Checksum mismatch"
+                
+                codec = get_codec(manifest['compression'], fallback=False)
+                fd = os.open(archive, os.O_RDONLY)
+                try:
+                    def check(item):
+                        index, location = item
+                        data = codec.decompress(read_frame(fd, *location))
+                        return block_hash(data) == manifest['blocks'][int(index)]
+                    
+                    if not all(parallel_map(check, manifest['stored'].items(), self.workers)):
+                        return False, "Block checksum mismatch"
+                finally:
+                    os.close(fd)
+                
+                chain = self._chain(backup_id)
+                if any(self._load_manifest(bid) is None for bid in chain) or \
+                        self.backups[chain[-1]].parent_backup_id is not None:
+                    return False, "Parent backup missing"
             
             metadata.status = BackupStatus.VERIFIED
             self._save_metadata()
@@ -283,6 +537,9 @@ class BackupManager:
         """
         Clean up old backups based on retention policy.
         
+        Backups that a retained incremental or differential backup still
+        depends on are kept.
+        
         Returns:
             Tuple of (deleted_count, freed_bytes)
         """
@@ -290,15 +547,21 @@ class BackupManager:
         deleted_count = 0
         freed_bytes = 0
         
+        required = set()
+        for backup_id, metadata in self.backups.items():
+            if metadata.created_at >= cutoff_date:
+                required.update(self._chain(backup_id))
+        
         for backup_id, metadata in list(self.backups.items()):
-            if metadata.created_at < cutoff_date:
+            if metadata.created_at < cutoff_date and backup_id not in required:
                 try:
-                    backup_file = self.backup_dir / f"{backup_id}.db.gz"
-                    if backup_file.exists():
+                    for backup_file in self._backup_files(backup_id):
                         freed_bytes += backup_file.stat().st_size
                         backup_file.unlink()
                     
                     del self.backups[backup_id]
+                    if self.last_full_backup_id == backup_id:
+                        self.last_full_backup_id = None
                     deleted_count += 1
                     logger.info(f"Deleted old backup: {backup_id}")
                 
@@ -324,7 +587,8 @@ class BackupManager:
             'verified_backups': verified,
             'failed_backups': failed,
             'last_backup_id': self.last_full_backup_id,
-            'backup_directory': str(self.backup_dir)
+            'backup_directory': str(self.backup_dir),
+            'compression': self.codec.name
         }
 
 
@@ -332,10 +596,11 @@ class BackupManager:
 _backup_manager: Optional[BackupManager] = None
 
 
-def init_backup_manager(backup_dir: str = "backups", db_path: str = "instance/app.db") -> BackupManager:
-    """Initialize backup manager."""
+def init_backup_manager(backup_dir: str = "backups", db_path: str = "instance/app.db",
+                        **options) -> BackupManager:
+    """Initialize backup manager (options are passed to BackupManager)."""
     global _backup_manager
-    _backup_manager = BackupManager(backup_dir, db_path)
+    _backup_manager = BackupManager(backup_dir, db_path, **options)
     logger.info("✓ Backup manager initialized")
     return _backup_manager
 
@@ -4,7 +4,7 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +46,22 @@ class Schedule:
             self.delivery_methods = [DeliveryMethod.EMAIL]
         if self.recipients is None:
             self.recipients = []
+    
+    def to_dict(self) -> Dict:
+        """Convert to dictionary."""
+        data = asdict(self)
+        data['frequency'] = self.frequency.value
+        data['delivery_methods'] = [m.value for m in self.delivery_methods]
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Schedule':
+        """Rebuild a schedule from to_dict() output."""
+        return cls(**{
+            **data,
+            'frequency': ScheduleFrequency(data['frequency']),
+            'delivery_methods': [DeliveryMethod(m) for m in data.get('delivery_methods') or []] or None,
+        })
 
 
 class ReportScheduler:
@@ -96,6 +112,7 @@ class ReportScheduler:
         schedule.next_run = self._calculate_next_run(schedule).isoformat()
         
         self.schedules[schedule_id] = schedule
+        self._arm(schedule)
         logger.info(f"Schedule created: {schedule_id}")
         
         return schedule
@@ -137,6 +154,21 @@ class ReportScheduler:
         
         return next_run
     
+    @staticmethod
+    def _arm(schedule: Schedule) -> None:
+        """
+        Keep the schedule's timer (fired by the timer scheduler) in step.
+        
+        The timer carries the schedule, so whichever worker fires it can
+        deliver it. The caller commits.
+        """
+        from app.scheduling import schedule_timer
+        from app.scheduling.timers import to_utc
+        
+        fire_at = to_utc(datetime.fromisoformat(schedule.next_run)) if schedule.enabled else None
+        schedule_timer(f'report:{schedule.id}', 'report', fire_at,
+                       {'schedule_id': schedule.id, 'schedule': schedule.to_dict()})
+    
     def get_due_schedules(self) -> List[Schedule]:
         """
         Get schedules due to run.
@@ -165,10 +197,35 @@ class ReportScheduler:
             schedule_id: Schedule ID
         """
         if schedule_id in self.schedules:
-            schedule = self.schedules[schedule_id]
-            schedule.last_run = datetime.now().isoformat()
-            schedule.next_run = self._calculate_next_run(schedule).isoformat()
-            logger.info(f"Schedule executed: {schedule_id}")
+            self._advance(self.schedules[schedule_id])
+    
+    def _advance(self, schedule: Schedule) -> None:
+        schedule.last_run = datetime.now().isoformat()
+        schedule.next_run = self._calculate_next_run(schedule).isoformat()
+        self._arm(schedule)
+        logger.info(f"Schedule executed: {schedule.id}")
+    
+    def run_schedule(self, schedule_id: str, definition: Optional[Dict] = None) -> bool:
+        """
+        Deliver a due schedule's report and move it to its next run.
+        
+        Args:
+            schedule_id: Schedule ID
+            definition: The schedule's to_dict(), used when it was created on another worker
+            
+        Returns:
+            False if the schedule is unknown here and no definition was given
+        """
+        schedule = self.schedules.get(schedule_id)
+        if schedule is None and definition is not None:
+            schedule = Schedule.from_dict(definition)
+        if schedule is None:
+            return False
+        
+        if schedule.enabled:
+            self._deliver(schedule, {'id': schedule.report_config_id})
+            self._advance(schedule)
+        return True
     
     def deliver_report(self, schedule_id: str, report_data: Dict) -> Dict:
         """
@@ -184,7 +241,9 @@ class ReportScheduler:
         if schedule_id not in self.schedules:
             return {'status': 'error', 'message': 'Schedule not found'}
         
-        schedule = self.schedules[schedule_id]
+        return self._deliver(self.schedules[schedule_id], report_data)
+    
+    def _deliver(self, schedule: Schedule, report_data: Dict) -> Dict:
         results = {}
         
         for method in schedule.delivery_methods:
@@ -192,7 +251,7 @@ class ReportScheduler:
             results[method.value] = result
         
         delivery_log = {
-            'schedule_id': schedule_id,
+            'schedule_id': schedule.id,
             'timestamp': datetime.now().isoformat(),
             'report_id': report_data.get('id'),
             'methods': results,
@@ -200,7 +259,7 @@ class ReportScheduler:
         }
         
         self.delivery_log.append(delivery_log)
-        logger.info(f"Report delivered: {schedule_id}")
+        logger.info(f"Report delivered: {schedule.id}")
         
         return {'status': 'success', 'results': results}
     
@@ -231,7 +290,10 @@ class ReportScheduler:
     def enable_schedule(self, schedule_id: str) -> bool:
         """Enable a schedule."""
         if schedule_id in self.schedules:
-            self.schedules[schedule_id].enabled = True
+            schedule = self.schedules[schedule_id]
+            schedule.enabled = True
+            schedule.next_run = self._calculate_next_run(schedule).isoformat()
+            self._arm(schedule)
             return True
         return False
     
@@ -239,13 +301,16 @@ class ReportScheduler:
         """Disable a schedule."""
         if schedule_id in self.schedules:
             self.schedules[schedule_id].enabled = False
+            self._arm(self.schedules[schedule_id])
             return True
         return False
     
     def delete_schedule(self, schedule_id: str) -> bool:
         """Delete a schedule."""
         if schedule_id in self.schedules:
-            del self.schedules[schedule_id]
+            schedule = self.schedules.pop(schedule_id)
+            schedule.enabled = False
+            self._arm(schedule)
             return True
         return False
     
@@ -5,9 +5,9 @@ Handles user management, team management, and admin dashboard.
 Requires admin or super_admin role for all operations.
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, abort
-from app.middleware import admin_required
-from app.services import UserService, ProjectService, AuditService
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, abort, jsonify
+from app.middleware import admin_required, get_current_user
+from app.services import UserService, ProjectService, AuditService, StatsService
 from app.utils.security import validate_csrf_token, sanitize_input
 from app.security.audit import log_security_event, log_admin_action
 
@@ -19,8 +19,7 @@ def verify_admin_privilege():
     Additional check to prevent privilege escalation.
     Verifies that the current session truly has admin privileges.
     """
-    from app.models import User
-    user = User.query.get(session.get('user_id'))
+    user = get_current_user()
     if not user or user.role not in ['admin', 'super_admin']:
         log_security_event(
             'PRIVILEGE_ESCALATION_ATTEMPT',
@@ -36,46 +35,24 @@ def verify_admin_privilege():
 @admin_required
 def admin_dashboard():
     """Admin dashboard with overview."""
-    from app.models import User, Team, Project, Issue
+    from app.models import User, Project
     from datetime import datetime, timedelta
-    from sqlalchemy import func
     
     # Double-check admin privilege (defense in depth)
     admin_user = verify_admin_privilege()
     
-    # Get counts
-    user_count = User.query.count()
-    team_count = Team.query.count()
-    project_count = Project.query.count()
-    issue_count = Issue.query.count()
-    
-    # Get online users (active in last 5 minutes)
-    five_mins_ago = datetime.utcnow() - timedelta(minutes=5)
-    online_users_count = User.query.filter(User.last_activity >= five_mins_ago).count() if hasattr(User, 'last_activity') else 0
-    
-    # Get active users (last 24 hours)
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    active_users_count = User.query.filter(User.last_login >= yesterday).count() if hasattr(User, 'last_login') else 0
-    
-    # Get project status breakdown
-    project_status = {}
-    projects = Project.query.all()
-    for project in projects:
-        status = project.status or 'Unknown'
-        project_status[status] = project_status.get(status, 0) + 1
+    # Counts and status breakdowns, aggregated in SQL and cached
+    stats = StatsService.get_admin_stats()
     
     # Get recent projects
-    recent_projects = Project.query.order_by(Project.created_at.desc()).limit(5).all() if hasattr(Project, 'created_at') else []
+    recent_projects = Project.query.order_by(Project.created_at.desc()).limit(5).all()
     
     # Get recent users with activity status
     recent_users = User.query.order_by(User.id.desc()).limit(5).all()
     
-    # Get online users list
-    online_users = User.query.filter(User.last_activity >= five_mins_ago).order_by(User.last_activity.desc()).all() if hasattr(User, 'last_activity') else []
-    
-    # Get users and teams for context
-    users = User.query.all()
-    teams = Team.query.all()
+    # Get the most recently active online users
+    five_mins_ago = datetime.utcnow() - timedelta(minutes=5)
+    online_users = User.query.filter(User.last_activity >= five_mins_ago).order_by(User.last_activity.desc()).limit(4).all()
     
     # Get recent security events
     security_events = AuditService.get_security_events(hours=24)
@@ -93,25 +70,36 @@ def admin_dashboard():
     )
     
     return render_template('admin/dashboard.html',
-                          user_count=user_count,
-                          team_count=team_count,
-                          project_count=project_count,
-                          issue_count=issue_count,
-                          total_issues=issue_count,
-                          active_users_count=active_users_count,
-                          online_users_count=online_users_count,
+                          stats=stats,
+                          user_count=stats.user_count,
+                          team_count=stats.team_count,
+                          project_count=stats.project_count,
+                          issue_count=stats.issue_count,
+                          total_issues=stats.issue_count,
+                          active_users_count=stats.active_users_count,
+                          online_users_count=stats.online_users_count,
                           online_users=online_users,
-                          project_status=project_status,
+                          project_status=stats.project_status,
                           projects=recent_projects,
                           recent_projects=recent_projects,
                           recent_users=recent_users,
-                          users=users,
-                          teams=teams,
                           security_events=security_events[:10],
                           suspicious=suspicious,
                           audit_stats=audit_stats)
 
 
+@admin_bp.route('/stats')
+@admin_required
+def admin_stats():
+    """Dashboard counts as JSON."""
+    verify_admin_privilege()
+    
+    return jsonify({
+        'success': True,
+        'data': StatsService.get_admin_stats().to_dict()
+    })
+
+
 @admin_bp.route('/users')
 @admin_required
 def admin_users():
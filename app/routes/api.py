@@ -6,8 +6,11 @@ All endpoints require authentication and include IDOR prevention.
 """
 
 from flask import Blueprint, request, jsonify, session
+from sqlalchemy.orm import selectinload
 from app.middleware.auth import api_auth_required, rate_limit_check
-from app.services import ProjectService, IssueService, ReportService
+from app.middleware.principal import get_current_user, get_principal
+from app.services import ProjectService, IssueService, ReportService, StatsService
+from app.utils.pagination import KeysetPaginator, parse_fields, stream_page
 from app.utils.security import sanitize_input
 from app.security.audit import log_security_event
 from app.security.validation import InputValidator, sanitize_html
@@ -20,58 +23,133 @@ def check_project_access(project_id):
     Check if the current user has access to a project.
     Returns (has_access: bool, project: Project or None).
     """
-    from app.models import User
-    
-    user = User.query.get(session.get('user_id'))
-    if not user:
+    principal = get_principal()
+    if principal is None:
         return False, None
     
     project = ProjectService.get_project_by_id(project_id)
     if not project:
         return False, None
     
-    # Admin/super_admin can access all
-    if user.role in ['admin', 'super_admin']:
-        return True, project
-    
-    # Check team membership
-    if project.team_id and user.team_id == project.team_id:
+    # Admins see every project, others the cached accessible set
+    if principal.can_access_project(project.id):
         return True, project
     
     # Log suspicious access
     log_security_event(
         'IDOR_ATTEMPT',
-        user_id=user.id,
+        user_id=principal.id,
         details=f"User attempted to access project {project_id} without authorization",
         severity='WARNING'
     )
     return False, None
 
 
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _username(user):
+    return user.username if user else None
+
+
+# Sparse fieldsets: field name -> serializer. Fields backed by a relationship
+# are listed in the *_RELATIONS maps and eager-loaded only when requested.
+PROJECT_FIELDS = {
+    'id': lambda p: p.id,
+    'name': lambda p: p.name,
+    'key': lambda p: p.key,
+    'status': lambda p: p.status,
+    'workflow_type': lambda p: p.workflow_type,
+    'team': lambda p: p.team.name if p.team else None,
+    'start_date': lambda p: _isoformat(p.start_date),
+    'end_date': lambda p: _isoformat(p.end_date),
+    'created_at': lambda p: _isoformat(p.created_at)
+}
+PROJECT_DEFAULT_FIELDS = ['id', 'name', 'key', 'status', 'workflow_type', 'team', 'start_date', 'end_date']
+PROJECT_RELATIONS = {'team': 'team'}
+
+ISSUE_FIELDS = {
+    'id': lambda i: i.id,
+    'key': lambda i: i.key,
+    'title': lambda i: i.title,
+    'status': lambda i: i.status,
+    'priority': lambda i: i.priority,
+    'type': lambda i: i.issue_type,
+    'assignee': lambda i: _username(i.assignee),
+    'reporter': lambda i: _username(i.reporter),
+    'story_points': lambda i: i.story_points,
+    'position': lambda i: i.position,
+    'due_date': lambda i: _isoformat(i.due_date),
+    'created_at': lambda i: _isoformat(i.created_at),
+    'updated_at': lambda i: _isoformat(i.updated_at)
+}
+ISSUE_DEFAULT_FIELDS = ['id', 'key', 'title', 'status', 'priority', 'type', 'assignee', 'due_date']
+ISSUE_RELATIONS = {'assignee': 'assignee', 'reporter': 'reporter'}
+
+STATUS_UPDATE_FIELDS = {
+    'id': lambda u: u.id,
+    'description': lambda u: u.update_text,
+    'status': lambda u: u.status,
+    'progress': lambda u: u.progress_percentage,
+    'hours_worked': lambda u: u.hours_worked,
+    'blockers': lambda u: u.blockers,
+    'notes': lambda u: u.completion_notes,
+    'team_members': lambda u: u.team_members_count,
+    'completion_days': lambda u: u.estimated_completion_days,
+    'date': lambda u: u.date.isoformat(),
+    'user': lambda u: u.user.username
+}
+STATUS_UPDATE_RELATIONS = {'user': 'user'}
+
+
+def _list_response(query, model, order_by, fields_map, default_fields, relations,
+                   default_limit=100, max_limit=None, descending=False):
+    """
+    Stream one keyset page of ``query`` using the request's cursor/limit/fields.
+    
+    Returns a Response, or a (json, 400) tuple for bad parameters.
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'), fields_map, default_fields)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    limit = request.args.get('limit', default_limit, type=int)
+    
+    if max_limit:
+        limit = min(max(limit, 1), max_limit)
+    
+    for name in fields:
+        if name in relations:
+            query = query.options(selectinload(getattr(model, relations[name])))
+    
+    try:
+        paginator = KeysetPaginator(query, order_by, cursor=request.args.get('cursor'),
+                                    per_page=limit, descending=descending)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return stream_page(paginator, fields_map, fields)
+
+
 # ============= PROJECT APIs =============
 
 @api_bp.route('/projects', methods=['GET'])
 @api_auth_required
 def get_projects():
-    """Get all accessible projects."""
-    from app.models import User
+    """
+    Get accessible projects, oldest first.
     
-    user = User.query.get(session['user_id'])
-    projects = ProjectService.get_user_accessible_projects(user)
+    Query params: limit, cursor (from pagination.next_cursor), fields.
+    """
+    from app.models import Project
     
-    return jsonify({
-        'success': True,
-        'data': [{
-            'id': p.id,
-            'name': p.name,
-            'key': p.key,
-            'status': p.status,
-            'workflow_type': p.workflow_type,
-            'team': p.team.name if p.team else None,
-            'start_date': p.start_date.isoformat() if p.start_date else None,
-            'end_date': p.end_date.isoformat() if p.end_date else None
-        } for p in projects]
-    })
+    user = get_current_user()
+    query = ProjectService.query_user_accessible_projects(user)
+    
+    return _list_response(query, Project, [Project.created_at, Project.id],
+                          PROJECT_FIELDS, PROJECT_DEFAULT_FIELDS, PROJECT_RELATIONS)
 
 
 @api_bp.route('/project/<int:project_id>', methods=['GET'])
@@ -145,7 +223,14 @@ def get_project_status(project_id):
 @api_bp.route('/project/<int:project_id>/issues', methods=['GET'])
 @api_auth_required
 def get_issues(project_id):
-    """Get issues for a project."""
+    """
+    Get issues for a project in board order.
+    
+    Query params: status, priority, assignee, type, limit,
+    cursor (from pagination.next_cursor), fields.
+    """
+    from app.models import Issue
+    
     has_access, project = check_project_access(project_id)
     
     if not has_access:
@@ -158,21 +243,10 @@ def get_issues(project_id):
         'issue_type': request.args.get('type')
     }
     
-    issues = IssueService.get_issues_by_project(project_id, filters)
+    query = IssueService.query_issues_by_project(project_id, filters)
     
-    return jsonify({
-        'success': True,
-        'data': [{
-            'id': i.id,
-            'key': i.key,
-            'title': i.title,
-            'status': i.status,
-            'priority': i.priority,
-            'type': i.issue_type,
-            'assignee': i.assignee.username if i.assignee else None,
-            'due_date': i.due_date.isoformat() if i.due_date else None
-        } for i in issues]
-    })
+    return _list_response(query, Issue, [Issue.position, Issue.id],
+                          ISSUE_FIELDS, ISSUE_DEFAULT_FIELDS, ISSUE_RELATIONS)
 
 
 @api_bp.route('/project/<int:project_id>/issue/<int:issue_id>', methods=['GET'])
@@ -427,37 +501,57 @@ def add_status_update(project_id):
 @api_bp.route('/project/<int:project_id>/status-updates', methods=['GET'])
 @api_auth_required
 def get_status_updates(project_id):
-    """Get status updates for a project."""
+    """
+    Get status updates for a project, newest first.
+    
+    Query params: limit, cursor (from pagination.next_cursor), fields;
+    offset selects the legacy offset paging.
+    """
+    from app.models import ProjectUpdate
+    
     has_access, project = check_project_access(project_id)
     
     if not has_access:
         return jsonify({'success': False, 'error': 'Project not found'}), 404
     
-    # Validate and sanitize query params
-    try:
-        limit = min(max(int(request.args.get('limit', 50)), 1), 100)  # Between 1 and 100
-        offset = max(int(request.args.get('offset', 0)), 0)  # At least 0
-    except (ValueError, TypeError):
-        limit = 50
-        offset = 0
+    # Legacy offset paging, kept for existing clients
+    if 'offset' in request.args and 'cursor' not in request.args:
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 100)  # Between 1 and 100
+            offset = max(int(request.args.get('offset', 0)), 0)  # At least 0
+        except (ValueError, TypeError):
+            limit = 50
+            offset = 0
+        
+        updates = ReportService.get_project_updates(project_id, limit=limit, offset=offset)
+        
+        return jsonify({
+            'success': True,
+            'data': [{name: serialize(u) for name, serialize in STATUS_UPDATE_FIELDS.items()}
+                     for u in updates]
+        })
+    
+    query = ReportService.query_project_updates(project_id)
     
-    updates = ReportService.get_project_updates(project_id, limit=limit, offset=offset)
+    return _list_response(query, ProjectUpdate, [ProjectUpdate.date, ProjectUpdate.id],
+                          STATUS_UPDATE_FIELDS, list(STATUS_UPDATE_FIELDS), STATUS_UPDATE_RELATIONS,
+                          default_limit=50, max_limit=100, descending=True)
+
+
+# ============= DASHBOARD STATS =============
+
+@api_bp.route('/dashboard/stats', methods=['GET'])
+@api_auth_required
+def get_dashboard_stats():
+    """Get project status buckets and the current user's work counts."""
+    user = get_current_user()
     
     return jsonify({
         'success': True,
-        'data': [{
-            'id': u.id,
-            'description': u.update_text,
-            'status': u.status,
-            'progress': u.progress_percentage,
-            'hours_worked': u.hours_worked,
-            'blockers': u.blockers,
-            'notes': u.completion_notes,
-            'team_members': u.team_members_count,
-            'completion_days': u.estimated_completion_days,
-            'date': u.date.isoformat(),
-            'user': u.user.username
-        } for u in updates]
+        'data': {
+            'projects': StatsService.get_project_stats(user).to_dict(),
+            'user': StatsService.get_user_stats(user.id).to_dict()
+        }
     })
 
 
@@ -559,23 +653,20 @@ def get_recent_items():
 @api_auth_required
 def search_autocomplete():
     """Get autocomplete suggestions for search."""
-    from app.models import Issue, Project, User
+    from app.models import Project, User
+    from app.search import SearchEngine
+    from sqlalchemy import or_
     
     query = request.args.get('q', '').strip()
     if len(query) < 2:
         return jsonify({'success': True, 'data': {'issues': [], 'projects': [], 'users': []}})
     
-    # Search issues by key or title
-    issues = Issue.query.filter(
-        db.or_(
-            Issue.key.ilike(f'%{query}%'),
-            Issue.title.ilike(f'%{query}%')
-        )
-    ).limit(5).all()
+    # Search issues by key, title, description and comments via the search index
+    issues = SearchEngine.autocomplete_issues(query, limit=5)
     
     # Search projects by name or key
     projects = Project.query.filter(
-        db.or_(
+        or_(
             Project.name.ilike(f'%{query}%'),
             Project.key.ilike(f'%{query}%')
         )
@@ -1,7 +1,6 @@
 """Workflow Automation Routes - Manage and execute workflows"""
 
 from flask import Blueprint, request, jsonify
-from functools import wraps
 from datetime import datetime
 import logging
 import uuid
@@ -13,6 +12,8 @@ from app.automation.workflow import (
     TriggerType,
     ActionType,
 )
+from app.middleware.auth import api_admin_required
+from app.models import db
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +21,8 @@ automation_bp = Blueprint('automation', __name__, url_prefix='/api/v1/automation
 
 
 def require_auth(f):
-    """Require authentication"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization', '')
-        if not token:
-            return jsonify({'error': 'Unauthorized'}), 401
-        return f(*args, **kwargs)
-    return decorated_function
+    """Require a signed-in administrator; workflows can call external webhooks"""
+    return api_admin_required(f)
 
 
 # ============================================================================
@@ -104,6 +99,7 @@ def create_workflow():
         
         # Create workflow
         workflow = workflow_engine.create_workflow(name, description, trigger, actions)
+        db.session.commit()
         
         return jsonify({
             'status': 'success',
@@ -120,6 +116,7 @@ def enable_workflow(workflow_id):
     """Enable workflow"""
     try:
         success = workflow_engine.enable_workflow(workflow_id)
+        db.session.commit()
         
         return jsonify({
             'status': 'success' if success else 'error',
@@ -136,6 +133,7 @@ def disable_workflow(workflow_id):
     """Disable workflow"""
     try:
         success = workflow_engine.disable_workflow(workflow_id)
+        db.session.commit()
         
         return jsonify({
             'status': 'success' if success else 'error',
@@ -152,6 +150,7 @@ def delete_workflow(workflow_id):
     """Delete workflow"""
     try:
         success = workflow_engine.delete_workflow(workflow_id)
+        db.session.commit()
         
         return jsonify({
             'status': 'success' if success else 'error',
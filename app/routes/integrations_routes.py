@@ -5,8 +5,8 @@ Endpoints for managing Slack, GitHub, Jira, webhooks, and sync operations.
 """
 
 from flask import Blueprint, request, jsonify
-from functools import wraps
 from typing import Dict, Any
+import asyncio
 import logging
 
 from app.integrations import (
@@ -14,8 +14,11 @@ from app.integrations import (
     GitHubIntegration,
     JiraIntegration,
     WebhookManager,
+    WebhookEvent,
     SyncManager
 )
+from app.middleware.auth import api_admin_required
+from app.models import db
 
 logger = logging.getLogger(__name__)
 
@@ -31,12 +34,8 @@ sync_manager = SyncManager()
 
 
 def require_auth(f):
-    """Require authentication for endpoint."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # In production, implement proper auth checking
-        return f(*args, **kwargs)
-    return decorated_function
+    """Require a signed-in administrator; integrations send project data off-site."""
+    return api_admin_required(f)
 
 
 # ============================================================================
@@ -251,14 +250,16 @@ def webhooks():
         event_type = data.get('event_type')
         target_url = data.get('target_url')
         
-        webhook = webhook_manager.register_webhook(
-            event_type=event_type,
-            target_url=target_url,
-            active=True
-        )
+        try:
+            webhook = webhook_manager.register_webhook(
+                url=target_url,
+                event=WebhookEvent(event_type)
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         return jsonify(webhook.to_dict()), 201
     
-    webhooks_list = [w.to_dict() for w in webhook_manager.webhooks.values()]
+    webhooks_list = [w.to_dict() for w in webhook_manager.list_webhooks()]
     return jsonify({'webhooks': webhooks_list})
 
 
@@ -270,8 +271,9 @@ def webhook_detail(webhook_id):
         webhook_manager.delete_webhook(webhook_id)
         return jsonify({'status': 'success'}), 204
     
-    if webhook_id in webhook_manager.webhooks:
-        return jsonify(webhook_manager.webhooks[webhook_id].to_dict())
+    webhook = webhook_manager.get_webhook(webhook_id)
+    if webhook is not None:
+        return jsonify(webhook.to_dict())
     
     return jsonify({'error': 'Webhook not found'}), 404
 
@@ -280,11 +282,11 @@ def webhook_detail(webhook_id):
 @require_auth
 def webhook_test(webhook_id):
     """Test webhook delivery."""
-    if webhook_id not in webhook_manager.webhooks:
+    if webhook_manager.get_webhook(webhook_id) is None:
         return jsonify({'error': 'Webhook not found'}), 404
     
-    webhook = webhook_manager.webhooks[webhook_id]
-    result = webhook_manager.deliver(webhook, {'test': True})
+    result = asyncio.run(webhook_manager.deliver(webhook_id, {'test': True}))
+    db.session.commit()
     return jsonify(result)
 
 
@@ -390,7 +392,7 @@ def integrations_health():
             'slack': {'configured': slack_service.config.workspace_url is not None},
             'github': {'configured': github_service.config.repo_url is not None},
             'jira': {'configured': jira_service.config.instance_url is not None},
-            'webhooks': {'active': len(webhook_manager.webhooks)},
+            'webhooks': {'active': sum(1 for w in webhook_manager.list_webhooks() if w.active)},
             'sync': {'jobs': len(sync_manager.sync_jobs)}
         }
     })
@@ -5,8 +5,8 @@ Handles dashboard, landing page, and general navigation.
 """
 
 from flask import Blueprint, render_template, redirect, url_for, session, request, flash, abort
-from app.middleware import login_required
-from app.services import ProjectService, ReportService, IssueService
+from app.middleware import login_required, get_current_user
+from app.services import ProjectService, ReportService, IssueService, StatsService
 from app.models import db, User, Team, Project, Issue, ProjectUpdate
 
 main_bp = Blueprint('main', __name__)
@@ -30,9 +30,9 @@ def index():
 @login_required
 def dashboard():
     """Main dashboard view."""
-    from app.models import User, Team
+    from app.models import Team
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Get accessible projects based on role
     projects = ProjectService.get_user_accessible_projects(user)
@@ -43,14 +43,8 @@ def dashboard():
     else:
         teams = [user.team] if user.team else []
     
-    # Calculate statistics
-    stats = {
-        'total': len(projects),
-        'not_started': len([p for p in projects if p.status == 'Not Started']),
-        'in_progress': len([p for p in projects if p.status in ['In Progress', 'Active']]),
-        'on_hold': len([p for p in projects if p.status in ['On Hold', 'Blocked', 'At Risk']]),
-        'completed': len([p for p in projects if p.status == 'Completed'])
-    }
+    # Status buckets, aggregated in SQL and cached
+    stats = StatsService.get_project_stats(user).to_dict()
     
     # Get Gantt data for admin
     gantt_data = None
@@ -77,7 +71,7 @@ def reports():
     search_query = request.args.get('search', '')
     status_filter = request.args.get('status', '')
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Get user's updates
     updates = ReportService.get_user_updates(
@@ -112,9 +106,9 @@ def reports():
 @login_required
 def gantt_chart():
     """Gantt chart view."""
-    from app.models import User, Team
+    from app.models import Team
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     if user.role not in ['admin', 'super_admin', 'manager']:
         flash('Access denied. Manager or admin access required.', 'error')
@@ -133,9 +127,9 @@ def gantt_chart():
 @login_required
 def calendar():
     """Calendar view for tasks and projects."""
-    from app.models import User, Team
+    from app.models import Team
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     projects = ProjectService.get_user_accessible_projects(user)
     teams = Team.query.all()
     
@@ -148,10 +142,9 @@ def calendar():
 @login_required
 def profile():
     """User profile page."""
-    from app.models import User
     from app.admin_secure.auth import AdminSecurityModel
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Get 2FA status
     admin_sec = AdminSecurityModel.query.filter_by(user_id=user.id).first()
@@ -164,10 +157,9 @@ def profile():
 @login_required
 def settings():
     """User settings page."""
-    from app.models import User
     from app.admin_secure.auth import AdminSecurityModel
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Get 2FA status
     admin_sec = AdminSecurityModel.query.filter_by(user_id=user.id).first()
@@ -180,9 +172,9 @@ def settings():
 @login_required
 def issues():
     """Issues navigator with advanced filters."""
-    from app.models import User, Issue, Project
+    from app.models import Issue, Project
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     projects = ProjectService.get_user_accessible_projects(user)
     
     # Get all issues from user's accessible projects
@@ -220,8 +212,8 @@ def issues():
 @login_required
 def board():
     """Kanban/Scrum board view."""
-    from app.models import User, Issue
-    user = User.query.get(session['user_id'])
+    from app.models import Issue
+    user = get_current_user()
     projects = ProjectService.get_user_accessible_projects(user)
     
     # Get first project with issues for default view
@@ -253,8 +245,8 @@ def board():
 @login_required
 def backlog():
     """Backlog with sprint planning."""
-    from app.models import User, Issue, Sprint
-    user = User.query.get(session['user_id'])
+    from app.models import Issue, Sprint
+    user = get_current_user()
     projects = ProjectService.get_user_accessible_projects(user)
     
     # Get first project for default view
@@ -290,8 +282,8 @@ def backlog():
 @login_required
 def timeline():
     """Timeline/Roadmap Gantt view."""
-    from app.models import User, Issue, Sprint
-    user = User.query.get(session['user_id'])
+    from app.models import Issue, Sprint
+    user = get_current_user()
     projects = ProjectService.get_user_accessible_projects(user)
     
     # Get first project for default view
@@ -322,8 +314,7 @@ def timeline():
 @login_required
 def service_desk():
     """Service Desk queue system."""
-    from app.models import User
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     return render_template('service_desk.html')
 
 
@@ -331,8 +322,7 @@ def service_desk():
 @login_required
 def analytics():
     """Reports & Analytics system."""
-    from app.models import User
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     projects = ProjectService.get_user_accessible_projects(user)
     return render_template('analytics.html', projects=projects)
 
@@ -341,8 +331,7 @@ def analytics():
 @login_required
 def automation():
     """Automation & Workflows."""
-    from app.models import User
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     return render_template('automation.html')
 
 
@@ -350,8 +339,7 @@ def automation():
 @login_required
 def search():
     """Advanced Search & Filters."""
-    from app.models import User
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     return render_template('search.html')
 
 
@@ -360,7 +348,7 @@ def search():
 def users():
     """User Management & Permissions."""
     from app.models import User
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     if user.role not in ['admin', 'super_admin']:
         flash('Access denied. Admin access required.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -371,8 +359,7 @@ def users():
 @login_required
 def integrations():
     """Integrations & Apps."""
-    from app.models import User
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     return render_template('integrations.html')
 
 
@@ -380,8 +367,7 @@ def integrations():
 @login_required
 def change_calendar():
     """Change Calendar & Risk Management."""
-    from app.models import User
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     return render_template('change_calendar.html')
 
 
@@ -389,7 +375,7 @@ def change_calendar():
 @login_required
 def update_profile():
     """Update user profile."""
-    from app.models import User, db
+    from app.models import db
     from app.utils.security import validate_csrf_token
     
     csrf_token = request.form.get('csrf_token')
@@ -397,7 +383,7 @@ def update_profile():
         flash('Security error. Please try again.', 'error')
         return redirect(url_for('main.settings'))
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Update allowed fields
     email = request.form.get('email', '').strip()
@@ -423,7 +409,7 @@ def facial_setup_guide():
     """Show facial ID setup guide with working links"""
     from flask import current_app
     
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Only admins can set up facial ID
     if user.role not in ['admin', 'super_admin']:
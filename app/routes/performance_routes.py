@@ -83,11 +83,15 @@ def cache_invalidate():
 def get_cache_stats():
     """Get cache statistics."""
     try:
+        from app.cache import get_tiered_cache
+        
         stats = performance_engine.get_cache_stats()
+        tiered = get_tiered_cache()
         
         return jsonify({
             'status': 'success',
-            'cache_stats': stats
+            'cache_stats': stats,
+            'application_cache': tiered.get_stats() if tiered else None
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
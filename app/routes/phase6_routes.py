@@ -63,15 +63,15 @@ def execute_batch():
             op_id = op.get('id')
             
             if op_type == 'create':
-                builder.create(resource, op_data)
+                builder.create(resource, op_data, user_id=g.user.id)
             elif op_type == 'update':
                 if not op_id:
                     return jsonify({'error': 'Update operation requires id'}), 400
-                builder.update(resource, op_id, op_data)
+                builder.update(resource, op_id, op_data, user_id=g.user.id)
             elif op_type == 'delete':
                 if not op_id:
                     return jsonify({'error': 'Delete operation requires id'}), 400
-                builder.delete(resource, op_id)
+                builder.delete(resource, op_id, user_id=g.user.id)
         
         result = builder.execute(atomic=data.get('atomic', False))
         
@@ -128,7 +128,7 @@ def list_backups():
 @phase6_bp.route('/backups/create', methods=['POST'])
 @require_admin
 def create_backup():
-    """Create a new full backup."""
+    """Create a full, incremental or differential backup."""
     try:
         from app.recovery import get_backup_manager
         
@@ -136,10 +136,16 @@ def create_backup():
         if not manager:
             return jsonify({'error': 'Backup manager not initialized'}), 500
         
+        from app.recovery import BackupType
+        
         data = request.get_json() or {}
         notes = data.get('notes', '')
+        try:
+            backup_type = BackupType(data.get('type', 'full'))
+        except ValueError:
+            return jsonify({'error': 'type must be full, incremental or differential'}), 400
         
-        success, message, metadata = manager.create_full_backup(notes=notes)
+        success, message, metadata = manager.create_backup(backup_type, notes=notes)
         
         if success:
             return jsonify({
@@ -319,14 +325,16 @@ def get_operation_stats(operation_name):
 def websocket_status():
     """Get WebSocket connection status."""
     try:
-        from app.websocket import get_connected_users
+        from app.websocket import get_connected_users, get_fanout_bus
         
         users = get_connected_users()
+        bus = get_fanout_bus()
         
         return jsonify({
             'connected': True,
             'active_connections': len(users),
-            'connected_users': users
+            'connected_users': users,
+            'fanout': bus.get_stats() if bus else None
         })
     
     except Exception as e:
@@ -5,11 +5,12 @@ Handles project views, kanban boards, and issue management.
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, abort, jsonify
-from app.middleware import login_required, project_access_required, permission_required
+from app.middleware import login_required, project_access_required, permission_required, get_current_user
 from app.services import ProjectService, IssueService, ReportService
 from app.utils.security import validate_csrf_token, sanitize_input
 from app.security.validation import sanitize_html, InputValidator, validate_file_upload
 from app.security.audit import log_security_event
+from app.scheduling import schedule_sprint_end, schedule_timer
 from app.models import db
 
 projects_bp = Blueprint('projects', __name__)
@@ -452,10 +453,9 @@ def add_status_update(project_id):
 @project_access_required
 def upload_attachment(project_id, issue_id):
     """Upload file attachment to an issue with security validation."""
-    import os
     from werkzeug.utils import secure_filename
     from app.models import Issue, Attachment, db
-    from flask import current_app
+    from app.upload import get_blob_store, UploadError
     
     csrf_token = request.form.get('csrf_token')
     if not validate_csrf_token(csrf_token):
@@ -487,56 +487,198 @@ def upload_attachment(project_id, issue_id):
         flash(error, 'error')
         return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
     
-    # Create uploads directory securely
-    upload_folder = os.path.join(current_app.root_path, '..', 'uploads', str(project_id))
-    os.makedirs(upload_folder, exist_ok=True)
-    
     # Secure filename and prevent path traversal
-    original_filename = file.filename
     filename = secure_filename(file.filename)
     if not filename:
         flash('Invalid filename', 'error')
         return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
     
-    # Add timestamp to avoid conflicts and prevent enumeration
-    import time
-    import secrets
-    unique_filename = f"{int(time.time())}_{secrets.token_hex(8)}_{filename}"
-    filepath = os.path.join(upload_folder, unique_filename)
+    # Stream into content-addressed storage; identical files share one blob
+    store = get_blob_store()
+    try:
+        blob = store.ingest(file.stream, filename)
+    except UploadError as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+        return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
     
-    # Ensure filepath stays within upload folder (double-check)
-    if not os.path.abspath(filepath).startswith(os.path.abspath(upload_folder)):
-        log_security_event(
-            'PATH_TRAVERSAL_ATTEMPT',
-            user_id=session.get('user_id'),
-            details=f"Path traversal attempt in filename: {original_filename}",
-            severity='CRITICAL'
-        )
-        abort(400)
+    attachment = _create_attachment(issue_id, filename, blob)
+    db.session.commit()
+    
+    log_security_event(
+        'FILE_UPLOADED',
+        user_id=session.get('user_id'),
+        details=f"File uploaded to issue {issue_id}: {filename} ({attachment.file_size} bytes)",
+        severity='INFO'
+    )
     
-    file.save(filepath)
+    flash('File uploaded successfully', 'success')
+    return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
+
+
+def _create_attachment(issue_id, filename, blob):
+    """Add an Attachment row pointing at a stored blob (caller commits)."""
+    from app.models import Attachment, db
+    from app.upload import get_blob_store
     
-    # Create attachment record
     attachment = Attachment(
         issue_id=issue_id,
+        user_id=session['user_id'],
         filename=filename,
-        filepath=filepath,
-        file_size=os.path.getsize(filepath),
-        mime_type=file.content_type,
-        uploaded_by=session['user_id']
+        file_path=get_blob_store().blob_path(blob.sha256),
+        file_size=blob.size,
+        mime_type=blob.mime_type,
+        blob=blob
     )
     db.session.add(attachment)
+    return attachment
+
+
+# Resumable uploads (tus 1.0 core protocol: create, HEAD offset, PATCH append)
+
+TUS_VERSION = '1.0.0'
+
+
+def _tus_response(body='', status=204, **headers):
+    from flask import make_response
+    
+    response = make_response(body, status)
+    response.headers['Tus-Resumable'] = TUS_VERSION
+    response.headers['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response.headers[name.replace('_', '-')] = str(value)
+    return response
+
+
+def _tus_metadata(header):
+    """Parse an Upload-Metadata header ('key base64value, ...')."""
+    import base64
+    
+    metadata = {}
+    for pair in (header or '').split(','):
+        parts = pair.strip().split(' ', 1)
+        if parts[0]:
+            try:
+                metadata[parts[0]] = base64.b64decode(parts[1]).decode('utf-8') if len(parts) > 1 else ''
+            except (ValueError, UnicodeDecodeError):
+                continue
+    return metadata
+
+
+def _get_upload_session(issue_id, upload_id):
+    from app.models import UploadSession
+    
+    upload = UploadSession.query.get_or_404(upload_id)
+    if upload.issue_id != issue_id or upload.user_id != session.get('user_id'):
+        abort(404)
+    return upload
+
+
+@projects_bp.route('/<int:project_id>/issue/<int:issue_id>/uploads', methods=['POST'])
+@login_required
+@project_access_required
+def create_upload(project_id, issue_id):
+    """Start a resumable attachment upload."""
+    from werkzeug.utils import secure_filename
+    from app.models import Issue
+    from app.upload import get_blob_store, UploadError
+    
+    if not validate_csrf_token(request.headers.get('X-CSRFToken')):
+        return _tus_response('Security error', 403)
+    
+    issue = Issue.query.get_or_404(issue_id)
+    if issue.project_id != project_id:
+        abort(404)
+    
+    try:
+        total_size = int(request.headers.get('Upload-Length', ''))
+    except ValueError:
+        return _tus_response('Upload-Length is required', 400)
+    
+    filename = secure_filename(_tus_metadata(request.headers.get('Upload-Metadata')).get('filename', ''))
+    
+    try:
+        upload = get_blob_store().create_upload(session['user_id'], issue_id, filename, total_size)
+    except UploadError as e:
+        return _tus_response(str(e), e.status)
+    
+    location = url_for('projects.upload_chunk', project_id=project_id, issue_id=issue_id, upload_id=upload.id)
+    return _tus_response('', 201, Location=location, Upload_Offset=0)
+
+
+@projects_bp.route('/<int:project_id>/issue/<int:issue_id>/uploads/<upload_id>', methods=['HEAD', 'PATCH', 'DELETE'])
+@login_required
+@project_access_required
+def upload_chunk(project_id, issue_id, upload_id):
+    """Report the offset of (HEAD), append to (PATCH) or cancel (DELETE) an upload."""
+    from app.models import db
+    from app.upload import get_blob_store, UploadError
+    
+    upload = _get_upload_session(issue_id, upload_id)
+    store = get_blob_store()
+    if store.is_expired(upload):
+        store.abort_upload(upload)
+        return _tus_response('Upload expired', 410)
+    
+    if request.method == 'HEAD':
+        return _tus_response('', 200, Upload_Offset=upload.offset, Upload_Length=upload.total_size)
+    
+    if not validate_csrf_token(request.headers.get('X-CSRFToken')):
+        return _tus_response('Security error', 403)
+    
+    if request.method == 'DELETE':
+        store.abort_upload(upload)
+        return _tus_response()
+    
+    if request.mimetype != 'application/offset+octet-stream':
+        return _tus_response('Content-Type must be application/offset+octet-stream', 415)
+    
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return _tus_response('Upload-Offset is required', 400)
+    
+    try:
+        blob = store.append_upload(upload, request.stream, offset)
+    except UploadError as e:
+        db.session.rollback()
+        if e.status == 415:
+            store.abort_upload(upload)
+        return _tus_response(str(e), e.status)
+    
+    if blob is None:
+        return _tus_response(Upload_Offset=upload.offset)
+    
+    attachment = _create_attachment(issue_id, upload.filename, blob)
     db.session.commit()
     
     log_security_event(
         'FILE_UPLOADED',
         user_id=session.get('user_id'),
-        details=f"File uploaded to issue {issue_id}: {filename}",
+        details=f"File uploaded to issue {issue_id}: {attachment.filename} ({attachment.file_size} bytes)",
         severity='INFO'
     )
     
-    flash('File uploaded successfully', 'success')
-    return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
+    return _tus_response(Upload_Offset=blob.size, X_Attachment_Id=attachment.id)
+
+
+@projects_bp.route('/<int:project_id>/issue/<int:issue_id>/attachment/<int:attachment_id>')
+@login_required
+@project_access_required
+def download_attachment(project_id, issue_id, attachment_id):
+    """Download an attachment (Range, ETag and front-server offload aware)."""
+    from app.models import Issue, Attachment
+    from app.upload import send_attachment
+    
+    issue = Issue.query.get_or_404(issue_id)
+    if issue.project_id != project_id:
+        abort(404)
+    
+    attachment = Attachment.query.get_or_404(attachment_id)
+    if attachment.issue_id != issue_id:
+        abort(404)
+    
+    return send_attachment(attachment, download=request.args.get('download') == '1')
 
 
 @projects_bp.route('/<int:project_id>/issue/<int:issue_id>/attachment/<int:attachment_id>/delete', methods=['POST'])
@@ -563,7 +705,7 @@ def delete_attachment(project_id, issue_id, attachment_id):
     
     # Check authorization: owner, admin, or manager
     user_role = session.get('role', 'user')
-    is_owner = check_ownership(attachment, session.get('user_id'), 'uploaded_by')
+    is_owner = check_ownership(Attachment, attachment.id, 'user_id')
     is_privileged = user_role in ['admin', 'super_admin', 'manager']
     
     if not is_owner and not is_privileged:
@@ -576,9 +718,10 @@ def delete_attachment(project_id, issue_id, attachment_id):
         flash('You do not have permission to delete this attachment', 'error')
         return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
     
-    # Delete file from disk
-    if os.path.exists(attachment.filepath):
-        os.remove(attachment.filepath)
+    # Shared blobs are released (and removed with their last attachment) on
+    # flush; legacy files directly
+    if attachment.blob_id is None and os.path.exists(attachment.file_path):
+        os.remove(attachment.file_path)
     
     db.session.delete(attachment)
     db.session.commit()
@@ -653,6 +796,8 @@ def add_sprint(project_id):
             status='planned'
         )
         db.session.add(sprint)
+        db.session.flush()
+        schedule_sprint_end(sprint)
         db.session.commit()
         
         flash('Sprint created successfully', 'success')
@@ -690,6 +835,7 @@ def edit_sprint(project_id, sprint_id):
         
         sprint.start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else None
         sprint.end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else None
+        schedule_sprint_end(sprint)
         
         db.session.commit()
         
@@ -717,6 +863,7 @@ def delete_sprint(project_id, sprint_id):
     
     # Remove sprint association from issues
     Issue.query.filter_by(sprint_id=sprint_id).update({'sprint_id': None})
+    schedule_timer(f'sprint_end:{sprint_id}', 'sprint_end', None)
     
     db.session.delete(sprint)
     db.session.commit()
@@ -1003,7 +1150,7 @@ def update_issue_labels(project_id, issue_id):
 @project_access_required
 def add_comment(project_id, issue_id):
     """Add a comment to an issue."""
-    from app.models import Issue, Comment, db
+    from app.models import Issue
     
     csrf_token = request.form.get('csrf_token')
     if not validate_csrf_token(csrf_token):
@@ -1019,13 +1166,10 @@ def add_comment(project_id, issue_id):
         flash('Comment cannot be empty', 'error')
         return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
     
-    comment = Comment(
-        issue_id=issue_id,
-        author_id=session['user_id'],
-        content=content
-    )
-    db.session.add(comment)
-    db.session.commit()
+    success, comment, message = IssueService.add_comment(issue_id, session['user_id'], content)
+    if not success:
+        flash(message, 'error')
+        return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
     
     flash('Comment added successfully', 'success')
     return redirect(url_for('projects.issue_view', project_id=project_id, issue_id=issue_id))
@@ -1037,6 +1181,7 @@ def add_comment(project_id, issue_id):
 def delete_comment(project_id, issue_id, comment_id):
     """Delete a comment with proper authorization."""
     from app.models import Comment, db
+    from app.search import get_search_index
     from app.security.authorization import check_ownership
     
     csrf_token = request.form.get('csrf_token')
@@ -1066,6 +1211,10 @@ def delete_comment(project_id, issue_id, comment_id):
     db.session.delete(comment)
     db.session.commit()
     
+    index = get_search_index()
+    if index is not None:
+        index.remove_comment(comment_id)
+    
     log_security_event(
         'COMMENT_DELETED',
         user_id=session.get('user_id'),
@@ -1185,12 +1334,12 @@ def project_deployments(project_id):
 @project_access_required
 def project_settings(project_id):
     """Project settings page."""
-    from app.models import User, Team
+    from app.models import Team
     
     project = ProjectService.get_project_by_id(project_id)
     
     # Check if user has permission to edit project settings
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     if user.role not in ['admin', 'super_admin'] and project.owner_id != user.id:
         flash('You do not have permission to edit project settings', 'error')
@@ -7,6 +7,7 @@ from app.reporting import (
     ReportConfig, ReportType, CustomReportConfig, Column, Filter,
     Schedule, ScheduleFrequency, DeliveryMethod
 )
+from app.models import db
 import logging
 import io
 
@@ -236,6 +237,7 @@ def create_schedule():
             day_of_week=data.get('day_of_week'),
             day_of_month=data.get('day_of_month')
         )
+        db.session.commit()
         
         return jsonify({
             'status': 'created',
@@ -252,6 +254,7 @@ def enable_schedule(schedule_id):
     """Enable a schedule."""
     try:
         success = report_scheduler.enable_schedule(schedule_id)
+        db.session.commit()
         
         return jsonify({
             'status': 'enabled' if success else 'not_found'
@@ -266,6 +269,7 @@ def disable_schedule(schedule_id):
     """Disable a schedule."""
     try:
         success = report_scheduler.disable_schedule(schedule_id)
+        db.session.commit()
         
         return jsonify({
             'status': 'disabled' if success else 'not_found'
@@ -0,0 +1,24 @@
+# app/scheduling/__init__.py
+"""
+Durable timers for time-based automation, reports and sync jobs.
+"""
+
+from .timers import (
+    TimerScheduler,
+    init_scheduler,
+    get_scheduler,
+    schedule_timer,
+    cancel_timers,
+    schedule_issue_deadline,
+    schedule_sprint_end
+)
+
+__all__ = [
+    'TimerScheduler',
+    'init_scheduler',
+    'get_scheduler',
+    'schedule_timer',
+    'cancel_timers',
+    'schedule_issue_deadline',
+    'schedule_sprint_end'
+]
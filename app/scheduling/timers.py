@@ -0,0 +1,577 @@
+# app/scheduling/timers.py
+"""
+Timer Scheduler
+Durable timers for deadline reminders, scheduled reports, sync jobs and upload cleanup.
+
+Every timer is a row in scheduled_timer, keyed by what it is for
+('issue_deadline:42', 'report:sched_1'). Request code arms, moves and
+cancels timers inside its own transaction when a due date, sprint end or
+schedule changes, so nothing ever has to scan issues or sprints looking
+for work.
+
+One process per deployment holds the scheduler lease (a row in
+scheduler_lease, renewed every poll) and fires timers. The leader loads the
+table into a heap once when it takes the lease and afterwards only reads
+rows changed since its last poll (updated_at is indexed), so arming,
+cancelling and firing a timer each cost O(log n). A popped entry is checked
+against its row before it fires, which drops timers cancelled or moved by
+other processes.
+
+Report, sync and workflow schedules live in the memory of the worker that
+defined them, so their timers carry the definition and the leader runs it
+from there. A timer the leader cannot resolve is retried later, not dropped.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger('scheduler')
+
+LEASE_NAME = 'timers'
+
+# Rows committed slightly after their updated_at was stamped must still be
+# seen by the next poll
+SYNC_OVERLAP = timedelta(seconds=30)
+
+# Issue statuses that no longer get deadline reminders
+CLOSED_STATUSES = ('done', 'closed')
+
+# How long a timer the leader cannot resolve waits before it is tried again
+UNRESOLVED_RETRY = timedelta(minutes=15)
+
+
+def to_utc(value: datetime) -> datetime:
+    """Naive UTC datetime from a naive local time (report schedules use local time)."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class TimerScheduler:
+    """Fires persisted timers from a heap on the lease holder."""
+
+    def __init__(self, app, poll_interval: float = 5.0, lease_seconds: int = 30,
+                 batch_size: int = 100):
+        """
+        Initialize timer scheduler.
+
+        Args:
+            app: Flask app whose database holds the timers
+            poll_interval: Maximum seconds between checks for changed timers
+            lease_seconds: How long leadership lasts without renewal
+            batch_size: Timers fired per transaction
+        """
+        self.app = app
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.handlers: Dict[str, Callable[[Dict], object]] = {}
+        self.seeders: List[Callable[[], None]] = []
+        self.autostart = False
+
+        # (fire_at, seq, key); an entry is live only while _armed[key] == fire_at
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._armed: Dict[str, datetime] = {}
+        self._seq = itertools.count()
+        self._watermark: Optional[datetime] = None
+        self.is_leader = False
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+        self.stats = {
+            'fired': 0,
+            'stale': 0,
+            'dropped': 0,
+            'errors': 0,
+            'loads': 0
+        }
+
+    def register(self, kind: str, handler: Callable[[Dict], object]) -> None:
+        """
+        Register the handler for a timer kind.
+
+        The handler gets the timer payload and may return False to drop the
+        timer (its target is gone) or a datetime (UTC) to re-arm it; otherwise
+        interval timers repeat and one-shot timers are removed.
+        """
+        self.handlers[kind] = handler
+
+    def register_seeder(self, seeder: Callable[[], None]) -> None:
+        """Register a function that arms missing timers whenever leadership is taken."""
+        self.seeders.append(seeder)
+
+    # ------------------------------------------------------------------
+    # Arming (caller commits)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def arm(key: str, kind: str, fire_at: datetime, payload: Optional[Dict] = None,
+            interval: Optional[int] = None):
+        """Create or move a timer in the current session."""
+        from app.models import ScheduledTimer, db
+
+        timer = ScheduledTimer.query.filter_by(key=key).first() or ScheduledTimer(key=key)
+        timer.kind = kind
+        timer.fire_at = fire_at
+        timer.interval_seconds = interval
+        timer.payload = json.dumps(payload or {})
+        db.session.add(timer)
+        return timer
+
+    @staticmethod
+    def cancel(key: str) -> bool:
+        """Remove a timer in the current session."""
+        from app.models import ScheduledTimer
+
+        return bool(ScheduledTimer.query.filter_by(key=key).delete())
+
+    @staticmethod
+    def cancel_many(keys: List[str]) -> int:
+        """Remove many timers in the current session."""
+        from app.models import ScheduledTimer
+
+        if not keys:
+            return 0
+        return ScheduledTimer.query.filter(ScheduledTimer.key.in_(keys)).delete(synchronize_session=False)
+
+    # ------------------------------------------------------------------
+    # Leadership
+    # ------------------------------------------------------------------
+
+    def acquire_lease(self, now: Optional[datetime] = None) -> bool:
+        """Take or renew the scheduler lease; load the heap on taking it."""
+        from app.models import SchedulerLease, db
+
+        now = now or datetime.utcnow()
+        expires = now + timedelta(seconds=self.lease_seconds)
+
+        with db.engine.begin() as conn:
+            renewed = conn.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == LEASE_NAME)
+                .where(or_(SchedulerLease.owner == self.owner, SchedulerLease.expires_at < now))
+                .values(owner=self.owner, expires_at=expires)
+            ).rowcount
+        if not renewed:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(SchedulerLease).values(name=LEASE_NAME, owner=self.owner,
+                                                               expires_at=expires))
+                renewed = 1
+            except IntegrityError:
+                pass
+
+        leader = bool(renewed)
+        if leader and not self.is_leader:
+            logger.info(f"Scheduler lease taken by {self.owner}")
+            for seeder in self.seeders:
+                seeder()
+            self._load()
+        elif not leader and self.is_leader:
+            logger.info(f"Scheduler lease lost by {self.owner}")
+            with self._lock:
+                self._heap, self._armed = [], {}
+        self.is_leader = leader
+        return leader
+
+    def release_lease(self) -> None:
+        from app.models import SchedulerLease, db
+
+        with db.engine.begin() as conn:
+            conn.execute(update(SchedulerLease)
+                         .where(SchedulerLease.name == LEASE_NAME, SchedulerLease.owner == self.owner)
+                         .values(expires_at=datetime.utcnow()))
+        self.is_leader = False
+
+    # ------------------------------------------------------------------
+    # Heap
+    # ------------------------------------------------------------------
+
+    def _push(self, key: str, fire_at: datetime) -> None:
+        if self._armed.get(key) == fire_at:
+            return
+        self._armed[key] = fire_at
+        heapq.heappush(self._heap, (fire_at, next(self._seq), key))
+
+    def _load(self) -> None:
+        """Read every timer once, when leadership is taken."""
+        from app.models import ScheduledTimer, db
+
+        started = datetime.utcnow()
+        rows = db.session.query(ScheduledTimer.key, ScheduledTimer.fire_at).all()
+        with self._lock:
+            self._heap = [(fire_at, next(self._seq), key) for key, fire_at in rows]
+            heapq.heapify(self._heap)
+            self._armed = {key: fire_at for key, fire_at in rows}
+        self._watermark = started
+        self.stats['loads'] += 1
+
+    def sync(self) -> int:
+        """Pick up timers armed or moved since the last poll."""
+        from app.models import ScheduledTimer, db
+
+        started = datetime.utcnow()
+        rows = db.session.query(ScheduledTimer.key, ScheduledTimer.fire_at) \
+            .filter(ScheduledTimer.updated_at >= self._watermark - SYNC_OVERLAP).all()
+        with self._lock:
+            for key, fire_at in rows:
+                self._push(key, fire_at)
+        self._watermark = started
+        return len(rows)
+
+    def next_fire_at(self) -> Optional[datetime]:
+        """Time of the earliest live timer."""
+        with self._lock:
+            while self._heap and self._armed.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def _pop_due(self, now: datetime) -> List[str]:
+        keys = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(keys) < self.batch_size:
+                fire_at, _, key = heapq.heappop(self._heap)
+                if self._armed.get(key) == fire_at:
+                    del self._armed[key]
+                    keys.append(key)
+        return keys
+
+    # ------------------------------------------------------------------
+    # Firing
+    # ------------------------------------------------------------------
+
+    def run_pending(self, now: Optional[datetime] = None) -> int:
+        """
+        Fire due timers (leader only; call inside an app context).
+
+        Returns:
+            int: Timers fired
+        """
+        from app.models import ScheduledTimer, db
+
+        now = now or datetime.utcnow()
+        if not self.acquire_lease(now):
+            return 0
+        self.sync()
+
+        fired = 0
+        rearmed = []
+        while True:
+            keys = self._pop_due(now)
+            if not keys:
+                break
+
+            for timer in ScheduledTimer.query.filter(ScheduledTimer.key.in_(keys)).all():
+                if timer.fire_at > now:
+                    # Moved later by another process
+                    self.stats['stale'] += 1
+                else:
+                    self._fire(timer, now)
+                    fired += 1
+
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.stats['errors'] += 1
+                logger.error(f"Timer batch not saved: {e}")
+            rearmed.extend(db.session.query(ScheduledTimer.key, ScheduledTimer.fire_at)
+                           .filter(ScheduledTimer.key.in_(keys)).all())
+
+        # Pushed after the loop, so a timer re-armed in the past fires next round
+        with self._lock:
+            for key, fire_at in rearmed:
+                self._push(key, fire_at)
+        return fired
+
+    def _fire(self, timer, now: datetime) -> None:
+        from app.models import db
+
+        fired_at = timer.fire_at
+        handler = self.handlers.get(timer.kind)
+        result = None
+        if handler is None:
+            logger.warning(f"No handler for timer kind {timer.kind}; retrying {timer.key} later")
+            result = now + UNRESOLVED_RETRY
+        else:
+            try:
+                result = handler(json.loads(timer.payload or '{}'))
+                self.stats['fired'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Timer {timer.key} failed: {e}")
+
+        if timer.fire_at != fired_at:
+            return  # the handler re-armed it
+        if result is False:
+            self.stats['dropped'] += 1
+            db.session.delete(timer)
+        elif isinstance(result, datetime):
+            timer.fire_at = result
+        elif timer.interval_seconds:
+            # Coalesce runs missed while no leader was up
+            step = timedelta(seconds=timer.interval_seconds)
+            missed = (now - timer.fire_at) // step
+            timer.fire_at = timer.fire_at + step * (missed + 1)
+        else:
+            db.session.delete(timer)
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the scheduler thread (again, after a fork)."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='timer-scheduler', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            wait = self.poll_interval
+            try:
+                with self.app.app_context():
+                    self.run_pending()
+                next_fire = self.next_fire_at()
+                if next_fire is not None:
+                    wait = min(wait, max(0.0, (next_fire - datetime.utcnow()).total_seconds()))
+            except Exception as e:
+                logger.error(f"Scheduler round failed: {e}")
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the thread and hand the lease over."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            if self.is_leader:
+                try:
+                    with self.app.app_context():
+                        self.release_lease()
+                except Exception as e:
+                    logger.warning(f"Scheduler lease not released: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get scheduler statistics."""
+        with self._lock:
+            armed = len(self._armed)
+        return {
+            **self.stats,
+            'leader': self.is_leader,
+            'owner': self.owner,
+            'armed': armed,
+            'worker_running': self._thread is not None and self._thread.is_alive()
+        }
+
+
+# ----------------------------------------------------------------------
+# Timer sources
+# ----------------------------------------------------------------------
+
+def _deadline_lead() -> timedelta:
+    from flask import current_app
+
+    return timedelta(hours=current_app.config.get('DEADLINE_REMINDER_HOURS', 24))
+
+
+def schedule_timer(key: str, kind: str, fire_at: Optional[datetime], payload: Optional[Dict] = None,
+                   interval: Optional[int] = None) -> bool:
+    """
+    Arm a timer, or cancel it when fire_at is None (caller commits).
+
+    A no-op outside an app context or without a scheduler, so in-memory
+    schedulers keep working standalone.
+    """
+    from flask import has_app_context
+
+    if _scheduler is None or not has_app_context():
+        return False
+
+    if fire_at is None:
+        TimerScheduler.cancel(key)
+    else:
+        TimerScheduler.arm(key, kind, fire_at, payload, interval)
+    if _scheduler.autostart:
+        _scheduler.start()
+    return True
+
+
+def cancel_timers(keys: List[str]) -> int:
+    """Cancel many timers in the current session (caller commits)."""
+    from flask import has_app_context
+
+    if _scheduler is None or not has_app_context():
+        return 0
+    return TimerScheduler.cancel_many(list(keys))
+
+
+def schedule_issue_deadline(issue) -> bool:
+    """Arm the DEADLINE_APPROACHING reminder for an issue (caller commits)."""
+    fire_at = None
+    if issue.due_date and issue.status not in CLOSED_STATUSES and issue.due_date > datetime.utcnow():
+        fire_at = max(issue.due_date - _deadline_lead(), datetime.utcnow())
+    return schedule_timer(f'issue_deadline:{issue.id}', 'issue_deadline', fire_at,
+                          {'issue_id': issue.id})
+
+
+def schedule_sprint_end(sprint) -> bool:
+    """Arm the DEADLINE_APPROACHING reminder for a sprint's end (caller commits)."""
+    fire_at = None
+    if sprint.end_date and sprint.status != 'completed' and sprint.end_date > datetime.utcnow():
+        fire_at = max(sprint.end_date - _deadline_lead(), datetime.utcnow())
+    return schedule_timer(f'sprint_end:{sprint.id}', 'sprint_end', fire_at,
+                          {'sprint_id': sprint.id})
+
+
+def _unresolved(what: str) -> datetime:
+    """Retry time for a timer whose target is defined on another worker only."""
+    logger.warning(f"{what} is not defined on this worker; retrying in {UNRESOLVED_RETRY}")
+    return datetime.utcnow() + UNRESOLVED_RETRY
+
+
+def _fire_issue_deadline(payload: Dict):
+    from app.automation.workflow import TriggerType, workflow_engine
+    from app.models import Issue
+    from app.services.issue_service import IssueService
+
+    issue = Issue.query.get(payload['issue_id'])
+    if issue is None or issue.status in CLOSED_STATUSES or not issue.due_date:
+        return False
+    # Workflows are held by the workers that created them, so every worker gets the event
+    workflow_engine.broadcast(TriggerType.DEADLINE_APPROACHING,
+                              IssueService._automation_event(issue, due_date=issue.due_date.isoformat()))
+
+
+def _fire_sprint_end(payload: Dict):
+    from app.automation.workflow import TriggerType, workflow_engine
+    from app.models import Sprint
+
+    sprint = Sprint.query.get(payload['sprint_id'])
+    if sprint is None or not sprint.end_date:
+        return False
+    workflow_engine.broadcast(TriggerType.DEADLINE_APPROACHING, {
+        'sprint_id': sprint.id,
+        'sprint_name': sprint.name,
+        'project_id': sprint.project_id,
+        'status': sprint.status,
+        'due_date': sprint.end_date.isoformat(),
+    })
+
+
+def _fire_report(payload: Dict):
+    from app.reporting import report_scheduler
+
+    if not report_scheduler.run_schedule(payload['schedule_id'], payload.get('schedule')):
+        return _unresolved(f"Report schedule {payload['schedule_id']}")
+
+
+def _fire_sync(payload: Dict):
+    from app.pwa import background_sync_manager
+
+    schedule = background_sync_manager.schedules.get(payload['schedule_id'])
+    if schedule is None:
+        if 'tag' not in payload:
+            return _unresolved(f"Sync schedule {payload['schedule_id']}")
+        background_sync_manager.trigger_sync(payload['tag'])
+    elif schedule.enabled:
+        background_sync_manager.trigger_sync(schedule.tag)
+
+
+def _fire_workflow(payload: Dict):
+    from app.automation.workflow import workflow_engine
+
+    if not workflow_engine.run_scheduled(payload['workflow_id'], payload.get('workflow')):
+        return _unresolved(f"Workflow {payload['workflow_id']}")
+
+
+def _fire_upload_sweep(payload: Dict):
+    from app.upload import get_blob_store
+
+    store = get_blob_store()
+    if store is not None:
+        store.sweep_expired_uploads()
+
+
+def _arm_sync_schedules() -> None:
+    """Give the PWA sync schedules a timer each, keeping ones already armed."""
+    from app.models import ScheduledTimer, db
+    from app.pwa import background_sync_manager
+
+    armed = {key for (key,) in db.session.query(ScheduledTimer.key)
+             .filter(ScheduledTimer.kind == 'sync').all()}
+    for schedule in background_sync_manager.schedules.values():
+        if f'sync:{schedule.id}' not in armed:
+            TimerScheduler.arm(f'sync:{schedule.id}', 'sync',
+                               datetime.utcnow() + timedelta(seconds=schedule.interval),
+                               {'schedule_id': schedule.id, 'tag': schedule.tag}, interval=schedule.interval)
+    db.session.commit()
+
+
+def _arm_upload_sweep() -> None:
+    """Arm the expired-upload sweep unless it is already armed."""
+    from flask import current_app
+    from app.models import ScheduledTimer, db
+
+    if ScheduledTimer.query.filter_by(key='upload_sweep').first() is None:
+        interval = current_app.config.get('UPLOAD_SWEEP_INTERVAL', 3600)
+        TimerScheduler.arm('upload_sweep', 'upload_sweep', datetime.utcnow() + timedelta(seconds=interval),
+                           interval=interval)
+        db.session.commit()
+
+
+# Global scheduler instance
+_scheduler: Optional[TimerScheduler] = None
+
+
+def init_scheduler(app) -> TimerScheduler:
+    """Initialize the timer scheduler for the app, stopping any previous one."""
+    global _scheduler
+
+    if _scheduler is not None:
+        _scheduler.shutdown()
+
+    _scheduler = TimerScheduler(
+        app,
+        poll_interval=app.config.get('SCHEDULER_POLL_INTERVAL', 5.0),
+        lease_seconds=app.config.get('SCHEDULER_LEASE_SECONDS', 30),
+        batch_size=app.config.get('SCHEDULER_BATCH_SIZE', 100)
+    )
+    _scheduler.register('issue_deadline', _fire_issue_deadline)
+    _scheduler.register('sprint_end', _fire_sprint_end)
+    _scheduler.register('report', _fire_report)
+    _scheduler.register('sync', _fire_sync)
+    _scheduler.register('workflow', _fire_workflow)
+    _scheduler.register('upload_sweep', _fire_upload_sweep)
+    _scheduler.register_seeder(_arm_sync_schedules)
+    _scheduler.register_seeder(_arm_upload_sweep)
+    _scheduler.autostart = app.config.get('SCHEDULER_ENABLED', True)
+
+    if _scheduler.autostart:
+        _scheduler.start()
+    return _scheduler
+
+
+def get_scheduler() -> Optional[TimerScheduler]:
+    """Get timer scheduler instance."""
+    return _scheduler
@@ -8,9 +8,17 @@ from .search_engine import (
     FilterBuilder,
     SavedSearch
 )
+from .index import (
+    SearchIndex,
+    init_search_index,
+    get_search_index
+)
 
 __all__ = [
     'SearchEngine',
     'FilterBuilder',
-    'SavedSearch'
+    'SavedSearch',
+    'SearchIndex',
+    'init_search_index',
+    'get_search_index'
 ]
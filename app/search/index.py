@@ -0,0 +1,349 @@
+# app/search/index.py
+"""
+Inverted index for issue and comment full-text search.
+
+Issue descriptions and comments are Fernet-encrypted in the main database, so
+the database itself can never match them. This module keeps a tokenized
+inverted index in a local SQLite FTS5 file, ranked with BM25, and is updated
+incrementally by IssueService whenever an issue or comment is written.
+
+The FTS5 table is contentless (``content=''``): only postings are stored, never
+the decrypted text. Contentless rows cannot be deleted without their original
+values, so re-indexing a document tombstones the previous row in ``search_doc``
+and inserts a fresh one. Tombstoned postings are dropped by ``rebuild()``.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+logger = logging.getLogger('search')
+
+# Only word characters reach FTS5, so user input can never inject query syntax.
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_doc (
+    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    issue_id INTEGER NOT NULL,
+    project_id INTEGER,
+    status TEXT,
+    priority TEXT,
+    assignee_id INTEGER,
+    live INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS ix_search_doc_source ON search_doc (kind, source_id) WHERE live = 1;
+CREATE INDEX IF NOT EXISTS ix_search_doc_issue ON search_doc (issue_id) WHERE live = 1;
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    key, title, body,
+    content='',
+    prefix='2 3',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+
+class SearchIndex:
+    """SQLite FTS5 backed inverted index with BM25 ranking."""
+
+    # BM25 column weights for (key, title, body)
+    COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+    # Comment matches count for less than matches on the issue itself
+    COMMENT_WEIGHT = 0.5
+
+    # Rebuild once this fraction of indexed rows are tombstones
+    COMPACTION_RATIO = 0.3
+
+    def __init__(self, index_path: str = ':memory:'):
+        """
+        Initialize search index.
+
+        Args:
+            index_path: SQLite file holding the index (':memory:' for tests)
+        """
+        self.index_path = index_path
+        if index_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def index_issue(self, issue) -> None:
+        """Index (or re-index) an issue's key, title and decrypted description."""
+        with self._lock, self._transaction():
+            self._tombstone('issue', issue.id)
+            self._insert_doc(
+                'issue', issue.id, issue,
+                key=issue.key or '',
+                title=issue.title or '',
+                body=issue.description or ''
+            )
+            self._sync_issue_fields(issue)
+
+    def index_comment(self, comment, issue=None) -> None:
+        """Index (or re-index) a comment's decrypted text."""
+        issue = issue or comment.issue
+        with self._lock, self._transaction():
+            self._tombstone('comment', comment.id)
+            self._insert_doc('comment', comment.id, issue, key='', title='', body=comment.text or '')
+
+    def update_issue_fields(self, issue) -> None:
+        """Refresh filterable fields (status, priority, ...) without touching postings."""
+        with self._lock, self._transaction():
+            self._sync_issue_fields(issue)
+
+    def update_issue_fields_many(self, issues: Iterable) -> None:
+        """Refresh filterable fields of many issues in one transaction."""
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                'UPDATE search_doc SET project_id = ?, status = ?, priority = ?, assignee_id = ? '
+                'WHERE issue_id = ? AND live = 1',
+                [(i.project_id, i.status, i.priority, i.assignee_id, i.id) for i in issues]
+            )
+
+    def remove_issues(self, issue_ids: Iterable[int]) -> None:
+        """Remove many issues and their comments from the index."""
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                'UPDATE search_doc SET live = 0 WHERE issue_id = ? AND live = 1',
+                [(issue_id,) for issue_id in issue_ids]
+            )
+
+    def remove_issue(self, issue_id: int) -> None:
+        """Remove an issue and all of its comments from the index."""
+        with self._lock:
+            self._conn.execute('UPDATE search_doc SET live = 0 WHERE issue_id = ? AND live = 1', (issue_id,))
+
+    def remove_comment(self, comment_id: int) -> None:
+        """Remove a single comment from the index."""
+        with self._lock:
+            self._tombstone('comment', comment_id)
+
+    def rebuild(self, issues: Iterable) -> int:
+        """
+        Rebuild the index from scratch, dropping all tombstoned postings.
+
+        Args:
+            issues: Iterable of Issue rows (comments are read via ``issue.comments``)
+
+        Returns:
+            Number of issues indexed
+        """
+        count = 0
+        with self._lock:
+            self._conn.executescript(
+                'DROP TABLE IF EXISTS search_fts; DROP TABLE IF EXISTS search_doc;'
+            )
+            self._conn.executescript(SCHEMA)
+            with self._transaction():
+                for issue in issues:
+                    self._insert_doc(
+                        'issue', issue.id, issue,
+                        key=issue.key or '',
+                        title=issue.title or '',
+                        body=issue.description or ''
+                    )
+                    for comment in issue.comments:
+                        self._insert_doc('comment', comment.id, issue, key='', title='', body=comment.text or '')
+                    count += 1
+            self._conn.execute("INSERT INTO search_fts(search_fts) VALUES ('optimize')")
+
+        logger.info(f"Search index rebuilt with {count} issues")
+        return count
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, project_id: Optional[int] = None,
+               status: Optional[str] = None,
+               priority: Optional[str] = None,
+               assignee_id: Optional[int] = None,
+               project_ids: Optional[Iterable[int]] = None,
+               limit: int = 50,
+               prefix: bool = True) -> List[Tuple[int, float]]:
+        """
+        Search issues (including their comments) ranked by BM25.
+
+        Args:
+            query: Search text
+            project_id: Filter by project
+            status: Filter by status
+            priority: Filter by priority
+            assignee_id: Filter by assignee
+            project_ids: Restrict to these projects (e.g. the user's accessible set)
+            limit: Max results
+            prefix: Treat the last term as a prefix (for type-ahead)
+
+        Returns:
+            List of (issue_id, score) tuples, best first
+        """
+        match = self.build_match_query(query, prefix=prefix)
+        if not match:
+            return []
+
+        filters = ['search_fts MATCH ?', 'd.live = 1']
+        params: List[Any] = [match]
+
+        if project_id:
+            filters.append('d.project_id = ?')
+            params.append(project_id)
+        if status:
+            filters.append('d.status = ?')
+            params.append(status)
+        if priority:
+            filters.append('d.priority = ?')
+            params.append(priority)
+        if assignee_id:
+            filters.append('d.assignee_id = ?')
+            params.append(assignee_id)
+        if project_ids is not None:
+            project_ids = list(project_ids)
+            if not project_ids:
+                return []
+            filters.append(f"d.project_id IN ({','.join('?' * len(project_ids))})")
+            params.extend(project_ids)
+
+        weights = ', '.join(str(w) for w in self.COLUMN_WEIGHTS)
+        # The CTE must stay materialized: bm25() is only valid while
+        # search_fts is the table being scanned, not after flattening.
+        sql = f"""
+            WITH hits AS MATERIALIZED (
+                SELECT d.issue_id AS issue_id,
+                       -bm25(search_fts, {weights})
+                         * CASE d.kind WHEN 'comment' THEN ? ELSE 1.0 END AS score
+                FROM search_fts
+                JOIN search_doc d ON d.doc_id = search_fts.rowid
+                WHERE {' AND '.join(filters)}
+            )
+            SELECT issue_id, SUM(score) AS total
+            FROM hits
+            GROUP BY issue_id
+            ORDER BY total DESC
+            LIMIT ?
+        """
+
+        with self._lock:
+            rows = self._conn.execute(sql, [self.COMMENT_WEIGHT] + params + [limit]).fetchall()
+
+        return [(row[0], row[1]) for row in rows]
+
+    @staticmethod
+    def build_match_query(query: str, prefix: bool = True) -> str:
+        """
+        Convert free text into a safe FTS5 MATCH expression.
+
+        Every term is quoted so punctuation and FTS operators in user input
+        are treated literally; all terms must match.
+        """
+        terms = TOKEN_RE.findall((query or '').lower())
+        if not terms:
+            return ''
+
+        parts = [f'"{term}"' for term in terms]
+        if prefix:
+            parts[-1] += '*'
+        return ' '.join(parts)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            live, dead = self._conn.execute(
+                'SELECT COALESCE(SUM(live), 0), COALESCE(SUM(1 - live), 0) FROM search_doc'
+            ).fetchone()
+
+        total = live + dead
+        return {
+            'index_path': self.index_path,
+            'live_documents': live,
+            'tombstones': dead,
+            'needs_rebuild': total > 0 and dead / total >= self.COMPACTION_RATIO
+        }
+
+    def close(self) -> None:
+        """Close the index connection."""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def _tombstone(self, kind: str, source_id: int) -> None:
+        self._conn.execute(
+            'UPDATE search_doc SET live = 0 WHERE kind = ? AND source_id = ? AND live = 1',
+            (kind, source_id)
+        )
+
+    def _insert_doc(self, kind: str, source_id: int, issue, key: str, title: str, body: str) -> None:
+        cursor = self._conn.execute(
+            'INSERT INTO search_doc (kind, source_id, issue_id, project_id, status, priority, assignee_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (kind, source_id, issue.id, issue.project_id, issue.status, issue.priority, issue.assignee_id)
+        )
+        self._conn.execute(
+            'INSERT INTO search_fts (rowid, key, title, body) VALUES (?, ?, ?, ?)',
+            (cursor.lastrowid, key, title, body)
+        )
+
+    def _sync_issue_fields(self, issue) -> None:
+        self._conn.execute(
+            'UPDATE search_doc SET project_id = ?, status = ?, priority = ?, assignee_id = ? '
+            'WHERE issue_id = ? AND live = 1',
+            (issue.project_id, issue.status, issue.priority, issue.assignee_id, issue.id)
+        )
+
+
+class _Transaction:
+    """Explicit BEGIN/COMMIT for an autocommit sqlite3 connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute('COMMIT')
+        else:
+            self.conn.execute('ROLLBACK')
+        return False
+
+
+# Global search index instance
+_search_index: Optional[SearchIndex] = None
+
+
+def init_search_index(index_path: str = 'instance/search_index.db') -> SearchIndex:
+    """Initialize search index."""
+    global _search_index
+    _search_index = SearchIndex(index_path)
+    logger.info("✓ Search index initialized")
+    return _search_index
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """Get search index instance."""
+    return _search_index
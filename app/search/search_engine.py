@@ -44,43 +44,46 @@ class SearchEngine:
         Returns:
             List of matching issues with score
         """
-        from app.models import Issue, Project
-        from app import db
+        from app.models import Issue
+        from .index import get_search_index
+        
+        index = get_search_index()
+        
+        if index is not None:
+            # Ranked candidates come from the inverted index; only the top
+            # `limit` rows are loaded (and decrypted) from the database.
+            ranked = index.search(query, project_id=project_id, status=status,
+                                  priority=priority, assignee_id=assignee_id,
+                                  limit=limit)
+            issues = {i.id: i for i in Issue.query.filter(Issue.id.in_([r[0] for r in ranked])).all()} if ranked else {}
+            results = [(issues[issue_id], score) for issue_id, score in ranked if issue_id in issues]
+        else:
+            # Without an index only plaintext columns can be matched in SQL
+            q = Issue.query
+            if project_id:
+                q = q.filter_by(project_id=project_id)
+            if status:
+                q = q.filter_by(status=status)
+            if priority:
+                q = q.filter_by(priority=priority)
+            if assignee_id:
+                q = q.filter_by(assignee_id=assignee_id)
+            
+            matches = q.filter(or_(
+                Issue.title.ilike(f'%{query}%'),
+                Issue.key.ilike(f'%{query}%')
+            )).limit(limit).all()
+            results = [(issue, SearchEngine._calculate_issue_score(issue, query)) for issue in matches]
         
-        # Build base query
-        q = Issue.query
-        
-        # Add filters
-        if project_id:
-            q = q.filter_by(project_id=project_id)
-        
-        if status:
-            q = q.filter_by(status=status)
-        
-        if priority:
-            q = q.filter_by(priority=priority)
-        
-        if assignee_id:
-            q = q.filter_by(assigned_to=assignee_id)
-        
-        # Full-text search on title and description
-        search_filter = or_(
-            Issue.title.ilike(f'%{query}%'),
-            Issue.description.ilike(f'%{query}%'),
-            Issue.tags.ilike(f'%{query}%')
-        )
-        
-        results = q.filter(search_filter).limit(limit).all()
-        
-        # Score and sort results
         scored_results = []
-        for issue in results:
-            score = SearchEngine._calculate_issue_score(issue, query)
+        for issue, score in results:
+            description = issue.description
             scored_results.append({
                 'type': 'issue',
                 'id': issue.id,
+                'key': issue.key,
                 'title': issue.title,
-                'description': issue.description[:100] + '...' if len(issue.description or '') > 100 else issue.description,
+                'description': description[:100] + '...' if len(description or '') > 100 else description,
                 'project_id': issue.project_id,
                 'status': issue.status,
                 'priority': issue.priority,
@@ -121,9 +124,10 @@ class SearchEngine:
         if status:
             q = q.filter_by(status=status)
         
+        # Project descriptions are encrypted; match plaintext name and key
         search_filter = or_(
             Project.name.ilike(f'%{query}%'),
-            Project.description.ilike(f'%{query}%')
+            Project.key.ilike(f'%{query}%')
         )
         
         results = q.filter(search_filter).limit(limit).all()
@@ -162,12 +166,8 @@ class SearchEngine:
         """
         from app.models import User
         
-        search_filter = or_(
-            User.username.ilike(f'%{query}%'),
-            User.email.ilike(f'%{query}%')
-        )
-        
-        results = User.query.filter(search_filter).limit(limit).all()
+        # Emails are encrypted; only usernames can be matched in SQL
+        results = User.query.filter(User.username.ilike(f'%{query}%')).limit(limit).all()
         
         scored_results = []
         for user in results:
@@ -218,6 +218,63 @@ class SearchEngine:
         
         return results
     
+    @staticmethod
+    def autocomplete_issues(query: str, project_ids: Optional[List[int]] = None,
+                            limit: int = 5) -> List:
+        """
+        Type-ahead issue suggestions.
+        
+        Args:
+            query: Partial search text (last term is matched as a prefix)
+            project_ids: Restrict to these projects (None for no restriction)
+            limit: Max results
+        
+        Returns:
+            List of Issue rows, best match first
+        """
+        from app.models import Issue
+        from .index import get_search_index
+        
+        index = get_search_index()
+        
+        if index is None:
+            q = Issue.query.filter(or_(
+                Issue.key.ilike(f'%{query}%'),
+                Issue.title.ilike(f'%{query}%')
+            ))
+            if project_ids is not None:
+                q = q.filter(Issue.project_id.in_(project_ids))
+            return q.limit(limit).all()
+        
+        ranked = index.search(query, project_ids=project_ids, limit=limit, prefix=True)
+        if not ranked:
+            return []
+        
+        issues = {i.id: i for i in Issue.query.filter(Issue.id.in_([r[0] for r in ranked])).all()}
+        return [issues[issue_id] for issue_id, _ in ranked if issue_id in issues]
+    
+    @staticmethod
+    def rebuild_index(batch_size: int = 500) -> int:
+        """
+        Rebuild the search index from the database (backfill / compaction).
+        
+        Args:
+            batch_size: Issues loaded per round trip
+        
+        Returns:
+            Number of issues indexed
+        """
+        from app.models import Issue
+        from sqlalchemy.orm import selectinload
+        from .index import get_search_index
+        
+        index = get_search_index()
+        if index is None:
+            return 0
+        
+        issues = Issue.query.options(selectinload(Issue.comments)).order_by(Issue.id).yield_per(batch_size)
+        return index.rebuild(issues)
+    
     @staticmethod
     def _calculate_issue_score(issue, query: str) -> int:
         """Calculate relevance score for issue."""
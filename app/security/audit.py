@@ -11,6 +11,8 @@ import logging
 import json
 import hashlib
 
+from app.security.audit_writer import get_audit_writer
+
 # Set up audit logger
 audit_logger = logging.getLogger('audit')
 security_logger = logging.getLogger('security')
@@ -145,11 +147,28 @@ class AuditLogger:
                 'details': event.get('details', {})
             }
             
-            log_entry = AuditLog(
-                user_id=event.get('user_id'),
-                action=action,
-                ip_address=event.get('ip_address')
-            )
+            columns = {
+                'user_id': event.get('user_id'),
+                'ip_address': event.get('ip_address'),
+                'severity': event.get('severity', 'INFO'),
+                'category': 'SECURITY_EVENT',
+                'endpoint': event.get('endpoint'),
+                'target_type': event.get('target_type'),
+                'target_id': event.get('target_id')
+            }
+            
+            # Queue for the background writer when one is running
+            writer = get_audit_writer()
+            if writer is not None:
+                writer.submit(
+                    action,
+                    details=json.dumps(details_dict, default=str),
+                    timestamp=datetime.fromisoformat(event['timestamp']),
+                    **columns
+                )
+                return
+            
+            log_entry = AuditLog(action=action, **columns)
             # Use the details setter which will encrypt it
             log_entry.details = json.dumps(details_dict)
             
@@ -0,0 +1,391 @@
+# app/security/audit_writer.py
+"""
+Audit Writer
+Write-behind persistence of audit events.
+
+Requests encrypt each event's details and append the event to a bounded
+in-memory buffer and to an append-only spool file, so plaintext details
+never reach the disk; a background thread bulk-inserts them, one
+transaction per batch. Spool segments are deleted only after their events
+are committed, and segments left behind by a crashed worker are replayed on
+the next start (delivery is at-least-once).
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+from sqlalchemy import insert
+
+security_logger = logging.getLogger('security')
+
+
+class AuditWriter:
+    """Buffers audit events and bulk-inserts them from a background thread."""
+
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+
+    # Plaintext metadata columns carried alongside each event
+    COLUMNS = ('severity', 'category', 'endpoint', 'target_type', 'target_id')
+
+    def __init__(self, app=None, spool_dir: Optional[str] = None, batch_size: int = 500,
+                 flush_interval: float = 0.5, max_pending: int = 50000,
+                 block_timeout: float = 0.05, drop_policy: str = DROP_OLDEST):
+        """
+        Initialize audit writer.
+
+        Args:
+            app: Flask app whose database receives the events
+            spool_dir: Directory for spool files (None: memory only)
+            batch_size: Events per INSERT transaction; a full batch wakes the flusher
+            flush_interval: Maximum seconds an event waits in the buffer
+            max_pending: Buffer capacity before backpressure applies
+            block_timeout: Seconds a caller waits for room in a full buffer
+            drop_policy: What to drop when the buffer stays full
+                         (drop_oldest or drop_newest)
+        """
+        if drop_policy not in (self.DROP_OLDEST, self.DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        self.app = app
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+        self.drop_policy = drop_policy
+
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Events taken from the buffer but not yet committed, and the spool
+        # segments (path, locked file) that hold them
+        self._unsaved: List[Dict] = []
+        self._segments: List[Tuple[str, object]] = []
+
+        self._spool = None
+        self._spool_path: Optional[str] = None
+        self._spool_events = 0
+        self._segment_seq = itertools.count()
+
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'batches': 0,
+            'dropped': 0,
+            'backpressure_waits': 0,
+            'recovered': 0,
+            'errors': 0
+        }
+
+        if spool_dir:
+            os.makedirs(spool_dir, mode=0o700, exist_ok=True)
+            self._recover()
+            self._open_spool()
+            if self._unsaved:
+                self._start()
+
+    def submit(self, action: str, user_id: Optional[int] = None, ip_address: Optional[str] = None,
+               details: Optional[str] = None, timestamp: Optional[datetime] = None,
+               **columns) -> bool:
+        """
+        Queue an audit event.
+
+        Args:
+            action: Action name
+            user_id: Acting user
+            ip_address: Client address
+            details: Plaintext details, encrypted before the event is queued
+            timestamp: Event time (default: now)
+            **columns: Plaintext AuditLog columns (severity, category,
+                       endpoint, target_type, target_id)
+
+        Returns:
+            bool: False if the event was dropped
+        """
+        from app.models import encrypt_field
+
+        event = {
+            **{name: columns.get(name) for name in self.COLUMNS},
+            'user_id': user_id,
+            'action': action[:100],
+            'ip_address': ip_address,
+            'details_encrypted': encrypt_field(details) if details else None,
+            'timestamp': timestamp or datetime.utcnow()
+        }
+
+        with self._cond:
+            self.stats['submitted'] += 1
+
+            if len(self._buffer) >= self.max_pending:
+                self.stats['backpressure_waits'] += 1
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: len(self._buffer) < self.max_pending, self.block_timeout)
+
+                if len(self._buffer) >= self.max_pending:
+                    self.stats['dropped'] += 1
+                    if self.drop_policy == self.DROP_NEWEST:
+                        return False
+                    self._buffer.popleft()
+
+            self._buffer.append(event)
+            self._write_spool(event)
+
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+
+        if self._thread is None:
+            self._start()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write all queued events to the database.
+
+        Returns:
+            Number of events written
+        """
+        with self._flush_lock:
+            with self._cond:
+                events = list(self._buffer)
+                self._buffer.clear()
+                segment = self._rotate_spool()
+                self._cond.notify_all()
+
+            if segment is not None:
+                self._segments.append(segment)
+
+            events = self._unsaved + events
+            written = 0
+            try:
+                for i in range(0, len(events), self.batch_size):
+                    chunk = events[i:i + self.batch_size]
+                    self._write(chunk)
+                    written += len(chunk)
+                    self.stats['batches'] += 1
+            except Exception as e:
+                # Keep the rest for the next flush; the spool still holds them
+                self._unsaved = events[written:]
+                overflow = len(self._unsaved) - self.max_pending
+                if overflow > 0:
+                    del self._unsaved[:overflow]
+                    self.stats['dropped'] += overflow
+                self.stats['errors'] += 1
+                security_logger.error(f"Audit flush failed, {len(self._unsaved)} events pending: {str(e)}")
+                return written
+            finally:
+                self.stats['written'] += written
+
+            self._unsaved = []
+            for path, handle in self._segments:
+                self._remove_segment(path, handle)
+            self._segments = []
+
+            return written
+
+    def _write(self, events: List[Dict]) -> None:
+        from app.models import AuditLog, db
+
+        with self.app.app_context():
+            rows = [{
+                **{name: event.get(name) for name in self.COLUMNS},
+                'user_id': event['user_id'],
+                'action': event['action'],
+                'ip_address': event['ip_address'],
+                'details_encrypted': event['details_encrypted'],
+                'timestamp': event['timestamp']
+            } for event in events]
+
+            with db.engine.begin() as conn:
+                conn.execute(insert(AuditLog), rows)
+
+    # ------------------------------------------------------------------
+    # Spool files
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode(event: Dict) -> str:
+        return json.dumps({**event, 'timestamp': event['timestamp'].isoformat()}) + '\n'
+
+    @staticmethod
+    def _decode(line: str) -> Dict:
+        event = json.loads(line)
+        event['timestamp'] = datetime.fromisoformat(event['timestamp'])
+        if 'details' in event:
+            # Spooled before details were encrypted on submit
+            from app.models import encrypt_field
+
+            details = event.pop('details')
+            event['details_encrypted'] = encrypt_field(details) if details else None
+        return event
+
+    @staticmethod
+    def _lock_file(handle) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _open_spool(self) -> None:
+        self._spool_path = os.path.join(self.spool_dir, f"audit-{os.getpid()}-{uuid.uuid4().hex[:8]}.spool")
+        fd = os.open(self._spool_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._spool = os.fdopen(fd, 'a', encoding='utf-8')
+        self._lock_file(self._spool)
+        self._spool_events = 0
+
+    def _write_spool(self, event: Dict) -> None:
+        if self._spool is None:
+            return
+        try:
+            self._spool.write(self._encode(event))
+            self._spool.flush()
+            self._spool_events += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.stats['errors'] += 1
+            security_logger.error(f"Audit spool write failed: {str(e)}")
+
+    def _rotate_spool(self) -> Optional[Tuple[str, object]]:
+        """Seal the current spool file as a segment and start a new one."""
+        if self._spool is None or not self._spool_events:
+            return None
+
+        path = f"{self._spool_path[:-len('.spool')]}.{next(self._segment_seq)}.pending"
+        os.replace(self._spool_path, path)
+        # The sealed segment keeps its lock until it is deleted
+        segment = (path, self._spool)
+        self._open_spool()
+        return segment
+
+    def _remove_segment(self, path: str, handle) -> None:
+        try:
+            os.remove(path)
+        except OSError as e:
+            security_logger.warning(f"Could not remove audit spool segment {path}: {str(e)}")
+        finally:
+            handle.close()
+
+    def _recover(self) -> None:
+        """Claim spool files of workers that exited before flushing them."""
+        names = [n for n in os.listdir(self.spool_dir) if n.endswith(('.spool', '.pending'))]
+        paths = sorted((os.path.join(self.spool_dir, n) for n in names), key=os.path.getmtime)
+
+        for path in paths:
+            handle = open(path, 'r+', encoding='utf-8')
+            if not self._lock_file(handle):
+                # Still owned by a live worker
+                handle.close()
+                continue
+
+            for line in handle:
+                try:
+                    self._unsaved.append(self._decode(line))
+                except (ValueError, KeyError):
+                    # Torn last line of a crashed write
+                    continue
+            self._segments.append((path, handle))
+
+        self.stats['recovered'] = len(self._unsaved)
+        if self._unsaved:
+            security_logger.info(f"Recovered {len(self._unsaved)} audit events from spool")
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                if len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            if not self._stop.is_set():
+                self.flush()
+
+    def shutdown(self) -> None:
+        """Stop the background thread, flush and close the spool."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self.flush()
+
+        with self._lock:
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+                if not self._spool_events:
+                    os.remove(self._spool_path)
+
+    def get_stats(self) -> Dict:
+        """Get writer statistics."""
+        with self._lock:
+            return {
+                **self.stats,
+                'pending': len(self._buffer),
+                'unsaved': len(self._unsaved),
+                'spool_segments': len(self._segments),
+                'drop_policy': self.drop_policy
+            }
+
+
+# Global audit writer instance
+_audit_writer: Optional[AuditWriter] = None
+
+
+def init_audit_writer(app) -> Optional[AuditWriter]:
+    """Initialize the audit writer for the app, flushing any previous one."""
+    global _audit_writer
+
+    if _audit_writer is not None:
+        _audit_writer.shutdown()
+        _audit_writer = None
+
+    if not app.config.get('AUDIT_ASYNC', True):
+        return None
+
+    _audit_writer = AuditWriter(
+        app,
+        spool_dir=app.config.get('AUDIT_SPOOL_DIR') or os.path.join(app.instance_path, 'audit_spool'),
+        batch_size=app.config.get('AUDIT_BATCH_SIZE', 500),
+        flush_interval=app.config.get('AUDIT_FLUSH_INTERVAL_MS', 500) / 1000,
+        max_pending=app.config.get('AUDIT_MAX_PENDING', 50000),
+        block_timeout=app.config.get('AUDIT_BLOCK_TIMEOUT_MS', 50) / 1000,
+        drop_policy=app.config.get('AUDIT_DROP_POLICY', AuditWriter.DROP_OLDEST)
+    )
+    return _audit_writer
+
+
+def get_audit_writer() -> Optional[AuditWriter]:
+    """Get audit writer instance."""
+    return _audit_writer
+
+
+@atexit.register
+def _flush_on_exit():
+    if _audit_writer is not None:
+        _audit_writer.shutdown()
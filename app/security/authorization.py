@@ -183,11 +183,11 @@ def check_resource_access(model_class, resource_id: int,
     
     # Check team membership
     if hasattr(resource, team_field):
-        from app.models import User
-        user = User.query.get(user_id)
-        if user and user.team_id:
+        from app.middleware.principal import get_principal
+        principal = get_principal()
+        if principal and principal.team_id:
             resource_team_id = getattr(resource, team_field)
-            if resource_team_id == user.team_id:
+            if resource_team_id == principal.team_id:
                 return True
     
     return False
@@ -2,109 +2,364 @@
 """
 Rate Limiting Module
 Prevents brute force, DoS, and abuse.
+
+All limiters share one engine based on GCRA (generic cell rate algorithm):
+each key stores a single "theoretical arrival time", so a check is O(1)
+regardless of traffic. State lives in a pluggable backend - in-process
+memory, or Redis via an atomic Lua script so limits hold across workers.
 """
 
 from functools import wraps
-from flask import request, abort, session, g
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Callable
+from flask import request, abort, session, g, current_app
+from typing import Dict, List, Optional, Callable, Sequence, Tuple
+import math
+import re
 import threading
+import time
+import zlib
 import logging
 
 security_logger = logging.getLogger('security')
 
-# In-memory storage (use Redis in production)
-_rate_limit_storage: Dict[str, list] = {}
-_storage_lock = threading.Lock()
+
+class RateLimit:
+    """A rate limit policy: ``limit`` requests per ``period`` seconds."""
+
+    PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+    _PATTERN = re.compile(r'^\s*(\d+)\s*(?:/|per)\s*(second|minute|hour|day)s?\s*$', re.IGNORECASE)
+
+    __slots__ = ('limit', 'period', 'name', 'interval')
+
+    def __init__(self, limit: int, period: float, name: Optional[str] = None):
+        """
+        Initialize rate limit policy.
+
+        Args:
+            limit: Maximum requests allowed in period (also the burst size)
+            period: Period in seconds
+            name: Namespace for the policy's keys (default: "<limit>/<period>")
+        """
+        if limit < 1 or period <= 0:
+            raise ValueError('Rate limit and period must be positive')
+
+        self.limit = int(limit)
+        self.period = float(period)
+        self.name = name or f"{self.limit}/{int(self.period)}"
+        self.interval = self.period / self.limit
+
+    @classmethod
+    def parse(cls, spec: str) -> 'RateLimit':
+        """Parse "100/minute" or "100 per minute"."""
+        match = cls._PATTERN.match(spec)
+        if not match:
+            raise ValueError(f'Invalid rate limit: {spec}')
+        return cls(int(match.group(1)), cls.PERIODS[match.group(2).lower()])
+
+    def __repr__(self):
+        return f'<RateLimit {self.limit}/{self.period:g}s>'
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check for one policy."""
+
+    __slots__ = ('allowed', 'limit', 'remaining', 'reset_after', 'retry_after')
+
+    def __init__(self, allowed: bool, limit: int, remaining: int,
+                 reset_after: float, retry_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        """X-RateLimit-* headers (reset is in seconds from now)."""
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(math.ceil(self.reset_after))
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _gcra(tat: float, now: float, policy: RateLimit, cost: int) -> Tuple[bool, float, RateLimitResult]:
+    """
+    Apply GCRA to one key.
+
+    Returns:
+        tuple: (allowed, tat to store, result)
+    """
+    tat = max(tat, now)
+    new_tat = tat + policy.interval * cost
+    allow_at = new_tat - policy.period
+
+    if now < allow_at:
+        remaining = int((now - (tat - policy.period)) // policy.interval)
+        return False, tat, RateLimitResult(
+            False, policy.limit, max(0, min(remaining, policy.limit)), tat - now, allow_at - now
+        )
+
+    remaining = int((now - allow_at) // policy.interval)
+    return True, new_tat, RateLimitResult(
+        True, policy.limit, max(0, min(remaining, policy.limit)), new_tat - now, 0.0
+    )
+
+
+class MemoryBackend:
+    """Per-process backend: one float per key, expired lazily."""
+
+    # Sweep expired keys after this many writes
+    SWEEP_EVERY = 10000
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def hit(self, checks: Sequence[Tuple[str, RateLimit]], cost: int = 1,
+            now: Optional[float] = None) -> List[RateLimitResult]:
+        """Check and (if every policy allows it) consume all keys atomically."""
+        now = time.time() if now is None else now
+
+        with self._lock:
+            outcomes = [_gcra(self._tats.get(key, now), now, policy, cost) for key, policy in checks]
+
+            if all(allowed for allowed, _, _ in outcomes):
+                for (key, _), (_, tat, _) in zip(checks, outcomes):
+                    self._tats[key] = tat
+
+                self._writes += 1
+                if self._writes >= self.SWEEP_EVERY:
+                    self._sweep(now)
+
+                return [result for _, _, result in outcomes]
+
+            # Denied: nothing was consumed, so report unconsumed state for every policy
+            results = []
+            for (key, policy), (allowed, _, result) in zip(checks, outcomes):
+                if allowed:
+                    _, _, result = _gcra(self._tats.get(key, now), now, policy, 0)
+                    result.allowed = False
+                results.append(result)
+            return results
+
+    def reset(self, keys: Sequence[str]) -> None:
+        """Forget the state of the given keys."""
+        with self._lock:
+            for key in keys:
+                self._tats.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        self._writes = 0
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+
+    def cleanup(self) -> int:
+        """Drop expired keys now; returns the number removed."""
+        with self._lock:
+            before = len(self._tats)
+            self._sweep(time.time())
+            return before - len(self._tats)
+
+    def __len__(self):
+        return len(self._tats)
+
+
+class RedisBackend:
+    """Shared backend: one atomic Lua script per check, using Redis server time."""
+
+    # KEYS: one per policy. ARGV: cost, then (interval, period) per key.
+    # Returns {allowed, remaining1, reset1, retry1, remaining2, ...}
+    SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local tats = {}
+local allowed = 1
+
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[2 * i])
+    local period = tonumber(ARGV[2 * i + 1])
+    local tat = tonumber(redis.call('GET', KEYS[i])) or now
+    if tat < now then tat = now end
+    tats[i] = tat
+    if now < tat + interval * cost - period then allowed = 0 end
+end
+
+local out = {allowed}
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[2 * i])
+    local period = tonumber(ARGV[2 * i + 1])
+    local tat = tats[i]
+    local retry = 0
+    if allowed == 1 then
+        tat = tat + interval * cost
+        redis.call('SET', KEYS[i], string.format('%.6f', tat), 'PX', math.max(1, math.ceil((tat - now) * 1000)))
+    else
+        retry = math.max(0, tat + interval * cost - period - now)
+    end
+    out[#out + 1] = math.floor((now - (tat - period)) / interval)
+    out[#out + 1] = string.format('%.3f', tat - now)
+    out[#out + 1] = string.format('%.3f', retry)
+end
+return out
+"""
+
+    def __init__(self, client, prefix: str = 'rl:'):
+        """
+        Initialize Redis backend.
+
+        Args:
+            client: redis.Redis client
+            prefix: Key prefix for limiter state
+        """
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    def hit(self, checks: Sequence[Tuple[str, RateLimit]], cost: int = 1,
+            now: Optional[float] = None) -> List[RateLimitResult]:
+        """Check and (if every policy allows it) consume all keys atomically."""
+        keys = [self.prefix + key for key, _ in checks]
+        args = [cost]
+        for _, policy in checks:
+            args.extend((repr(policy.interval), repr(policy.period)))
+
+        reply = self._script(keys=keys, args=args)
+        allowed = bool(int(reply[0]))
+
+        results = []
+        for i, (_, policy) in enumerate(checks):
+            remaining, reset_after, retry_after = reply[1 + 3 * i:4 + 3 * i]
+            results.append(RateLimitResult(
+                allowed, policy.limit, max(0, min(int(remaining), policy.limit)),
+                float(reset_after), float(retry_after)
+            ))
+        return results
+
+    def reset(self, keys: Sequence[str]) -> None:
+        """Forget the state of the given keys."""
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def cleanup(self) -> int:
+        """Keys expire on their own in Redis."""
+        return 0
+
+
+class RateLimitEngine:
+    """Evaluates policies against a backend, falling back to memory if Redis fails."""
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self._fallback = None if isinstance(self.backend, MemoryBackend) else MemoryBackend()
+
+    @staticmethod
+    def make_key(policy: RateLimit, key: str) -> str:
+        return f"{policy.name}:{key}"
+
+    def hit(self, key: str, policies: Sequence[RateLimit], cost: int = 1) -> List[RateLimitResult]:
+        """Count one request for ``key`` against every policy."""
+        checks = [(self.make_key(policy, key), policy) for policy in policies]
+        if not checks:
+            return []
+
+        try:
+            return self.backend.hit(checks, cost)
+        except Exception as e:
+            if self._fallback is None:
+                raise
+            security_logger.error(f"Rate limit backend error, using local limits: {str(e)}")
+            return self._fallback.hit(checks, cost)
+
+    def peek(self, key: str, policies: Sequence[RateLimit]) -> List[RateLimitResult]:
+        """Current state without consuming anything."""
+        return self.hit(key, policies, cost=0)
+
+    def reset(self, key: str, policies: Sequence[RateLimit]) -> None:
+        keys = [self.make_key(policy, key) for policy in policies]
+        self.backend.reset(keys)
+        if self._fallback is not None:
+            self._fallback.reset(keys)
+
+
+# Global engine; init_rate_limiter() swaps in the configured backend
+_engine = RateLimitEngine()
+
+
+def get_rate_limit_engine() -> RateLimitEngine:
+    """Get the rate limit engine."""
+    return _engine
+
+
+def most_restrictive(results: Sequence[RateLimitResult]) -> Optional[RateLimitResult]:
+    """Pick the result whose headers should be reported."""
+    if not results:
+        return None
+    denied = [r for r in results if not r.allowed]
+    if denied:
+        return max(denied, key=lambda r: r.retry_after)
+    return min(results, key=lambda r: (r.remaining, r.limit))
+
+
+def _record_result(result: Optional[RateLimitResult]) -> None:
+    """Remember the tightest result of this request for the response headers."""
+    if result is None:
+        return
+    current = g.get('rate_limit')
+    g.rate_limit = most_restrictive([r for r in (current, result) if r is not None])
 
 
 class RateLimiter:
     """
     Thread-safe rate limiter implementation.
-    Uses sliding window algorithm.
+    Uses GCRA (a token bucket refilled continuously) on the shared engine.
     """
-    
-    def __init__(self, max_requests: int, window_seconds: int):
+
+    def __init__(self, max_requests: int, window_seconds: int, name: Optional[str] = None):
         """
         Initialize rate limiter.
-        
+
         Args:
             max_requests: Maximum requests allowed in window
             window_seconds: Time window in seconds
+            name: Policy namespace (default: derived from the limits)
         """
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-    
+        self.policy = RateLimit(max_requests, window_seconds, name)
+
+    def hit(self, key: str) -> RateLimitResult:
+        """Count a request and return the full result."""
+        return get_rate_limit_engine().hit(key, [self.policy])[0]
+
     def is_allowed(self, key: str) -> bool:
         """
         Check if request is allowed.
-        
+
         Args:
             key: Unique identifier (e.g., IP + endpoint)
-            
+
         Returns:
             bool: True if request is allowed
         """
-        now = datetime.utcnow()
-        window_start = now - timedelta(seconds=self.window_seconds)
-        
-        with _storage_lock:
-            # Initialize or get existing timestamps
-            if key not in _rate_limit_storage:
-                _rate_limit_storage[key] = []
-            
-            # Remove old timestamps
-            _rate_limit_storage[key] = [
-                ts for ts in _rate_limit_storage[key]
-                if ts > window_start
-            ]
-            
-            # Check if limit exceeded
-            if len(_rate_limit_storage[key]) >= self.max_requests:
-                return False
-            
-            # Add current timestamp
-            _rate_limit_storage[key].append(now)
-            
-            return True
-    
+        return self.hit(key).allowed
+
     def get_remaining(self, key: str) -> int:
         """Get remaining requests in current window."""
-        now = datetime.utcnow()
-        window_start = now - timedelta(seconds=self.window_seconds)
-        
-        with _storage_lock:
-            if key not in _rate_limit_storage:
-                return self.max_requests
-            
-            current = len([
-                ts for ts in _rate_limit_storage[key]
-                if ts > window_start
-            ])
-            
-            return max(0, self.max_requests - current)
-    
+        return get_rate_limit_engine().peek(key, [self.policy])[0].remaining
+
     def reset(self, key: str) -> None:
         """Reset rate limit for a key."""
-        with _storage_lock:
-            if key in _rate_limit_storage:
-                del _rate_limit_storage[key]
-    
+        get_rate_limit_engine().reset(key, [self.policy])
+
     @staticmethod
     def cleanup_old_entries():
-        """Remove old entries to prevent memory bloat."""
-        cutoff = datetime.utcnow() - timedelta(hours=1)
-        
-        with _storage_lock:
-            keys_to_remove = []
-            
-            for key, timestamps in _rate_limit_storage.items():
-                # Remove if all timestamps are old
-                if all(ts < cutoff for ts in timestamps):
-                    keys_to_remove.append(key)
-            
-            for key in keys_to_remove:
-                del _rate_limit_storage[key]
+        """Remove expired entries to prevent memory bloat."""
+        return get_rate_limit_engine().backend.cleanup()
 
 
 def get_client_identifier() -> str:
@@ -115,8 +370,9 @@ def get_client_identifier() -> str:
     ip = get_client_ip()
     user_agent = request.headers.get('User-Agent', '')[:50]
     user_id = session.get('user_id', 'anon')
-    
-    return f"{ip}:{user_id}:{hash(user_agent) % 10000}"
+
+    # crc32 rather than hash(): must be identical across worker processes
+    return f"{ip}:{user_id}:{zlib.crc32(user_agent.encode('utf-8')) % 10000}"
 
 
 def get_client_ip() -> str:
@@ -127,14 +383,14 @@ def get_client_ip() -> str:
         ip = request.environ['HTTP_X_REAL_IP']
     else:
         ip = request.environ.get('REMOTE_ADDR', '127.0.0.1')
-    
+
     return ip
 
 
 # Pre-configured rate limiters
-_login_limiter = RateLimiter(max_requests=5, window_seconds=300)  # 5 attempts per 5 min
-_api_limiter = RateLimiter(max_requests=100, window_seconds=60)  # 100 requests per min
-_sensitive_limiter = RateLimiter(max_requests=3, window_seconds=60)  # 3 per min for sensitive
+_login_limiter = RateLimiter(max_requests=5, window_seconds=300, name='login')  # 5 attempts per 5 min
+_api_limiter = RateLimiter(max_requests=100, window_seconds=60, name='api')  # 100 requests per min
+_sensitive_limiter = RateLimiter(max_requests=3, window_seconds=60, name='sensitive')  # 3 per min for sensitive
 
 
 def login_rate_limit(f: Callable) -> Callable:
@@ -146,11 +402,13 @@ def login_rate_limit(f: Callable) -> Callable:
     def decorated_function(*args, **kwargs):
         ip = get_client_ip()
         key = f"login:{ip}"
-        
-        if not _login_limiter.is_allowed(key):
+
+        result = _login_limiter.hit(key)
+        _record_result(result)
+        if not result.allowed:
             security_logger.warning(f"Login rate limit exceeded for IP: {ip}")
             abort(429, description="Too many login attempts. Please try again later.")
-        
+
         return f(*args, **kwargs)
     return decorated_function
 
@@ -163,14 +421,13 @@ def api_rate_limit(f: Callable) -> Callable:
     @wraps(f)
     def decorated_function(*args, **kwargs):
         key = f"api:{get_client_identifier()}"
-        
-        if not _api_limiter.is_allowed(key):
-            remaining = _api_limiter.get_remaining(key)
+
+        result = _api_limiter.hit(key)
+        _record_result(result)
+        if not result.allowed:
             security_logger.warning(f"API rate limit exceeded: {key}")
-            
-            response = abort(429, description="Rate limit exceeded. Please slow down.")
-            return response
-        
+            abort(429, description="Rate limit exceeded. Please slow down.")
+
         return f(*args, **kwargs)
     return decorated_function
 
@@ -183,11 +440,13 @@ def sensitive_action_rate_limit(f: Callable) -> Callable:
     @wraps(f)
     def decorated_function(*args, **kwargs):
         key = f"sensitive:{get_client_identifier()}"
-        
-        if not _sensitive_limiter.is_allowed(key):
+
+        result = _sensitive_limiter.hit(key)
+        _record_result(result)
+        if not result.allowed:
             security_logger.warning(f"Sensitive action rate limit exceeded: {key}")
             abort(429, description="Too many attempts. Please wait before trying again.")
-        
+
         return f(*args, **kwargs)
     return decorated_function
 
@@ -195,23 +454,25 @@ def sensitive_action_rate_limit(f: Callable) -> Callable:
 def rate_limit(max_requests: int = 100, window_seconds: int = 60):
     """
     Decorator factory for custom rate limiting.
-    
+
     Usage:
         @rate_limit(max_requests=10, window_seconds=60)
         def my_endpoint():
             ...
     """
     limiter = RateLimiter(max_requests, window_seconds)
-    
+
     def decorator(f: Callable) -> Callable:
         @wraps(f)
         def decorated_function(*args, **kwargs):
             key = f"{request.endpoint}:{get_client_identifier()}"
-            
-            if not limiter.is_allowed(key):
+
+            result = limiter.hit(key)
+            _record_result(result)
+            if not result.allowed:
                 security_logger.warning(f"Rate limit exceeded: {key}")
                 abort(429, description="Rate limit exceeded")
-            
+
             return f(*args, **kwargs)
         return decorated_function
     return decorator
@@ -222,11 +483,98 @@ def check_rate_limit(key: str, max_requests: int, window_seconds: int) -> bool:
     Check rate limit without decorator.
     Returns True if allowed.
     """
-    limiter = RateLimiter(max_requests, window_seconds)
-    return limiter.is_allowed(key)
+    result = RateLimiter(max_requests, window_seconds).hit(key)
+    try:
+        _record_result(result)
+    except RuntimeError:
+        pass  # Outside a request context
+    return result.allowed
 
 
 def reset_login_attempts(ip: str) -> None:
     """Reset login rate limit for an IP after successful login."""
     key = f"login:{ip}"
     _login_limiter.reset(key)
+
+
+# ============= PER-ROUTE POLICIES =============
+
+def parse_policies(config) -> List[Tuple[str, List[RateLimit], Optional[frozenset]]]:
+    """
+    Parse RATELIMIT_POLICIES: [(path prefix, ["100/minute", ...][, methods]), ...].
+
+    The first prefix matching the path (and the request method, when the
+    entry lists methods) applies; policies of one prefix share a namespace
+    so identical limits on different prefixes stay independent.
+    """
+    parsed = []
+    for prefix, specs, *methods in config:
+        policies = []
+        for spec in specs:
+            policy = RateLimit.parse(spec)
+            policy.name = f"route:{prefix}:{policy.name}"
+            policies.append(policy)
+        parsed.append((prefix, policies, frozenset(m.upper() for m in methods[0]) if methods else None))
+    return parsed
+
+
+def _create_backend(storage_url: Optional[str]):
+    if not storage_url or storage_url.startswith('memory://'):
+        return MemoryBackend()
+
+    try:
+        import redis
+        client = redis.from_url(storage_url, socket_connect_timeout=5, socket_timeout=5)
+        client.ping()
+        return RedisBackend(client)
+    except Exception as e:
+        security_logger.error(f"Rate limit storage unavailable ({str(e)}); using in-process limits")
+        return MemoryBackend()
+
+
+def init_rate_limiter(app) -> RateLimitEngine:
+    """
+    Initialize the rate limit engine for the app and register per-route policies.
+
+    RATELIMIT_STORAGE_URL selects the backend (memory:// or a redis:// URL).
+    Route policies apply when RATELIMIT_ENABLED is set; X-RateLimit-* headers
+    are added to every response that was checked by a policy or decorator.
+    """
+    global _engine
+
+    _engine = RateLimitEngine(_create_backend(app.config.get('RATELIMIT_STORAGE_URL')))
+    routes = parse_policies(app.config.get('RATELIMIT_POLICIES', []))
+
+    @app.before_request
+    def apply_rate_limit_policies():
+        """Apply the first matching route policy."""
+        if not current_app.config.get('RATELIMIT_ENABLED', False):
+            return None
+
+        for prefix, policies, methods in routes:
+            if request.path.startswith(prefix) and (methods is None or request.method in methods):
+                user_id = session.get('user_id')
+                identifier = f"user_{user_id}" if user_id else get_client_ip()
+
+                results = _engine.hit(identifier, policies)
+                result = most_restrictive(results)
+                g.rate_limit = result
+
+                if not result.allowed:
+                    security_logger.warning(
+                        f"Rate limit exceeded for {identifier} on {request.path}"
+                    )
+                    abort(429, description="Rate limit exceeded")
+                break
+
+        return None
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        result = g.get('rate_limit')
+        if result is not None:
+            for name, value in result.headers().items():
+                response.headers[name] = value
+        return response
+
+    return _engine
@@ -7,6 +7,9 @@ from .project_service import ProjectService
 from .issue_service import IssueService
 from .report_service import ReportService
 from .audit_service import AuditService
+from .audit_store import AuditStore
+from .analytics_service import AnalyticsService
+from .stats_service import StatsService
 
 __all__ = [
     'AuthService',
@@ -14,5 +17,8 @@ __all__ = [
     'ProjectService',
     'IssueService',
     'ReportService',
-    'AuditService'
+    'AuditService',
+    'AuditStore',
+    'AnalyticsService',
+    'StatsService'
 ]
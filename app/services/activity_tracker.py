@@ -0,0 +1,168 @@
+# app/services/activity_tracker.py
+"""
+Activity Tracker
+Write-behind buffering of user last-seen timestamps.
+
+Requests record activity in memory; a background thread flushes the latest
+timestamp per user in one bulk UPDATE ... CASE every few seconds and on
+shutdown, so page views and API polls no longer open a write transaction.
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import case, update
+
+logger = logging.getLogger('activity')
+
+
+class ActivityTracker:
+    """Buffers last-activity timestamps and flushes them in bulk."""
+
+    # Users per UPDATE statement (each uses three bound parameters)
+    CHUNK_SIZE = 300
+
+    def __init__(self, app=None, flush_interval: float = 30.0):
+        """
+        Initialize activity tracker.
+
+        Args:
+            app: Flask app whose database receives the flushes
+            flush_interval: Seconds between background flushes
+        """
+        self.app = app
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[int, datetime] = {}
+        self._recent: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'recorded': 0,
+            'flushes': 0,
+            'rows_flushed': 0,
+            'errors': 0
+        }
+
+    def record(self, user_id: int, when: Optional[datetime] = None) -> None:
+        """Record activity for a user (in memory only)."""
+        when = when or datetime.utcnow()
+        with self._lock:
+            self._pending[user_id] = when
+            self._recent[user_id] = when
+            self.stats['recorded'] += 1
+
+        if self._thread is None:
+            self._start()
+
+    def last_seen(self, user_id: int) -> Optional[datetime]:
+        """Latest activity seen by this worker (flushed or not)."""
+        return self._recent.get(user_id)
+
+    def flush(self) -> int:
+        """
+        Write all buffered timestamps to the database.
+
+        Returns:
+            Number of users updated
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            if not pending:
+                return 0
+
+            try:
+                self._write(pending)
+            except Exception as e:
+                # Put entries back unless a newer timestamp arrived meanwhile
+                with self._lock:
+                    for user_id, when in pending.items():
+                        if self._pending.get(user_id, when) <= when:
+                            self._pending[user_id] = when
+                self.stats['errors'] += 1
+                logger.warning(f"Activity flush failed: {str(e)}")
+                return 0
+
+            self.stats['flushes'] += 1
+            self.stats['rows_flushed'] += len(pending)
+
+            # Flushed values are in the database now; keep memory bounded
+            with self._lock:
+                for user_id, when in pending.items():
+                    if self._recent.get(user_id) == when and user_id not in self._pending:
+                        del self._recent[user_id]
+
+            return len(pending)
+
+    def _write(self, pending: Dict[int, datetime]) -> None:
+        from app.models import User, db
+
+        items = list(pending.items())
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                for i in range(0, len(items), self.CHUNK_SIZE):
+                    chunk = dict(items[i:i + self.CHUNK_SIZE])
+                    conn.execute(
+                        update(User)
+                        .where(User.id.in_(list(chunk)))
+                        .values(last_activity=case(chunk, value=User.id))
+                    )
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='activity-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def shutdown(self) -> None:
+        """Stop the background thread and flush what is left."""
+        self._stop.set()
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        """Get tracker statistics."""
+        with self._lock:
+            return {
+                **self.stats,
+                'pending': len(self._pending),
+                'flush_interval': self.flush_interval
+            }
+
+
+# Global activity tracker instance
+_activity_tracker: Optional[ActivityTracker] = None
+
+
+def init_activity_tracker(app, flush_interval: float = 30.0) -> ActivityTracker:
+    """Initialize activity tracker for the app, flushing any previous one."""
+    global _activity_tracker
+
+    if _activity_tracker is not None:
+        _activity_tracker.shutdown()
+
+    _activity_tracker = ActivityTracker(app, flush_interval)
+    return _activity_tracker
+
+
+def get_activity_tracker() -> Optional[ActivityTracker]:
+    """Get activity tracker instance."""
+    return _activity_tracker
+
+
+@atexit.register
+def _flush_on_exit():
+    if _activity_tracker is not None:
+        _activity_tracker.shutdown()
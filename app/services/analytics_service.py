@@ -0,0 +1,400 @@
+# app/services/analytics_service.py
+"""
+Analytics Service
+Maintains the per-day project status snapshots behind burndown, cumulative
+flow, velocity and cycle-time reports.
+
+Issue changes are applied as deltas to today's snapshot rows, so a report
+over N days is one range scan of at most N x statuses rows instead of a
+pass over every issue for every day. Deltas are added in SQL (an upsert of
+col = col + delta), so concurrent changes to one project never overwrite
+each other.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger('analytics')
+
+# Snapshot columns, in the order of a delta list
+SNAPSHOT_TOTALS = ('issue_count', 'story_points', 'hours', 'completed_count', 'completed_points')
+
+
+class AnalyticsService:
+    """Service for project analytics snapshots."""
+
+    COMPLETED_STATUSES = ('done', 'closed')
+    FLOW_STATUSES = ['open', 'todo', 'in_progress', 'code_review',
+                     'testing', 'ready_deploy', 'done', 'closed']
+
+    # Upper bounds (days) of the cycle-time histogram buckets
+    CYCLE_TIME_BUCKETS = [1, 3, 7, 14, 30]
+
+    @staticmethod
+    def issue_state(issue):
+        """Snapshot-relevant state of an issue: (status, story points, hours)."""
+        return issue.status, issue.story_points or 0, issue.time_spent or 0
+
+    @staticmethod
+    def record_issue_change(project_id, before, after, when=None):
+        """
+        Apply an issue change to the project's snapshot for today.
+
+        Args:
+            project_id: Project the issue belongs to
+            before: issue_state() before the change (None when created)
+            after: issue_state() after the change (None when deleted)
+            when: Time of the change (default: now); changes must be
+                  recorded in time order
+
+        Returns:
+            bool: True if the snapshot was updated
+        """
+        from app.models import db
+
+        if before == after:
+            return True
+
+        deltas = defaultdict(lambda: [0, 0, 0.0, 0, 0])
+        AnalyticsService._add_delta(deltas, before, after)
+        day = (when or datetime.utcnow()).date()
+
+        try:
+            AnalyticsService._apply(project_id, day, deltas)
+            db.session.commit()
+            return True
+        except Exception as e:
+            # Snapshots are derived data; rebuild_snapshots() repairs drift
+            db.session.rollback()
+            logger.warning(f"Snapshot update failed for project {project_id}: {str(e)}")
+            return False
+
+    @staticmethod
+    def record_issue_changes(changes, when=None):
+        """
+        Apply many issue changes at once, one snapshot update per project.
+
+        Args:
+            changes: Iterable of (project_id, before, after) as for
+                     record_issue_change()
+            when: Time of the changes (default: now)
+
+        Returns:
+            bool: True if every snapshot was updated
+        """
+        from app.models import db
+
+        by_project = defaultdict(lambda: defaultdict(lambda: [0, 0, 0.0, 0, 0]))
+        for project_id, before, after in changes:
+            if before != after:
+                AnalyticsService._add_delta(by_project[project_id], before, after)
+        if not by_project:
+            return True
+
+        day = (when or datetime.utcnow()).date()
+        try:
+            for project_id, deltas in by_project.items():
+                AnalyticsService._apply(project_id, day, deltas)
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Snapshot update failed for projects {sorted(by_project)}: {str(e)}")
+            return False
+
+    @staticmethod
+    def _add_delta(deltas, before, after):
+        """Add one issue's before/after states to per-status deltas."""
+        if before is not None:
+            status, points, hours = before
+            deltas[status][0] -= 1
+            deltas[status][1] -= points
+            deltas[status][2] -= hours
+        if after is not None:
+            status, points, hours = after
+            deltas[status][0] += 1
+            deltas[status][1] += points
+            deltas[status][2] += hours
+
+            if before is not None and status in AnalyticsService.COMPLETED_STATUSES and \
+                    before[0] not in AnalyticsService.COMPLETED_STATUSES:
+                deltas[status][3] += 1
+                deltas[status][4] += points
+
+    @staticmethod
+    def _apply(project_id, day, deltas):
+        """Add deltas to the day's rows in the database (col = col + delta), creating missing ones."""
+        from app.models import ProjectStatusSnapshot, db
+        from app.utils.sql import dialect_insert
+
+        started = db.session.query(ProjectStatusSnapshot.id).filter_by(
+            project_id=project_id, day=day
+        ).first()
+        if started is None:
+            has_snapshot = db.session.query(
+                ProjectStatusSnapshot.query.filter_by(project_id=project_id).exists()
+            ).scalar()
+            if not has_snapshot:
+                # Changes are recorded after they commit, so a rebuild from the
+                # issue table already includes them; deltas alone would start
+                # the project from nothing
+                AnalyticsService._write_snapshots(project_id)
+                return
+            AnalyticsService._carry_forward(project_id, day)
+
+        table = ProjectStatusSnapshot.__table__
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['project_id', 'day', 'status'],
+            set_={name: table.c[name] + stmt.excluded[name] for name in SNAPSHOT_TOTALS}
+        )
+        db.session.execute(stmt, [
+            {'project_id': project_id, 'day': day, 'status': status,
+             **dict(zip(SNAPSHOT_TOTALS, values))}
+            for status, values in deltas.items()
+        ])
+
+    @staticmethod
+    def _carry_forward(project_id, day):
+        """Start a new snapshot day from the latest earlier one (a no-op for rows already there)."""
+        from sqlalchemy import literal, select
+
+        from app.models import ProjectStatusSnapshot, db
+        from app.utils.sql import dialect_insert
+
+        previous = select(db.func.max(ProjectStatusSnapshot.day)).where(
+            ProjectStatusSnapshot.project_id == project_id,
+            ProjectStatusSnapshot.day < day
+        ).scalar_subquery()
+
+        rows = select(
+            ProjectStatusSnapshot.project_id, literal(day, ProjectStatusSnapshot.day.type),
+            ProjectStatusSnapshot.status, ProjectStatusSnapshot.issue_count,
+            ProjectStatusSnapshot.story_points, ProjectStatusSnapshot.hours, literal(0), literal(0)
+        ).where(ProjectStatusSnapshot.project_id == project_id, ProjectStatusSnapshot.day == previous)
+
+        db.session.execute(
+            dialect_insert(ProjectStatusSnapshot.__table__)
+            .from_select(['project_id', 'day', 'status', *SNAPSHOT_TOTALS], rows)
+            .on_conflict_do_nothing(index_elements=['project_id', 'day', 'status'])
+        )
+
+    @staticmethod
+    def rebuild_snapshots(project_id):
+        """
+        Rebuild a project's snapshots from its issues and WorkflowTransition history.
+
+        Story points and hours are not versioned, so history uses each
+        issue's current values.
+
+        Returns:
+            int: Number of snapshot rows written
+        """
+        from app.models import db
+
+        try:
+            written = AnalyticsService._write_snapshots(project_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return written
+
+    @staticmethod
+    def _write_snapshots(project_id):
+        """Replace a project's snapshot rows in the current transaction (caller commits)."""
+        from app.models import Issue, WorkflowTransition, ProjectStatusSnapshot, db
+
+        issues = db.session.query(
+            Issue.id, Issue.status, Issue.story_points, Issue.time_spent, Issue.created_at
+        ).filter(Issue.project_id == project_id).all()
+
+        transitions = db.session.query(
+            WorkflowTransition.issue_id, WorkflowTransition.from_status,
+            WorkflowTransition.to_status, WorkflowTransition.timestamp
+        ).join(Issue, Issue.id == WorkflowTransition.issue_id)\
+         .filter(Issue.project_id == project_id)\
+         .order_by(WorkflowTransition.timestamp, WorkflowTransition.id).all()
+
+        first_status = {}
+        for t in transitions:
+            first_status.setdefault(t.issue_id, t.from_status)
+
+        # day -> status -> [count, points, hours, completed, completed_points]
+        events = defaultdict(lambda: defaultdict(lambda: [0, 0, 0.0, 0, 0]))
+        weights = {}
+
+        for issue in issues:
+            points, hours = issue.story_points or 0, issue.time_spent or 0
+            weights[issue.id] = (points, hours)
+            created = (issue.created_at or datetime.utcnow()).date()
+            delta = events[created][first_status.get(issue.id, issue.status)]
+            delta[0] += 1
+            delta[1] += points
+            delta[2] += hours
+
+        for t in transitions:
+            points, hours = weights[t.issue_id]
+            day = t.timestamp.date()
+
+            old = events[day][t.from_status]
+            old[0] -= 1
+            old[1] -= points
+            old[2] -= hours
+
+            new = events[day][t.to_status]
+            new[0] += 1
+            new[1] += points
+            new[2] += hours
+            if t.to_status in AnalyticsService.COMPLETED_STATUSES and \
+                    t.from_status not in AnalyticsService.COMPLETED_STATUSES:
+                new[3] += 1
+                new[4] += points
+
+        rows = []
+        state = defaultdict(lambda: [0, 0, 0.0])
+        for day in sorted(events):
+            for status, (count, points, hours, _, _) in events[day].items():
+                state[status][0] += count
+                state[status][1] += points
+                state[status][2] += hours
+
+            for status, (count, points, hours) in state.items():
+                flow = events[day].get(status)
+                rows.append({
+                    'project_id': project_id,
+                    'day': day,
+                    'status': status,
+                    'issue_count': count,
+                    'story_points': points,
+                    'hours': hours,
+                    'completed_count': flow[3] if flow else 0,
+                    'completed_points': flow[4] if flow else 0
+                })
+
+        ProjectStatusSnapshot.query.filter_by(project_id=project_id).delete()
+        if rows:
+            db.session.execute(db.insert(ProjectStatusSnapshot), rows)
+        return len(rows)
+
+    @staticmethod
+    def ensure_snapshots(project_id):
+        """Backfill a project on first use if it has issues but no snapshots."""
+        from app.models import Issue, ProjectStatusSnapshot, db
+
+        has_snapshot = db.session.query(
+            ProjectStatusSnapshot.query.filter_by(project_id=project_id).exists()
+        ).scalar()
+        if has_snapshot:
+            return False
+
+        has_issues = db.session.query(
+            Issue.query.filter_by(project_id=project_id).exists()
+        ).scalar()
+        if not has_issues:
+            return False
+
+        AnalyticsService.rebuild_snapshots(project_id)
+        return True
+
+    @staticmethod
+    def get_daily_series(project_id, start_day, end_day=None):
+        """
+        Get the project's state for every day in [start_day, end_day].
+
+        Returns:
+            list: [(day, {status: {'count', 'points', 'hours',
+                                   'completed', 'completed_points'}})]
+        """
+        from app.models import ProjectStatusSnapshot, db
+
+        end_day = end_day or datetime.utcnow().date()
+
+        # Start at the last snapshot on or before start_day so its state carries in
+        base_day = db.session.query(db.func.max(ProjectStatusSnapshot.day)).filter(
+            ProjectStatusSnapshot.project_id == project_id,
+            ProjectStatusSnapshot.day <= start_day
+        ).scalar_subquery()
+
+        rows = db.session.query(
+            ProjectStatusSnapshot.day, ProjectStatusSnapshot.status,
+            ProjectStatusSnapshot.issue_count, ProjectStatusSnapshot.story_points,
+            ProjectStatusSnapshot.hours, ProjectStatusSnapshot.completed_count,
+            ProjectStatusSnapshot.completed_points
+        ).filter(
+            ProjectStatusSnapshot.project_id == project_id,
+            ProjectStatusSnapshot.day >= db.func.coalesce(base_day, start_day),
+            ProjectStatusSnapshot.day <= end_day
+        ).order_by(ProjectStatusSnapshot.day).all()
+
+        by_day = defaultdict(dict)
+        for row in rows:
+            by_day[row.day][row.status] = row
+
+        series = []
+        state = {}
+        for day in sorted(d for d in by_day if d < start_day)[-1:]:
+            state = {s: (r.issue_count, r.story_points, r.hours) for s, r in by_day[day].items()}
+
+        day = start_day
+        while day <= end_day:
+            today = by_day.get(day)
+            if today:
+                state = {s: (r.issue_count, r.story_points, r.hours) for s, r in today.items()}
+
+            series.append((day, {
+                status: {
+                    'count': count,
+                    'points': points,
+                    'hours': hours,
+                    'completed': today[status].completed_count if today and status in today else 0,
+                    'completed_points': today[status].completed_points if today and status in today else 0
+                } for status, (count, points, hours) in state.items()
+            }))
+            day += timedelta(days=1)
+
+        return series
+
+    @staticmethod
+    def get_cycle_times(project_id, since):
+        """
+        Cycle times (created -> closed, in days) of issues closed since a date.
+
+        Returns:
+            dict: average, median, p85 and a histogram keyed by bucket label
+        """
+        from app.models import Issue, db
+
+        rows = db.session.query(Issue.created_at, Issue.closed_at).filter(
+            Issue.project_id == project_id,
+            Issue.closed_at >= since,
+            Issue.created_at.isnot(None)
+        ).all()
+
+        times = sorted((closed - created).total_seconds() / 86400 for created, closed in rows)
+
+        labels = []
+        lower = 0
+        for upper in AnalyticsService.CYCLE_TIME_BUCKETS:
+            labels.append(f'{lower}-{upper}d')
+            lower = upper
+        labels.append(f'{lower}d+')
+
+        histogram = dict.fromkeys(labels, 0)
+        for value in times:
+            index = next((i for i, upper in enumerate(AnalyticsService.CYCLE_TIME_BUCKETS)
+                          if value < upper), len(AnalyticsService.CYCLE_TIME_BUCKETS))
+            histogram[labels[index]] += 1
+
+        def percentile(p):
+            return round(times[min(int(len(times) * p), len(times) - 1)], 1) if times else 0
+
+        return {
+            'count': len(times),
+            'average': round(sum(times) / len(times), 1) if times else 0,
+            'median': percentile(0.5),
+            'p85': percentile(0.85),
+            'histogram': histogram
+        }
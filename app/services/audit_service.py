@@ -6,6 +6,7 @@ Handles security auditing and activity logging.
 
 from datetime import datetime, timedelta
 from app.utils.security import get_client_ip
+from app.services.audit_store import AuditStore
 
 
 class AuditService:
@@ -24,6 +25,17 @@ class AuditService:
     CATEGORY_SECURITY = 'SECURITY_EVENT'
     CATEGORY_SYSTEM = 'SYSTEM'
     
+    SECURITY_ACTIONS = (
+        'LOGIN_FAILED',
+        'LOGIN_ATTEMPT_LOCKED',
+        'UNAUTHORIZED_ACCESS',
+        'RATE_LIMIT_EXCEEDED',
+        'CSRF_TOKEN_INVALID',
+        'SESSION_HIJACK_ATTEMPT',
+        'SQL_INJECTION_ATTEMPT',
+        'XSS_ATTEMPT'
+    )
+    
     @staticmethod
     def log_event(action, user_id=None, details=None, severity='INFO', category='SYSTEM'):
         """
@@ -37,18 +49,14 @@ class AuditService:
             category: Event category
             
         Returns:
-            AuditLog: The created audit log entry
+            AuditLog: The created audit log entry (None when queued for the
+            background audit writer or on failure)
         """
         from app.models import AuditLog, db
+        from app.security.audit_writer import get_audit_writer
         from flask import request
         
         try:
-            audit = AuditLog(
-                user_id=user_id,
-                action=f"{category}:{action}",
-                ip_address=get_client_ip()
-            )
-            
             # Add details including severity and user agent
             full_details = {
                 'severity': severity,
@@ -58,6 +66,20 @@ class AuditService:
                 'endpoint': request.endpoint if request else None
             }
             
+            columns = {
+                'user_id': user_id,
+                'ip_address': get_client_ip(),
+                'severity': severity,
+                'category': category,
+                'endpoint': request.endpoint if request else None
+            }
+            
+            writer = get_audit_writer()
+            if writer is not None:
+                writer.submit(f"{category}:{action}", details=str(full_details), **columns)
+                return None
+            
+            audit = AuditLog(action=f"{category}:{action}", **columns)
             audit.details = str(full_details)
             
             db.session.add(audit)
@@ -72,97 +94,65 @@ class AuditService:
             logging.error(f"Failed to log audit event: {action} - {str(e)}")
             return None
     
+    @staticmethod
+    def _action_names(*actions):
+        """Stored action names for bare actions, with and without a category prefix."""
+        categories = (AuditService.CATEGORY_AUTH, AuditService.CATEGORY_ACCESS,
+                      AuditService.CATEGORY_DATA, AuditService.CATEGORY_SECURITY,
+                      AuditService.CATEGORY_SYSTEM)
+        return [*actions, *(f"{category}:{action}" for category in categories for action in actions)]
+    
     @staticmethod
     def get_recent_events(limit=100, user_id=None, category=None, severity=None):
         """Get recent audit events with optional filtering."""
-        from app.models import AuditLog
-        
-        query = AuditLog.query.order_by(AuditLog.timestamp.desc())
-        
-        if user_id:
-            query = query.filter_by(user_id=user_id)
-        
-        if category:
-            query = query.filter(AuditLog.action.like(f'{category}:%'))
-        
-        if severity:
-            query = query.filter(AuditLog.details_encrypted.like(f'%{severity}%'))
-        
-        return query.limit(limit).all()
+        return AuditStore.query(limit=limit, user_id=user_id, category=category, severity=severity)
     
     @staticmethod
     def get_security_events(hours=24):
         """Get security-related events from the last N hours."""
-        from app.models import AuditLog
-        
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        security_actions = [
-            'LOGIN_FAILED',
-            'LOGIN_ATTEMPT_LOCKED',
-            'UNAUTHORIZED_ACCESS',
-            'RATE_LIMIT_EXCEEDED',
-            'CSRF_TOKEN_INVALID',
-            'SESSION_HIJACK_ATTEMPT',
-            'SQL_INJECTION_ATTEMPT',
-            'XSS_ATTEMPT'
-        ]
-        
-        events = AuditLog.query.filter(
-            AuditLog.timestamp >= cutoff
-        ).order_by(AuditLog.timestamp.desc()).all()
-        
-        return [e for e in events if any(action in e.action for action in security_actions)]
+        return AuditStore.query(
+            since=cutoff, limit=None,
+            actions=AuditService._action_names(*AuditService.SECURITY_ACTIONS)
+        )
     
     @staticmethod
     def get_failed_logins(hours=24):
         """Get failed login attempts from the last N hours."""
-        from app.models import AuditLog
-        
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        return AuditLog.query.filter(
-            AuditLog.action.like('%LOGIN_FAILED%'),
-            AuditLog.timestamp >= cutoff
-        ).order_by(AuditLog.timestamp.desc()).all()
+        return AuditStore.query(
+            since=cutoff, limit=None, actions=AuditService._action_names('LOGIN_FAILED')
+        )
     
     @staticmethod
     def get_user_activity(user_id, days=30):
         """Get activity history for a specific user."""
-        from app.models import AuditLog
-        
         cutoff = datetime.utcnow() - timedelta(days=days)
         
-        return AuditLog.query.filter(
-            AuditLog.user_id == user_id,
-            AuditLog.timestamp >= cutoff
-        ).order_by(AuditLog.timestamp.desc()).all()
+        return AuditStore.query(since=cutoff, limit=None, user_id=user_id)
     
     @staticmethod
     def get_ip_activity(ip_address, hours=24):
         """Get activity from a specific IP address."""
-        from app.models import AuditLog
-        
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        return AuditLog.query.filter(
-            AuditLog.ip_address == ip_address,
-            AuditLog.timestamp >= cutoff
-        ).order_by(AuditLog.timestamp.desc()).all()
+        return AuditStore.query(since=cutoff, limit=None, ip_address=ip_address)
     
     @staticmethod
     def get_suspicious_activity():
         """Detect suspicious activity patterns."""
-        from app.models import AuditLog, User
+        from app.models import User
         
         suspicious = []
         
         # Check for multiple failed logins
-        failed_logins = AuditService.get_failed_logins(hours=1)
-        ip_counts = {}
-        for event in failed_logins:
-            ip = event.ip_address
-            ip_counts[ip] = ip_counts.get(ip, 0) + 1
+        ip_counts = AuditStore.count_by(
+            'ip_address',
+            since=datetime.utcnow() - timedelta(hours=1),
+            actions=AuditService._action_names('LOGIN_FAILED')
+        )
         
         for ip, count in ip_counts.items():
             if count >= 5:
@@ -188,38 +178,28 @@ class AuditService:
     @staticmethod
     def get_statistics(days=30):
         """Get audit statistics for dashboard."""
-        from app.models import AuditLog
-        from sqlalchemy import func
-        
-        cutoff = datetime.utcnow() - timedelta(days=days)
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=days)
+        first_day = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
         
         # Total events
-        total = AuditLog.query.filter(AuditLog.timestamp >= cutoff).count()
+        total = AuditStore.count(since=cutoff)
         
         # Events by day
+        per_day = AuditStore.count_by('day', since=first_day)
         daily_events = []
         for i in range(days, -1, -1):
-            day_start = (datetime.utcnow() - timedelta(days=i)).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            day_end = day_start + timedelta(days=1)
-            
-            count = AuditLog.query.filter(
-                AuditLog.timestamp >= day_start,
-                AuditLog.timestamp < day_end
-            ).count()
-            
+            day = (now - timedelta(days=i)).strftime('%Y-%m-%d')
             daily_events.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'count': count
+                'date': day,
+                'count': per_day.get(day, 0)
             })
         
         # Top events
-        events = AuditLog.query.filter(AuditLog.timestamp >= cutoff).all()
         action_counts = {}
-        for event in events:
-            action = event.action.split(':')[-1] if ':' in event.action else event.action
-            action_counts[action] = action_counts.get(action, 0) + 1
+        for action, count in AuditStore.count_by('action', since=cutoff).items():
+            action = action.split(':')[-1] if ':' in action else action
+            action_counts[action] = action_counts.get(action, 0) + count
         
         top_actions = sorted(action_counts.items(), key=lambda x: x[1], reverse=True)[:10]
         
@@ -227,18 +207,25 @@ class AuditService:
             'total_events': total,
             'daily_events': daily_events,
             'top_actions': top_actions,
-            'security_events': len(AuditService.get_security_events(hours=24 * days)),
-            'failed_logins': len(AuditService.get_failed_logins(hours=24 * days))
+            'security_events': AuditStore.count(
+                since=now - timedelta(hours=24 * days),
+                actions=AuditService._action_names(*AuditService.SECURITY_ACTIONS)
+            ),
+            'failed_logins': AuditStore.count(
+                since=now - timedelta(hours=24 * days),
+                actions=AuditService._action_names('LOGIN_FAILED')
+            )
         }
     
     @staticmethod
     def cleanup_old_logs(days=90):
-        """Remove audit logs older than specified days."""
-        from app.models import AuditLog, db
+        """
+        Remove audit logs older than specified days.
         
+        Finished months are first archived into monthly partitions, so
+        retention mostly drops whole partition tables.
+        """
         cutoff = datetime.utcnow() - timedelta(days=days)
         
-        deleted = AuditLog.query.filter(AuditLog.timestamp < cutoff).delete()
-        db.session.commit()
-        
-        return deleted
+        AuditStore.archive()
+        return AuditStore.drop_before(cutoff)
@@ -0,0 +1,266 @@
+# app/services/audit_store.py
+"""
+Audit Store
+Monthly-partitioned storage and SQL query API for audit events.
+
+New events land in the live audit_log table. archive() moves every finished
+month into its own audit_log_YYYYMM table carrying the same indexes;
+retention drops whole partitions, and queries only touch the partitions
+that overlap the requested time range.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, Index, MetaData, Table, delete, func, inspect, literal, select, union_all
+
+PARTITION_PATTERN = re.compile(r'^audit_log_(\d{4})(\d{2})$')
+
+COLUMNS = ('id', 'user_id', 'action', 'ip_address', 'timestamp', 'severity', 'category',
+           'endpoint', 'target_type', 'target_id', 'details_encrypted')
+
+
+class AuditRecord:
+    """Read-only audit event from the live table or a monthly partition."""
+
+    __slots__ = COLUMNS + ('partition',)
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, row[name])
+
+    @property
+    def details(self):
+        from app.models import decrypt_field
+        return decrypt_field(self.details_encrypted)
+
+    def __repr__(self):
+        return f'<AuditRecord {self.action}>'
+
+
+def _month_start(when: datetime) -> datetime:
+    return datetime(when.year, when.month, 1)
+
+
+def _next_month(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+class AuditStore:
+    """Partition management and filtered queries over audit events."""
+
+    @staticmethod
+    def partition_name(when: datetime) -> str:
+        """Name of the partition holding events from when's month."""
+        return f'audit_log_{when.year:04d}{when.month:02d}'
+
+    @staticmethod
+    def list_partitions() -> Dict[datetime, str]:
+        """Existing partitions keyed by month start, oldest first."""
+        from app.models import db
+
+        partitions = {}
+        for name in inspect(db.engine).get_table_names():
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+        return dict(sorted(partitions.items()))
+
+    @staticmethod
+    def partition_table(name: str) -> Table:
+        """Table for a partition, mirroring audit_log's columns and indexes."""
+        from app.models import AuditLog
+
+        live = AuditLog.__table__
+        table = Table(name, MetaData(), *[
+            Column(column.name, column.type, primary_key=column.primary_key)
+            for column in live.columns
+        ])
+        for index in live.indexes:
+            Index(index.name.replace(live.name, name, 1), *[table.c[c.name] for c in index.columns])
+        return table
+
+    @staticmethod
+    def _sources(since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Table]:
+        """The live table plus the partitions overlapping [since, until]."""
+        from app.models import AuditLog
+
+        sources = [AuditLog.__table__]
+        for start, name in AuditStore.list_partitions().items():
+            if since is not None and _next_month(start) <= since:
+                continue
+            if until is not None and start > until:
+                continue
+            sources.append(AuditStore.partition_table(name))
+        return sources
+
+    @staticmethod
+    def _conditions(table, since=None, until=None, user_id=None, category=None, severity=None,
+                    actions=None, ip_address=None, target_type=None, target_id=None):
+        conditions = []
+        if since is not None:
+            conditions.append(table.c.timestamp >= since)
+        if until is not None:
+            conditions.append(table.c.timestamp <= until)
+        if user_id is not None:
+            conditions.append(table.c.user_id == user_id)
+        if category is not None:
+            conditions.append(table.c.category == category)
+        if severity is not None:
+            conditions.append(table.c.severity == severity)
+        if actions is not None:
+            conditions.append(table.c.action.in_(list(actions)))
+        if ip_address is not None:
+            conditions.append(table.c.ip_address == ip_address)
+        if target_type is not None:
+            conditions.append(table.c.target_type == target_type)
+        if target_id is not None:
+            conditions.append(table.c.target_id == target_id)
+        return conditions
+
+    @staticmethod
+    def query(since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: Optional[int] = 100, **filters) -> List[AuditRecord]:
+        """
+        Get audit events, newest first.
+
+        Args:
+            since: Earliest timestamp (inclusive)
+            until: Latest timestamp (inclusive)
+            limit: Maximum number of events (None: all)
+            **filters: user_id, category, severity, actions (exact action
+                       names), ip_address, target_type, target_id
+
+        Returns:
+            list: AuditRecord objects
+        """
+        from app.models import db
+
+        branches = []
+        for table in AuditStore._sources(since, until):
+            stmt = select(*[table.c[name] for name in COLUMNS], literal(table.name).label('partition'))\
+                .where(*AuditStore._conditions(table, since, until, **filters))\
+                .order_by(table.c.timestamp.desc(), table.c.id.desc())
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            branches.append(select(stmt.subquery()))
+
+        combined = union_all(*branches).subquery() if len(branches) > 1 else branches[0].subquery()
+        stmt = select(combined).order_by(combined.c.timestamp.desc(), combined.c.id.desc())
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        return [AuditRecord(row) for row in db.session.execute(stmt).mappings()]
+
+    @staticmethod
+    def count(since: Optional[datetime] = None, until: Optional[datetime] = None, **filters) -> int:
+        """Count audit events matching the filters."""
+        from app.models import db
+
+        return sum(
+            db.session.execute(
+                select(func.count()).select_from(table)
+                .where(*AuditStore._conditions(table, since, until, **filters))
+            ).scalar()
+            for table in AuditStore._sources(since, until)
+        )
+
+    @staticmethod
+    def count_by(group: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 **filters) -> Dict:
+        """
+        Count audit events per value of a column.
+
+        Args:
+            group: Column name, or 'day' for the event date ('YYYY-MM-DD')
+        """
+        from app.models import db
+
+        counts: Dict = {}
+        for table in AuditStore._sources(since, until):
+            key = func.date(table.c.timestamp) if group == 'day' else table.c[group]
+            rows = db.session.execute(
+                select(key, func.count())
+                .where(*AuditStore._conditions(table, since, until, **filters))
+                .group_by(key)
+            )
+            for value, count in rows:
+                counts[value] = counts.get(value, 0) + count
+        return counts
+
+    @staticmethod
+    def archive(now: Optional[datetime] = None) -> int:
+        """
+        Move events from months before now's month into their partitions.
+        The newest event always stays live so ids keep increasing.
+
+        Returns:
+            int: Number of events moved
+        """
+        from app.models import AuditLog, db
+
+        live = AuditLog.__table__
+        cutoff = _month_start(now or datetime.utcnow())
+        kept = AuditStore._newest_id(db.session)
+        moved = 0
+
+        while True:
+            oldest = db.session.execute(
+                select(func.min(live.c.timestamp)).where(live.c.timestamp < cutoff, live.c.id != kept)
+            ).scalar()
+            if oldest is None:
+                return moved
+
+            start = _month_start(oldest)
+            end = _next_month(start)
+            table = AuditStore.partition_table(AuditStore.partition_name(start))
+            in_month = (live.c.timestamp >= start, live.c.timestamp < end, live.c.id != kept)
+
+            table.create(db.engine, checkfirst=True)
+            with db.engine.begin() as conn:
+                conn.execute(table.insert().from_select(
+                    list(COLUMNS), select(*[live.c[name] for name in COLUMNS]).where(*in_month)
+                ))
+                moved += conn.execute(delete(live).where(*in_month)).rowcount
+
+    @staticmethod
+    def drop_before(cutoff: datetime) -> int:
+        """
+        Remove events older than cutoff, dropping fully expired partitions whole.
+        The newest live event is kept, as in archive().
+
+        Returns:
+            int: Number of events removed
+        """
+        from app.models import AuditLog, db
+
+        partitions = AuditStore.list_partitions()
+        removed = 0
+        with db.engine.begin() as conn:
+            for start, name in partitions.items():
+                if start >= cutoff:
+                    break
+
+                table = AuditStore.partition_table(name)
+                if _next_month(start) <= cutoff:
+                    removed += conn.execute(select(func.count()).select_from(table)).scalar()
+                    table.drop(conn)
+                else:
+                    removed += conn.execute(delete(table).where(table.c.timestamp < cutoff)).rowcount
+
+            live = AuditLog.__table__
+            removed += conn.execute(
+                delete(live).where(live.c.timestamp < cutoff, live.c.id != AuditStore._newest_id(conn))
+            ).rowcount
+
+        return removed
+
+    @staticmethod
+    def _newest_id(conn) -> int:
+        # SQLite hands out max(id) + 1 without AUTOINCREMENT, so the newest
+        # event stays live until a later one arrives; otherwise new ids would
+        # repeat ones already in the partitions
+        from app.models import AuditLog
+
+        return conn.execute(select(func.max(AuditLog.__table__.c.id))).scalar() or 0
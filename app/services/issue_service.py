@@ -4,7 +4,11 @@ Issue Service
 Handles issue/task management business logic.
 """
 
+import logging
 from datetime import datetime
+from app.cache import CacheInvalidator
+from app.scheduling import schedule_issue_deadline, schedule_timer
+from app.services.analytics_service import AnalyticsService
 from app.utils.security import sanitize_input, log_security_event
 from app.utils.validators import (
     validate_required, validate_length, validate_date,
@@ -92,8 +96,18 @@ class IssueService:
                 issue.description = sanitize_input(description, allow_html=True)
             
             db.session.add(issue)
+            db.session.flush()
+            IssueService._queue_webhook('created', issue)
+            if issue.due_date:
+                schedule_issue_deadline(issue)
             db.session.commit()
             
+            IssueService._sync_search_index(issue)
+            AnalyticsService.record_issue_change(project_id, None, AnalyticsService.issue_state(issue))
+            CacheInvalidator.invalidate_issue(project_id)
+            IssueService._publish_realtime('created', project_id, issue.id, issue)
+            IssueService._dispatch_automation('ISSUE_CREATED', issue)
+            
             log_security_event(
                 'ISSUE_CREATED',
                 user_id=reporter_id,
@@ -120,6 +134,9 @@ class IssueService:
                 return False, None, 'Issue not found'
             
             old_status = issue.status
+            old_assignee_id = issue.assignee_id
+            old_state = AnalyticsService.issue_state(issue)
+            text_changed = 'title' in data or 'description' in data
             
             if 'title' in data:
                 issue.title = sanitize_input(data['title'])
@@ -179,8 +196,20 @@ class IssueService:
                 issue.epic_id = int(data['epic_id']) if data['epic_id'] else None
             
             issue.updated_at = datetime.utcnow()
+            IssueService._queue_webhook('updated', issue)
+            if 'due_date' in data or issue.status != old_status:
+                schedule_issue_deadline(issue)
             db.session.commit()
             
+            IssueService._sync_search_index(issue, fields_only=not text_changed)
+            AnalyticsService.record_issue_change(issue.project_id, old_state, AnalyticsService.issue_state(issue))
+            CacheInvalidator.invalidate_issue(issue.project_id)
+            IssueService._publish_realtime('updated', issue.project_id, issue.id, issue)
+            if issue.status != old_status:
+                IssueService._dispatch_automation('ISSUE_STATUS_CHANGED', issue, from_status=old_status)
+            if issue.assignee_id != old_assignee_id and issue.assignee_id:
+                IssueService._dispatch_automation('ISSUE_ASSIGNED', issue)
+            
             log_security_event(
                 'ISSUE_UPDATED',
                 user_id=updated_by,
@@ -213,10 +242,18 @@ class IssueService:
             
             issue_key = issue.key
             project_id = issue.project_id
+            old_state = AnalyticsService.issue_state(issue)
             
+            IssueService._queue_webhook('deleted', issue)
+            schedule_timer(f'issue_deadline:{issue_id}', 'issue_deadline', None)
             db.session.delete(issue)
             db.session.commit()
             
+            IssueService._sync_search_index(issue_id=issue_id, removed=True)
+            AnalyticsService.record_issue_change(project_id, old_state, None)
+            CacheInvalidator.invalidate_issue(project_id)
+            IssueService._publish_realtime('deleted', project_id, issue_id)
+            
             log_security_event(
                 'ISSUE_DELETED',
                 user_id=deleted_by,
@@ -247,6 +284,13 @@ class IssueService:
         """Get issues for a project with optional filters."""
         from app.models import Issue
         
+        return IssueService.query_issues_by_project(project_id, filters).order_by(Issue.position).all()
+    
+    @staticmethod
+    def query_issues_by_project(project_id, filters=None):
+        """Build the (unordered) filtered issue query for a project."""
+        from app.models import Issue
+        
         query = Issue.query.filter_by(project_id=project_id)
         
         if filters:
@@ -263,7 +307,7 @@ class IssueService:
             if 'epic_id' in filters and filters['epic_id']:
                 query = query.filter_by(epic_id=int(filters['epic_id']))
         
-        return query.order_by(Issue.position).all()
+        return query
     
     @staticmethod
     def get_issues_grouped_by_status(project_id):
@@ -300,8 +344,13 @@ class IssueService:
             
             db.session.add(comment)
             issue.updated_at = datetime.utcnow()
+            IssueService._queue_webhook('updated', issue)
             db.session.commit()
             
+            IssueService._sync_search_index(issue, comment=comment)
+            IssueService._dispatch_automation('COMMENT_ADDED', issue, comment_id=comment.id, user_id=user_id)
+            IssueService._queue_comment_notifications(comment.id)
+            
             return True, comment, 'Comment added successfully'
             
         except Exception as e:
@@ -373,17 +422,135 @@ class IssueService:
                 return False, 'Issue not found'
             
             hours = validate_float(hours, 'hours', min_value=0, max_value=24)
+            old_state = AnalyticsService.issue_state(issue)
             
             issue.time_spent = (issue.time_spent or 0) + hours
             issue.updated_at = datetime.utcnow()
+            IssueService._queue_webhook('updated', issue)
             db.session.commit()
             
+            AnalyticsService.record_issue_change(issue.project_id, old_state, AnalyticsService.issue_state(issue))
             return True, f'Logged {hours} hours'
             
         except Exception as e:
             db.session.rollback()
             return False, f'Error logging time: {str(e)}'
     
+    @staticmethod
+    def _queue_webhook(action, issue):
+        """Add an issue event to the webhook outbox in the current transaction.
+        
+        Subscribers are resolved and called by the delivery worker, never
+        inside the request.
+        """
+        from app.integrations.webhook_delivery import get_webhook_dispatcher
+        
+        dispatcher = get_webhook_dispatcher()
+        if dispatcher is None:
+            return
+        
+        dispatcher.enqueue('issue', {
+            'action': action,
+            'issue': IssueService._issue_summary(issue)
+        })
+    
+    @staticmethod
+    def _issue_summary(issue):
+        """Fields sent to webhook subscribers and live board viewers."""
+        return {
+            'id': issue.id,
+            'key': issue.key,
+            'title': issue.title,
+            'project_id': issue.project_id,
+            'status': issue.status,
+            'priority': issue.priority,
+            'issue_type': issue.issue_type,
+            'assignee_id': issue.assignee_id,
+            'updated_at': issue.updated_at.isoformat() if issue.updated_at else None,
+        }
+    
+    @staticmethod
+    def _publish_realtime(action, project_id, issue_id, issue=None):
+        """Push a committed issue change to the project's live viewers.
+        
+        Bursts of changes are coalesced by the fanout bus, so a bulk edit
+        reaches each board as one frame.
+        """
+        from app.websocket import publish_issue_update
+        
+        data = IssueService._issue_summary(issue) if issue is not None else {'id': issue_id}
+        publish_issue_update(project_id, issue_id, f'issue_{action}', data)
+    
+    @staticmethod
+    def _dispatch_automation(trigger, issue, **extra):
+        """Hand a committed issue event to the workflow engine.
+        
+        Only the trigger index is consulted here; matching workflows run on
+        the engine's worker thread.
+        """
+        from app.automation.workflow import TriggerType, workflow_engine
+        
+        try:
+            workflow_engine.dispatch(TriggerType[trigger], IssueService._automation_event(issue, **extra))
+        except Exception as e:
+            logging.getLogger('automation').error(f'Workflow automation dispatch failed: {str(e)}')
+    
+    @staticmethod
+    def _automation_event(issue, **extra):
+        """Workflow event data for an issue."""
+        return {
+            'issue_id': issue.id,
+            'key': issue.key,
+            'project_id': issue.project_id,
+            'status': issue.status,
+            'priority': issue.priority,
+            'issue_type': issue.issue_type,
+            'assignee_id': issue.assignee_id,
+            'assignees': [issue.assignee_id] if issue.assignee_id else [],
+            'created_at': issue.created_at.isoformat() if issue.created_at else None,
+            **extra
+        }
+    
+    @staticmethod
+    def _queue_comment_notifications(comment_id):
+        """Hand a committed comment to the notification fanout job.
+        
+        Recipients are resolved and notified on a job worker, so posting a
+        comment costs the same however many people watch the issue.
+        """
+        from app.services.notification_service import fanout_comment_notifications
+        
+        try:
+            fanout_comment_notifications.delay(comment_id)
+        except Exception as e:
+            logging.getLogger('notifications').error(f'Comment notification fanout failed: {str(e)}')
+    
+    @staticmethod
+    def _sync_search_index(issue=None, comment=None, issue_id=None,
+                           fields_only=False, removed=False):
+        """Push an issue or comment change into the search index.
+        
+        Index failures are logged and never fail the write that triggered them;
+        a rebuild restores consistency.
+        """
+        from app.search.index import get_search_index
+        
+        index = get_search_index()
+        if index is None:
+            return
+        
+        try:
+            if removed:
+                index.remove_issue(issue_id)
+            elif comment is not None:
+                index.index_comment(comment, issue)
+            elif fields_only:
+                index.update_issue_fields(issue)
+            else:
+                index.index_issue(issue)
+        except Exception as e:
+            logging.getLogger('search').warning(f'Search index update failed: {str(e)}')
+    
     @staticmethod
     def _generate_issue_key(project_id):
         """Generate unique issue key like PROJ-123."""
@@ -1,11 +1,26 @@
 """
 Notification Service
 Handles creating, retrieving, and managing user notifications
+
+Notifications for many users are written with one bulk insert. Each user's
+unread count lives in notification_counter and is adjusted in the same
+transaction as the notifications it counts, so badge polls read one row.
+New-notification pushes go through the fanout bus coalesced per user.
 """
 
+import logging
+import re
+from collections import Counter
 from datetime import datetime, timedelta
-from flask_login import current_user
-from models import db, Notification
+from sqlalchemy import and_, case, delete, false, func, insert, or_, select, update
+from models import db, Notification, NotificationCounter
+from app.tasks import async_task
+from app.utils.sql import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# @username in comment text
+MENTION_PATTERN = re.compile(r'(?<![\w@])@([A-Za-z0-9_]+)')
 
 
 class NotificationService:
@@ -42,10 +57,121 @@ class NotificationService:
         )
         
         db.session.add(notification)
+        db.session.flush()
+        NotificationService._bump_counters({user_id: 1})
         db.session.commit()
         
+        NotificationService._push({user_id: notification.to_dict()})
+        
         return notification
     
+    @staticmethod
+    def notify_users(user_ids, notification_type, title, message=None, link=None,
+                     icon='bell', related_type=None, related_id=None):
+        """
+        Create the same notification for many users in one transaction
+        
+        Args:
+            user_ids: Target user IDs (duplicates are ignored)
+            notification_type, title, message, link, icon, related_type,
+            related_id: As for create_notification()
+        
+        Returns:
+            Integer count of notifications created
+        """
+        rows = [
+            NotificationService._row(user_id, notification_type, title, message, link,
+                                     icon, related_type, related_id)
+            for user_id in dict.fromkeys(user_ids)
+        ]
+        return NotificationService._fanout(rows)
+    
+    @staticmethod
+    def resolve_issue_recipients(issue, actor_id=None, mentions=()):
+        """
+        Find who hears about activity on an issue, in one query
+        
+        Watchers and the assignee are always included. Mentioned users are
+        included only if they can open the issue's project.
+        
+        Args:
+            issue: Issue the activity happened on
+            actor_id: User who caused the activity (never notified)
+            mentions: Usernames mentioned in the activity
+        
+        Returns:
+            Dict of user ID to reason ('mention' or 'watching')
+        """
+        from app.middleware.principal import ADMIN_ROLES
+        from app.models import IssueWatcher, Project, User
+        
+        mentions = list(mentions)
+        project = select(Project).where(Project.id == issue.project_id).subquery()
+        can_open_project = or_(
+            User.role.in_(ADMIN_ROLES),
+            User.team_id == select(project.c.team_id).scalar_subquery(),
+            and_(User.role == 'manager', User.id == select(project.c.created_by).scalar_subquery())
+        )
+        mentioned = and_(User.username.in_(mentions), can_open_project) if mentions else false()
+        watching = or_(
+            User.id.in_(select(IssueWatcher.user_id).where(IssueWatcher.issue_id == issue.id)),
+            User.id == issue.assignee_id
+        )
+        
+        query = select(User.id, case((mentioned, 'mention'), else_='watching')).where(
+            or_(watching, mentioned),
+            User.is_active.isnot(False)
+        )
+        if actor_id is not None:
+            query = query.where(User.id != actor_id)
+        
+        return dict(db.session.execute(query).all())
+    
+    @staticmethod
+    def notify_comment(comment_id):
+        """
+        Notify watchers, the assignee and mentioned users of a new comment
+        
+        Users already notified of the comment are skipped, so a retried
+        job does not notify anyone twice.
+        
+        Args:
+            comment_id: Comment ID
+        
+        Returns:
+            Integer count of notifications created
+        """
+        from app.models import Comment
+        
+        comment = db.session.get(Comment, comment_id)
+        if comment is None:
+            return 0
+        
+        issue = comment.issue
+        author = comment.user.username if comment.user else 'Someone'
+        mentions = set(MENTION_PATTERN.findall(comment.text or ''))
+        recipients = NotificationService.resolve_issue_recipients(issue, comment.user_id, mentions)
+        notified = {user_id for (user_id,) in db.session.execute(
+            select(Notification.user_id).where(Notification.related_type == 'comment',
+                                               Notification.related_id == comment.id)
+        )}
+        
+        rows = []
+        for user_id, reason in recipients.items():
+            if user_id in notified:
+                continue
+            if reason == 'mention':
+                rows.append(NotificationService._row(
+                    user_id, 'mention', f'{author} mentioned you on {issue.key}', issue.title,
+                    f'/issues/{issue.id}', 'at-sign', 'comment', comment.id
+                ))
+            else:
+                rows.append(NotificationService._row(
+                    user_id, 'comment', f'{author} commented on {issue.key}', issue.title,
+                    f'/issues/{issue.id}', 'message-square', 'comment', comment.id
+                ))
+        return NotificationService._fanout(rows)
+    
     @staticmethod
     def get_notifications(user_id, limit=50, unread_only=False):
         """
@@ -73,16 +199,30 @@ class NotificationService:
         """
         Get count of unread notifications for a user
         
+        Reads the user's counter row; the first call for a user without
+        one counts their notifications and creates it.
+        
         Args:
             user_id: User ID
         
         Returns:
             Integer count of unread notifications
         """
-        count = Notification.query.filter_by(
-            user_id=user_id,
-            is_read=False
-        ).count()
+        counters = NotificationCounter.__table__
+        count = db.session.execute(
+            select(counters.c.unread).where(counters.c.user_id == user_id)
+        ).scalar()
+        
+        if count is None:
+            try:
+                count = NotificationService._init_counters([user_id])[user_id]
+                db.session.commit()
+            except Exception:
+                # Created concurrently by a fanout; its count is current
+                db.session.rollback()
+                count = db.session.execute(
+                    select(counters.c.unread).where(counters.c.user_id == user_id)
+                ).scalar() or 0
         
         return count
     
@@ -98,15 +238,19 @@ class NotificationService:
         Returns:
             Boolean success
         """
-        notification = Notification.query.filter_by(
-            id=notification_id,
-            user_id=user_id
-        ).first()
-        
-        if notification and not notification.is_read:
-            notification.is_read = True
-            notification.read_at = datetime.utcnow()
+        notifications = Notification.__table__
+        marked = db.session.execute(
+            update(notifications)
+            .where(notifications.c.id == notification_id,
+                   notifications.c.user_id == user_id,
+                   notifications.c.is_read == False)
+            .values(is_read=True, read_at=datetime.utcnow())
+        ).rowcount
+        
+        if marked:
+            NotificationService._decrement_counter(user_id, marked)
             db.session.commit()
+            NotificationService._push({user_id: None})
             return True
         
         return False
@@ -122,19 +266,17 @@ class NotificationService:
         Returns:
             Integer count of notifications marked as read
         """
-        notifications = Notification.query.filter_by(
-            user_id=user_id,
-            is_read=False
-        ).all()
-        
-        count = 0
-        for notification in notifications:
-            notification.is_read = True
-            notification.read_at = datetime.utcnow()
-            count += 1
+        notifications = Notification.__table__
+        count = db.session.execute(
+            update(notifications)
+            .where(notifications.c.user_id == user_id, notifications.c.is_read == False)
+            .values(is_read=True, read_at=datetime.utcnow())
+        ).rowcount
         
         if count > 0:
+            NotificationService._decrement_counter(user_id, count)
             db.session.commit()
+            NotificationService._push({user_id: None})
         
         return count
     
@@ -156,8 +298,13 @@ class NotificationService:
         ).first()
         
         if notification:
+            was_unread = not notification.is_read
             db.session.delete(notification)
+            if was_unread:
+                NotificationService._decrement_counter(user_id, 1)
             db.session.commit()
+            if was_unread:
+                NotificationService._push({user_id: None})
             return True
         
         return False
@@ -175,23 +322,41 @@ class NotificationService:
             Integer count of deleted notifications
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
+        notifications = Notification.__table__
         
-        old_notifications = Notification.query.filter(
-            Notification.user_id == user_id,
-            Notification.is_read == True,
-            Notification.created_at < cutoff_date
-        ).all()
-        
-        count = len(old_notifications)
-        
-        for notification in old_notifications:
-            db.session.delete(notification)
+        count = db.session.execute(
+            delete(notifications).where(
+                notifications.c.user_id == user_id,
+                notifications.c.is_read == True,
+                notifications.c.created_at < cutoff_date
+            )
+        ).rowcount
         
         if count > 0:
             db.session.commit()
         
         return count
     
+    @staticmethod
+    def rebuild_unread_counters():
+        """
+        Recount every user's unread notifications
+        
+        Counters are adjusted with each change; this repairs them after
+        notifications were written without going through this service.
+        
+        Returns:
+            Integer count of counters written
+        """
+        from app.models import User
+        
+        db.session.execute(delete(NotificationCounter.__table__))
+        user_ids = [user_id for (user_id,) in db.session.execute(select(User.id))]
+        if user_ids:
+            NotificationService._init_counters(user_ids)
+        db.session.commit()
+        return len(user_ids)
+    
     @staticmethod
     def create_sample_notifications(user_id):
         """
@@ -248,14 +413,142 @@ class NotificationService:
             }
         ]
         
-        for sample in samples:
-            NotificationService.create_notification(
-                user_id=user_id,
-                notification_type=sample['type'],
-                title=sample['title'],
-                message=sample['message'],
-                link=sample['link'],
-                icon=sample['icon'],
-                related_type=sample.get('related_type'),
-                related_id=sample.get('related_id')
+        NotificationService._fanout([
+            NotificationService._row(
+                user_id, sample['type'], sample['title'], sample['message'], sample['link'],
+                sample['icon'], sample.get('related_type'), sample.get('related_id')
             )
+            for sample in samples
+        ])
+    
+    @staticmethod
+    def _row(user_id, notification_type, title, message, link, icon, related_type, related_id):
+        """Column values of one notification for a bulk insert."""
+        return {
+            'user_id': user_id,
+            'type': notification_type,
+            'title': title,
+            'message': message,
+            'link': link,
+            'icon': icon,
+            'related_type': related_type,
+            'related_id': related_id,
+            'is_read': False,
+            'created_at': datetime.utcnow(),
+        }
+    
+    @staticmethod
+    def _fanout(rows):
+        """Insert notifications and bump their users' counters in one transaction."""
+        if not rows:
+            return 0
+        
+        db.session.execute(insert(Notification.__table__), rows)
+        NotificationService._bump_counters(Counter(row['user_id'] for row in rows))
+        db.session.commit()
+        
+        latest = {}
+        for row in rows:
+            latest[row['user_id']] = {
+                **row,
+                'created_at': row['created_at'].isoformat()
+            }
+        NotificationService._push(latest)
+        return len(rows)
+    
+    @staticmethod
+    def _bump_counters(increments):
+        """
+        Add new unread notifications to counters (caller commits).
+        
+        Counters are upserted, so concurrent fanouts to a user without one
+        both land. Users whose notifications predate the counter table get
+        a counter of their earlier unread notifications first.
+        """
+        counters = NotificationCounter.__table__
+        now = datetime.utcnow()
+        
+        existing = {user_id for (user_id,) in db.session.execute(
+            select(counters.c.user_id).where(counters.c.user_id.in_(list(increments)))
+        )}
+        missing = [user_id for user_id in increments if user_id not in existing]
+        if missing:
+            # Counted from the table, so the rows just inserted are taken off again
+            counts = dict(db.session.execute(
+                select(Notification.user_id, func.count())
+                .where(Notification.user_id.in_(missing), Notification.is_read == False)
+                .group_by(Notification.user_id)
+            ).all())
+            db.session.execute(dialect_insert(counters).on_conflict_do_nothing(index_elements=['user_id']), [
+                {'user_id': user_id, 'unread': max(counts.get(user_id, 0) - increments[user_id], 0),
+                 'updated_at': now}
+                for user_id in missing
+            ])
+        
+        stmt = dialect_insert(counters)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['user_id'],
+                set_={'unread': counters.c.unread + stmt.excluded.unread, 'updated_at': stmt.excluded.updated_at}
+            ),
+            [{'user_id': user_id, 'unread': added, 'updated_at': now} for user_id, added in increments.items()]
+        )
+    
+    @staticmethod
+    def _init_counters(user_ids):
+        """Create counters from the notification table (caller commits)."""
+        counts = dict(db.session.execute(
+            select(Notification.user_id, func.count())
+            .where(Notification.user_id.in_(user_ids), Notification.is_read == False)
+            .group_by(Notification.user_id)
+        ).all())
+        
+        now = datetime.utcnow()
+        db.session.execute(insert(NotificationCounter.__table__), [
+            {'user_id': user_id, 'unread': counts.get(user_id, 0), 'updated_at': now}
+            for user_id in user_ids
+        ])
+        return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+    
+    @staticmethod
+    def _decrement_counter(user_id, count):
+        """Remove read or deleted notifications from a counter (caller commits)."""
+        counters = NotificationCounter.__table__
+        db.session.execute(
+            update(counters)
+            .where(counters.c.user_id == user_id)
+            .values(
+                unread=case((counters.c.unread > count, counters.c.unread - count), else_=0),
+                updated_at=datetime.utcnow()
+            )
+        )
+    
+    @staticmethod
+    def _push(latest):
+        """
+        Send committed badge counts to each user's connections.
+        
+        Args:
+            latest: Dict of user ID to the newest notification (or None
+                    when only the count changed)
+        """
+        from app.websocket import publish_user_update
+        
+        counters = NotificationCounter.__table__
+        try:
+            counts = dict(db.session.execute(
+                select(counters.c.user_id, counters.c.unread).where(counters.c.user_id.in_(list(latest)))
+            ).all())
+            for user_id, notification in latest.items():
+                data = {'unread_count': counts.get(user_id, 0)}
+                if notification is not None:
+                    data['notification'] = notification
+                publish_user_update(user_id, 'notifications', 'notifications_updated', data)
+        except Exception as e:
+            logger.warning(f"Notification push failed: {str(e)}")
+
+
+@async_task(priority='high')
+def fanout_comment_notifications(comment_id):
+    """Notify everyone following an issue of a new comment."""
+    return NotificationService.notify_comment(comment_id)
@@ -5,6 +5,8 @@ Handles project management business logic.
 """
 
 from datetime import datetime, timedelta
+from app.cache import CacheInvalidator
+from app.middleware.principal import accessible_project_ids, invalidate_project_access
 from app.utils.security import sanitize_input, log_security_event
 from app.utils.validators import (
     validate_required, validate_length, validate_date,
@@ -73,6 +75,7 @@ class ProjectService:
             
             db.session.add(project)
             db.session.commit()
+            invalidate_project_access(project.team_id, user_id=created_by)
             
             # Create default labels for the project
             ProjectService._create_default_labels(project.id)
@@ -103,6 +106,7 @@ class ProjectService:
                 return False, None, 'Project not found'
             
             old_status = project.status
+            old_team_id = project.team_id
             
             if 'name' in data:
                 project.name = sanitize_input(data['name'])
@@ -132,6 +136,9 @@ class ProjectService:
                 project.end_date = validate_date(data['end_date'], 'end_date')
             
             db.session.commit()
+            CacheInvalidator.invalidate_project(project.id)
+            if project.team_id != old_team_id:
+                invalidate_project_access(old_team_id, project.team_id)
             
             log_security_event(
                 'PROJECT_UPDATED',
@@ -160,10 +167,13 @@ class ProjectService:
             
             project_name = project.name
             project_key = project.key
+            team_id, owner_id = project.team_id, project.created_by
             
             # Cascade delete will handle related entities
             db.session.delete(project)
             db.session.commit()
+            CacheInvalidator.invalidate_project(project_id)
+            invalidate_project_access(team_id, user_id=owner_id)
             
             log_security_event(
                 'PROJECT_DELETED',
@@ -211,14 +221,21 @@ class ProjectService:
     @staticmethod
     def get_user_accessible_projects(user):
         """Get all projects accessible to a user based on role."""
+        return ProjectService.query_user_accessible_projects(user).all()
+    
+    @staticmethod
+    def query_user_accessible_projects(user):
+        """Build the query of projects accessible to a user based on role."""
+        from sqlalchemy import false
         from app.models import Project
         
-        if user.role in ['admin', 'super_admin']:
-            return Project.query.all()
-        elif user.team_id:
-            return Project.query.filter_by(team_id=user.team_id).all()
+        project_ids = accessible_project_ids(user)
+        if project_ids is None:
+            return Project.query
+        elif project_ids:
+            return Project.query.filter(Project.id.in_(project_ids))
         else:
-            return []
+            return Project.query.filter(false())
     
     @staticmethod
     def get_project_statistics(project_id):
@@ -5,6 +5,8 @@ Handles reporting and analytics business logic.
 """
 
 from datetime import datetime, timedelta
+from app.cache import cache_result
+from app.services.analytics_service import AnalyticsService
 from app.utils.security import sanitize_input, log_security_event
 from app.utils.validators import (
     validate_required, validate_integer, validate_float,
@@ -18,6 +20,9 @@ class ReportService:
     VALID_STATUSES = ['on_track', 'at_risk', 'blocked']
     VALID_PERIODS = ['daily', 'weekly', 'monthly']
     
+    # Seconds project metrics stay cached; issue changes invalidate them sooner
+    ANALYTICS_TTL = 300
+    
     @staticmethod
     def create_status_update(project_id, user_id, description, status='on_track',
                             progress=0, hours_worked=0, blockers=None,
@@ -108,6 +113,13 @@ class ReportService:
             .order_by(ProjectUpdate.date.desc())\
             .limit(limit).offset(offset).all()
     
+    @staticmethod
+    def query_project_updates(project_id):
+        """Build the (unordered) status update query for a project."""
+        from app.models import ProjectUpdate
+        
+        return ProjectUpdate.query.filter_by(project_id=project_id)
+    
     @staticmethod
     def get_user_updates(user_id, filter_type='all', status_filter=None, 
                         search_query=None, sort_by='date'):
@@ -198,7 +210,7 @@ class ReportService:
     @staticmethod
     def get_project_analytics(project_id, days=30):
         """Get comprehensive analytics for a project."""
-        from app.models import Project, Issue, ProjectUpdate
+        from app.models import Project, ProjectUpdate
         
         project = Project.query.get(project_id)
         if not project:
@@ -206,42 +218,59 @@ class ReportService:
         
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        # Get issues
-        issues = Issue.query.filter_by(project_id=project_id).all()
-        
         # Get updates in date range
         updates = ProjectUpdate.query.filter(
             ProjectUpdate.project_id == project_id,
             ProjectUpdate.date >= start_date
         ).order_by(ProjectUpdate.date).all()
         
+        return {
+            'project': project,
+            'updates': updates,
+            **ReportService.get_project_metrics(project_id, days)
+        }
+    
+    @staticmethod
+    @cache_result(ttl=ANALYTICS_TTL, tags=['project:{project_id}'])
+    def get_project_metrics(project_id, days=30):
+        """
+        Snapshot-derived metrics of a project (velocity, burndown, flow, cycle time).
+        
+        Cached per project and window under the project's tag, so issue
+        changes drop them.
+        """
+        start_date = datetime.utcnow() - timedelta(days=days)
+        
+        # Daily status snapshots for the window (backfilled on first use)
+        AnalyticsService.ensure_snapshots(project_id)
+        series = AnalyticsService.get_daily_series(project_id, start_date.date())
+        current = series[-1][1] if series else {}
+        
+        total_issues = sum(s['count'] for s in current.values())
+        completed_issues = sum(s['completed'] for _, day in series for s in day.values())
+        
         # Calculate velocity (issues completed per week)
-        completed_issues = [i for i in issues if i.closed_at and i.closed_at >= start_date]
         weeks = days / 7
-        velocity = len(completed_issues) / weeks if weeks > 0 else 0
-        
-        # Calculate burn-down data
-        burn_down = ReportService._calculate_burndown(issues, days)
+        velocity = completed_issues / weeks if weeks > 0 else 0
         
-        # Calculate cumulative flow
-        cumulative_flow = ReportService._calculate_cumulative_flow(issues, days)
+        cycle_times = AnalyticsService.get_cycle_times(project_id, start_date)
         
         return {
-            'project': project,
-            'total_issues': len(issues),
-            'completed_issues': len(completed_issues),
+            'total_issues': total_issues,
+            'completed_issues': completed_issues,
             'velocity': round(velocity, 1),
-            'updates': updates,
-            'burn_down': burn_down,
-            'cumulative_flow': cumulative_flow,
-            'avg_cycle_time': ReportService._calculate_avg_cycle_time(completed_issues),
-            'status_distribution': ReportService._calculate_status_distribution(issues)
+            'velocity_by_week': ReportService._calculate_weekly_velocity(series),
+            'burn_down': ReportService._calculate_burndown(series, total_issues),
+            'cumulative_flow': ReportService._calculate_cumulative_flow(series),
+            'avg_cycle_time': cycle_times['average'],
+            'cycle_time': cycle_times,
+            'status_distribution': ReportService._calculate_status_distribution(current)
         }
     
     @staticmethod
     def get_team_analytics(team_id, days=30):
         """Get analytics for a team across all projects."""
-        from app.models import Project, Issue, User, ProjectUpdate
+        from app.models import Project, Issue, User, ProjectUpdate, db
         
         start_date = datetime.utcnow() - timedelta(days=days)
         
@@ -252,90 +281,102 @@ class ReportService:
         # Get team members
         members = User.query.filter_by(team_id=team_id).all()
         
-        # Get all issues for team projects
-        issues = Issue.query.filter(Issue.project_id.in_(project_ids)).all()
+        # Issue totals per assignee and overall, in one grouped query
+        done = db.case((Issue.status.in_(['done', 'closed']), 1), else_=0)
+        issue_rows = db.session.query(
+            Issue.assignee_id, db.func.count(Issue.id), db.func.sum(done)
+        ).filter(Issue.project_id.in_(project_ids)).group_by(Issue.assignee_id).all()
+        
+        issue_totals = {assignee_id: (total, completed or 0) for assignee_id, total, completed in issue_rows}
+        total_issues = sum(total for total, _ in issue_totals.values())
+        total_completed = sum(completed for _, completed in issue_totals.values())
+        
+        # Update totals per member, in one grouped query
+        update_rows = db.session.query(
+            ProjectUpdate.user_id,
+            db.func.sum(ProjectUpdate.hours_worked),
+            db.func.avg(db.func.coalesce(ProjectUpdate.progress_percentage, 0))
+        ).filter(
+            ProjectUpdate.user_id.in_([m.id for m in members]),
+            ProjectUpdate.date >= start_date
+        ).group_by(ProjectUpdate.user_id).all()
+        
+        update_totals = {user_id: (hours or 0, progress or 0) for user_id, hours, progress in update_rows}
         
         # Calculate per-member statistics
         member_stats = []
         for member in members:
-            member_issues = [i for i in issues if i.assignee_id == member.id]
-            member_completed = [i for i in member_issues if i.status in ['done', 'closed']]
-            
-            member_updates = ProjectUpdate.query.filter(
-                ProjectUpdate.user_id == member.id,
-                ProjectUpdate.date >= start_date
-            ).all()
+            member_total, member_completed = issue_totals.get(member.id, (0, 0))
+            hours, progress = update_totals.get(member.id, (0, 0))
             
             member_stats.append({
                 'user': member,
-                'total_issues': len(member_issues),
-                'completed_issues': len(member_completed),
-                'total_hours': sum(u.hours_worked or 0 for u in member_updates),
-                'avg_progress': (sum(u.progress_percentage or 0 for u in member_updates) / 
-                               len(member_updates)) if member_updates else 0
+                'total_issues': member_total,
+                'completed_issues': member_completed,
+                'total_hours': hours,
+                'avg_progress': progress
             })
         
         return {
             'projects': projects,
-            'total_issues': len(issues),
+            'total_issues': total_issues,
             'member_stats': member_stats,
-            'overall_completion': (sum(1 for i in issues if i.status in ['done', 'closed']) / 
-                                  len(issues) * 100) if issues else 0
+            'overall_completion': (total_completed / total_issues * 100) if total_issues else 0
         }
     
     @staticmethod
-    def _calculate_burndown(issues, days):
-        """Calculate burndown chart data."""
-        from datetime import date
-        
+    def _remaining(day_state):
+        """Issues not yet done/closed in a snapshot day."""
+        return sum(s['count'] for status, s in day_state.items()
+                   if status not in AnalyticsService.COMPLETED_STATUSES)
+    
+    @staticmethod
+    def _calculate_burndown(series, total):
+        """Calculate burndown chart data from daily snapshots."""
         data = []
-        total = len(issues)
+        days = len(series) - 1
         
-        for i in range(days, -1, -1):
-            day = datetime.utcnow() - timedelta(days=i)
-            remaining = sum(1 for issue in issues 
-                          if not issue.closed_at or issue.closed_at > day)
+        for i, (day, state) in enumerate(series):
             data.append({
                 'date': day.strftime('%Y-%m-%d'),
-                'remaining': remaining,
-                'ideal': total - (total * (days - i) / days) if days > 0 else 0
+                'remaining': ReportService._remaining(state),
+                'ideal': total - (total * i / days) if days > 0 else 0
             })
         
         return data
     
     @staticmethod
-    def _calculate_cumulative_flow(issues, days):
-        """Calculate cumulative flow diagram data."""
-        statuses = ['open', 'todo', 'in_progress', 'code_review', 
-                   'testing', 'ready_deploy', 'done', 'closed']
+    def _calculate_cumulative_flow(series):
+        """Calculate cumulative flow diagram data (issue count per status per day)."""
+        statuses = list(AnalyticsService.FLOW_STATUSES)
+        for _, state in series:
+            statuses.extend(s for s in state if s not in statuses)
         
-        # Simplified - just return current status distribution
-        return {status: sum(1 for i in issues if i.status == status) for status in statuses}
+        return {
+            'dates': [day.strftime('%Y-%m-%d') for day, _ in series],
+            'series': {
+                status: [state[status]['count'] if status in state else 0 for _, state in series]
+                for status in statuses
+            }
+        }
     
     @staticmethod
-    def _calculate_avg_cycle_time(completed_issues):
-        """Calculate average cycle time for completed issues."""
-        if not completed_issues:
-            return 0
-        
-        cycle_times = []
-        for issue in completed_issues:
-            if issue.closed_at and issue.created_at:
-                cycle_time = (issue.closed_at - issue.created_at).days
-                cycle_times.append(cycle_time)
-        
-        return round(sum(cycle_times) / len(cycle_times), 1) if cycle_times else 0
+    def _calculate_weekly_velocity(series):
+        """Issues and story points completed per week (weeks start on Monday)."""
+        weeks = {}
+        for day, state in series:
+            week = (day - timedelta(days=day.weekday())).strftime('%Y-%m-%d')
+            totals = weeks.setdefault(week, {'week': week, 'issues': 0, 'points': 0})
+            for s in state.values():
+                totals['issues'] += s['completed']
+                totals['points'] += s['completed_points']
+        
+        return list(weeks.values())
     
     @staticmethod
-    def _calculate_status_distribution(issues):
-        """Calculate status distribution for issues."""
-        distribution = {}
-        total = len(issues)
-        
-        for issue in issues:
-            status = issue.status
-            distribution[status] = distribution.get(status, 0) + 1
-        
-        # Convert to percentages
-        return {status: round(count / total * 100, 1) if total > 0 else 0 
-                for status, count in distribution.items()}
+    def _calculate_status_distribution(day_state):
+        """Calculate status distribution (percent) from a snapshot day."""
+        total = sum(s['count'] for s in day_state.values())
+        
+        return {status: round(s['count'] / total * 100, 1) if total > 0 else 0
+                for status, s in day_state.items() if s['count'] > 0}
@@ -0,0 +1,239 @@
+# app/services/stats_service.py
+"""
+Stats Service
+Dashboard and admin aggregates computed with grouped SQL queries.
+
+Each snapshot takes a fixed number of queries (GROUP BY status, conditional
+SUM(CASE ...)), whatever the number of rows. Snapshots are cached for a
+short time under per-table tags, and commits that add, remove or re-status
+projects, users, teams or issues invalidate them.
+"""
+
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict
+
+from sqlalchemy import case, event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.cache import CacheInvalidator, CacheTags, get_tiered_cache
+
+logger = logging.getLogger('stats')
+
+STATS_TTL = 60
+ONLINE_WINDOW = timedelta(minutes=5)
+ACTIVE_WINDOW = timedelta(days=1)
+
+# Columns whose changes affect a snapshot, per table
+STATS_COLUMNS = {
+    'project': ('status', 'team_id', 'created_by'),
+    'user': ('role', 'team_id', 'last_login', 'is_active'),
+    'team': (),
+    'issue': ('status', 'project_id', 'assignee_id', 'reporter_id'),
+}
+
+# Dashboard buckets of project statuses
+PROJECT_BUCKETS = {
+    'not_started': ('Not Started',),
+    'in_progress': ('In Progress', 'Active'),
+    'on_hold': ('On Hold', 'Blocked', 'At Risk'),
+    'completed': ('Completed',),
+}
+
+
+@dataclass(frozen=True)
+class AdminStats:
+    """Instance-wide counts for the admin dashboard."""
+    user_count: int = 0
+    online_users_count: int = 0
+    active_users_count: int = 0
+    team_count: int = 0
+    project_count: int = 0
+    issue_count: int = 0
+    users_by_role: Dict[str, int] = field(default_factory=dict)
+    project_status: Dict[str, int] = field(default_factory=dict)
+    issue_status: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class ProjectStats:
+    """Status buckets of the projects a user can open."""
+    total: int = 0
+    not_started: int = 0
+    in_progress: int = 0
+    on_hold: int = 0
+    completed: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class UserStats:
+    """Work attributed to one user."""
+    total_issues_assigned: int = 0
+    total_issues_created: int = 0
+    completed_issues: int = 0
+    total_projects: int = 0
+    total_updates: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class StatsService:
+    """Service for cached dashboard aggregates."""
+
+    COMPLETED_STATUSES = ('done', 'closed')
+
+    @staticmethod
+    def get_admin_stats():
+        """Counts and status breakdowns across the whole instance."""
+        return StatsService._cached(
+            'stats:admin', AdminStats, StatsService._compute_admin_stats,
+            [CacheTags.stats(table) for table in STATS_COLUMNS]
+        )
+
+    @staticmethod
+    def get_project_stats(user):
+        """Status buckets of the projects a user can open."""
+        key = f"stats:projects:{user.id}:{user.role}:{user.team_id or 0}"
+        return StatsService._cached(
+            key, ProjectStats, lambda: StatsService._compute_project_stats(user),
+            [CacheTags.stats('project'), CacheTags.user(user.id)]
+        )
+
+    @staticmethod
+    def get_user_stats(user_id):
+        """Issues, projects and updates attributed to a user."""
+        return StatsService._cached(
+            f"stats:user:{user_id}", UserStats, lambda: StatsService._compute_user_stats(user_id),
+            [CacheTags.stats('issue'), CacheTags.stats('project'), CacheTags.user(user_id)]
+        )
+
+    @staticmethod
+    def _cached(key, snapshot_type, compute, tags):
+        # Cached as plain dicts so every cache codec can hold them
+        cache = get_tiered_cache()
+        if cache is None:
+            return snapshot_type(**compute())
+        return snapshot_type(**cache.get_or_set(key, compute, STATS_TTL, tags=tags))
+
+    @staticmethod
+    def _compute_admin_stats():
+        from app.models import Issue, Project, Team, User, db
+
+        now = datetime.utcnow()
+        users = db.session.execute(
+            select(
+                User.role,
+                func.count(),
+                func.sum(case((User.last_activity >= now - ONLINE_WINDOW, 1), else_=0)),
+                func.sum(case((User.last_login >= now - ACTIVE_WINDOW, 1), else_=0))
+            ).group_by(User.role)
+        ).all()
+        projects = db.session.execute(
+            select(Project.status, func.count()).group_by(Project.status)
+        ).all()
+        issues = db.session.execute(
+            select(Issue.status, func.count()).group_by(Issue.status)
+        ).all()
+        team_count = db.session.execute(select(func.count()).select_from(Team)).scalar()
+
+        project_status = {}
+        for status, count in projects:
+            status = status or 'Unknown'
+            project_status[status] = project_status.get(status, 0) + count
+
+        return asdict(AdminStats(
+            user_count=sum(row[1] for row in users),
+            online_users_count=sum(row[2] or 0 for row in users),
+            active_users_count=sum(row[3] or 0 for row in users),
+            team_count=team_count or 0,
+            project_count=sum(project_status.values()),
+            issue_count=sum(count for _, count in issues),
+            users_by_role={role or 'unknown': count for role, count, _, _ in users},
+            project_status=project_status,
+            issue_status={status or 'open': count for status, count in issues}
+        ))
+
+    @staticmethod
+    def _compute_project_stats(user):
+        from app.models import Project, db
+        from app.services.project_service import ProjectService
+
+        query = ProjectService.query_user_accessible_projects(user).with_entities(
+            func.count(Project.id),
+            *(func.sum(case((Project.status.in_(statuses), 1), else_=0)) for statuses in PROJECT_BUCKETS.values())
+        )
+        total, *buckets = db.session.execute(query.statement).one()
+        return asdict(ProjectStats(
+            total=total or 0,
+            **{name: count or 0 for name, count in zip(PROJECT_BUCKETS, buckets)}
+        ))
+
+    @staticmethod
+    def _compute_user_stats(user_id):
+        from app.models import Issue, Project, ProjectUpdate, db
+
+        completed = Issue.status.in_(StatsService.COMPLETED_STATUSES)
+        issues = select(
+            func.sum(case((Issue.assignee_id == user_id, 1), else_=0)),
+            func.sum(case((Issue.reporter_id == user_id, 1), else_=0)),
+            func.sum(case(((Issue.assignee_id == user_id) & completed, 1), else_=0))
+        ).where(or_(Issue.assignee_id == user_id, Issue.reporter_id == user_id)).subquery()
+
+        assigned, created, done, projects, updates = db.session.execute(select(
+            *issues.c,
+            select(func.count()).select_from(Project).where(Project.created_by == user_id).scalar_subquery(),
+            select(func.count()).select_from(ProjectUpdate).where(ProjectUpdate.user_id == user_id).scalar_subquery()
+        )).one()
+
+        return asdict(UserStats(
+            total_issues_assigned=assigned or 0,
+            total_issues_created=created or 0,
+            completed_issues=done or 0,
+            total_projects=projects or 0,
+            total_updates=updates or 0
+        ))
+
+
+def _collect_stats_changes(session, flush_context):
+    """Note which snapshot tables a flush touched, for invalidation on commit."""
+    touched = session.info.setdefault('stats_tables', set())
+    for obj in chain(session.new, session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table in STATS_COLUMNS:
+            touched.add(table)
+    for obj in session.dirty:
+        table = getattr(obj, '__tablename__', None)
+        if table in STATS_COLUMNS and table not in touched:
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in STATS_COLUMNS[table]):
+                touched.add(table)
+
+
+def _invalidate_stats(session):
+    tables = session.info.pop('stats_tables', None)
+    if tables:
+        try:
+            CacheInvalidator.invalidate_tags(*(CacheTags.stats(table) for table in tables))
+        except Exception as e:
+            logger.warning(f"Stats cache invalidation failed: {str(e)}")
+
+
+def _discard_stats_changes(session):
+    session.info.pop('stats_tables', None)
+
+
+def register_stats_invalidation():
+    """Invalidate cached snapshots when a commit changes the rows they count."""
+    if not event.contains(Session, 'after_flush', _collect_stats_changes):
+        event.listen(Session, 'after_flush', _collect_stats_changes)
+        event.listen(Session, 'after_commit', _invalidate_stats)
+        event.listen(Session, 'after_rollback', _discard_stats_changes)
@@ -5,7 +5,11 @@ Background task system.
 
 from .background_jobs import (
     JobQueue,
+    UnknownTask,
+    PRIORITIES,
     async_task,
+    register_task,
+    resolve_task,
     init_tasks,
     get_job_queue,
     send_email_async,
@@ -17,7 +21,11 @@ from .background_jobs import (
 
 __all__ = [
     'JobQueue',
+    'UnknownTask',
+    'PRIORITIES',
     'async_task',
+    'register_task',
+    'resolve_task',
     'init_tasks',
     'get_job_queue',
     'send_email_async',
@@ -2,201 +2,782 @@
 """
 Background jobs for async tasks.
 Provides job scheduling, email notifications, and report generation.
-Uses in-memory queue for demo (production: use Celery + Redis).
+
+Jobs are rows in the background_job table, committed before enqueue
+returns, so nothing queued is lost when a process restarts. Each process
+runs one dispatcher thread that claims due jobs under a lease (highest
+priority lane first, then oldest ETA) and hands them to a thread pool, or
+to a process pool for CPU-heavy tags so they don't compete with request
+threads for the GIL. Pool processes are started by a fork server (spawn
+where unavailable), never forked from the threaded web process, and each
+builds its own app so tasks run inside an app context there too. Leases are renewed while a job runs; a job whose
+worker died is picked up again once its lease expires.
+
+Failed jobs are retried with exponential backoff and dead-lettered after
+max_attempts. Return values are stored as JSON on the row. Execution is
+at-least-once: tasks should be safe to run twice.
 """
 
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import random
 import threading
-import queue
 import time
-import logging
-from datetime import datetime
-from typing import Callable, Any, Dict
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
 from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from sqlalchemy import and_, bindparam, delete, func as sql_func, insert, or_, select, update
 
 logger = logging.getLogger('tasks')
 
+# Priority lanes; lower values are claimed first
+PRIORITIES = {
+    'high': 0,
+    'default': 5,
+    'low': 9
+}
+
+# Task name -> callable, filled in by @async_task and register_task()
+_registry: Dict[str, Callable] = {}
+
+# Settings of the app built in each pool process: it runs tasks, not workers
+PROCESS_APP_SETTINGS = {
+    'JOB_QUEUE_WORKER': False,
+    'WEBHOOK_WORKER': False,
+    'SCHEDULER_ENABLED': False,
+    'WORKFLOW_ASYNC': False,
+    'AUDIT_ASYNC': False,
+}
+
+# App of this pool process, built by _init_process
+_process_app = None
+
+
+class UnknownTask(LookupError):
+    """Raised when a job names a task that cannot be resolved; never retried."""
+
+
+def task_name(func: Callable) -> str:
+    """Importable name a task is stored under."""
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def register_task(func: Callable, name: Optional[str] = None) -> str:
+    """Make a callable runnable by name, returning the name."""
+    name = name or task_name(func)
+    _registry[name] = func
+    return name
+
+
+def resolve_task(name: str) -> Callable:
+    """Find a task by name, importing its module if it isn't registered yet."""
+    if name in _registry:
+        return _registry[name]
+
+    module_name, _, attr_path = name.rpartition('.')
+    while module_name:
+        try:
+            target = importlib.import_module(module_name)
+        except ImportError:
+            module_name, _, head = module_name.rpartition('.')
+            attr_path = f"{head}.{attr_path}"
+            continue
+        # Importing the module may have registered it
+        if name in _registry:
+            return _registry[name]
+        try:
+            for attr in attr_path.split('.'):
+                target = getattr(target, attr)
+        except AttributeError:
+            break
+        if callable(target):
+            return target
+        break
+    raise UnknownTask(f"Unknown task {name}")
+
+
+def _init_process(config_name: Optional[str], settings: Dict) -> None:
+    """Process pool initializer; builds the app tasks run against."""
+    global _process_app
+    from app import create_app
+
+    _process_app = create_app(config_name, **{**settings, **PROCESS_APP_SETTINGS})
+
+
+def _run_task(name: str, args: Sequence, kwargs: Dict) -> Any:
+    """Process pool entry point; tasks are looked up by name in the worker."""
+    if _process_app is None:
+        return resolve_task(name)(*args, **kwargs)
+    with _process_app.app_context():
+        return resolve_task(name)(*args, **kwargs)
+
+
+def _priority(value: Union[str, int]) -> int:
+    if isinstance(value, int):
+        return value
+    try:
+        return PRIORITIES[value]
+    except KeyError:
+        raise ValueError(f"Unknown priority lane {value!r}; expected one of {', '.join(PRIORITIES)}")
+
 
 class JobQueue:
-    """Thread-safe job queue for background tasks."""
-    
-    def __init__(self, max_workers: int = 4):
+    """Durable job queue and the per-process dispatcher."""
+
+    def __init__(self, app, max_workers: int = 4, process_workers: int = 2,
+                 process_tags: Iterable[str] = ('cpu',), batch_size: int = 100,
+                 max_attempts: int = 5, backoff_base: float = 2.0, backoff_max: float = 3600.0,
+                 lease_seconds: int = 300, poll_interval: float = 0.5, retention_days: int = 7):
         """
         Initialize job queue.
-        
+
         Args:
-            max_workers: Number of worker threads
+            app: Flask app whose database holds the jobs
+            max_workers: Threads running ordinary jobs
+            process_workers: Processes running jobs with a process tag
+            process_tags: Tags routed to the process pool
+            batch_size: Most jobs claimed per round
+            max_attempts: Default attempts before a job is dead-lettered
+            backoff_base: Seconds before the first retry; doubles per attempt
+            backoff_max: Longest wait between attempts
+            lease_seconds: How long a claimed job is reserved; renewed while it runs
+            poll_interval: Seconds the dispatcher idles when there is nothing to do
+            retention_days: Finished jobs older than this are purged
         """
-        self.queue = queue.Queue(maxsize=1000)
+        self.app = app
         self.max_workers = max_workers
-        self.workers = []
+        self.process_workers = process_workers
+        # Without a process pool every tag runs on the threads
+        self.process_tags = frozenset(process_tags) if process_workers > 0 else frozenset()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._running: Dict[int, str] = {}  # job id -> lease token
+        self._in_flight = {'thread': 0, 'process': 0}
+        self._done = deque()  # (job, ok, value) from pool callbacks
+        self._callbacks: Dict[int, Callable] = {}  # in-process only; not persisted
+        self._lock = threading.Lock()
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._last_renew = 0.0
+        self._last_purge = 0.0
+        self.autostart = False
         self.running = False
+
         self.stats = {
             'total_jobs': 0,
             'completed_jobs': 0,
             'failed_jobs': 0,
-            'active_jobs': 0
+            'retried_jobs': 0,
+            'dead_jobs': 0,
+            'reclaimed_jobs': 0
         }
-    
-    def start(self):
-        """Start worker threads."""
-        if self.running:
-            return
-        
-        self.running = True
-        logger.info(f"Starting job queue with {self.max_workers} workers")
-        
-        for i in range(self.max_workers):
-            worker = threading.Thread(
-                target=self._worker_loop,
-                name=f"JobWorker-{i}",
-                daemon=True
-            )
-            worker.start()
-            self.workers.append(worker)
-    
-    def stop(self):
-        """Stop worker threads."""
-        self.running = False
-        logger.info("Stopping job queue")
-        
-        # Wait for queue to empty
-        self.queue.join()
-    
-    def _worker_loop(self):
-        """Worker thread main loop."""
-        while self.running:
-            try:
-                # Get job with timeout to allow checking running flag
-                job = self.queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            
-            try:
-                self.stats['active_jobs'] += 1
-                self._execute_job(job)
-                self.stats['completed_jobs'] += 1
-            except Exception as e:
-                logger.error(f"Job failed: {str(e)}", exc_info=True)
-                self.stats['failed_jobs'] += 1
-            finally:
-                self.stats['active_jobs'] -= 1
-                self.queue.task_done()
-    
-    def _execute_job(self, job: Dict[str, Any]):
-        """Execute a single job."""
-        job_id = job['id']
-        func = job['func']
-        args = job.get('args', ())
-        kwargs = job.get('kwargs', {})
-        
-        logger.debug(f"Executing job {job_id}: {func.__name__}")
-        
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        elapsed = time.time() - start_time
-        
-        logger.debug(f"Job {job_id} completed in {elapsed:.2f}s")
-        
-        # Call result callback if provided
-        if 'callback' in job and job['callback']:
-            job['callback'](result)
-    
-    def enqueue(self, func: Callable, *args, callback: Callable = None, **kwargs) -> str:
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    # ------------------------------------------------------------------
+    # Enqueueing
+    # ------------------------------------------------------------------
+
+    def _row(self, func: Union[Callable, str], args: Sequence, kwargs: Optional[Dict],
+             priority: Union[str, int], tag: Optional[str], eta: Optional[datetime],
+             countdown: Optional[float], max_attempts: Optional[int], now: datetime) -> Dict:
+        if isinstance(func, str):
+            name = func
+        else:
+            name = task_name(func)
+            _registry.setdefault(name, func)
+        options = getattr(func, 'task_options', {})
+        if countdown is not None:
+            eta = now + timedelta(seconds=countdown)
+
+        return {
+            'task': name,
+            'args': json.dumps(list(args)),
+            'kwargs': json.dumps(kwargs or {}),
+            'tag': tag or options.get('tag', 'default'),
+            'priority': _priority(priority if priority is not None else options.get('priority', 'default')),
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': max_attempts or options.get('max_attempts') or self.max_attempts,
+            'run_at': eta or now,
+            'created_at': now
+        }
+
+    def submit(self, func: Union[Callable, str], args: Sequence = (), kwargs: Optional[Dict] = None,
+               priority: Union[str, int, None] = None, tag: Optional[str] = None,
+               eta: Optional[datetime] = None, countdown: Optional[float] = None,
+               max_attempts: Optional[int] = None, callback: Optional[Callable] = None) -> int:
         """
-        Enqueue a job.
-        
+        Store a job and wake the dispatcher.
+
+        Args:
+            func: Task function or registered task name
+            args: JSON-serializable positional arguments
+            kwargs: JSON-serializable keyword arguments
+            priority: Lane name ('high', 'default', 'low') or a raw priority
+            tag: Routing tag; process tags run in the process pool
+            eta: Earliest UTC time to run
+            countdown: Seconds from now to run (overrides eta)
+            max_attempts: Attempts before the job is dead-lettered
+            callback: Called with the result if this process runs the job
+
+        Returns:
+            Job ID
+        """
+        from app.models import BackgroundJob, db
+
+        row = self._row(func, args, kwargs, priority, tag, eta, countdown, max_attempts, datetime.utcnow())
+        with db.engine.begin() as conn:
+            job_id = conn.execute(insert(BackgroundJob.__table__).values(**row)).inserted_primary_key[0]
+
+        if callback is not None:
+            self._callbacks[job_id] = callback
+        self._count('total_jobs')
+        logger.debug(f"Enqueued job {job_id}: {row['task']}")
+        self._notify()
+        return job_id
+
+    def enqueue(self, func: Callable, *args, callback: Callable = None, **kwargs) -> int:
+        """
+        Enqueue a job with the task's default lane and tag.
+
         Args:
             func: Function to execute
             *args: Positional arguments
             callback: Optional callback on completion
             **kwargs: Keyword arguments
-        
+
         Returns:
             Job ID
         """
-        job_id = f"job_{time.time()}_{self.stats['total_jobs']}"
-        
-        job = {
-            'id': job_id,
-            'func': func,
-            'args': args,
-            'kwargs': kwargs,
-            'callback': callback,
-            'created_at': datetime.now(),
-            'status': 'queued'
-        }
-        
-        self.queue.put(job)
-        self.stats['total_jobs'] += 1
-        
-        logger.debug(f"Enqueued job {job_id}: {func.__name__}")
-        
-        return job_id
-    
+        return self.submit(func, args, kwargs, callback=callback)
+
+    def enqueue_many(self, func: Union[Callable, str], calls: Iterable[Union[Sequence, Dict]],
+                     priority: Union[str, int, None] = None, tag: Optional[str] = None,
+                     eta: Optional[datetime] = None, countdown: Optional[float] = None,
+                     max_attempts: Optional[int] = None) -> int:
+        """
+        Store many jobs for one task in a single transaction.
+
+        Args:
+            func: Task function or registered task name
+            calls: One entry per job; a dict of keyword arguments or a
+                sequence of positional arguments
+
+        Returns:
+            int: Jobs enqueued
+        """
+        from app.models import BackgroundJob, db
+
+        now = datetime.utcnow()
+        rows = [
+            self._row(func, (), call, priority, tag, eta, countdown, max_attempts, now)
+            if isinstance(call, dict) else
+            self._row(func, call, None, priority, tag, eta, countdown, max_attempts, now)
+            for call in calls
+        ]
+        if not rows:
+            return 0
+
+        with db.engine.begin() as conn:
+            conn.execute(insert(BackgroundJob.__table__), rows)
+
+        self._count('total_jobs', len(rows))
+        self._notify()
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Claiming and recording
+    # ------------------------------------------------------------------
+
+    def _claim(self, now: datetime, limit: int, in_process: Optional[bool] = None) -> List[Dict]:
+        """
+        Lease due jobs to this worker, highest priority and oldest ETA first.
+
+        Jobs still marked running whose lease has expired belonged to a
+        worker that died; they are claimed again, or dead-lettered if that
+        was their last attempt.
+
+        Args:
+            in_process: Only process-tagged jobs (True), only thread jobs
+                (False) or both (None)
+        """
+        from app.models import BackgroundJob, db
+
+        jobs = BackgroundJob.__table__
+        lease = uuid.uuid4().hex
+        expired = and_(jobs.c.status == 'running', jobs.c.leased_until < now)
+        due = [or_(and_(jobs.c.status == 'queued', jobs.c.run_at <= now), expired)]
+        if in_process is True:
+            due.append(jobs.c.tag.in_(sorted(self.process_tags)))
+        elif in_process is False and self.process_tags:
+            due.append(jobs.c.tag.notin_(sorted(self.process_tags)))
+
+        with db.engine.begin() as conn:
+            abandoned = conn.execute(
+                update(jobs).where(expired, jobs.c.attempts >= jobs.c.max_attempts).values(
+                    status='dead', last_error='Worker lost while running the final attempt',
+                    finished_at=now, lease_owner=None, leased_until=None
+                )
+            ).rowcount
+            batch = select(jobs.c.id).where(*due)\
+                .order_by(jobs.c.priority, jobs.c.run_at, jobs.c.id).limit(limit)
+            claimed = conn.execute(
+                update(jobs)
+                .where(jobs.c.id.in_(batch.scalar_subquery()), *due)
+                .values(status='running', lease_owner=lease, started_at=now,
+                        leased_until=now + timedelta(seconds=self.lease_seconds),
+                        attempts=jobs.c.attempts + 1)
+            ).rowcount
+            rows = conn.execute(
+                select(jobs.c.id, jobs.c.task, jobs.c.args, jobs.c.kwargs, jobs.c.tag,
+                       jobs.c.attempts, jobs.c.max_attempts, jobs.c.lease_owner)
+                .where(jobs.c.lease_owner == lease).order_by(jobs.c.priority, jobs.c.run_at, jobs.c.id)
+            ).mappings().all() if claimed else []
+
+        if abandoned:
+            self._count('dead_jobs', abandoned)
+        reclaimed = sum(1 for row in rows if row['attempts'] > 1)
+        if reclaimed:
+            self._count('reclaimed_jobs', reclaimed)
+        return [dict(row) for row in rows]
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds to wait after the given number of failed attempts (with jitter)."""
+        delay = self.backoff_base * (2 ** (attempts - 1))
+        return min(self.backoff_max, delay * random.uniform(1.0, 1.2))
+
+    def _record(self, outcomes: List, now: datetime) -> None:
+        """
+        Write the result of every finished job in one executemany.
+
+        Rows are matched on their lease too, so a job that overran its lease
+        and was claimed by another worker is left to that worker.
+        """
+        from app.models import BackgroundJob, db
+
+        jobs = BackgroundJob.__table__
+        params = []
+        succeeded = []
+
+        for job, ok, value in outcomes:
+            if ok:
+                try:
+                    result = json.dumps(value, default=str)
+                except (TypeError, ValueError):
+                    result = json.dumps(repr(value))
+                state, run_at, error, finished = 'completed', now, None, now
+                succeeded.append((job['id'], value))
+            else:
+                error = f"{type(value).__name__}: {value}"[:1000]
+                result = None
+                self._count('failed_jobs')
+                if isinstance(value, UnknownTask) or job['attempts'] >= job['max_attempts']:
+                    state, run_at, finished = 'dead', now, now
+                    self._count('dead_jobs')
+                    logger.error(f"Job {job['id']} ({job['task']}) dead-lettered: {error}")
+                else:
+                    state, run_at, finished = 'queued', now + timedelta(seconds=self.backoff(job['attempts'])), None
+                    self._count('retried_jobs')
+            params.append({'_id': job['id'], '_lease': job['lease_owner'], '_status': state,
+                           '_run_at': run_at, '_result': result, '_error': error, '_finished': finished})
+
+        if not params:
+            return
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(jobs).where(jobs.c.id == bindparam('_id'), jobs.c.lease_owner == bindparam('_lease')).values(
+                    status=bindparam('_status'),
+                    run_at=bindparam('_run_at'),
+                    result=bindparam('_result'),
+                    last_error=bindparam('_error'),
+                    finished_at=bindparam('_finished'),
+                    lease_owner=None,
+                    leased_until=None
+                ),
+                params
+            )
+
+        self._count('completed_jobs', len(succeeded))
+        for job_id, value in succeeded:
+            callback = self._callbacks.pop(job_id, None)
+            if callback is not None:
+                try:
+                    callback(value)
+                except Exception as e:
+                    logger.error(f"Callback for job {job_id} failed: {e}")
+
+    def _renew(self, now: datetime) -> None:
+        """Extend the leases of jobs still running here."""
+        from app.models import BackgroundJob, db
+
+        with self._lock:
+            running = dict(self._running)
+        if not running:
+            return
+        jobs = BackgroundJob.__table__
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(jobs)
+                .where(jobs.c.id.in_(list(running)), jobs.c.lease_owner.in_(set(running.values())))
+                .values(leased_until=now + timedelta(seconds=self.lease_seconds))
+            )
+
+    def purge(self, before: Optional[datetime] = None) -> int:
+        """
+        Remove completed jobs finished before a cutoff; dead jobs are kept.
+
+        Returns:
+            int: Jobs removed
+        """
+        from app.models import BackgroundJob, db
+
+        before = before or datetime.utcnow() - timedelta(days=self.retention_days)
+        jobs = BackgroundJob.__table__
+        with db.engine.begin() as conn:
+            return conn.execute(
+                delete(jobs).where(jobs.c.status == 'completed', jobs.c.finished_at < before)
+            ).rowcount
+
+    def retry_dead(self, job_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Put dead-lettered jobs back in the queue with fresh attempts.
+
+        Returns:
+            int: Jobs requeued
+        """
+        from app.models import BackgroundJob, db
+
+        jobs = BackgroundJob.__table__
+        where = [jobs.c.status == 'dead']
+        if job_ids is not None:
+            where.append(jobs.c.id.in_(list(job_ids)))
+        with db.engine.begin() as conn:
+            requeued = conn.execute(
+                update(jobs).where(*where).values(status='queued', attempts=0, run_at=datetime.utcnow(),
+                                                  finished_at=None)
+            ).rowcount
+        if requeued:
+            self._notify()
+        return requeued
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _execute(self, name: str, args: Sequence, kwargs: Dict) -> Any:
+        """Thread pool entry point; runs the task inside an app context."""
+        with self.app.app_context():
+            return resolve_task(name)(*args, **kwargs)
+
+    def _invoke(self, job: Dict):
+        """Run a claimed job in the calling thread, returning (job, ok, value)."""
+        start_time = time.time()
+        try:
+            value = self._execute(job['task'], json.loads(job['args']), json.loads(job['kwargs']))
+        except Exception as e:
+            logger.warning(f"Job {job['id']} ({job['task']}) failed on attempt {job['attempts']}: {e}")
+            return job, False, e
+        logger.debug(f"Job {job['id']} completed in {time.time() - start_time:.2f}s")
+        return job, True, value
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """
+        Claim and run one batch of due jobs in the calling thread.
+
+        Returns:
+            int: Jobs run
+        """
+        with self.app.app_context():
+            jobs = self._claim(now or datetime.utcnow(), self.batch_size)
+            if not jobs:
+                return 0
+            outcomes = [self._invoke(job) for job in jobs]
+            self._record(outcomes, datetime.utcnow())
+        return len(jobs)
+
+    def _pools(self):
+        # Pools don't survive fork; build fresh ones per process
+        if self._threads is None or self._pid != os.getpid():
+            self._threads = ThreadPoolExecutor(max_workers=max(1, self.max_workers),
+                                               thread_name_prefix='JobWorker')
+            self._processes = None
+            self._pid = os.getpid()
+            # Jobs running in the parent are not ours; their leases expire there
+            self._lock = threading.Lock()
+            self._running = {}
+            self._in_flight = {'thread': 0, 'process': 0}
+            self._done.clear()
+        if self._processes is None and self.process_tags:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=context,
+                initializer=_init_process,
+                initargs=(getattr(self.app, 'config_name', None),
+                          {'SQLALCHEMY_DATABASE_URI': self.app.config.get('SQLALCHEMY_DATABASE_URI')})
+            )
+        return self._threads, self._processes
+
+    def _dispatch(self, job: Dict, in_process: bool) -> None:
+        threads, processes = self._pools()
+        args, kwargs = json.loads(job['args']), json.loads(job['kwargs'])
+        lane = 'process' if in_process else 'thread'
+        if in_process:
+            future = processes.submit(_run_task, job['task'], args, kwargs)
+        else:
+            future = threads.submit(self._execute, job['task'], args, kwargs)
+
+        with self._lock:
+            self._running[job['id']] = job['lease_owner']
+            self._in_flight[lane] += 1
+
+        def done(fut):
+            with self._lock:
+                self._running.pop(job['id'], None)
+                self._in_flight[lane] -= 1
+            if fut.cancelled():
+                return  # shutting down; the job is claimed again after its lease
+            error = fut.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._processes = None
+            if error is not None:
+                logger.warning(f"Job {job['id']} ({job['task']}) failed on attempt {job['attempts']}: {error}")
+            self._done.append((job, error is None, fut.result() if error is None else error))
+            self._wake.set()
+
+        future.add_done_callback(done)
+
+    def _record_finished(self) -> int:
+        """Record jobs the pools have finished since the last round."""
+        outcomes = []
+        while self._done:
+            outcomes.append(self._done.popleft())
+        if outcomes:
+            self._record(outcomes, datetime.utcnow())
+        return len(outcomes)
+
+    def _round(self) -> int:
+        """Record finished jobs, then claim as many as there are free workers."""
+        with self.app.app_context():
+            finished = self._record_finished()
+
+            now = datetime.utcnow()
+            if time.monotonic() - self._last_renew > self.lease_seconds / 3:
+                self._last_renew = time.monotonic()
+                self._renew(now)
+
+            lanes = [(False, self.max_workers)]
+            if self.process_tags:
+                lanes.append((True, self.process_workers))
+            claimed = 0
+            for in_process, capacity in lanes:
+                with self._lock:
+                    free = capacity - self._in_flight['process' if in_process else 'thread']
+                if free <= 0:
+                    continue
+                for job in self._claim(now, min(free, self.batch_size), in_process):
+                    self._dispatch(job, in_process)
+                    claimed += 1
+        return claimed + finished
+
+    # ------------------------------------------------------------------
+    # Background worker
+    # ------------------------------------------------------------------
+
+    def _notify(self) -> None:
+        if self.autostart:
+            # Threads do not survive a fork; restart in the child on first use
+            self.start()
+        self._wake.set()
+
+    def start(self):
+        """Start the dispatcher (again, after a fork)."""
+        self.autostart = True
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        self._pools()
+        self._stop.clear()
+        self.running = True
+        logger.info(f"Starting job queue with {self.max_workers} threads and {self.process_workers} processes")
+        self._thread = threading.Thread(target=self._run, name='JobDispatcher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                busy = self._round()
+                if time.monotonic() - self._last_purge > 3600:
+                    self._last_purge = time.monotonic()
+                    with self.app.app_context():
+                        self.purge()
+            except Exception as e:
+                logger.error(f"Job dispatch round failed: {e}")
+                busy = 0
+
+            if not busy:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def stop(self, timeout: float = 30.0):
+        """
+        Stop the dispatcher, waiting up to timeout for running jobs.
+
+        Queued jobs stay in the table; jobs still running when the timeout
+        passes are claimed again once their lease expires.
+        """
+        self.autostart = False
+        self.running = False
+        logger.info("Stopping job queue")
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        deadline = time.monotonic() + timeout
+        while self._running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        try:
+            with self.app.app_context():
+                self._record_finished()
+        except Exception as e:
+            logger.error(f"Failed to record finished jobs on shutdown: {e}")
+
+        if self._pid == os.getpid():
+            if self._threads is not None:
+                self._threads.shutdown(wait=False, cancel_futures=True)
+            if self._processes is not None:
+                self._processes.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
     def get_stats(self) -> Dict[str, Any]:
         """Get queue statistics."""
-        return {
-            **self.stats,
-            'queue_size': self.queue.qsize(),
-            'workers': self.max_workers,
-            'running': self.running
-        }
+        from app.models import BackgroundJob, db
+
+        jobs = BackgroundJob.__table__
+        with self.app.app_context(), db.engine.connect() as conn:
+            counts = dict(conn.execute(
+                select(jobs.c.status, sql_func.count()).group_by(jobs.c.status)
+            ).all())
+        with self._lock:
+            return {
+                **self.stats,
+                'active_jobs': len(self._running),
+                'queue_size': counts.get('queued', 0),
+                'by_status': counts,
+                'workers': self.max_workers,
+                'process_workers': self.process_workers,
+                'running': self._thread is not None and self._thread.is_alive()
+            }
 
 
-def async_task(func: Callable) -> Callable:
+def async_task(func: Callable = None, *, tag: str = 'default', priority: Union[str, int] = 'default',
+               max_attempts: Optional[int] = None) -> Callable:
     """
     Decorator to run function as background task.
-    
+
     Usage:
         @async_task
         def send_email(user_id, subject):
             # Task implementation
             pass
-        
+
+        @async_task(tag='cpu', priority='low')
+        def export_project(project_id):
+            pass
+
         # Call and execute in background
         send_email.delay(user_id=123, subject="Hello")
+        export_project.apply_async(args=(7,), countdown=60)
     """
+    if func is None:
+        return lambda f: async_task(f, tag=tag, priority=priority, max_attempts=max_attempts)
+
+    name = register_task(func)
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         # Synchronous call (for testing)
         return func(*args, **kwargs)
-    
+
+    def apply_async(args: Sequence = (), kwargs: Optional[Dict] = None, **options):
+        queue = get_job_queue()
+        if queue is None:
+            logger.warning(f"Job queue not initialized, executing {func.__name__} synchronously")
+            return func(*args, **(kwargs or {}))
+        return queue.submit(wrapper, args, kwargs, **options)
+
     def delay(*args, **kwargs):
         # Async call
-        if hasattr(async_task, '_queue') and async_task._queue:
-            return async_task._queue.enqueue(func, *args, **kwargs)
-        else:
-            logger.warning(f"Job queue not initialized, executing {func.__name__} synchronously")
-            return func(*args, **kwargs)
-    
+        return apply_async(args, kwargs)
+
+    wrapper.task_name = name
+    wrapper.task_options = {'tag': tag, 'priority': priority, 'max_attempts': max_attempts}
     wrapper.delay = delay
+    wrapper.apply_async = apply_async
     return wrapper
 
 
 # Global job queue instance
-_queue_instance: JobQueue = None
+_queue_instance: Optional[JobQueue] = None
 
 
 def init_tasks(app):
-    """Initialize background job system."""
+    """Initialize background job system, stopping any previous queue."""
     global _queue_instance
-    
+
+    if _queue_instance is not None:
+        _queue_instance.stop(timeout=5.0)
+
     max_workers = app.config.get('JOB_QUEUE_WORKERS', 4)
-    _queue_instance = JobQueue(max_workers=max_workers)
-    _queue_instance.start()
-    
+    _queue_instance = JobQueue(
+        app,
+        max_workers=max_workers,
+        process_workers=app.config.get('JOB_QUEUE_PROCESS_WORKERS', 2),
+        process_tags=app.config.get('JOB_QUEUE_PROCESS_TAGS', ('cpu',)),
+        batch_size=app.config.get('JOB_QUEUE_BATCH_SIZE', 100),
+        max_attempts=app.config.get('JOB_QUEUE_MAX_ATTEMPTS', 5),
+        backoff_base=app.config.get('JOB_QUEUE_BACKOFF_BASE', 2.0),
+        backoff_max=app.config.get('JOB_QUEUE_BACKOFF_MAX', 3600.0),
+        lease_seconds=app.config.get('JOB_QUEUE_LEASE_SECONDS', 300),
+        retention_days=app.config.get('JOB_QUEUE_RETENTION_DAYS', 7)
+    )
+    if app.config.get('JOB_QUEUE_WORKER', True):
+        _queue_instance.start()
+
     # Store on app for access
     app.job_queue = _queue_instance
-    
-    # Store reference for decorator
-    async_task._queue = _queue_instance
-    
+
     logger.info(f"✓ Background job queue initialized with {max_workers} workers")
-    
+
     return _queue_instance
 
 
-def get_job_queue() -> JobQueue:
+def get_job_queue() -> Optional[JobQueue]:
     """Get global job queue instance."""
     return _queue_instance
 
@@ -211,7 +792,7 @@ def send_email_async(to_email: str, subject: str, body: str):
     return f"Email sent to {to_email}"
 
 
-@async_task
+@async_task(tag='cpu', priority='low')
 def generate_report_async(project_id: int, report_type: str = 'summary'):
     """Generate project report asynchronously."""
     logger.info(f"Generating {report_type} report for project {project_id}")
@@ -220,7 +801,7 @@ def generate_report_async(project_id: int, report_type: str = 'summary'):
     return f"Report generated for project {project_id}"
 
 
-@async_task
+@async_task(priority='low')
 def cleanup_old_data_async(days: int = 30):
     """Cleanup old data asynchronously."""
     logger.info(f"Cleaning up data older than {days} days")
@@ -229,7 +810,7 @@ def cleanup_old_data_async(days: int = 30):
     return f"Cleanup complete"
 
 
-@async_task
+@async_task(priority='high')
 def send_notification_async(user_id: int, message: str, notification_type: str = 'info'):
     """Send user notification asynchronously."""
     logger.info(f"Sending {notification_type} notification to user {user_id}: {message}")
@@ -240,20 +821,45 @@ def send_notification_async(user_id: int, message: str, notification_type: str =
 # Job status tracker
 class JobStatus:
     """Track job execution status."""
-    
+
     QUEUED = 'queued'
     RUNNING = 'running'
     COMPLETED = 'completed'
     FAILED = 'failed'
-    
+    DEAD = 'dead'
+
     @staticmethod
-    def get_status(job_id: str) -> str:
+    def get(job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job's state, attempts and result, or None if it doesn't exist."""
+        from app.models import BackgroundJob, db
+
+        # Workers update rows outside this session; always re-read
+        job = db.session.get(BackgroundJob, job_id, populate_existing=True)
+        if job is None:
+            return None
+        # A queued job that has run before is waiting to be retried
+        status = JobStatus.FAILED if job.status == JobStatus.QUEUED and job.attempts else job.status
+        return {
+            'id': job.id,
+            'task': job.task,
+            'status': status,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'run_at': job.run_at.isoformat() if job.run_at else None,
+            'result': json.loads(job.result) if job.result else None,
+            'error': job.last_error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    @staticmethod
+    def get_status(job_id: int) -> Optional[str]:
         """Get job status."""
-        # In production, would query persistent store
-        return JobStatus.QUEUED
-    
+        job = JobStatus.get(job_id)
+        return job['status'] if job else None
+
     @staticmethod
-    def get_result(job_id: str) -> Any:
+    def get_result(job_id: int) -> Any:
         """Get job result."""
-        # In production, would query persistent store
-        return None
+        job = JobStatus.get(job_id)
+        return job['result'] if job else None
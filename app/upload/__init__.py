@@ -8,9 +8,23 @@ from .file_handler import (
     FileUploadValidator,
     FileUploadHandler
 )
+from .storage import (
+    BlobStore,
+    UploadError,
+    init_blob_store,
+    get_blob_store,
+    register_blob_release
+)
+from .download import send_attachment
 
 __all__ = [
     'FileUploadConfig',
     'FileUploadValidator',
-    'FileUploadHandler'
+    'FileUploadHandler',
+    'BlobStore',
+    'UploadError',
+    'init_blob_store',
+    'get_blob_store',
+    'register_blob_release',
+    'send_attachment'
 ]
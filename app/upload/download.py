@@ -0,0 +1,133 @@
+# app/upload/download.py
+"""
+Attachment Downloads
+Serve attachment files without copying them through Python.
+
+With ATTACHMENT_SENDFILE set to 'x-accel' (nginx) or 'x-sendfile' (Apache,
+lighttpd) the view only authorizes the request and names the file in a
+header; the front server streams it and answers Range requests itself.
+Otherwise the open file goes to the WSGI server's file wrapper, which
+gunicorn sends with os.sendfile(), partial (Range) responses included.
+
+Blob-backed attachments use their SHA-256 as a strong ETag and may be
+cached privately for ATTACHMENT_CACHE_MAX_AGE, since a blob never changes.
+
+Example nginx location for X-Accel-Redirect:
+
+    location /protected-uploads/ {
+        internal;
+        alias /srv/projectflow/uploads/;
+    }
+"""
+
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import Response, abort, current_app, request
+from werkzeug.utils import send_file
+
+from .storage import get_blob_store
+
+# Types a browser may render in place; everything else (SVG, HTML-capable
+# office formats, archives) is always sent as a download
+INLINE_TYPES = {
+    'image/jpeg', 'image/png', 'image/gif', 'image/webp',
+    'application/pdf', 'text/plain',
+}
+INLINE_PREFIXES = ('video/', 'audio/')
+
+# File wrappers that clamp output to Content-Length and send from the
+# current file offset, so a range can be served by seeking alone
+SEEKABLE_WRAPPERS = ('gunicorn.',)
+
+
+class AttachmentResponse(Response):
+    """Response that keeps sendfile() for Range requests where the server allows."""
+
+    def _wrap_range_response(self, start: int, length: int) -> None:
+        filelike = getattr(self.response, 'filelike', None)
+        if self.status_code == 206 and filelike is not None and \
+                type(self.response).__module__.startswith(SEEKABLE_WRAPPERS):
+            filelike.seek(start)
+            return
+        super()._wrap_range_response(start, length)
+
+
+def _is_inline(mimetype: str) -> bool:
+    return mimetype in INLINE_TYPES or mimetype.startswith(INLINE_PREFIXES)
+
+
+def _accel_path(path: str):
+    """URL of a file below the storage root for X-Accel-Redirect, or None."""
+    store = get_blob_store()
+    if store is None:
+        return None
+
+    relative = os.path.relpath(os.path.realpath(path), os.path.realpath(store.root))
+    if relative.startswith(os.pardir):
+        return None
+
+    prefix = current_app.config.get('ATTACHMENT_ACCEL_PREFIX', '/protected-uploads/').rstrip('/')
+    return f"{prefix}/{quote(relative.replace(os.sep, '/'))}"
+
+
+def send_attachment(attachment, download: bool = False) -> Response:
+    """
+    Build the response for an attachment download.
+
+    Args:
+        attachment: Attachment row (already authorized)
+        download: Force Content-Disposition: attachment
+
+    Returns:
+        Response: File, offload or 304 Not Modified response
+    """
+    path = attachment.file_path
+    if not path or not os.path.isfile(path):
+        abort(404)
+
+    blob = attachment.blob
+    mimetype = attachment.mime_type or mimetypes.guess_type(attachment.filename)[0] \
+        or 'application/octet-stream'
+    as_attachment = download or not _is_inline(mimetype)
+
+    mode = current_app.config.get('ATTACHMENT_SENDFILE')
+    accel_path = _accel_path(path) if mode == 'x-accel' else None
+
+    if accel_path or mode == 'x-sendfile':
+        response = Response(mimetype=mimetype)
+        if accel_path:
+            response.headers['X-Accel-Redirect'] = accel_path
+        else:
+            response.headers['X-Sendfile'] = os.path.abspath(path)
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                             filename=attachment.filename)
+        if blob is not None:
+            response.set_etag(blob.sha256)
+        # Answer If-None-Match with 304 here; the front server handles Range
+        response.make_conditional(request.environ)
+        if response.status_code == 304:
+            # The proxy would otherwise replace the 304 with the whole file
+            response.headers.pop('X-Accel-Redirect', None)
+            response.headers.pop('X-Sendfile', None)
+    else:
+        # Handles Range, If-Range and If-None-Match
+        response = send_file(
+            path, request.environ,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=attachment.filename,
+            etag=blob.sha256 if blob is not None else True,
+            response_class=AttachmentResponse
+        )
+
+    response.cache_control.private = True
+    if blob is not None:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = current_app.config.get('ATTACHMENT_CACHE_MAX_AGE', 31536000)
+        response.cache_control.immutable = True
+    else:
+        # Legacy files are addressed by attachment id; revalidate each time
+        response.cache_control.no_cache = True
+    return response
@@ -11,7 +11,11 @@ from typing import Optional, Tuple, Dict, Any
 from pathlib import Path
 from datetime import datetime
 import hashlib
-import magic
+
+try:
+    import magic
+except ImportError:
+    magic = None
 
 logger = logging.getLogger('upload')
 
@@ -147,7 +151,7 @@ class FileUploadValidator:
                 return False, f"Invalid file type detected: {mime_type}"
             
             return True, ""
-        except ImportError:
+        except (ImportError, AttributeError):
             # Fallback if python-magic not available
             logger.debug("python-magic not available, skipping magic byte check")
             return True, ""
@@ -186,6 +190,9 @@ class FileUploadValidator:
 class FileUploadHandler:
     """Handle secure file uploads."""
     
+    # Bytes read from the upload stream at a time
+    CHUNK_SIZE = 64 * 1024
+    
     def __init__(self, upload_dir: str = None):
         """Initialize handler."""
         self.upload_dir = upload_dir or FileUploadConfig.UPLOAD_DIR
@@ -225,32 +232,35 @@ class FileUploadHandler:
             result['error'] = error
             return False, result
         
-        # Step 2: Read file content
-        file_content = file_obj.read()
-        file_size = len(file_content)
-        
-        # Step 3: Validate file size
-        valid, error = FileUploadValidator.validate_file_size(file_size)
-        if not valid:
-            logger.warning(f"Invalid file size from user {user_id}: {file_size}")
-            result['error'] = error
-            return False, result
-        
-        # Step 4: Generate safe filename
+        # Step 2: Generate safe filename
         file_id = self._generate_file_id(user_id, original_filename)
         _, ext = os.path.splitext(original_filename)
         safe_filename = f"{file_id}{ext}"
         file_path = os.path.join(self.upload_dir, safe_filename)
         
-        # Step 5: Save file
+        # Step 3: Stream file to disk, enforcing the size limit as it arrives
+        file_size = 0
         try:
             with open(file_path, 'wb') as f:
-                f.write(file_content)
+                for chunk in iter(lambda: file_obj.read(self.CHUNK_SIZE), b''):
+                    file_size += len(chunk)
+                    if file_size > FileUploadConfig.MAX_FILE_SIZE:
+                        break
+                    f.write(chunk)
         except Exception as e:
             logger.error(f"Error saving file: {str(e)}")
+            self.delete_file(file_path)
             result['error'] = "Error saving file"
             return False, result
         
+        # Step 4: Validate file size
+        valid, error = FileUploadValidator.validate_file_size(file_size)
+        if not valid:
+            self.delete_file(file_path)
+            logger.warning(f"Invalid file size from user {user_id}: {file_size}")
+            result['error'] = error
+            return False, result
+        
         # Step 6: Validate content
         valid, error = FileUploadValidator.validate_file_content(file_path)
         if not valid:
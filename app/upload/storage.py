@@ -0,0 +1,469 @@
+# app/upload/storage.py
+"""
+Attachment Storage
+Content-addressed blob store with streaming and resumable uploads.
+
+Uploads are streamed to a temp file one chunk at a time while their SHA-256
+is computed, then moved to blobs/<aa>/<bb>/<sha256>. Identical content is
+stored once and reference-counted by its Blob row; attachments point at the
+blob, and deleting an attachment (directly or through its issue or project)
+releases its reference when the session flushes. Resumable uploads follow the tus offset protocol: each PATCH appends
+at the offset the server last acknowledged. Uploads left idle longer than
+upload_ttl expire: they are answered with 410 and swept, with their partial
+files, by a periodic timer.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.security.validation import ALLOWED_EXTENSIONS, ALLOWED_MIME_TYPES, InputValidator
+
+try:
+    import magic
+    MAGIC_AVAILABLE = True
+except ImportError:
+    MAGIC_AVAILABLE = False
+
+logger = logging.getLogger('upload')
+
+
+class UploadError(Exception):
+    """Upload rejected; status is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class BlobStore:
+    """Content-addressed file storage with reference counting."""
+
+    def __init__(self, root: str, chunk_size: int = 1024 * 1024, max_size: int = 100 * 1024 * 1024,
+                 upload_ttl: int = 24 * 3600):
+        """
+        Initialize blob store.
+
+        Args:
+            root: Storage root; blobs and partial uploads live below it
+            chunk_size: Bytes read from a request stream at a time
+            max_size: Largest accepted upload in bytes
+            upload_ttl: Seconds a resumable upload may sit idle before it expires
+        """
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.upload_ttl = timedelta(seconds=upload_ttl)
+
+        # upload id -> (offset, running SHA-256, last use) for uploads appended by this worker
+        self._hashers: Dict[str, Tuple[int, 'hashlib._Hash', float]] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> str:
+        """Path of the blob with this digest."""
+        return os.path.join(self.blob_dir, sha256[:2], sha256[2:4], sha256)
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def check_filename(filename: str) -> None:
+        """Reject traversal attempts and extensions outside the allow-list."""
+        if not filename or len(filename) > 255 or InputValidator.check_path_traversal(filename):
+            raise UploadError('Invalid filename')
+
+        ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        if not any(ext in exts for exts in ALLOWED_EXTENSIONS.values()):
+            raise UploadError(f'File type not allowed: {ext or "no extension"}', 415)
+
+    @staticmethod
+    def sniff_type(head: bytes, filename: str) -> str:
+        """
+        Detect the MIME type from the first chunk's magic bytes.
+
+        Falls back to the filename when python-magic is not installed.
+        """
+        if MAGIC_AVAILABLE:
+            mime = magic.from_buffer(head, mime=True)
+            if mime not in ALLOWED_MIME_TYPES:
+                logger.warning(f"Blocked upload: magic bytes say {mime} for {filename}")
+                raise UploadError('File type not allowed', 415)
+            return mime
+
+        return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def _copy(self, stream: BinaryIO, out: BinaryIO, hasher, written: int, limit: int,
+              filename: str) -> Tuple[int, Optional[str]]:
+        """
+        Copy a stream chunk by chunk, hashing as it goes.
+
+        Returns:
+            Tuple of (total bytes written, sniffed MIME type if the first
+            chunk of the file was part of this stream)
+        """
+        mime = None
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                return written, mime
+
+            if written == 0:
+                mime = self.sniff_type(chunk, filename)
+            written += len(chunk)
+            if written > limit:
+                raise UploadError('File too large', 413)
+
+            hasher.update(chunk)
+            out.write(chunk)
+
+    def ingest(self, stream: BinaryIO, filename: str, max_size: Optional[int] = None):
+        """
+        Store an upload from a stream.
+
+        Returns:
+            Blob: The (possibly shared) blob, with its reference taken; the
+            caller commits it together with the row that references it
+        """
+        self.check_filename(filename)
+
+        tmp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+        hasher = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as out:
+                size, mime = self._copy(stream, out, hasher, 0, max_size or self.max_size, filename)
+            if size == 0:
+                raise UploadError('File is empty')
+            return self._commit(tmp_path, hasher.hexdigest(), size, mime)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _commit(self, tmp_path: str, sha256: str, size: int, mime: Optional[str]):
+        """Move a finished temp file into place and take a reference on its blob."""
+        from app.models import Blob, db
+
+        path = self.blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+        blob = Blob.query.filter_by(sha256=sha256).first()
+        if blob is None:
+            try:
+                with db.session.begin_nested():
+                    blob = Blob(sha256=sha256, size=size, mime_type=mime, ref_count=0)
+                    db.session.add(blob)
+            except IntegrityError:
+                # Another request stored the same content first
+                blob = Blob.query.filter_by(sha256=sha256).one()
+
+        db.session.execute(
+            update(Blob).where(Blob.id == blob.id).values(ref_count=Blob.ref_count + 1)
+        )
+        db.session.refresh(blob)
+        return blob
+
+    def release(self, blob) -> Optional[str]:
+        """
+        Drop a reference to a blob, deleting its row when none remain.
+
+        Only for references not held by an Attachment row; deleting an
+        attachment releases its blob by itself.
+
+        Returns:
+            str: Digest whose file should be removed with remove_unreferenced()
+            once the transaction commits, or None
+        """
+        from app.models import Blob, db
+
+        db.session.execute(
+            update(Blob).where(Blob.id == blob.id).values(ref_count=Blob.ref_count - 1)
+        )
+        db.session.refresh(blob)
+        if blob.ref_count > 0:
+            return None
+
+        db.session.delete(blob)
+        return blob.sha256
+
+    @staticmethod
+    def release_blobs(counts: Dict[int, int], connection=None) -> List[str]:
+        """
+        Drop many references at once, deleting blob rows none remain on.
+
+        Args:
+            counts: References to drop per blob id
+            connection: Connection to run on (default: the session's)
+
+        Returns:
+            list: Digests whose files should be removed with
+            remove_unreferenced() once the transaction commits
+        """
+        from app.models import Blob, db
+
+        if not counts:
+            return []
+        conn = connection if connection is not None else db.session.connection()
+        blobs = Blob.__table__
+        conn.execute(
+            update(blobs).where(blobs.c.id == bindparam('_id'))
+            .values(ref_count=blobs.c.ref_count - bindparam('_count')),
+            [{'_id': blob_id, '_count': count} for blob_id, count in counts.items()]
+        )
+        gone = conn.execute(
+            select(blobs.c.id, blobs.c.sha256).where(blobs.c.id.in_(list(counts)), blobs.c.ref_count <= 0)
+        ).all()
+        if gone:
+            conn.execute(delete(blobs).where(blobs.c.id.in_([blob_id for blob_id, _ in gone])))
+        return [sha256 for _, sha256 in gone]
+
+    def remove_unreferenced(self, sha256: str) -> bool:
+        """Delete a blob file unless a new upload has re-created its row."""
+        from app.models import Blob, db
+
+        # Own connection: this runs after commit, when the session cannot query
+        with db.engine.connect() as conn:
+            if conn.execute(select(Blob.id).where(Blob.sha256 == sha256)).first() is not None:
+                return False
+
+        try:
+            os.remove(self.blob_path(sha256))
+            return True
+        except FileNotFoundError:
+            return False
+
+    # ------------------------------------------------------------------
+    # Resumable uploads
+    # ------------------------------------------------------------------
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.tmp_dir, f"{upload_id}.part")
+
+    def is_expired(self, upload, now: Optional[datetime] = None) -> bool:
+        """Whether an upload has been idle longer than upload_ttl."""
+        last_active = upload.updated_at or upload.created_at
+        return last_active is not None and last_active < (now or datetime.utcnow()) - self.upload_ttl
+
+    def create_upload(self, user_id: int, issue_id: int, filename: str, total_size: int):
+        """
+        Start a resumable upload.
+
+        Returns:
+            UploadSession: The committed session
+        """
+        from app.models import UploadSession, db
+
+        self.check_filename(filename)
+        self._prune_hashers()
+        if total_size <= 0:
+            raise UploadError('File is empty')
+        if total_size > self.max_size:
+            raise UploadError('File too large', 413)
+
+        upload = UploadSession(
+            id=uuid.uuid4().hex, user_id=user_id, issue_id=issue_id,
+            filename=filename, total_size=total_size, offset=0
+        )
+        open(self._part_path(upload.id), 'wb').close()
+
+        db.session.add(upload)
+        db.session.commit()
+        return upload
+
+    def append_upload(self, upload, stream: BinaryIO, offset: int):
+        """
+        Append a chunk at the given offset.
+
+        Returns:
+            Blob: The stored blob when this chunk completed the upload
+            (the session row is deleted and the caller commits), else None
+        """
+        from app.models import db
+
+        if self.is_expired(upload):
+            self.abort_upload(upload)
+            raise UploadError('Upload expired', 410)
+        if offset != upload.offset:
+            raise UploadError(f'Offset mismatch: expected {upload.offset}', 409)
+
+        path = self._part_path(upload.id)
+        if not os.path.exists(path):
+            raise UploadError('Upload expired', 410)
+
+        with self._lock:
+            cached = self._hashers.pop(upload.id, None)
+        hasher = cached[1] if cached and cached[0] == offset else None
+        tracking = hasher is not None or offset == 0
+        if hasher is None:
+            hasher = hashlib.sha256()
+
+        with open(path, 'r+b') as out:
+            # Discard bytes of an earlier PATCH that failed before it was acknowledged
+            out.truncate(offset)
+            out.seek(offset)
+            try:
+                written, mime = self._copy(stream, out, hasher, offset, upload.total_size, upload.filename)
+            finally:
+                out.flush()
+
+        if mime:
+            upload.mime_type = mime
+        upload.offset = written
+        db.session.commit()
+
+        if written < upload.total_size:
+            if tracking:
+                with self._lock:
+                    self._hashers[upload.id] = (written, hasher, time.monotonic())
+            return None
+
+        if not tracking:
+            # Earlier chunks went through another worker; hash the file once
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    hasher.update(chunk)
+
+        blob = self._commit(path, hasher.hexdigest(), written, upload.mime_type)
+        db.session.delete(upload)
+        if os.path.exists(path):
+            os.remove(path)
+        return blob
+
+    def abort_upload(self, upload) -> None:
+        """Discard a resumable upload and its partial file."""
+        from app.models import db
+
+        with self._lock:
+            self._hashers.pop(upload.id, None)
+
+        path = self._part_path(upload.id)
+        if os.path.exists(path):
+            os.remove(path)
+
+        db.session.delete(upload)
+        db.session.commit()
+
+    def sweep_expired_uploads(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete expired upload sessions and stray partial files.
+
+        Partial files with no session (left by a crash) are removed once
+        they are older than upload_ttl.
+
+        Returns:
+            int: Upload sessions deleted
+        """
+        from app.models import UploadSession, db
+
+        now = now or datetime.utcnow()
+        cutoff = now - self.upload_ttl
+        expired = {upload_id for (upload_id,) in db.session.query(UploadSession.id).filter(
+            db.func.coalesce(UploadSession.updated_at, UploadSession.created_at) < cutoff
+        ).all()}
+        if expired:
+            UploadSession.query.filter(UploadSession.id.in_(list(expired))).delete(synchronize_session=False)
+            db.session.commit()
+
+        live = {upload_id for (upload_id,) in db.session.query(UploadSession.id).all()}
+        stale_mtime = time.time() - self.upload_ttl.total_seconds()
+        for name in os.listdir(self.tmp_dir):
+            upload_id, ext = os.path.splitext(name)
+            if ext != '.part' or upload_id in live:
+                continue
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if upload_id in expired or os.path.getmtime(path) < stale_mtime:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            for upload_id in expired:
+                self._hashers.pop(upload_id, None)
+        self._prune_hashers()
+
+        if expired:
+            logger.info(f"Swept {len(expired)} expired uploads")
+        return len(expired)
+
+    def _prune_hashers(self) -> None:
+        """Forget running digests of uploads this worker has not seen within upload_ttl."""
+        cutoff = time.monotonic() - self.upload_ttl.total_seconds()
+        with self._lock:
+            for upload_id, (_, _, last_use) in list(self._hashers.items()):
+                if last_use < cutoff:
+                    del self._hashers[upload_id]
+
+
+# Global blob store instance
+_blob_store: Optional[BlobStore] = None
+
+
+def init_blob_store(root: str, chunk_size: int = 1024 * 1024,
+                    max_size: int = 100 * 1024 * 1024, upload_ttl: int = 24 * 3600) -> BlobStore:
+    """Initialize the attachment blob store."""
+    global _blob_store
+    _blob_store = BlobStore(root, chunk_size, max_size, upload_ttl)
+    return _blob_store
+
+
+def get_blob_store() -> Optional[BlobStore]:
+    """Get blob store instance."""
+    return _blob_store
+
+
+def _release_deleted_attachments(session, flush_context):
+    """Release the blobs of attachments deleted in a flush, grouped per blob."""
+    from app.models import Attachment
+
+    counts: Dict[int, int] = {}
+    for obj in session.deleted:
+        if isinstance(obj, Attachment) and obj.blob_id is not None:
+            counts[obj.blob_id] = counts.get(obj.blob_id, 0) + 1
+    if counts:
+        released = BlobStore.release_blobs(counts, session.connection())
+        session.info.setdefault('released_blobs', set()).update(released)
+
+
+def _remove_released_blobs(session):
+    released = session.info.pop('released_blobs', None)
+    store = get_blob_store()
+    if released and store is not None:
+        for sha256 in released:
+            try:
+                store.remove_unreferenced(sha256)
+            except Exception as e:
+                logger.warning(f"Removing blob {sha256[:12]} failed: {str(e)}")
+
+
+def _discard_released_blobs(session):
+    session.info.pop('released_blobs', None)
+
+
+def register_blob_release():
+    """Release blob references whenever attachment rows are deleted through the ORM."""
+    if not event.contains(Session, 'after_flush', _release_deleted_attachments):
+        event.listen(Session, 'after_flush', _release_deleted_attachments)
+        event.listen(Session, 'after_commit', _remove_released_blobs)
+        event.listen(Session, 'after_rollback', _discard_released_blobs)
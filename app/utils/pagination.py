@@ -1,10 +1,16 @@
 # app/utils/pagination.py
 """
 Pagination utilities for list views.
+Offset pagination for rendered pages, keyset (cursor) pagination and
+streamed JSON for API listings.
 """
 
-from flask import request, url_for
+import base64
+import json
+from datetime import datetime
+from flask import request, url_for, current_app, Response, stream_with_context
 from math import ceil
+from sqlalchemy import and_, false, or_, tuple_
 
 
 class Paginator:
@@ -153,3 +159,177 @@ def paginate(query, page=None, per_page=None):
         per_page = PaginationConfig.get_per_page()
     
     return Paginator(query, page, per_page)
+
+
+# ============= KEYSET PAGINATION =============
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    
+    if not isinstance(payload, list):
+        raise ValueError('Invalid cursor')
+    
+    return [datetime.fromisoformat(v['dt']) if isinstance(v, dict) and 'dt' in v else v
+            for v in payload]
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a unique sort key such as (position, id).
+    
+    Each page is a single indexed range scan (WHERE key > cursor LIMIT n+1)
+    instead of OFFSET, so deep pages cost the same as the first one and no
+    COUNT(*) is issued. Rows are consumed lazily while iterating.
+    
+    NULLs in nullable key columns sort last (first when descending) on
+    every database, and the cursor condition is expanded column by column
+    with IS NULL branches, since a row comparison against NULL never matches.
+    """
+    
+    def __init__(self, query, order_by, cursor=None, per_page=None, descending=False):
+        """
+        Initialize keyset paginator.
+        
+        Args:
+            query: SQLAlchemy query object (without ORDER BY)
+            order_by: Columns forming a unique sort key, last one usually the id
+            cursor: Cursor string from a previous page (default: first page)
+            per_page: Items per page (default: from request args)
+            descending: Walk the key from newest to oldest
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        self.order_by = list(order_by)
+        self.per_page = PaginationConfig.get_per_page(per_page)
+        self.descending = descending
+        self.has_more = False
+        self._last = None
+        
+        nullable = [getattr(getattr(c, 'expression', c), 'nullable', True) for c in self.order_by]
+        
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(self.order_by):
+                raise ValueError('Invalid cursor')
+            if any(nullable) or None in values:
+                query = query.filter(self._after(values))
+            else:
+                key, bound = tuple_(*self.order_by), tuple_(*values)
+                query = query.filter(key < bound if descending else key > bound)
+        
+        ordering = []
+        for column, can_be_null in zip(self.order_by, nullable):
+            if descending:
+                ordering.append(column.desc().nulls_first() if can_be_null else column.desc())
+            else:
+                ordering.append(column.asc().nulls_last() if can_be_null else column.asc())
+        self.query = query.order_by(*ordering).limit(self.per_page + 1)
+    
+    def _after(self, values):
+        """Rows past the cursor: equal on a key prefix, then beyond on the next column."""
+        branches = []
+        for i, (column, value) in enumerate(zip(self.order_by, values)):
+            ties = [c.is_(None) if v is None else c == v for c, v in zip(self.order_by[:i], values[:i])]
+            branches.append(and_(*ties, self._beyond(column, value)))
+        return or_(*branches)
+    
+    def _beyond(self, column, value):
+        """Values of one column that come after ``value`` in walk order."""
+        if value is None:
+            # NULLs are last ascending, so only descending walks go on to values
+            return column.isnot(None) if self.descending else false()
+        if self.descending:
+            return column < value
+        return or_(column > value, column.is_(None))
+    
+    def _key_of(self, item):
+        return [getattr(item, c.key) for c in self.order_by]
+    
+    def __iter__(self):
+        """Yield up to per_page items, recording whether more remain."""
+        for index, item in enumerate(self.query.yield_per(min(self.per_page + 1, 500))):
+            if index == self.per_page:
+                self.has_more = True
+                break
+            self._last = item
+            yield item
+    
+    @property
+    def items(self):
+        """Get items for current page."""
+        return list(self)
+    
+    @property
+    def next_cursor(self):
+        """Cursor for the following page (available once iteration finished)."""
+        if self.has_more and self._last is not None:
+            return encode_cursor(self._key_of(self._last))
+        return None
+
+
+def parse_fields(requested, available, default):
+    """
+    Parse a sparse fieldset (?fields=id,key,title).
+    
+    Args:
+        requested: Comma separated field names (None for default)
+        available: All selectable field names
+        default: Fields returned when none are requested
+    
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not requested:
+        return list(default)
+    
+    fields = []
+    for name in requested.split(','):
+        name = name.strip()
+        if not name or name in fields:
+            continue
+        if name not in available:
+            raise ValueError(f'Unknown field: {name}')
+        fields.append(name)
+    
+    return fields or list(default)
+
+
+def stream_page(paginator, serializers, fields):
+    """
+    Stream one keyset page as {"success", "data", "pagination"} JSON.
+    
+    Items are serialized and written one at a time, so response memory does
+    not grow with the page size.
+    """
+    dumps = current_app.json.dumps
+    
+    def generate():
+        yield '{"success":true,"data":['
+        for index, item in enumerate(paginator):
+            row = {name: serializers[name](item) for name in fields}
+            yield (',' if index else '') + dumps(row)
+        yield '],"pagination":' + dumps({
+            'limit': paginator.per_page,
+            'has_more': paginator.has_more,
+            'next_cursor': paginator.next_cursor
+        }) + '}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
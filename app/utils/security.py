@@ -25,10 +25,6 @@ ph = PasswordHasher(
     salt_len=16         # Length of the salt
 )
 
-# Rate limiting storage (use Redis in production)
-_rate_limit_storage = {}
-
-
 def generate_csrf_token():
     """Generate cryptographically secure CSRF token."""
     if 'csrf_token' not in session:
@@ -200,21 +196,9 @@ def rate_limit(key, max_requests, window_seconds):
     Check if rate limit is exceeded.
     Returns True if request should be allowed.
     """
-    now = datetime.utcnow()
-    window_key = f"{key}:{now.strftime('%Y%m%d%H%M')}"
-    
-    if window_key not in _rate_limit_storage:
-        _rate_limit_storage[window_key] = 0
-    
-    _rate_limit_storage[window_key] += 1
-    
-    # Clean old entries
-    cutoff = (now - timedelta(seconds=window_seconds * 2)).strftime('%Y%m%d%H%M')
-    old_keys = [k for k in list(_rate_limit_storage.keys()) if k.rsplit(':', 1)[-1] < cutoff]
-    for old_key in old_keys:
-        del _rate_limit_storage[old_key]
+    from app.security.rate_limiting import check_rate_limit
     
-    return _rate_limit_storage.get(window_key, 0) <= max_requests
+    return check_rate_limit(key, max_requests, window_seconds)
 
 
 def log_security_event(event_type, user_id=None, details=None, severity='INFO'):
@@ -0,0 +1,22 @@
+# app/utils/sql.py
+"""
+SQL helpers for statements the ORM does not build portably.
+"""
+
+
+def dialect_insert(table):
+    """
+    INSERT for the app database with on_conflict_do_update/do_nothing.
+
+    SQLite and PostgreSQL share that API; other databases are not supported.
+    """
+    from app.models import db
+
+    name = db.engine.dialect.name
+    if name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {name}")
+    return insert(table)
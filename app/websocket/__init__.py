@@ -7,6 +7,18 @@ from .realtime import (
     emit_event,
     broadcast_event,
     get_connected_users,
+    publish_issue_update,
+    publish_user_update,
+)
+from .fanout import (
+    FanoutBus,
+    LocalHub,
+    LocalBackend,
+    RedisBackend,
+    init_fanout_bus,
+    get_fanout_bus,
+    project_room,
+    user_room,
 )
 
 __all__ = [
@@ -14,4 +26,14 @@ __all__ = [
     'emit_event',
     'broadcast_event',
     'get_connected_users',
+    'publish_issue_update',
+    'publish_user_update',
+    'FanoutBus',
+    'LocalHub',
+    'LocalBackend',
+    'RedisBackend',
+    'init_fanout_bus',
+    'get_fanout_bus',
+    'project_room',
+    'user_room',
 ]
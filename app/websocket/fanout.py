@@ -0,0 +1,549 @@
+# app/websocket/fanout.py
+"""
+Cross-worker fanout for realtime events.
+
+Every worker publishes events to one pub/sub channel and delivers what it
+receives to its own Socket.IO clients, so an event raised on any worker
+reaches subscribers on all of them. Redis is the production backend; the
+in-process LocalHub stands in for it in development and tests.
+
+Delivery is scoped to rooms (one per project, one per user). Bursty issue
+updates are coalesced per room into a single frame per window, and room
+presence is replicated as join/leave diffs stamped with a per-room version
+that clients reconcile against a snapshot. Versions are local to each
+worker: a worker that joins late starts every room at 0 and rebuilds the
+member set from the others' announcements, so its numbers differ from
+theirs. A client only compares versions from the worker it is connected to
+and takes a fresh snapshot when it reconnects. Workers heartbeat on the
+channel; one that stays silent past the TTL (killed
+without a chance to say goodbye) is expired and its presence withdrawn.
+
+The channel also carries named signals for server-side state that lives in
+each worker's memory (workflow automation), delivered to the handler each
+worker registered for the name.
+"""
+
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger('websocket')
+
+ONLINE_ROOM = 'online'
+
+
+def project_room(project_id) -> str:
+    """Room for a project's boards and issue views."""
+    return f'project_{project_id}'
+
+
+def user_room(user_id) -> str:
+    """Room holding every connection of one user."""
+    return f'user_{user_id}'
+
+
+class LocalHub:
+    """In-process stand-in for a pub/sub server (one per test, or per process)."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+        self._queue = deque()
+        self._draining = False
+        self._lock = threading.RLock()
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callable[[str], None]):
+        with self._lock:
+            callbacks = self._subscribers.get(channel, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def publish(self, channel: str, message: str):
+        """Deliver a message to every subscriber, all in one global order."""
+        with self._lock:
+            self._queue.append((channel, message))
+            if self._draining:
+                # Published from inside a callback: delivered after the current message
+                return
+            self._draining = True
+            try:
+                while self._queue:
+                    channel, message = self._queue.popleft()
+                    for callback in list(self._subscribers.get(channel, ())):
+                        try:
+                            callback(message)
+                        except Exception as e:
+                            logger.error(f'Fanout subscriber failed: {e}')
+            finally:
+                self._draining = False
+
+
+_default_hub = LocalHub()
+
+
+class LocalBackend:
+    """Fanout backend on a LocalHub (reaches buses in the same process only)."""
+
+    def __init__(self, hub: Optional[LocalHub] = None):
+        self.hub = hub or _default_hub
+        self._channel = None
+        self._callback = None
+
+    def start(self, channel: str, callback: Callable[[str], None]):
+        self._channel, self._callback = channel, callback
+        self.hub.subscribe(channel, callback)
+
+    def publish(self, channel: str, message: str):
+        self.hub.publish(channel, message)
+
+    def stop(self):
+        if self._callback is not None:
+            self.hub.unsubscribe(self._channel, self._callback)
+            self._callback = None
+
+
+class RedisBackend:
+    """Fanout backend on Redis pub/sub."""
+
+    def __init__(self, host: str = 'localhost', port: int = 6379):
+        import redis
+
+        self.client = redis.Redis(host=host, port=port, socket_timeout=5)
+        self.client.ping()
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, channel: str, callback: Callable[[str], None]):
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{channel: lambda item: callback(item['data'])})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.01, daemon=True)
+
+    def publish(self, channel: str, message: str):
+        self.client.publish(channel, message)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+class FanoutBus:
+    """
+    Publish realtime events to every worker and deliver them to local clients.
+
+    deliver(event, payload, room) emits to this worker's clients; room None
+    means every client.
+    """
+
+    def __init__(self, backend, deliver: Optional[Callable[[str, Dict, Optional[str]], None]] = None,
+                 channel: str = 'realtime:fanout', coalesce_ms: int = 50,
+                 heartbeat_s: float = 10, worker_ttl_s: float = 30):
+        self.backend = backend
+        self.deliver = deliver
+        self.channel = channel
+        self.coalesce_interval = coalesce_ms / 1000.0
+        self.heartbeat_interval = heartbeat_s
+        self.worker_ttl = worker_ttl_s
+        self.worker_id = None
+        self._pid = None
+        self.lock = threading.RLock()
+
+        # This worker's connections: sid -> (user, rooms) and room -> user -> sid count
+        self._sessions: Dict[str, Any] = {}
+        self._local: Dict[str, Dict[str, int]] = {}
+
+        # Replicated presence: room -> user -> workers holding a connection
+        self._presence: Dict[str, Dict[str, Set[str]]] = {}
+        self._versions: Dict[str, int] = {}
+
+        # Outgoing coalesced updates and incoming presence diffs, per room
+        self._pending_updates: Dict[str, Dict[Any, Dict]] = {}
+        self._pending_presence: Dict[str, Dict[str, Set[str]]] = {}
+        self._timer: Optional[threading.Timer] = None
+
+        # Other workers -> when they were last heard from (monotonic seconds)
+        self._last_seen: Dict[str, float] = {}
+        self._stopping = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+        # Signal name -> this worker's handler
+        self._signals: Dict[str, Callable[[Dict], None]] = {}
+
+        self.stats = {'published': 0, 'received': 0, 'frames': 0, 'coalesced': 0}
+
+    # Lifecycle
+
+    def _ensure_started(self):
+        """Subscribe on first use in each process (subscriptions don't survive fork)."""
+        if self._pid == os.getpid():
+            return
+        with self.lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.worker_id = f'{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:6]}'
+            self._sessions.clear()
+            self._local.clear()
+            self._presence.clear()
+            self._versions.clear()
+            self._last_seen.clear()
+            self._stopping = threading.Event()
+            if self.heartbeat_interval > 0:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, args=(self._stopping,),
+                                                   name='fanout-heartbeat', daemon=True)
+                self._heartbeat.start()
+        self.backend.start(self.channel, self._on_message)
+        # Ask the other workers for the connections they already hold
+        self._publish({'kind': 'sync'})
+
+    def shutdown(self):
+        """Withdraw this worker's presence and unsubscribe."""
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self.flush()
+        self._publish({'kind': 'worker_down'})
+        self.backend.stop()
+        self._pid = None
+
+    def _heartbeat_loop(self, stopping: threading.Event):
+        while not stopping.wait(self.heartbeat_interval):
+            try:
+                self._beat()
+            except Exception as e:
+                logger.error(f'Fanout heartbeat failed: {e}')
+
+    def _beat(self, now: Optional[float] = None):
+        """Announce this worker is alive and expire workers silent past the TTL."""
+        self._ensure_started()
+        now = time.monotonic() if now is None else now
+        self._publish({'kind': 'heartbeat'})
+        with self.lock:
+            expired = [worker for worker, seen in self._last_seen.items() if now - seen > self.worker_ttl]
+            for worker in expired:
+                del self._last_seen[worker]
+        # Applied in channel order like worker_down, so every worker sees the same member set
+        for worker in expired:
+            logger.warning(f'Fanout worker {worker} stopped heartbeating, withdrawing its presence')
+            self._publish({'kind': 'worker_expired', 'expired': worker})
+
+    def _publish(self, message: Dict):
+        message['worker'] = self.worker_id
+        self.backend.publish(self.channel, json.dumps(message, default=str))
+        self.stats['published'] += 1
+
+    # Publishing
+
+    def publish(self, event_type: str, data: Dict[str, Any], room: Optional[str] = None):
+        """Send an event to a room (or everyone) on every worker."""
+        self._ensure_started()
+        self._publish({'kind': 'event', 'event': event_type, 'data': data, 'room': room})
+
+    def publish_coalesced(self, room: str, key: Any, event_type: str, data: Dict[str, Any]):
+        """
+        Queue a room update, merged with earlier updates to the same key.
+
+        Everything queued for a room within one coalescing window is sent
+        as a single room_updates frame.
+        """
+        self._ensure_started()
+        with self.lock:
+            updates = self._pending_updates.setdefault(room, {})
+            slot = (event_type, key)
+            if slot in updates:
+                updates[slot]['data'].update(data)
+                self.stats['coalesced'] += 1
+            else:
+                updates[slot] = {'event': event_type, 'key': key, 'data': dict(data)}
+        self._schedule_flush()
+
+    def signal(self, name: str, data: Dict[str, Any]):
+        """Send a named signal to every worker (this one included)."""
+        self._ensure_started()
+        self._publish({'kind': 'signal', 'name': name, 'data': data})
+
+    def on_signal(self, name: str, handler: Callable[[Dict], None]):
+        """Handle a named signal on this worker."""
+        self._ensure_started()
+        self._signals[name] = handler
+
+    def _schedule_flush(self):
+        if self.coalesce_interval <= 0:
+            self.flush()
+            return
+        with self.lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.coalesce_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Send queued updates and deliver queued presence diffs."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            updates, self._pending_updates = self._pending_updates, {}
+            presence, self._pending_presence = self._pending_presence, {}
+            versions = {room: self._versions.get(room, 0) for room in presence}
+
+        for room, events in updates.items():
+            self._publish({'kind': 'batch', 'room': room, 'events': list(events.values())})
+
+        for room, diff in presence.items():
+            if diff['joined'] or diff['left']:
+                self._deliver('presence_diff', {
+                    'room': room,
+                    'from_version': diff['from_version'],
+                    'version': versions[room],
+                    'joined': sorted(diff['joined']),
+                    'left': sorted(diff['left'])
+                }, room)
+
+    def _deliver(self, event_type: str, payload: Dict, room: Optional[str]):
+        if self.deliver is None:
+            return
+        # Rooms without local clients cost nothing on this worker
+        if room is not None and not room.startswith('user_') and room not in self._local:
+            return
+        try:
+            self.deliver(event_type, payload, room)
+            self.stats['frames'] += 1
+        except Exception as e:
+            logger.error(f'Realtime delivery failed: {e}')
+
+    # Local connections
+
+    def connect(self, sid: str, user_id: str):
+        """Register a client connection and mark the user online."""
+        self._ensure_started()
+        with self.lock:
+            self._sessions[sid] = (user_id, set())
+        self.join(sid, ONLINE_ROOM)
+
+    def disconnect(self, sid: str):
+        """Drop a client connection and leave all of its rooms."""
+        with self.lock:
+            session = self._sessions.get(sid)
+            rooms = list(session[1]) if session else []
+        for room in rooms:
+            self.leave(sid, room)
+        with self.lock:
+            self._sessions.pop(sid, None)
+
+    def join(self, sid: str, room: str) -> Dict[str, Any]:
+        """Add a connection to a room; returns the room's presence snapshot."""
+        self._ensure_started()
+        with self.lock:
+            session = self._sessions.get(sid)
+            if session is None or room in session[1]:
+                return self.snapshot(room)
+            user_id, rooms = session
+            rooms.add(room)
+            users = self._local.setdefault(room, {})
+            users[user_id] = users.get(user_id, 0) + 1
+            first = users[user_id] == 1
+            snapshot = self.snapshot(room)
+        if first:
+            self._publish({'kind': 'presence', 'op': 'join', 'room': room, 'user': user_id})
+        return snapshot
+
+    def leave(self, sid: str, room: str):
+        """Remove a connection from a room."""
+        with self.lock:
+            session = self._sessions.get(sid)
+            if session is None or room not in session[1]:
+                return
+            user_id, rooms = session
+            rooms.discard(room)
+            users = self._local.get(room, {})
+            users[user_id] = users.get(user_id, 1) - 1
+            last = users[user_id] <= 0
+            if last:
+                users.pop(user_id, None)
+                if not users:
+                    self._local.pop(room, None)
+        if last:
+            self._publish({'kind': 'presence', 'op': 'leave', 'room': room, 'user': user_id})
+
+    # Presence
+
+    def snapshot(self, room: str) -> Dict[str, Any]:
+        """Members of a room (across workers) with the version diffs build on."""
+        with self.lock:
+            return {
+                'room': room,
+                'version': self._versions.get(room, 0),
+                'members': sorted(self._presence.get(room, {}))
+            }
+
+    def members(self, room: str) -> List[str]:
+        with self.lock:
+            return list(self._presence.get(room, {}))
+
+    def _apply_presence(self, room: str, user_id: str, worker: str, joined: bool):
+        """Apply one worker's join or leave; only changes to the member set bump the version."""
+        members = self._presence.setdefault(room, {})
+        holders = members.get(user_id)
+        if joined:
+            if holders is None:
+                members[user_id] = {worker}
+                self._record_diff(room, user_id, joined=True)
+            else:
+                holders.add(worker)
+        elif holders is not None:
+            holders.discard(worker)
+            if not holders:
+                del members[user_id]
+                if not members:
+                    del self._presence[room]
+                self._record_diff(room, user_id, joined=False)
+
+    def _record_diff(self, room: str, user_id: str, joined: bool):
+        version = self._versions.get(room, 0)
+        self._versions[room] = version + 1
+        diff = self._pending_presence.setdefault(
+            room, {'from_version': version, 'joined': set(), 'left': set()}
+        )
+        # A join and leave inside one window cancel out
+        if joined:
+            if user_id in diff['left']:
+                diff['left'].discard(user_id)
+            else:
+                diff['joined'].add(user_id)
+        elif user_id in diff['joined']:
+            diff['joined'].discard(user_id)
+        else:
+            diff['left'].add(user_id)
+
+    # Incoming
+
+    def _on_message(self, raw):
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            logger.warning('Dropped malformed fanout message')
+            return
+        self.stats['received'] += 1
+        kind = message.get('kind')
+        worker = message.get('worker')
+        if worker != self.worker_id:
+            with self.lock:
+                if kind == 'worker_down':
+                    self._last_seen.pop(worker, None)
+                else:
+                    self._last_seen[worker] = time.monotonic()
+
+        if kind == 'event':
+            self._deliver(message['event'], message['data'], message.get('room'))
+        elif kind == 'batch':
+            self._deliver('room_updates', {'room': message['room'], 'events': message['events']},
+                          message['room'])
+        elif kind in ('presence', 'presence_state', 'worker_down', 'worker_expired'):
+            with self.lock:
+                if kind == 'presence':
+                    self._apply_presence(message['room'], message['user'], worker,
+                                         joined=message['op'] == 'join')
+                elif kind == 'presence_state':
+                    for room, users in message['rooms'].items():
+                        for user_id in users:
+                            self._apply_presence(room, user_id, worker, joined=True)
+                else:
+                    if kind == 'worker_expired':
+                        worker = message['expired']
+                        self._last_seen.pop(worker, None)
+                    for room, members in list(self._presence.items()):
+                        for user_id, holders in list(members.items()):
+                            if worker in holders:
+                                self._apply_presence(room, user_id, worker, joined=False)
+                has_diffs = bool(self._pending_presence)
+            if has_diffs:
+                self._schedule_flush()
+            if kind == 'worker_expired' and worker == self.worker_id:
+                # Expired while still running (a long pause): announce our connections again
+                self._announce()
+        elif kind == 'signal':
+            handler = self._signals.get(message.get('name'))
+            if handler is not None:
+                try:
+                    handler(message['data'])
+                except Exception as e:
+                    logger.error(f"Signal {message.get('name')} failed: {e}")
+        elif kind == 'sync' and worker != self.worker_id:
+            self._announce()
+
+    def _announce(self):
+        """Publish the connections this worker holds."""
+        with self.lock:
+            rooms = {room: list(users) for room, users in self._local.items()}
+        if rooms:
+            self._publish({'kind': 'presence_state', 'rooms': rooms})
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.stats,
+                'worker_id': self.worker_id,
+                'backend': type(self.backend).__name__,
+                'local_connections': len(self._sessions),
+                'rooms': len(self._presence),
+                'online_users': len(self._presence.get(ONLINE_ROOM, {})),
+            }
+
+
+# Global instance
+_fanout_bus: Optional[FanoutBus] = None
+
+
+def init_fanout_bus(app, deliver: Optional[Callable] = None) -> FanoutBus:
+    """Create the fanout bus on Redis when configured, otherwise in-process."""
+    global _fanout_bus
+
+    backend = None
+    if app.config.get('REALTIME_BACKEND') == 'redis':
+        try:
+            backend = RedisBackend(host=app.config.get('REDIS_HOST') or 'localhost',
+                                   port=app.config.get('REDIS_PORT') or 6379)
+        except Exception as e:
+            logger.warning(f'Redis fanout unavailable, events stay on this worker: {e}')
+    if backend is None:
+        backend = LocalBackend()
+
+    if _fanout_bus is not None:
+        _fanout_bus.shutdown()
+    _fanout_bus = FanoutBus(
+        backend,
+        deliver=deliver,
+        channel=app.config.get('REALTIME_CHANNEL', 'realtime:fanout'),
+        coalesce_ms=app.config.get('REALTIME_COALESCE_MS', 50),
+        heartbeat_s=app.config.get('REALTIME_HEARTBEAT_SECONDS', 10),
+        worker_ttl_s=app.config.get('REALTIME_WORKER_TTL_SECONDS', 30)
+    )
+    return _fanout_bus
+
+
+def get_fanout_bus() -> Optional[FanoutBus]:
+    """Get global fanout bus."""
+    return _fanout_bus
+
+
+@atexit.register
+def _shutdown_fanout_bus():
+    if _fanout_bus is not None:
+        try:
+            _fanout_bus.shutdown()
+        except Exception:
+            pass
@@ -11,6 +11,10 @@ from typing import Dict, Set, List, Any, Optional, Callable
 from datetime import datetime
 from functools import wraps
 
+from .fanout import (
+    ONLINE_ROOM, get_fanout_bus, init_fanout_bus, project_room, user_room
+)
+
 logger = logging.getLogger('websocket')
 
 # Try importing SocketIO (optional)
@@ -157,86 +161,119 @@ def init_websocket(app, socketio: Optional[Any] = None) -> Optional[Any]:
     """
     Initialize WebSocket system.
     
+    The fanout bus is always created so events published by any worker
+    reach clients on every worker; Socket.IO handlers are registered when
+    a server is passed in.
+    
     Usage in app.py:
         from flask_socketio import SocketIO
         
         socketio = SocketIO(app, cors_allowed_origins="*")
         init_websocket(app, socketio)
     """
-    if not SOCKETIO_AVAILABLE:
-        logger.warning('WebSocket not available - flask-socketio not installed')
-        return None
-    
     global _socketio, _connection_manager
     
     _socketio = socketio
     _connection_manager = ConnectionManager()
+    init_fanout_bus(app, deliver=_deliver_local)
     
-    if not SOCKETIO_AVAILABLE:
-        logger.warning('WebSocket not available - flask-socketio not installed')
+    if not SOCKETIO_AVAILABLE or socketio is None:
+        logger.warning('WebSocket server not attached - events are published but not delivered')
         return None
     
+    def _current_user_id():
+        from flask import session
+        user_id = session.get('user_id')
+        return str(user_id) if user_id else None
+    
     # Register event handlers
     @_socketio.on('connect')
     def handle_connect():
         from flask import request
-        user_id = request.sid
-        session_id = request.sid
-        _connection_manager.register_connection(user_id, session_id)
-        emit('connection_response', {
-            'connected': True,
-            'online_users': get_connected_users()
-        })
-        broadcast_event('user_online', {'user_id': user_id})
+        user_id = _current_user_id()
+        if user_id is None:
+            # Anonymous sockets are refused
+            return False
+        _connection_manager.register_connection(user_id, request.sid)
+        join_room(user_room(user_id))
+        # Presence is announced to the online room as a diff, not broadcast to everyone
+        get_fanout_bus().connect(request.sid, user_id)
+        emit('connection_response', {'connected': True, 'user_id': user_id})
         logger.info(f"Client {user_id} connected")
     
     @_socketio.on('disconnect')
     def handle_disconnect():
         from flask import request
-        user_id = request.sid
-        _connection_manager.unregister_connection(user_id, user_id)
-        broadcast_event('user_offline', {'user_id': user_id})
+        user_id = _current_user_id()
+        _connection_manager.unregister_connection(user_id, request.sid)
+        get_fanout_bus().disconnect(request.sid)
         logger.info(f"Client {user_id} disconnected")
     
     @_socketio.on('join')
     def on_join(data):
         from flask import request
         room_id = data.get('room_id')
-        user_id = request.sid
+        user_id = _current_user_id()
         
+        if room_id and not can_join_room(user_id, room_id):
+            emit('join_response', {'room': room_id, 'error': 'forbidden'})
+            return
         if room_id:
             join_room(room_id)
             _connection_manager.join_room(user_id, room_id)
-            emit('join_response', {
-                'room': room_id,
-                'members': _connection_manager.get_room_members(room_id)
-            })
-            broadcast_event('user_joined_room', {
-                'user_id': user_id,
-                'room_id': room_id
-            }, room=room_id)
+            # Members and the version later presence_diff frames build on
+            emit('join_response', get_fanout_bus().join(request.sid, room_id))
     
     @_socketio.on('leave')
     def on_leave(data):
         from flask import request
         room_id = data.get('room_id')
-        user_id = request.sid
+        user_id = _current_user_id()
         
         if room_id:
             leave_room(room_id)
             _connection_manager.leave_room(user_id, room_id)
-            broadcast_event('user_left_room', {
-                'user_id': user_id,
-                'room_id': room_id
-            }, room=room_id)
+            get_fanout_bus().leave(request.sid, room_id)
     
     logger.info("✓ WebSocket system initialized")
     return socketio
 
 
+def can_join_room(user_id: Optional[str], room_id: str) -> bool:
+    """
+    Check a user may subscribe to a room.
+    
+    Users may join their own user room, the online room and the rooms of
+    projects they can open.
+    """
+    if not user_id:
+        return False
+    if room_id in (user_room(user_id), ONLINE_ROOM):
+        return True
+    
+    prefix = project_room('')
+    if not room_id.startswith(prefix) or not room_id[len(prefix):].isdigit():
+        return False
+    
+    from app.middleware.principal import accessible_project_ids
+    from app.models import User
+    
+    user = User.query.get(int(user_id)) if user_id.isdigit() else None
+    if user is None or not user.is_active:
+        return False
+    project_ids = accessible_project_ids(user)
+    return project_ids is None or int(room_id[len(prefix):]) in project_ids
+
+
+def _deliver_local(event_type: str, payload: Dict[str, Any], room: Optional[str]):
+    """Emit a fanout frame to this worker's clients."""
+    if _socketio:
+        _socketio.emit(event_type, payload, to=room)
+
+
 def emit_event(user_id: str, event_type: str, data: Dict[str, Any]):
     """
-    Emit event to specific user.
+    Emit event to specific user (every connection, on any worker).
     
     Usage:
         emit_event('user123', 'issue_updated', {
@@ -244,7 +281,8 @@ def emit_event(user_id: str, event_type: str, data: Dict[str, Any]):
             'title': 'Updated Title'
         })
     """
-    if not _socketio:
+    bus = get_fanout_bus()
+    if not bus:
         logger.warning("WebSocket not initialized")
         return
     
@@ -252,7 +290,7 @@ def emit_event(user_id: str, event_type: str, data: Dict[str, Any]):
     _connection_manager.trigger_event_handlers(event)
     
     try:
-        _socketio.emit(event_type, event.to_dict(), to=user_id)
+        bus.publish(event_type, event.to_dict(), room=user_room(user_id))
         logger.debug(f"Event emitted to {user_id}: {event_type}")
     except Exception as e:
         logger.error(f"Failed to emit event: {e}")
@@ -260,7 +298,7 @@ def emit_event(user_id: str, event_type: str, data: Dict[str, Any]):
 
 def broadcast_event(event_type: str, data: Dict[str, Any], room: Optional[str] = None):
     """
-    Broadcast event to all users or specific room.
+    Broadcast event to all users or specific room, on every worker.
     
     Usage:
         # Broadcast to all
@@ -272,7 +310,8 @@ def broadcast_event(event_type: str, data: Dict[str, Any], room: Optional[str] =
             'comment': 'New comment'
         }, room='issue_42')
     """
-    if not _socketio:
+    bus = get_fanout_bus()
+    if not bus:
         logger.warning("WebSocket not initialized")
         return
     
@@ -280,17 +319,52 @@ def broadcast_event(event_type: str, data: Dict[str, Any], room: Optional[str] =
     _connection_manager.trigger_event_handlers(event)
     
     try:
-        _socketio.emit(event_type, event.to_dict(), to=room if room else None)
+        bus.publish(event_type, event.to_dict(), room=room)
         logger.debug(f"Event broadcasted: {event_type}" + (f" to room {room}" if room else ""))
     except Exception as e:
         logger.error(f"Failed to broadcast event: {e}")
 
 
+def publish_issue_update(project_id: int, issue_id: int, event_type: str, data: Dict[str, Any]):
+    """
+    Send an issue change to the project's room.
+    
+    Changes to the same issue within one coalescing window (50 ms by
+    default) are merged, and each window produces one room_updates frame.
+    """
+    bus = get_fanout_bus()
+    if not bus:
+        return
+    
+    try:
+        bus.publish_coalesced(project_room(project_id), issue_id, event_type, data)
+    except Exception as e:
+        logger.error(f"Failed to publish issue update: {e}")
+
+
+def publish_user_update(user_id: int, key: Any, event_type: str, data: Dict[str, Any]):
+    """
+    Send a change to one user's connections.
+    
+    Updates with the same key within one coalescing window are merged, so a
+    burst of notifications reaches each user as one frame.
+    """
+    bus = get_fanout_bus()
+    if not bus:
+        return
+    
+    try:
+        bus.publish_coalesced(user_room(user_id), key, event_type, data)
+    except Exception as e:
+        logger.error(f"Failed to publish user update: {e}")
+
+
 def get_connected_users() -> List[str]:
-    """Get list of connected users."""
-    if not _connection_manager:
+    """Get list of connected users (across all workers)."""
+    bus = get_fanout_bus()
+    if not bus:
         return []
-    return _connection_manager.get_online_users()
+    return bus.members(ONLINE_ROOM)
 
 
 def register_event_handler(event_type: str, handler: Callable):
@@ -6,6 +6,7 @@ Supports environment variables for secrets and environment-specific settings.
 
 import os
 import secrets
+import tempfile
 from datetime import timedelta
 
 
@@ -55,15 +56,121 @@ class Config:
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=30)
     SESSION_TIMEOUT_MINUTES = 30
     
+    # Seconds between bulk flushes of buffered user last_activity timestamps
+    ACTIVITY_FLUSH_INTERVAL = 30
+    
+    # Audit events: write-behind batches with a local spool (defaults to instance/audit_spool)
+    AUDIT_ASYNC = True
+    AUDIT_SPOOL_DIR = get_env_variable('AUDIT_SPOOL_DIR')
+    AUDIT_BATCH_SIZE = 500
+    AUDIT_FLUSH_INTERVAL_MS = 500
+    AUDIT_MAX_PENDING = 50000
+    AUDIT_BLOCK_TIMEOUT_MS = 50  # how long a request waits when the buffer is full
+    AUDIT_DROP_POLICY = 'drop_oldest'  # or 'drop_newest'
+    
     # File Upload Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
     UPLOAD_FOLDER = 'uploads'
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx'}
     
-    # Rate Limiting
+    # Attachment blob storage (defaults to UPLOAD_FOLDER next to the app package)
+    UPLOAD_STORAGE_PATH = get_env_variable('UPLOAD_STORAGE_PATH')
+    ATTACHMENT_MAX_SIZE = 100 * 1024 * 1024  # resumable uploads
+    ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+    UPLOAD_SESSION_TTL = 24 * 3600  # idle resumable uploads expire after this many seconds
+    UPLOAD_SWEEP_INTERVAL = 3600
+    
+    # Attachment downloads: None (WSGI file wrapper / sendfile), 'x-accel' (nginx)
+    # or 'x-sendfile' (Apache, lighttpd)
+    ATTACHMENT_SENDFILE = get_env_variable('ATTACHMENT_SENDFILE')
+    ATTACHMENT_ACCEL_PREFIX = get_env_variable('ATTACHMENT_ACCEL_PREFIX', '/protected-uploads/')
+    ATTACHMENT_CACHE_MAX_AGE = 365 * 24 * 3600  # blob content never changes
+    
+    # Online SQLite backups (defaults to instance/backups)
+    BACKUP_DIR = get_env_variable('BACKUP_DIR')
+    BACKUP_COMPRESSION = get_env_variable('BACKUP_COMPRESSION', 'zstd')  # gzip if zstandard is missing
+    BACKUP_WORKERS = None  # hashing/compression threads (default: min(8, CPUs))
+    BACKUP_BLOCK_PAGES = 256  # pages per incremental block (1 MiB with 4 KiB pages)
+    BACKUP_STEP_PAGES = 1024  # pages copied per online backup step
+    
+    # Outbound webhooks: outbox worker with pooled keep-alive connections
+    WEBHOOK_WORKER = True
+    WEBHOOK_CONCURRENCY = 200  # requests in flight per process
+    WEBHOOK_PER_HOST = 8
+    WEBHOOK_BATCH_SIZE = 500  # deliveries claimed per round
+    WEBHOOK_COALESCE_MAX = 50  # events per request to one endpoint
+    WEBHOOK_MAX_ATTEMPTS = 8
+    WEBHOOK_BACKOFF_BASE = 2.0  # seconds; doubles per attempt
+    WEBHOOK_BACKOFF_MAX = 3600.0
+    WEBHOOK_TIMEOUT = 10.0
+    WEBHOOK_BREAKER_THRESHOLD = 5  # consecutive host failures that open the circuit
+    WEBHOOK_BREAKER_COOLDOWN = 60.0
+    WEBHOOK_RETENTION_DAYS = 7
+    WEBHOOK_ALLOW_PRIVATE = False  # allow loopback, private and link-local destinations
+    
+    # Background jobs: durable background_job table, claimed under a lease;
+    # tags in JOB_QUEUE_PROCESS_TAGS run in a process pool
+    JOB_QUEUE_WORKER = True
+    JOB_QUEUE_WORKERS = 4  # threads per process
+    JOB_QUEUE_PROCESS_WORKERS = 2
+    JOB_QUEUE_PROCESS_TAGS = ('cpu',)
+    JOB_QUEUE_BATCH_SIZE = 100
+    JOB_QUEUE_MAX_ATTEMPTS = 5
+    JOB_QUEUE_BACKOFF_BASE = 2.0  # seconds; doubles per attempt
+    JOB_QUEUE_BACKOFF_MAX = 3600.0
+    JOB_QUEUE_LEASE_SECONDS = 300  # renewed while a job runs
+    JOB_QUEUE_RETENTION_DAYS = 7
+    
+    # Workflow automation: events run in batches on a background thread
+    WORKFLOW_ASYNC = True
+    WORKFLOW_BATCH_SIZE = 200
+    WORKFLOW_FLUSH_INTERVAL_MS = 200
+    WORKFLOW_MAX_PENDING = 10000  # oldest events are dropped beyond this
+    WORKFLOW_HISTORY_SIZE = 1000  # executions kept in memory; summaries go to workflow_execution
+    
+    # Durable timers (deadline reminders, scheduled reports, sync jobs); one
+    # process holds the scheduler lease and fires them
+    SCHEDULER_ENABLED = True
+    SCHEDULER_POLL_INTERVAL = 5.0
+    SCHEDULER_LEASE_SECONDS = 30
+    SCHEDULER_BATCH_SIZE = 100
+    DEADLINE_REMINDER_HOURS = 24  # DEADLINE_APPROACHING fires this long before a due date
+    
+    # Admin facial ID: decrypted encodings stay in a per-process index and
+    # image decoding/detection runs in a small process pool
+    FACIAL_INDEX_TTL = 300
+    FACIAL_POOL_WORKERS = 2  # 0 runs image processing in the request thread
+    FACIAL_POOL_TIMEOUT = 10.0
+    
+    # Caching: per-worker LRU tier, backed by Redis when REDIS_HOST is set
+    REDIS_HOST = get_env_variable('REDIS_HOST')
+    REDIS_PORT = int(get_env_variable('REDIS_PORT', 6379))
+    CACHE_REDIS_ENABLED = bool(REDIS_HOST)
+    CACHE_CODEC = get_env_variable('CACHE_CODEC', 'pickle')  # pickle, msgpack or json
+    CACHE_LOCAL_MAX_ENTRIES = 10000
+    CACHE_LOCAL_MAX_BYTES = 64 * 1024 * 1024
+    CACHE_LOCAL_TTL = 30
+    
+    # Realtime fanout: events reach clients on every worker over Redis
+    # pub/sub (in-process when Redis isn't configured)
+    REALTIME_BACKEND = 'redis' if REDIS_HOST else 'local'
+    REALTIME_CHANNEL = 'realtime:fanout'
+    REALTIME_COALESCE_MS = 50  # issue updates per room are merged into one frame per window
+    REALTIME_HEARTBEAT_SECONDS = 10
+    REALTIME_WORKER_TTL_SECONDS = 30  # presence of workers silent this long is withdrawn
+    
+    # Full-text search index (SQLite FTS5 file; defaults to instance/search_index.db)
+    SEARCH_INDEX_PATH = get_env_variable('SEARCH_INDEX_PATH')
+    
+    # Rate Limiting (GCRA; memory:// is per worker, use a redis:// URL to share limits)
     RATELIMIT_ENABLED = True
-    RATELIMIT_DEFAULT = "200 per day"
     RATELIMIT_STORAGE_URL = "memory://"
+    RATELIMIT_POLICIES = [
+        ('/api/', ['100/minute', '3000/hour']),
+        ('/login', ['5/minute', '50/hour'], ('POST',)),  # login attempts, not page views
+        ('/register', ['30/minute', '500/hour']),
+        ('/forgot-password', ['30/minute', '500/hour']),
+    ]
     
     # Security Headers
     SECURITY_HEADERS_ENABLED = True
@@ -139,9 +246,8 @@ class ProductionConfig(Config):
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Strict'
     
-    # Stricter rate limiting
+    # Shared rate limiting across workers
     RATELIMIT_ENABLED = True
-    RATELIMIT_DEFAULT = "100 per hour"
     RATELIMIT_STORAGE_URL = get_env_variable('REDIS_URL', 'memory://')
     
     # Production logging
@@ -171,6 +277,33 @@ class TestingConfig(Config):
     # Disable rate limiting for tests
     RATELIMIT_ENABLED = False
     
+    # Keep the search index in memory
+    SEARCH_INDEX_PATH = ':memory:'
+    
+    # Write audit events synchronously so tests see them immediately
+    AUDIT_ASYNC = False
+    
+    # Deliver webhooks only when a test calls run_once()
+    WEBHOOK_WORKER = False
+    
+    # Run background jobs only when a test calls run_once()
+    JOB_QUEUE_WORKER = False
+    
+    # Run workflow automation inline
+    WORKFLOW_ASYNC = False
+    
+    # Fire timers only when a test calls run_pending()
+    SCHEDULER_ENABLED = False
+    
+    # Send realtime frames immediately
+    REALTIME_COALESCE_MS = 0
+    
+    # Process face images in the test thread
+    FACIAL_POOL_WORKERS = 0
+    
+    # Keep test attachments out of the project's uploads folder
+    UPLOAD_STORAGE_PATH = os.path.join(tempfile.gettempdir(), 'projectflow_test_uploads')
+    
     # Generate random secret key for each test run
     SECRET_KEY = secrets.token_hex(32)
     
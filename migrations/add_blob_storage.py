@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add Blob Storage
+Creates the blob and upload_session tables and links attachments to blobs.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Attachment, Blob, UploadSession
+from sqlalchemy import inspect, text
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Add blob storage...")
+        
+        try:
+            Blob.__table__.create(db.engine, checkfirst=True)
+            UploadSession.__table__.create(db.engine, checkfirst=True)
+            print("✓ Tables blob and upload_session ready")
+            
+            columns = {c['name'] for c in inspect(db.engine).get_columns('attachment')}
+            if 'blob_id' not in columns:
+                db.session.execute(text("ALTER TABLE attachment ADD COLUMN blob_id INTEGER REFERENCES blob(id)"))
+                db.session.commit()
+                print("✓ Added column attachment.blob_id")
+            
+            for index in Attachment.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+            print("✓ Attachment indexes ready")
+            
+            print("\n✓ Migration completed successfully!")
+            print("Existing attachments keep their files; new uploads are deduplicated.")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add Keyset Pagination Indexes
+Adds composite indexes backing cursor pagination of the v1 list APIs.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Issue, ProjectUpdate
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Add keyset pagination indexes...")
+        
+        try:
+            for model in (Issue, ProjectUpdate):
+                for index in model.__table__.indexes:
+                    if index.name in ('ix_issue_project_position', 'ix_project_update_project_date'):
+                        index.create(db.engine, checkfirst=True)
+                        print(f"✓ Index {index.name} ready")
+            
+            print("\n✓ Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Notification Counters
+Creates the notification_counter table behind unread badges and fills it
+from the existing unread notifications, and indexes notifications by the
+item they refer to (comment fanouts skip users already notified).
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Notification, NotificationCounter
+from app.services.notification_service import NotificationService
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Notification counters...")
+        
+        try:
+            NotificationCounter.__table__.create(db.engine, checkfirst=True)
+            print("✓ Table notification_counter ready")
+            
+            for index in Notification.__table__.indexes:
+                if index.name == 'ix_notification_related':
+                    index.create(db.engine, checkfirst=True)
+                    print(f"✓ Index {index.name} ready")
+            
+            count = NotificationService.rebuild_unread_counters()
+            print(f"✓ Unread counters set for {count} user(s)")
+            
+            print("\n✓ Migration completed successfully!")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
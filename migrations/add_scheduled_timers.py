@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Scheduled Timers
+Creates the scheduled_timer and scheduler_lease tables used by the
+durable timer scheduler (deadline reminders, reports, sync jobs).
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, ScheduledTimer, SchedulerLease
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Scheduled timers...")
+        
+        try:
+            for model in (ScheduledTimer, SchedulerLease):
+                model.__table__.create(db.engine, checkfirst=True)
+                print(f"✓ Table {model.__tablename__} ready")
+            
+            print("\n✓ Migration completed successfully!")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
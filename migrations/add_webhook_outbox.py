@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Webhook Outbox
+Creates the webhook_endpoint, webhook_outbox and webhook_delivery tables
+used by the outbound webhook delivery worker.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, WebhookEndpoint, WebhookOutbox, WebhookDelivery
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Webhook outbox...")
+        
+        try:
+            for model in (WebhookEndpoint, WebhookOutbox, WebhookDelivery):
+                model.__table__.create(db.engine, checkfirst=True)
+                print(f"✓ Table {model.__tablename__} ready")
+            
+            print("\n✓ Migration completed successfully!")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
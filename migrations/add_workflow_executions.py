@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Workflow Execution Summaries
+Creates the workflow_execution table holding per-run summaries
+written by the workflow automation engine.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, WorkflowExecution
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Workflow execution summaries...")
+        
+        try:
+            WorkflowExecution.__table__.create(db.engine, checkfirst=True)
+            print("✓ Table workflow_execution ready")
+            
+            print("\n✓ Migration completed successfully!")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Build Analytics Snapshots
+Creates the project_status_snapshot table and backfills it from issues and
+WorkflowTransition history. Re-run at any time to repair drift.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Project
+from app.services import AnalyticsService
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Build analytics snapshots...")
+        
+        try:
+            db.create_all()
+            print("✓ project_status_snapshot table ready")
+            
+            project_ids = [pid for (pid,) in db.session.query(Project.id).all()]
+            total = 0
+            for project_id in project_ids:
+                total += AnalyticsService.rebuild_snapshots(project_id)
+            
+            print(f"✓ Wrote {total} snapshot rows for {len(project_ids)} project(s)")
+            print("\n✓ Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Build Search Index
+Backfills the full-text search index from existing issues and comments.
+Re-run at any time to compact tombstoned postings.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.search import SearchEngine, get_search_index
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+    
+    with app.app_context():
+        print("Starting migration: Build search index...")
+        
+        try:
+            if get_search_index() is None:
+                print("✗ Search index is not initialized")
+                return False
+            
+            count = SearchEngine.rebuild_index()
+            print(f"✓ Indexed {count} issues")
+            print(f"  Index stats: {get_search_index().get_stats()}")
+            print("\n✓ Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Queryable Audit Store
+Adds plaintext severity/category/endpoint/target columns and their indexes to
+audit_log, backfills them from the encrypted details, and moves finished
+months into monthly audit_log_YYYYMM partitions.
+"""
+
+import sys
+import os
+import ast
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, AuditLog
+from sqlalchemy import inspect, text
+
+NEW_COLUMNS = {
+    'severity': 'VARCHAR(20)',
+    'category': 'VARCHAR(30)',
+    'endpoint': 'VARCHAR(100)',
+    'target_type': 'VARCHAR(50)',
+    'target_id': 'INTEGER',
+}
+
+BATCH_SIZE = 1000
+
+
+def _parse_details(raw):
+    """Details were stored as JSON (AuditLogger) or a dict repr (AuditService)."""
+    if not raw:
+        return {}
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(raw)
+            if isinstance(value, dict):
+                return value
+        except (ValueError, SyntaxError):
+            continue
+    return {}
+
+
+def migrate():
+    """Run the migration"""
+    app = create_app()
+
+    with app.app_context():
+        print("Starting migration: Queryable audit store...")
+
+        try:
+            existing = {c['name'] for c in inspect(db.engine).get_columns('audit_log')}
+            for name, sql_type in NEW_COLUMNS.items():
+                if name not in existing:
+                    db.session.execute(text(f"ALTER TABLE audit_log ADD COLUMN {name} {sql_type}"))
+                    print(f"✓ Added column audit_log.{name}")
+            db.session.commit()
+
+            for index in AuditLog.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+            print("✓ Audit indexes ready")
+
+            # Backfill in id order, one transaction per batch
+            backfilled = 0
+            last_id = 0
+            while True:
+                rows = AuditLog.query.filter(
+                    AuditLog.id > last_id, AuditLog.severity.is_(None)
+                ).order_by(AuditLog.id).limit(BATCH_SIZE).all()
+                if not rows:
+                    break
+
+                for row in rows:
+                    details = _parse_details(row.details)
+                    row.severity = details.get('severity') or 'INFO'
+                    row.category = details.get('category') or (
+                        row.action.split(':', 1)[0] if ':' in row.action else 'SECURITY_EVENT'
+                    )
+                    row.endpoint = details.get('endpoint')
+                    row.target_type = details.get('target_type')
+                    target_id = details.get('target_id')
+                    row.target_id = target_id if isinstance(target_id, int) else None
+
+                db.session.commit()
+                backfilled += len(rows)
+                last_id = rows[-1].id
+            print(f"✓ Backfilled {backfilled} audit rows")
+
+            from app.services.audit_store import AuditStore
+            moved = AuditStore.archive()
+            print(f"✓ Archived {moved} audit rows into monthly partitions")
+
+            print("\n✓ Migration completed successfully!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n✗ Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    return True
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -70,13 +70,24 @@ class User(UserMixin, db.Model):
     def email(self, value):
         self.email_encrypted = encrypt_field(value)
     
+    @property
+    def seen_at(self):
+        """Latest activity, including timestamps not yet flushed to the database."""
+        from app.services.activity_tracker import get_activity_tracker
+        tracker = get_activity_tracker()
+        pending = tracker.last_seen(self.id) if tracker else None
+        if pending and (not self.last_activity or pending > self.last_activity):
+            return pending
+        return self.last_activity
+    
     @property
     def is_online(self):
         """Check if user is considered online (active in last 5 minutes)."""
-        if not self.last_activity:
+        seen_at = self.seen_at
+        if not seen_at:
             return False
         from datetime import timedelta
-        return (datetime.utcnow() - self.last_activity) < timedelta(minutes=5)
+        return (datetime.utcnow() - seen_at) < timedelta(minutes=5)
     
     @property
     def status_text(self):
@@ -85,8 +96,9 @@ class User(UserMixin, db.Model):
             return 'Inactive'
         if self.is_online:
             return 'Online'
-        if self.last_activity:
-            return f'Last seen {self.time_ago(self.last_activity)}'
+        seen_at = self.seen_at
+        if seen_at:
+            return f'Last seen {self.time_ago(seen_at)}'
         return 'Offline'
     
     @staticmethod
@@ -310,6 +322,12 @@ class Issue(db.Model):
     subtasks = db.relationship('Issue', backref=db.backref('parent', remote_side=[id]))
     watchers = db.relationship('IssueWatcher', backref='issue', lazy=True, cascade='all, delete-orphan')
     
+    # Keyset pagination in board order (API cursors are (position, id))
+    __table_args__ = (
+        db.Index('ix_issue_project_position', 'project_id', 'position', 'id'),
+        db.Index('ix_issue_project_closed', 'project_id', 'closed_at'),
+    )
+    
     @property
     def description(self):
         return decrypt_field(self.description_encrypted)
@@ -383,13 +401,46 @@ class Attachment(db.Model):
     file_path = db.Column(db.String(500), nullable=False)
     file_size = db.Column(db.Integer)
     mime_type = db.Column(db.String(100))
+    blob_id = db.Column(db.Integer, db.ForeignKey('blob.id'), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     user = db.relationship('User', backref='attachments')
+    blob = db.relationship('Blob')
     
     def __repr__(self):
         return f'<Attachment {self.filename}>'
 
+class Blob(db.Model):
+    """Content-addressed attachment file, shared by identical uploads"""
+    __tablename__ = 'blob'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    mime_type = db.Column(db.String(100))
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Blob {self.sha256[:12]} refs:{self.ref_count}>'
+
+class UploadSession(db.Model):
+    """Resumable attachment upload in progress"""
+    __tablename__ = 'upload_session'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    issue_id = db.Column(db.Integer, db.ForeignKey('issue.id', ondelete='CASCADE'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.Integer, nullable=False)
+    offset = db.Column(db.Integer, default=0, nullable=False)
+    mime_type = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.offset}/{self.total_size}>'
+
 class IssueWatcher(db.Model):
     """Users watching an issue for notifications"""
     __tablename__ = 'issue_watcher'
@@ -419,9 +470,43 @@ class WorkflowTransition(db.Model):
     issue = db.relationship('Issue', backref='transitions')
     user = db.relationship('User', backref='transitions')
     
+    __table_args__ = (
+        db.Index('ix_workflow_transition_issue', 'issue_id', 'timestamp'),
+    )
+    
     def __repr__(self):
         return f'<WorkflowTransition {self.from_status} -> {self.to_status}>'
 
+class ProjectStatusSnapshot(db.Model):
+    """Materialized per-day, per-status issue totals for project analytics.
+    
+    Each day with activity holds the full state of the project (one row per
+    status); days without activity carry the previous day's values forward.
+    The completed_* columns count issues that reached done/closed that day.
+    """
+    __tablename__ = 'project_status_snapshot'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    
+    # State at end of day
+    issue_count = db.Column(db.Integer, default=0, nullable=False)
+    story_points = db.Column(db.Integer, default=0, nullable=False)
+    hours = db.Column(db.Float, default=0, nullable=False)
+    
+    # Flow during the day
+    completed_count = db.Column(db.Integer, default=0, nullable=False)
+    completed_points = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'day', 'status', name='uq_snapshot_project_day_status'),
+    )
+    
+    def __repr__(self):
+        return f'<ProjectStatusSnapshot {self.project_id} {self.day} {self.status}={self.issue_count}>'
+
 class ProjectUpdate(db.Model):
     """Project update model with status and progress tracking"""
     __tablename__ = 'project_update'
@@ -448,6 +533,11 @@ class ProjectUpdate(db.Model):
     date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     user = db.relationship('User', backref='project_updates')
     
+    # Keyset pagination newest first (API cursors are (date, id))
+    __table_args__ = (
+        db.Index('ix_project_update_project_date', 'project_id', 'date', 'id'),
+    )
+    
     @property
     def update_text(self):
         return decrypt_field(self.update_text_encrypted)
@@ -486,6 +576,22 @@ class AuditLog(db.Model):
     ip_address = db.Column(db.String(50))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    # Queryable metadata; only details are encrypted
+    severity = db.Column(db.String(20))
+    category = db.Column(db.String(30))
+    endpoint = db.Column(db.String(100))
+    target_type = db.Column(db.String(50))
+    target_id = db.Column(db.Integer)
+    
+    # Index names start with the table name so monthly partitions can copy them
+    __table_args__ = (
+        db.Index('ix_audit_log_category_time', 'category', 'timestamp'),
+        db.Index('ix_audit_log_severity_time', 'severity', 'timestamp'),
+        db.Index('ix_audit_log_action_time', 'action', 'timestamp'),
+        db.Index('ix_audit_log_user_time', 'user_id', 'timestamp'),
+        db.Index('ix_audit_log_ip_time', 'ip_address', 'timestamp'),
+    )
+    
     @property
     def details(self):
         return decrypt_field(self.details_encrypted)
@@ -498,6 +604,149 @@ class AuditLog(db.Model):
     def __repr__(self):
         return f'<AuditLog {self.action}>'
 
+class WebhookEndpoint(db.Model):
+    """Outbound webhook subscription"""
+    __tablename__ = 'webhook_endpoint'
+    
+    id = db.Column(db.String(64), primary_key=True)
+    url = db.Column(db.String(500), nullable=False)
+    event = db.Column(db.String(50), nullable=False)
+    secret_encrypted = db.Column(db.Text)
+    active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_webhook_endpoint_event_active', 'event', 'active'),
+    )
+    
+    @property
+    def secret(self):
+        return decrypt_field(self.secret_encrypted)
+    
+    @secret.setter
+    def secret(self, value):
+        self.secret_encrypted = encrypt_field(value) if value else None
+    
+    def __repr__(self):
+        return f'<WebhookEndpoint {self.id} {self.event}>'
+
+class WebhookOutbox(db.Model):
+    """Event waiting to be fanned out to webhook subscribers"""
+    __tablename__ = 'webhook_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claimed_by = db.Column(db.String(32), index=True)  # worker that fanned it out
+    
+    def __repr__(self):
+        return f'<WebhookOutbox {self.id} {self.event}>'
+
+class WebhookDelivery(db.Model):
+    """One event to one URL, retried until delivered or out of attempts"""
+    __tablename__ = 'webhook_delivery'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('webhook_outbox.id', ondelete='CASCADE'), nullable=False, index=True)
+    endpoint_id = db.Column(db.String(64), db.ForeignKey('webhook_endpoint.id', ondelete='CASCADE'), index=True)
+    url = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, delivered, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    lease_owner = db.Column(db.String(32))
+    leased_until = db.Column(db.DateTime)
+    response_status = db.Column(db.Integer)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_webhook_delivery_due', 'status', 'next_attempt_at'),
+        db.Index('ix_webhook_delivery_lease', 'lease_owner'),
+    )
+    
+    def __repr__(self):
+        return f'<WebhookDelivery {self.id} {self.status}>'
+
+class WorkflowExecution(db.Model):
+    """Summary of one automation workflow run"""
+    __tablename__ = 'workflow_execution'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    workflow_id = db.Column(db.String(64), nullable=False)
+    workflow_name = db.Column(db.String(200), nullable=False)
+    trigger_type = db.Column(db.String(50), nullable=False)
+    success = db.Column(db.Boolean, default=True, nullable=False)
+    actions_executed = db.Column(db.Integer, default=0, nullable=False)
+    actions_failed = db.Column(db.Integer, default=0, nullable=False)
+    duration_ms = db.Column(db.Float)
+    triggered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_workflow_execution_workflow', 'workflow_id', 'triggered_at'),
+    )
+    
+    def __repr__(self):
+        return f'<WorkflowExecution {self.workflow_id} {"ok" if self.success else "failed"}>'
+
+class ScheduledTimer(db.Model):
+    """Durable timer fired by the scheduler lease holder"""
+    __tablename__ = 'scheduled_timer'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), unique=True, nullable=False)  # e.g. 'issue_deadline:42'
+    kind = db.Column(db.String(50), nullable=False)
+    fire_at = db.Column(db.DateTime, nullable=False, index=True)
+    interval_seconds = db.Column(db.Integer)  # repeat interval; None for one-shot timers
+    payload = db.Column(db.Text)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<ScheduledTimer {self.key} at {self.fire_at}>'
+
+class SchedulerLease(db.Model):
+    """Leadership lease; only the owner fires timers"""
+    __tablename__ = 'scheduler_lease'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} {self.owner}>'
+
+class BackgroundJob(db.Model):
+    """Durable background job claimed by task workers under a lease"""
+    __tablename__ = 'background_job'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(200), nullable=False)  # registered task name, e.g. 'app.tasks.background_jobs.send_email_async'
+    args = db.Column(db.Text, nullable=False, default='[]')  # JSON
+    kwargs = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    tag = db.Column(db.String(50), nullable=False, default='default')  # routes to the thread or process pool
+    priority = db.Column(db.Integer, nullable=False, default=5)  # lower runs first
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    lease_owner = db.Column(db.String(64))
+    leased_until = db.Column(db.DateTime)
+    result = db.Column(db.Text)  # JSON
+    last_error = db.Column(db.String(1000))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_background_job_due', 'status', 'priority', 'run_at'),
+        db.Index('ix_background_job_lease', 'lease_owner'),
+    )
+    
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.task} {self.status}>'
+
 class RecentItem(db.Model):
     """Track recently viewed items for quick access"""
     __tablename__ = 'recent_item'
@@ -539,6 +788,10 @@ class Notification(db.Model):
     # Relationship
     user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic'))
     
+    __table_args__ = (
+        db.Index('ix_notification_related', 'related_type', 'related_id', 'user_id'),
+    )
+    
     def __repr__(self):
         return f'<Notification {self.id}: {self.type}>'
     
@@ -556,6 +809,18 @@ class Notification(db.Model):
             'related_type': self.related_type,
             'related_id': self.related_id,
         }
+
+class NotificationCounter(db.Model):
+    """Per-user unread notification count, kept current by NotificationService"""
+    __tablename__ = 'notification_counter'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    unread = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<NotificationCounter user:{self.user_id} unread:{self.unread}>'
+
 class StarredItem(db.Model):
     """Track starred/favorite items for quick access"""
     __tablename__ = 'starred_item'
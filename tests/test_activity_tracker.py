@@ -0,0 +1,57 @@
+# tests/test_activity_tracker.py
+"""
+Activity tracker tests - write-behind last_activity updates.
+"""
+
+from datetime import datetime, timedelta
+
+
+class TestActivityTracker:
+    """Test buffered activity tracking."""
+
+    def test_record_does_not_write(self, app, auth_user):
+        """Test recording activity leaves the database untouched until flush."""
+        from app.models import User, db
+        from app.services.activity_tracker import get_activity_tracker
+
+        user = User.query.filter_by(username='testuser').first()
+        tracker = get_activity_tracker()
+        tracker.record(user.id)
+
+        db.session.expire_all()
+        assert User.query.get(user.id).last_activity is None
+        assert tracker.get_stats()['pending'] == 1
+
+    def test_flush_bulk_updates_latest_timestamp(self, app, auth_user, admin_user):
+        """Test one flush writes the newest timestamp for every user."""
+        from app.models import User, db
+        from app.services.activity_tracker import get_activity_tracker
+
+        users = User.query.order_by(User.id).all()
+        tracker = get_activity_tracker()
+        older = datetime.utcnow() - timedelta(minutes=2)
+        newer = datetime.utcnow()
+
+        tracker.record(users[0].id, older)
+        tracker.record(users[0].id, newer)
+        tracker.record(users[1].id, older)
+
+        assert tracker.flush() == 2
+
+        db.session.expire_all()
+        assert User.query.get(users[0].id).last_activity == newer
+        assert User.query.get(users[1].id).last_activity == older
+        assert tracker.get_stats()['pending'] == 0
+
+    def test_is_online_reads_unflushed_activity(self, app, auth_user):
+        """Test presence reflects activity still in the buffer."""
+        from app.models import User
+        from app.services.activity_tracker import get_activity_tracker
+
+        user = User.query.filter_by(username='testuser').first()
+        assert user.is_online is False
+
+        get_activity_tracker().record(user.id)
+
+        assert user.is_online is True
+        assert user.status_text == 'Online'
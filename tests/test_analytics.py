@@ -0,0 +1,145 @@
+# tests/test_analytics.py
+"""
+Analytics tests - daily status snapshots and the reports built on them.
+"""
+
+from datetime import datetime, timedelta
+
+
+def _setup_project():
+    from app.models import Project, db
+
+    project = Project(name='Flow', key='FLOW', status='Active')
+    db.session.add(project)
+    db.session.commit()
+    return project
+
+
+class TestSnapshots:
+    """Test incremental maintenance and backfill."""
+
+    def test_issue_changes_update_today(self, app):
+        """Test create/transition/delete through IssueService keep counts current."""
+        from app.services import IssueService, AnalyticsService
+
+        project = _setup_project()
+        _, a, _ = IssueService.create_issue(project.id, 'A', status='todo', story_points=3)
+        _, b, _ = IssueService.create_issue(project.id, 'B', status='todo', story_points=5)
+        IssueService.update_status(a.id, 'done')
+        IssueService.delete_issue(b.id)
+
+        today = datetime.utcnow().date()
+        (_, state), = AnalyticsService.get_daily_series(project.id, today)
+
+        assert state['todo']['count'] == 0
+        assert state['done']['count'] == 1
+        assert state['done']['points'] == 3
+        assert state['done']['completed'] == 1
+
+    def test_deltas_add_to_carried_forward_day(self, app, auth_user):
+        """Test the first change of a day starts from the previous day and logged time counts."""
+        from app.models import ProjectStatusSnapshot, User, db
+        from app.services import IssueService, AnalyticsService
+
+        user = User.query.filter_by(username='testuser').first()
+        project = _setup_project()
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        db.session.add(ProjectStatusSnapshot(project_id=project.id, day=yesterday, status='todo',
+                                             issue_count=4, story_points=8, hours=1.5,
+                                             completed_count=0, completed_points=0))
+        db.session.commit()
+
+        _, issue, _ = IssueService.create_issue(project.id, 'A', status='todo', story_points=2)
+        assert IssueService.log_time(issue.id, 2.5, user.id)[0]
+
+        today = datetime.utcnow().date()
+        (_, state), = AnalyticsService.get_daily_series(project.id, today)
+        assert (state['todo']['count'], state['todo']['points']) == (5, 10)
+        assert state['todo']['hours'] == 4.0
+
+    def test_first_change_backfills_existing_issues(self, app):
+        """Test a project's first snapshot counts the issues it already had."""
+        from app.models import Issue, db
+        from app.services import IssueService, AnalyticsService
+
+        project = _setup_project()
+        db.session.add_all([Issue(key=f'FLOW-{n}', title=f'Old {n}', project_id=project.id, status='todo')
+                            for n in range(1, 4)])
+        db.session.commit()
+
+        IssueService.create_issue(project.id, 'New', status='todo')
+        (_, state), = AnalyticsService.get_daily_series(project.id, datetime.utcnow().date())
+        assert state['todo']['count'] == 4
+
+    def test_rebuild_replays_transitions(self, app):
+        """Test backfill reconstructs history and carries days forward."""
+        from app.models import Issue, WorkflowTransition, db
+        from app.services import AnalyticsService
+
+        project = _setup_project()
+        now = datetime.utcnow()
+        issue = Issue(key='FLOW-1', title='A', project_id=project.id, status='done',
+                      story_points=2, created_at=now - timedelta(days=5))
+        db.session.add(issue)
+        db.session.flush()
+        db.session.add_all([
+            WorkflowTransition(issue_id=issue.id, from_status='todo', to_status='in_progress',
+                               timestamp=now - timedelta(days=3)),
+            WorkflowTransition(issue_id=issue.id, from_status='in_progress', to_status='done',
+                               timestamp=now - timedelta(days=1)),
+        ])
+        db.session.commit()
+
+        AnalyticsService.rebuild_snapshots(project.id)
+        series = AnalyticsService.get_daily_series(project.id, (now - timedelta(days=4)).date())
+        counts = [{s: v['count'] for s, v in state.items() if v['count']} for _, state in series]
+
+        assert counts == [{'todo': 1}, {'in_progress': 1}, {'in_progress': 1}, {'done': 1}, {'done': 1}]
+        assert [state.get('done', {}).get('completed', 0) for _, state in series] == [0, 0, 0, 1, 0]
+
+
+class TestProjectAnalytics:
+    """Test reports served from snapshots."""
+
+    def test_burndown_and_flow(self, app):
+        """Test burndown, cumulative flow and velocity shapes."""
+        from app.services import IssueService, ReportService
+
+        project = _setup_project()
+        _, a, _ = IssueService.create_issue(project.id, 'A', status='todo')
+        IssueService.create_issue(project.id, 'B', status='todo')
+        IssueService.update_status(a.id, 'closed')
+
+        result = ReportService.get_project_analytics(project.id, days=7)
+
+        assert len(result['burn_down']) == 8
+        assert result['burn_down'][-1]['remaining'] == 1
+        assert result['cumulative_flow']['series']['closed'][-1] == 1
+        assert result['completed_issues'] == 1
+        assert result['cycle_time']['count'] == 1
+
+    def test_metrics_are_cached_until_an_issue_changes(self, app):
+        """Test repeated reports reuse cached metrics and issue edits drop them."""
+        from app.services import IssueService, ReportService
+        from app.services.analytics_service import AnalyticsService
+
+        project = _setup_project()
+        _, a, _ = IssueService.create_issue(project.id, 'A', status='todo')
+        calls = []
+        series = AnalyticsService.get_daily_series
+
+        def counting(*args, **kwargs):
+            calls.append(args)
+            return series(*args, **kwargs)
+
+        AnalyticsService.get_daily_series = staticmethod(counting)
+        try:
+            assert ReportService.get_project_analytics(project.id, days=7)['total_issues'] == 1
+            assert ReportService.get_project_analytics(project.id, days=7)['total_issues'] == 1
+            assert len(calls) == 1
+
+            IssueService.update_status(a.id, 'closed')
+            assert ReportService.get_project_analytics(project.id, days=7)['completed_issues'] == 1
+            assert len(calls) == 2
+        finally:
+            AnalyticsService.get_daily_series = staticmethod(series)
@@ -0,0 +1,104 @@
+# tests/test_audit_store.py
+"""
+Audit store tests - plaintext filter columns and monthly partitions.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def drop_partitions(app):
+    """Partition tables are not in the model metadata, so drop_all misses them."""
+    yield
+    from app.models import db
+    from app.services import AuditStore
+
+    db.session.remove()
+    for name in AuditStore.list_partitions().values():
+        AuditStore.partition_table(name).drop(db.engine)
+
+
+def _add(action, when, **columns):
+    from app.models import AuditLog, db
+
+    log = AuditLog(action=action, timestamp=when, **columns)
+    log.details = '{"secret": true}'
+    db.session.add(log)
+    db.session.commit()
+
+
+class TestAuditStore:
+    """Test audit queries and partition management."""
+
+    def test_severity_filter_uses_plaintext_column(self, app):
+        """Test logged severity and category can be filtered in SQL."""
+        from app.services import AuditService
+
+        with app.test_request_context('/admin/users', headers={'User-Agent': 'pytest'}):
+            AuditService.log_event('USER_UPDATED', user_id=1, severity='WARNING',
+                                   category=AuditService.CATEGORY_DATA)
+            AuditService.log_event('SETTINGS_VIEWED', user_id=1)
+
+        events = AuditService.get_recent_events(severity='WARNING')
+        assert [e.action for e in events] == ['DATA_MODIFICATION:USER_UPDATED']
+        assert events[0].category == 'DATA_MODIFICATION'
+        assert "'severity': 'WARNING'" in events[0].details
+        assert len(AuditService.get_recent_events(category='SYSTEM')) == 1
+
+    def test_queries_span_live_table_and_partitions(self, app):
+        """Test archived months stay queryable and are pruned by time range."""
+        from app.models import AuditLog
+        from app.services import AuditService, AuditStore
+
+        now = datetime.utcnow()
+        _add('LOGIN_FAILED', now - timedelta(days=70), ip_address='10.0.0.9')
+        _add('AUTHENTICATION:LOGIN_FAILED', now - timedelta(days=40), ip_address='10.0.0.9')
+        _add('LOGIN_FAILED', now, ip_address='10.0.0.9')
+        _add('DATA_READ', now)
+
+        assert AuditStore.archive() == 2
+        assert AuditLog.query.count() == 2
+        assert len(AuditStore.list_partitions()) == 2
+
+        failed = AuditService.get_failed_logins(hours=24 * 90)
+        assert [e.timestamp for e in failed] == sorted((e.timestamp for e in failed), reverse=True)
+        assert len(failed) == 3 and failed[-1].partition.startswith('audit_log_')
+        assert failed[-1].details == '{"secret": true}'
+
+        assert len(AuditStore._sources(since=now - timedelta(days=1))) == 1
+        assert AuditStore.count(since=now - timedelta(days=50), ip_address='10.0.0.9') == 2
+
+        stats = AuditService.get_statistics(days=90)
+        assert stats['failed_logins'] == 3 and stats['total_events'] == 4
+        assert stats['top_actions'][0] == ('LOGIN_FAILED', 3)
+
+    def test_ids_are_not_reused_after_archive(self, app):
+        """Test new events get ids above the ones moved into partitions."""
+        from app.models import AuditLog
+        from app.services import AuditStore
+
+        old = datetime.utcnow() - timedelta(days=70)
+        _add('FIRST', old)
+        _add('SECOND', old)
+
+        assert AuditStore.archive() == 1
+        assert [log.action for log in AuditLog.query] == ['SECOND']
+        _add('THIRD', datetime.utcnow())
+        assert AuditStore.archive() == 1
+
+        ids = [e.id for e in AuditStore.query(since=old - timedelta(days=1))]
+        assert len(ids) == len(set(ids)) == 3
+
+    def test_retention_drops_whole_partitions(self, app):
+        """Test cleanup drops expired partitions and keeps recent events."""
+        from app.services import AuditService, AuditStore
+
+        now = datetime.utcnow()
+        _add('OLD_EVENT', now - timedelta(days=200))
+        _add('NEW_EVENT', now)
+
+        assert AuditService.cleanup_old_logs(days=90) == 1
+        assert AuditStore.list_partitions() == {}
+        assert [e.action for e in AuditStore.query()] == ['NEW_EVENT']
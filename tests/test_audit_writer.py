@@ -0,0 +1,77 @@
+# tests/test_audit_writer.py
+"""
+Audit writer tests - spooled, batched audit persistence.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+
+class TestAuditWriter:
+    """Test write-behind audit logging."""
+
+    def test_flush_bulk_inserts_encrypted_events(self, app, tmp_path):
+        """Test events stay queued until flush and keep their own timestamps."""
+        from app.models import AuditLog
+        from app.security.audit_writer import AuditWriter
+
+        writer = AuditWriter(app, spool_dir=str(tmp_path), batch_size=3, flush_interval=60)
+        when = datetime.utcnow() - timedelta(minutes=5)
+        for i in range(2):
+            writer.submit('LOGIN_SUCCESS', user_id=i, ip_address='10.0.0.1',
+                          details=f'{{"n": {i}}}', timestamp=when)
+
+        assert AuditLog.query.count() == 0
+        spooled = ''.join(open(tmp_path / name).read() for name in os.listdir(tmp_path))
+        assert spooled.count('LOGIN_SUCCESS') == 2 and '"n"' not in spooled
+
+        writer.submit('LOGIN_SUCCESS', user_id=2, details='{"n": 2}', timestamp=when)
+        writer.flush()
+        assert writer.get_stats()['written'] == 3
+
+        logs = AuditLog.query.order_by(AuditLog.user_id).all()
+        assert [log.user_id for log in logs] == [0, 1, 2]
+        assert logs[2].details == '{"n": 2}' and logs[2].details_encrypted != '{"n": 2}'
+        assert logs[0].timestamp == when
+        assert writer.get_stats()['batches'] == 1
+        assert not [n for n in os.listdir(tmp_path) if n.endswith('.pending')]
+        writer.shutdown()
+
+    def test_recovers_spool_of_crashed_writer(self, app, tmp_path):
+        """Test unflushed events are replayed from the spool by the next writer."""
+        from app.models import AuditLog
+        from app.security.audit_writer import AuditWriter
+
+        crashed = AuditWriter(app, spool_dir=str(tmp_path), flush_interval=60)
+        crashed.submit('DATA_CREATE', user_id=1)
+        crashed.submit('DATA_UPDATE', user_id=1)
+        crashed._spool.write('{"action": "DATA_DEL')
+        crashed._spool.close()
+
+        writer = AuditWriter(app, spool_dir=str(tmp_path), flush_interval=60)
+        assert writer.get_stats()['recovered'] == 2
+
+        writer.flush()
+        assert [log.action for log in AuditLog.query.order_by(AuditLog.id)] == ['DATA_CREATE', 'DATA_UPDATE']
+        writer.shutdown()
+        assert os.listdir(tmp_path) == []
+
+    def test_full_buffer_applies_drop_policy(self, app):
+        """Test a full buffer drops per policy and counts the drops."""
+        from app.models import AuditLog
+        from app.security.audit_writer import AuditWriter
+
+        newest = AuditWriter(app, max_pending=2, block_timeout=0, flush_interval=60,
+                             drop_policy=AuditWriter.DROP_NEWEST)
+        results = [newest.submit(f'EVENT_{i}') for i in range(3)]
+        assert results == [True, True, False]
+
+        oldest = AuditWriter(app, max_pending=2, block_timeout=0, flush_interval=60)
+        for i in range(3):
+            oldest.submit(f'OLD_{i}')
+        oldest.flush()
+
+        assert oldest.get_stats()['dropped'] == 1
+        assert {log.action for log in AuditLog.query.filter(AuditLog.action.like('OLD_%'))} == {'OLD_1', 'OLD_2'}
+        newest.shutdown()
+        oldest.shutdown()
@@ -0,0 +1,176 @@
+# tests/test_batch_bulk.py
+"""
+Batch operation tests - set-based issue updates and deletes.
+"""
+
+import time
+from datetime import datetime
+
+
+def _setup_issues(count):
+    from app.models import Issue, Project, db
+
+    project = Project(name='Bulk', key='BULK', status='Active')
+    db.session.add(project)
+    db.session.flush()
+    now = datetime.utcnow()
+    db.session.execute(Issue.__table__.insert(), [
+        {'key': f'BULK-{n}', 'title': f'Issue {n}', 'project_id': project.id, 'status': 'todo',
+         'priority': 'medium', 'issue_type': 'task', 'story_points': 2, 'created_at': now, 'updated_at': now}
+        for n in range(1, count + 1)
+    ])
+    db.session.commit()
+    return project, [i for (i,) in db.session.query(Issue.id).order_by(Issue.id)]
+
+
+def _processor():
+    from app.operations import BatchProcessor
+    from app.operations.issue_operations import register_issue_operations
+
+    processor = BatchProcessor()
+    register_issue_operations(processor)
+    return processor
+
+
+class TestBulkIssueOperations:
+    """Test homogeneous issue operations run as set-based statements."""
+
+    def test_bulk_status_change(self, app):
+        """Test thousands of status changes commit quickly with transitions and snapshots."""
+        from app.models import Issue, WorkflowTransition
+        from app.operations import BatchBuilder
+        from app.services import AnalyticsService
+
+        project, ids = _setup_issues(3000)
+        builder = BatchBuilder()
+        for issue_id in ids:
+            builder.update('issue', str(issue_id), {'status': 'done'}, user_id=None)
+
+        started = time.perf_counter()
+        result = _processor().execute_batch(builder.build())
+        elapsed = time.perf_counter() - started
+
+        assert result.successful == 3000 and result.failed == 0
+        assert elapsed < 1.0
+        assert Issue.query.filter_by(status='done').filter(Issue.closed_at.isnot(None)).count() == 3000
+        assert WorkflowTransition.query.filter_by(to_status='done').count() == 3000
+
+        (_, state), = AnalyticsService.get_daily_series(project.id, datetime.utcnow().date())
+        assert state['done']['count'] == 3000 and state['done']['points'] == 6000
+
+    def test_repeated_and_invalid_updates(self, app):
+        """Test later updates to the same issue see earlier ones and bad rows fail alone."""
+        from app.models import Issue, WorkflowTransition
+        from app.operations import BatchBuilder
+
+        _, ids = _setup_issues(3)
+        result = _processor().execute_batch(
+            BatchBuilder()
+            .update('issue', str(ids[0]), {'status': 'in_progress'})
+            .update('issue', str(ids[0]), {'status': 'done', 'priority': 'high'})
+            .update('issue', str(ids[1]), {'status': 'nonsense'})
+            .update('issue', '999999', {'status': 'done'})
+            .update('issue', str(ids[2]), {'title': 'Renamed'})
+            .build()
+        )
+
+        assert (result.successful, result.failed) == (3, 2)
+        assert set(result.errors) == {2, 3}
+        first = Issue.query.get(ids[0])
+        assert (first.status, first.priority) == ('done', 'high')
+        assert [(t.from_status, t.to_status) for t in WorkflowTransition.query.order_by(WorkflowTransition.id)] == \
+            [('todo', 'in_progress'), ('in_progress', 'done')]
+        assert Issue.query.get(ids[1]).status == 'todo'
+        assert Issue.query.get(ids[2]).title == 'Renamed'
+
+    def test_atomic_batch_rolls_back(self, app):
+        """Test one failing operation undoes the whole atomic batch."""
+        from app.models import Issue, WorkflowTransition
+        from app.operations import BatchBuilder
+
+        _, ids = _setup_issues(50)
+        builder = BatchBuilder()
+        for issue_id in ids:
+            builder.update('issue', str(issue_id), {'status': 'in_progress'})
+        builder.update('issue', '999999', {'status': 'done'})
+
+        result = _processor().execute_batch(builder.build(), atomic=True)
+
+        assert (result.successful, result.failed, result.skipped) == (0, 1, 50)
+        assert Issue.query.filter_by(status='todo').count() == 50
+        assert WorkflowTransition.query.count() == 0
+
+    def test_atomic_batch_with_committing_handler(self, app):
+        """Test bulk work committed before a single handler is not reported as rolled back."""
+        from app.models import Issue
+        from app.operations import BatchBuilder
+        from app.services import AnalyticsService
+
+        project, ids = _setup_issues(1)
+        result = _processor().execute_batch(
+            BatchBuilder()
+            .update('issue', str(ids[0]), {'status': 'done'})
+            .create('issue', {'project_id': project.id, 'title': 'New'})
+            .update('issue', '999999', {'status': 'done'})
+            .build(),
+            atomic=True
+        )
+
+        assert [op.status for op in result.operations] == ['success', 'success', 'failed']
+        assert Issue.query.get(ids[0]).status == 'done'
+        (_, state), = AnalyticsService.get_daily_series(project.id, datetime.utcnow().date())
+        assert state['done']['count'] == 1
+
+    def test_bulk_delete_removes_dependents(self, app, auth_user):
+        """Test deleting issues removes their comments and history and detaches subtasks."""
+        from app.models import Comment, Issue, User, WorkflowTransition, db
+        from app.operations import BatchBuilder
+        from app.services import IssueService
+
+        user = User.query.filter_by(username='testuser').first()
+        _, ids = _setup_issues(4)
+        IssueService.add_comment(ids[0], user.id, 'Going away')
+        IssueService.update_status(ids[1], 'in_progress', updated_by=user.id)
+        child = Issue.query.get(ids[3])
+        child.parent_id = ids[0]
+        db.session.commit()
+
+        builder = BatchBuilder()
+        for issue_id in ids[:3]:
+            builder.delete('issue', str(issue_id), user_id=user.id)
+        result = _processor().execute_batch(builder.build())
+
+        assert result.successful == 3
+        assert [i.id for i in Issue.query.all()] == [ids[3]]
+        assert Issue.query.get(ids[3]).parent_id is None
+        assert Comment.query.count() == 0
+        assert WorkflowTransition.query.count() == 0
+
+    def test_bulk_delete_releases_attachment_blobs(self, app, admin_user, tmp_path):
+        """Test attachments swept by a bulk delete drop their blob references and files."""
+        import io
+        import os
+        from app.models import Attachment, Blob, User, db
+        from app.operations import BatchBuilder
+        from app.upload.storage import init_blob_store
+
+        store = init_blob_store(str(tmp_path))
+        admin = User.query.filter_by(username='admin').first()
+        _, ids = _setup_issues(3)
+        for issue_id in (ids[0], ids[1], ids[2]):
+            blob = store.ingest(io.BytesIO(b'%PDF-1.4\n' + b'x' * 64), 'spec.pdf')
+            db.session.add(Attachment(issue_id=issue_id, user_id=admin.id, filename='spec.pdf',
+                                      file_path=store.blob_path(blob.sha256), blob=blob))
+        db.session.commit()
+        blob_id, path = blob.id, store.blob_path(blob.sha256)
+
+        result = _processor().execute_batch(
+            BatchBuilder().delete('issue', str(ids[0])).delete('issue', str(ids[1])).build()
+        )
+        assert result.successful == 2
+        db.session.expire_all()
+        assert db.session.get(Blob, blob_id).ref_count == 1 and os.path.exists(path)
+
+        _processor().execute_batch(BatchBuilder().delete('issue', str(ids[2])).build())
+        assert Attachment.query.count() == 0 and Blob.query.count() == 0
+        assert not os.path.exists(path)
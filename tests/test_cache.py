@@ -0,0 +1,163 @@
+# tests/test_cache.py
+"""
+Cache tests - local LRU tier, argument hashing and single-flight memoization.
+"""
+
+import threading
+import time
+import pytest
+
+
+class TestLocalCache:
+    """Test the in-process LRU/TTL tier."""
+
+    def test_lru_eviction_by_entries(self):
+        """Test least recently used entry is evicted first."""
+        from app.cache import LocalCache
+
+        cache = LocalCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_eviction_by_bytes(self):
+        """Test byte budget is enforced."""
+        from app.cache import LocalCache
+
+        cache = LocalCache(max_entries=100, max_bytes=100)
+        cache.set('a', 'x', size=60)
+        cache.set('b', 'y', size=60)
+
+        assert 'a' not in cache
+        assert cache.get_stats()['bytes'] == 60
+        assert cache.set('huge', 'z', size=500) is False
+
+    def test_ttl_expiry(self):
+        """Test expired entries are misses."""
+        from app.cache import LocalCache
+
+        cache = LocalCache()
+        cache.set('k', 'v', ttl=0)
+
+        assert cache.get('k') is None
+        stats = cache.get_stats()
+        assert stats['expirations'] == 1
+        assert stats['misses'] == 1
+
+
+class TestCacheKeys:
+    """Test stable argument hashing."""
+
+    def test_defaults_and_keywords_share_key(self):
+        """Test equivalent calls produce one key."""
+        from app.cache import make_cache_key
+
+        def analytics(project_id, days=30):
+            pass
+
+        key = make_cache_key('p', analytics, (1,), {})
+        assert make_cache_key('p', analytics, (1, 30), {}) == key
+        assert make_cache_key('p', analytics, (), {'project_id': 1}) == key
+        assert make_cache_key('p', analytics, (2,), {}) != key
+
+    def test_unhashable_argument_rejected(self):
+        """Test arguments without a stable form raise TypeError."""
+        from app.cache import make_cache_key
+
+        def f(obj):
+            pass
+
+        with pytest.raises(TypeError):
+            make_cache_key('p', f, (object(),), {})
+
+
+class TestTieredCache:
+    """Test memoization through the tiered cache."""
+
+    def test_single_flight(self):
+        """Test concurrent misses compute once."""
+        from app.cache import TieredCache
+
+        cache = TieredCache()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('k', slow)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == ['value'] * 8
+
+    def test_cache_result_uses_arguments(self, app):
+        """Test decorated function caches per argument set."""
+        from app.cache import cache_result
+
+        calls = []
+
+        @cache_result(ttl=60)
+        def square(n):
+            calls.append(n)
+            return n * n
+
+        assert square(3) == 9
+        assert square(3) == 9
+        assert square(4) == 16
+        assert calls == [3, 4]
+
+        square.invalidate(3)
+        assert square(3) == 9
+        assert calls == [3, 4, 3]
+
+
+class TestTagInvalidation:
+    """Test tag-based invalidation."""
+
+    def test_local_tag_delete(self):
+        """Test deleting a tag only drops entries carrying it."""
+        from app.cache import LocalCache
+
+        cache = LocalCache()
+        cache.set('a', 1, tags=['project:1'])
+        cache.set('b', 2, tags=['project:1', 'user:7'])
+        cache.set('c', 3, tags=['project:2'])
+
+        assert cache.delete_tag('project:1') == 2
+        assert cache.get('a') is None
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+        assert cache.get_stats()['tags'] == 1
+
+    def test_invalidate_project_is_scoped(self, app):
+        """Test invalidating one project keeps other projects cached."""
+        from app.cache import cache_result, CacheInvalidator
+
+        calls = []
+
+        @cache_result(ttl=60, tags=['project:{project_id}'])
+        def stats(project_id, days=30):
+            calls.append(project_id)
+            return {'project': project_id, 'days': days}
+
+        stats(1)
+        stats(1, days=7)
+        stats(2)
+
+        assert CacheInvalidator.invalidate_project(1) == 2
+
+        stats(1)
+        stats(2)
+        assert calls == [1, 1, 2, 1]
@@ -0,0 +1,139 @@
+# tests/test_facial_index.py
+"""
+Facial ID index tests - cached encodings, vectorized matching and the worker pool.
+"""
+
+import time
+
+import numpy as np
+import pytest
+from cryptography.fernet import Fernet
+
+
+def _manager(app):
+    from app.admin_secure.facial_recognition import FacialIDManager
+
+    app.config['FACIAL_ENCRYPTION_KEY'] = Fernet.generate_key()
+    return FacialIDManager()
+
+
+def _face(seed):
+    vector = np.random.default_rng(seed).normal(size=128).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestFaceIndex:
+    """Test verification against the in-memory index."""
+
+    def test_descriptor_verification_uses_cached_matrix(self, app, admin_user):
+        """Test encodings are decrypted once and re-read only when enrollments change."""
+        from app.models import User
+
+        with app.app_context():
+            admin = User.query.filter_by(username='admin').first()
+            manager = _manager(app)
+            for seed in (1, 2):
+                ok, details = manager.enroll_admin_face_descriptor(admin.id, _face(seed).tolist())
+                assert ok, details
+
+            probe = _face(2) + 0.01
+            ok, details = manager.verify_admin_face_descriptor(admin.id, probe.tolist())
+            assert ok and details['match_count'] == 1 and details['total_attempts'] == 2
+            assert manager.verify_admin_face_descriptor(admin.id, probe.tolist())[0]
+            assert manager.face_index.stats['loads'] == 1
+            assert manager.face_index.stats['hits'] == 1
+
+            manager.enroll_admin_face_descriptor(admin.id, _face(3).tolist())
+            assert manager.verify_admin_face_descriptor(admin.id, _face(3).tolist())[1]['total_attempts'] == 3
+            assert manager.face_index.get_stats()['encodings'] == 3
+
+            manager.delete_facial_data(admin.id)
+            ok, details = manager.verify_admin_face_descriptor(admin.id, probe.tolist())
+            assert not ok and details['message'] == 'No enrolled faces found for this admin'
+            assert manager.face_index.get_stats()['admins'] == 0
+
+    def test_failed_attempts_lock_enrollments(self, app, admin_user):
+        """Test five failures lock the enrollment and drop it from the index."""
+        from app.models import FacialIDData, User
+
+        with app.app_context():
+            admin = User.query.filter_by(username='admin').first()
+            manager = _manager(app)
+            manager.enroll_admin_face_descriptor(admin.id, _face(1).tolist())
+
+            for _ in range(5):
+                assert not manager.verify_admin_face_descriptor(admin.id, _face(9).tolist())[0]
+
+            record = FacialIDData.query.filter_by(admin_id=admin.id).one()
+            assert record.failed_attempts == 5 and not record.is_verified
+            assert not manager.verify_admin_face_descriptor(admin.id, _face(1).tolist())[0]
+            assert manager.face_index.get_stats()['admins'] == 0
+
+    def test_evicted_entries_are_never_matched(self, app, admin_user):
+        """Test an entry held across a rebuild yields no distances and degenerate probes fail."""
+        from app.models import User
+
+        with app.app_context():
+            admin = User.query.filter_by(username='admin').first()
+            manager = _manager(app)
+            manager.enroll_admin_face_descriptor(admin.id, _face(1).tolist())
+
+            held = manager._enrolled_index(admin.id)
+            manager.face_index.invalidate(admin.id)
+            assert manager.face_index.distances(held, np.zeros(128)) is None
+
+            for probe in (np.zeros(128), _face(1) * 5, np.full(128, np.nan)):
+                ok, details = manager.verify_admin_face_descriptor(admin.id, probe.tolist())
+                assert not ok and details['message'].startswith('Invalid descriptor')
+            assert manager.verify_admin_face_descriptor(admin.id, _face(1).tolist())[0]
+
+    def test_image_verification_matches_in_one_pass(self, app, admin_user, monkeypatch):
+        """Test image attempts encode through the pool and update unlock counters."""
+        import app.admin_secure.facial_recognition as facial
+        from app.models import FacialIDData, User
+
+        with app.app_context():
+            admin = User.query.filter_by(username='admin').first()
+            manager = _manager(app)
+            manager.enroll_admin_face_descriptor(admin.id, _face(1).tolist(), label='laptop')
+            manager.enroll_admin_face_descriptor(admin.id, _face(2).tolist(), label='phone')
+
+            monkeypatch.setattr(facial, '_extract_face_encoding', lambda data: _face(1) + 0.005)
+            ok, details = manager.verify_admin_face(admin.id, b'jpeg')
+            assert ok and [m['is_match'] for m in details['matches']] == [True, False]
+
+            record = FacialIDData.query.filter_by(encoding_label='laptop').one()
+            assert record.successful_unlocks == 1 and record.last_unlock_at is not None
+
+            monkeypatch.setattr(facial, '_extract_face_encoding', lambda data: None)
+            ok, details = manager.verify_admin_face(admin.id, b'jpeg')
+            assert not ok and details['message'].startswith('No face detected')
+
+
+class TestFaceWorkerPool:
+    """Test the bounded process pool."""
+
+    def test_runs_jobs_in_worker_processes(self):
+        """Test jobs run out of process and inline when disabled."""
+        from app.admin_secure.face_index import FaceWorkerPool
+
+        pool = FaceWorkerPool(max_workers=1, timeout=30)
+        try:
+            assert pool.run(pow, 2, 10) == 1024
+        finally:
+            pool.shutdown()
+
+        assert FaceWorkerPool(max_workers=0).run(pow, 3, 2) == 9
+
+    def test_timed_out_job_frees_its_worker(self):
+        """Test a hung job is killed and the pool keeps serving."""
+        from app.admin_secure.face_index import FacePoolBusy, FaceWorkerPool
+
+        pool = FaceWorkerPool(max_workers=1, max_pending=1, timeout=0.5)
+        try:
+            with pytest.raises(FacePoolBusy):
+                pool.run(time.sleep, 60)
+            pool.timeout = 30
+            assert pool.run(pow, 2, 3) == 8
+        finally:
+            pool.shutdown()
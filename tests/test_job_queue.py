@@ -0,0 +1,160 @@
+# tests/test_job_queue.py
+"""
+Background job tests - durable queue, priority lanes, retries and pool routing.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.tasks import JobQueue, async_task
+from app.tasks.background_jobs import JobStatus
+
+calls = []
+
+
+def record(label):
+    calls.append(label)
+    return {'label': label}
+
+
+def flaky(label):
+    calls.append(label)
+    raise RuntimeError('upstream unavailable')
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def database_uri():
+    from flask import current_app
+
+    return current_app.config['SQLALCHEMY_DATABASE_URI']
+
+
+@async_task(priority='high', max_attempts=2)
+def urgent(label):
+    calls.append(label)
+    return label.upper()
+
+
+def _queue(app, **options):
+    calls.clear()
+    return JobQueue(app, backoff_base=60, **options)
+
+
+class TestJobQueue:
+    """Test jobs are stored, claimed in order and retried."""
+
+    def test_priority_lanes_and_results(self, app):
+        """Test high-priority jobs run first and results are stored."""
+        with app.app_context():
+            queue = _queue(app)
+            low = queue.submit(record, ('low',), priority='low')
+            queue.enqueue(record, 'default')
+            high = queue.submit(record, ('high',), priority='high')
+
+            assert JobStatus.get_status(low) == JobStatus.QUEUED
+            assert queue.run_once() == 3
+            assert calls == ['high', 'default', 'low']
+            assert JobStatus.get_status(high) == JobStatus.COMPLETED
+            assert JobStatus.get_result(low) == {'label': 'low'}
+            assert queue.run_once() == 0
+
+    def test_delayed_jobs_wait_for_their_eta(self, app):
+        """Test countdown and ETA jobs are not claimed early."""
+        with app.app_context():
+            queue = _queue(app)
+            later = queue.submit(record, ('later',), countdown=300)
+            queue.submit(record, ('tomorrow',), eta=datetime.utcnow() + timedelta(days=1))
+
+            assert queue.run_once() == 0
+            assert queue.run_once(now=datetime.utcnow() + timedelta(minutes=10)) == 1
+            assert calls == ['later'] and JobStatus.get_status(later) == JobStatus.COMPLETED
+
+    def test_retries_back_off_then_dead_letter(self, app):
+        """Test failures are retried later and dead-lettered after max_attempts."""
+        with app.app_context():
+            queue = _queue(app)
+            job_id = queue.submit(flaky, ('x',), max_attempts=2)
+
+            assert queue.run_once() == 1
+            job = JobStatus.get(job_id)
+            assert job['status'] == JobStatus.FAILED and job['attempts'] == 1
+            assert 'upstream unavailable' in job['error']
+            assert queue.run_once() == 0  # backing off
+
+            assert queue.run_once(now=datetime.utcnow() + timedelta(hours=1)) == 1
+            assert JobStatus.get_status(job_id) == JobStatus.DEAD
+            assert queue.run_once(now=datetime.utcnow() + timedelta(days=1)) == 0
+
+            assert queue.retry_dead() == 1
+            assert JobStatus.get(job_id)['attempts'] == 0
+            queue.submit('no.such.module.task')
+            assert queue.run_once() == 2
+            assert queue.stats['dead_jobs'] == 2 and calls == ['x', 'x', 'x']
+
+    def test_lost_worker_jobs_are_reclaimed(self, app):
+        """Test a job whose lease expires runs again, and never past its last attempt."""
+        with app.app_context():
+            queue = _queue(app, lease_seconds=30)
+            job_id = queue.submit(record, ('lost',), max_attempts=2)
+            assert len(queue._claim(datetime.utcnow(), 10)) == 1  # the worker dies here
+
+            assert queue.run_once() == 0
+            later = datetime.utcnow() + timedelta(minutes=1)
+            assert len(queue._claim(later, 10)) == 1  # and dies again
+            assert queue.run_once(now=later + timedelta(minutes=1)) == 0
+            job = JobStatus.get(job_id)
+            assert job['status'] == JobStatus.DEAD and job['error'].startswith('Worker lost')
+            assert calls == []
+
+    def test_bulk_enqueue_and_decorated_tasks(self, app):
+        """Test enqueue_many stores jobs in one transaction and delay uses task options."""
+        from app.models import BackgroundJob, db
+
+        with app.app_context():
+            queue = _queue(app, batch_size=5000)
+            assert queue.enqueue_many(record, [(n,) for n in range(2000)] + [{'label': 'kw'}]) == 2001
+            assert BackgroundJob.query.filter_by(status='queued').count() == 2001
+
+            import app.tasks.background_jobs as jobs
+            previous, jobs._queue_instance = jobs._queue_instance, queue
+            try:
+                job_id = urgent.delay('now')
+            finally:
+                jobs._queue_instance = previous
+            job = db.session.get(BackgroundJob, job_id)
+            assert (job.priority, job.max_attempts) == (0, 2)
+
+            assert queue.run_once() == 2002
+            assert calls[0] == 'now' and calls[-1] == 'kw'
+            assert JobStatus.get_result(job_id) == 'NOW'
+
+
+class TestJobRouting:
+    """Test the background dispatcher routes tags to thread and process pools."""
+
+    def test_cpu_jobs_run_in_worker_processes(self, app):
+        """Test cpu-tagged jobs run out of process and others on threads."""
+        with app.app_context():
+            queue = _queue(app, max_workers=2, process_workers=1, poll_interval=0.05)
+            threaded = queue.submit(worker_pid)
+            forked = queue.submit(worker_pid, tag='cpu')
+            in_context = queue.submit(database_uri, tag='cpu')
+            queue.start()
+            try:
+                deadline = time.monotonic() + 30
+                while time.monotonic() < deadline:
+                    if all(JobStatus.get_status(job) == JobStatus.COMPLETED
+                           for job in (threaded, forked, in_context)):
+                        break
+                    time.sleep(0.05)
+            finally:
+                queue.stop(timeout=5)
+
+            assert JobStatus.get_result(threaded) == os.getpid()
+            assert JobStatus.get_result(forked) not in (None, os.getpid())
+            assert JobStatus.get_result(in_context) == app.config['SQLALCHEMY_DATABASE_URI']
+            assert queue.get_stats()['by_status'] == {'completed': 3}
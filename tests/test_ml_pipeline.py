@@ -0,0 +1,174 @@
+# tests/test_ml_pipeline.py
+"""
+ML pipeline tests - feature matrices and batched, cache-filtered inference.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+class SumModel:
+    """Model that scores a row as the sum of its features and counts calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return X.sum(axis=1)
+
+
+def _projects(count):
+    return [{
+        'created_at': datetime.now() - timedelta(days=i),
+        'members': [1] * (i % 5),
+        'completion_rate': (i % 10) / 10,
+    } for i in range(count)]
+
+
+class TestFeatureMatrix:
+    """Test fixed-schema feature extraction."""
+
+    def test_matrix_follows_schema(self):
+        """Test one row per item with columns in schema order."""
+        from app.ml.ml_pipeline import FeatureEngineer
+
+        issues = [
+            {'priority': 'high', 'assignees': [1, 2], 'status': 'open'},
+            {'priority': 'low', 'comments': [1], 'status': 'closed'},
+        ]
+        X = FeatureEngineer.build_feature_matrix('issue', issues)
+
+        assert X.shape == (2, len(FeatureEngineer.ISSUE_FEATURES))
+        assert X[0, FeatureEngineer.ISSUE_FEATURES.index('priority')] == 3.0
+        assert X[0, FeatureEngineer.ISSUE_FEATURES.index('assignee_count')] == 2
+        assert X[1, FeatureEngineer.ISSUE_FEATURES.index('comment_count')] == 1
+
+
+class TestBatchPredict:
+    """Test batched inference."""
+
+    def _pipeline(self, **kwargs):
+        from app.ml.ml_pipeline import MLPipeline
+
+        pipeline = MLPipeline(**kwargs)
+        model = SumModel()
+        pipeline.model_manager.models['sum'] = model
+        return pipeline, model
+
+    def test_one_model_call_per_chunk(self):
+        """Test the model sees whole chunks and results match row-wise scoring."""
+        pipeline, model = self._pipeline(batch_size=40)
+        projects = _projects(100)
+
+        predictions = pipeline.batch_predict('sum', projects)
+
+        assert model.calls == [40, 40, 20]
+        X = pipeline.feature_engineer.build_feature_matrix('project', projects)
+        assert np.allclose(predictions, X.sum(axis=1))
+
+    def test_cached_rows_skip_model(self):
+        """Test only cache misses and distinct rows reach the model."""
+        pipeline, model = self._pipeline()
+        projects = _projects(10)
+
+        first = pipeline.batch_predict('sum', projects + projects)
+        assert model.calls == [10]
+
+        second = pipeline.batch_predict('sum', projects + _projects(12))
+        assert model.calls == [10, 2]
+        assert second[:10] == first[:10]
+
+    def test_single_predict_uses_batch_path(self):
+        """Test predict() shares the batch cache and unknown types return None."""
+        pipeline, model = self._pipeline()
+        project = _projects(1)[0]
+
+        value = pipeline.predict('sum', project)
+        assert pipeline.batch_predict('sum', [project]) == [value]
+        assert model.calls == [1]
+        assert pipeline.predict('sum', project, data_type='unknown') is None
+
+    def test_plain_callables_get_feature_dicts(self):
+        """Test callables without batch support score one feature dict per item."""
+        from app.ml.ml_pipeline import FeatureEngineer, MLPipeline
+
+        pipeline = MLPipeline()
+        seen = []
+
+        def team_size(features):
+            seen.append(features)
+            return features['team_size']
+
+        def row_sums(X):
+            return X.sum(axis=1)
+        row_sums.supports_batch = True
+
+        pipeline.model_manager.models.update({'team_size': team_size, 'row_sums': row_sums})
+        projects = _projects(6)
+
+        assert pipeline.batch_predict('team_size', projects) == [0, 1, 2, 3, 4, 0]
+        assert set(seen[0]) == set(FeatureEngineer.PROJECT_FEATURES) and len(seen) == 6
+        X = pipeline.feature_engineer.build_feature_matrix('project', projects)
+        assert np.allclose(pipeline.batch_predict('row_sums', projects), X.sum(axis=1))
+
+
+class LinearModel:
+    """Picklable model holding its weights as a NumPy array."""
+
+    def __init__(self, weights):
+        self.weights = weights
+
+    def predict(self, X):
+        return X @ self.weights
+
+
+class TestBoundedCaches:
+    """Test cache bounds, expiry and memory-mapped models."""
+
+    def test_lru_eviction_by_count_and_bytes(self):
+        """Test least recently used entries go first when a bound is hit."""
+        from app.ml.ml_pipeline import BoundedCache
+
+        cache = BoundedCache(max_entries=3, max_bytes=1000, sweep_interval=0)
+        for key in 'abc':
+            cache.set(key, key, size=100)
+        cache.get('a')
+        cache.set('d', 'd', size=100)
+
+        assert 'b' not in cache and 'a' in cache
+        cache.set('e', 'e', size=850)
+        assert list(cache._data) == ['d', 'e'] and cache.bytes == 950
+        assert cache.set('huge', 'x', size=5000) is False
+        assert cache.get_stats()['evictions'] == 3
+
+    def test_expired_entries_are_swept(self):
+        """Test sweep() drops expired entries that are never read again."""
+        from app.ml.ml_pipeline import PredictionCache
+
+        cache = PredictionCache(ttl_hours=1)
+        cache.set_many([('m_1', 1.0), ('m_2', 2.0)])
+        cache.cache.set('m_3', 3.0, ttl_seconds=-1)
+
+        assert cache.cache.sweep() == 1
+        values, hits = cache.get_many(['m_1', 'm_3'])
+        assert values == [1.0, None] and hits.tolist() == [True, False]
+        assert cache.get_stats()['entries'] == 2
+
+    def test_model_arrays_are_memory_mapped(self, tmp_path):
+        """Test models reloaded from disk keep their arrays in mapped files."""
+        from app.ml.ml_pipeline import ModelCache
+
+        cache = ModelCache(cache_dir=str(tmp_path))
+        cache.set('model_linear', LinearModel(np.arange(4, dtype=np.float64)))
+        cache.clear()
+
+        model = cache.get('model_linear')
+        base = model.weights
+        while getattr(base, 'base', None) is not None and not isinstance(base, np.memmap):
+            base = base.base
+        assert isinstance(base, np.memmap)
+        assert not model.weights.flags.writeable
+        assert model.predict(np.ones((2, 4))).tolist() == [6.0, 6.0]
+        assert cache.get_stats()['mapped_bytes'] == 32
@@ -0,0 +1,127 @@
+# tests/test_notification_fanout.py
+"""
+Notification tests - bulk fanout, recipient resolution and unread counters.
+"""
+
+from datetime import datetime
+
+
+def _setup(watchers=0):
+    from app.models import Issue, IssueWatcher, Project, Team, User, db
+
+    team = Team(name='Core')
+    db.session.add(team)
+    db.session.flush()
+    project = Project(name='Flow', key='FLOW', status='Active', team_id=team.id)
+    author = User(username='author', email='author@example.com', password='x', role='employee', team_id=team.id)
+    db.session.add_all([project, author])
+    db.session.flush()
+    issue = Issue(key='FLOW-1', title='Login broken', project_id=project.id, status='todo',
+                  priority='medium', issue_type='bug', created_at=datetime.utcnow())
+    db.session.add(issue)
+    db.session.flush()
+
+    users = [User(username=f'watcher{n}', email=f'w{n}@example.com', password='x', role='employee')
+             for n in range(watchers)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([IssueWatcher(issue_id=issue.id, user_id=u.id) for u in users + [author]])
+    db.session.commit()
+    return team, project, author, issue, users
+
+
+class TestNotificationFanout:
+    """Test comment notifications are resolved in one query and inserted in bulk."""
+
+    def test_comment_fans_out_to_watchers_and_mentions(self, app):
+        """Test watchers, the assignee and permitted mentions are notified, not the author."""
+        from app.models import User, db
+        from app.services import IssueService
+        from app.services.notification_service import NotificationService
+        from models import Notification
+
+        team, _, author, issue, watchers = _setup(watchers=200)
+        teammate = User(username='teammate', email='t@example.com', password='x', role='employee', team_id=team.id)
+        outsider = User(username='outsider', email='o@example.com', password='x', role='employee')
+        assignee = User(username='assignee', email='a@example.com', password='x', role='employee')
+        db.session.add_all([teammate, outsider, assignee])
+        db.session.flush()
+        issue.assignee_id = assignee.id
+        db.session.commit()
+
+        ok, comment, _ = IssueService.add_comment(issue.id, author.id, 'Ping @teammate and @outsider')
+        assert ok
+        assert Notification.query.count() == 0  # fanout runs on the job queue
+
+        assert NotificationService.notify_comment(comment.id) == 202
+        assert {n.type for n in Notification.query.filter_by(user_id=teammate.id)} == {'mention'}
+        assert Notification.query.filter_by(user_id=outsider.id).count() == 0
+        assert Notification.query.filter_by(user_id=author.id).count() == 0
+        assert NotificationService.get_unread_count(watchers[0].id) == 1
+        assert NotificationService.get_unread_count(assignee.id) == 1
+
+    def test_queued_fanout_runs_on_worker(self, app):
+        """Test the job queued by add_comment delivers the notifications."""
+        from app.services import IssueService
+        from app.services.notification_service import NotificationService
+        from app.tasks import get_job_queue
+
+        _, _, author, issue, watchers = _setup(watchers=3)
+        IssueService.add_comment(issue.id, author.id, 'Deployed')
+
+        assert get_job_queue().run_once() == 1
+        assert [NotificationService.get_unread_count(w.id) for w in watchers] == [1, 1, 1]
+
+    def test_retried_fanout_notifies_once(self, app):
+        """Test running a comment's fanout again skips users already notified."""
+        from app.services import IssueService
+        from app.services.notification_service import NotificationService
+        from models import Notification
+
+        _, _, author, issue, watchers = _setup(watchers=3)
+        ok, comment, _ = IssueService.add_comment(issue.id, author.id, 'Deployed')
+
+        assert NotificationService.notify_comment(comment.id) == 3
+        assert NotificationService.notify_comment(comment.id) == 0
+        assert Notification.query.count() == 3
+        assert [NotificationService.get_unread_count(w.id) for w in watchers] == [1, 1, 1]
+
+
+class TestUnreadCounters:
+    """Test counters follow creates, reads and deletes."""
+
+    def test_counter_tracks_changes(self, app, auth_user):
+        """Test the badge count is kept current without counting rows."""
+        from app.models import User
+        from app.services.notification_service import NotificationService
+        from models import Notification, NotificationCounter
+
+        user = User.query.filter_by(username='testuser').first()
+        NotificationService.create_sample_notifications(user.id)
+        NotificationService.create_notification(user.id, 'comment', 'Hello')
+        assert NotificationCounter.query.get(user.id).unread == 6
+
+        first, second = Notification.query.filter_by(user_id=user.id).limit(2).all()
+        assert NotificationService.mark_as_read(first.id, user.id)
+        assert not NotificationService.mark_as_read(first.id, user.id)
+        assert NotificationService.delete_notification(second.id, user.id)
+        assert NotificationService.get_unread_count(user.id) == 4
+
+        assert NotificationService.mark_all_as_read(user.id) == 4
+        assert NotificationService.get_unread_count(user.id) == 0
+        assert Notification.query.filter_by(user_id=user.id, is_read=False).count() == 0
+
+    def test_missing_counter_is_backfilled(self, app, auth_user):
+        """Test users with notifications from before the counter table get an exact count."""
+        from app.models import User, db
+        from app.services.notification_service import NotificationService
+        from models import Notification
+
+        user = User.query.filter_by(username='testuser').first()
+        db.session.add_all([Notification(user_id=user.id, type='comment', title=f'Old {n}') for n in range(3)])
+        db.session.commit()
+
+        NotificationService.notify_users([user.id, user.id], 'mention', 'New')
+        assert NotificationService.get_unread_count(user.id) == 4
+        assert NotificationService.rebuild_unread_counters() == 1
+        assert NotificationService.get_unread_count(user.id) == 4
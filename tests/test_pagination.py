@@ -0,0 +1,126 @@
+# tests/test_pagination.py
+"""
+Pagination tests - keyset cursors, sparse fieldsets and streamed API pages.
+"""
+
+from datetime import datetime
+import pytest
+
+
+def _make_project(admin, issue_count):
+    from app.models import Project, Issue, db
+
+    project = Project(name='Paging', key='PAGE', status='Active', created_by=admin.id)
+    db.session.add(project)
+    db.session.flush()
+    for n in range(issue_count):
+        db.session.add(Issue(
+            key=f'PAGE-{n + 1}', title=f'Issue {n + 1}', project_id=project.id,
+            position=n // 2, assignee_id=admin.id
+        ))
+    db.session.commit()
+    return project
+
+
+class TestCursors:
+    """Test cursor encoding and field parsing."""
+
+    def test_cursor_round_trip(self):
+        """Test datetimes and ints survive encoding."""
+        from app.utils.pagination import encode_cursor, decode_cursor
+
+        values = [datetime(2024, 5, 1, 12, 30), 42]
+        assert decode_cursor(encode_cursor(values)) == values
+
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor!')
+
+    def test_parse_fields(self):
+        """Test sparse fieldsets are validated."""
+        from app.utils.pagination import parse_fields
+
+        available = {'id': None, 'key': None, 'title': None}
+        assert parse_fields(None, available, ['id']) == ['id']
+        assert parse_fields('key, id,key', available, ['id']) == ['key', 'id']
+
+        with pytest.raises(ValueError):
+            parse_fields('id,password_hash', available, ['id'])
+
+
+class TestKeysetPaginator:
+    """Test walking a query page by page."""
+
+    def test_pages_cover_all_rows_once(self, app, admin_user):
+        """Test duplicate sort values are split correctly by the id tiebreaker."""
+        from app.models import User, Issue
+        from app.utils.pagination import KeysetPaginator
+
+        admin = User.query.filter_by(username='admin').first()
+        project = _make_project(admin, 7)
+        query = Issue.query.filter_by(project_id=project.id)
+
+        seen, cursor = [], None
+        while True:
+            page = KeysetPaginator(query, [Issue.position, Issue.id], cursor=cursor, per_page=3)
+            seen.extend(i.key for i in page)
+            cursor = page.next_cursor
+            if not page.has_more:
+                break
+
+        assert seen == [f'PAGE-{n}' for n in range(1, 8)]
+        assert cursor is None
+
+    @pytest.mark.parametrize('descending', [False, True])
+    def test_null_sort_values_are_paged(self, app, admin_user, descending):
+        """Test rows with a NULL sort column are neither skipped nor repeated."""
+        from app.models import User, Issue, db
+        from app.utils.pagination import KeysetPaginator
+
+        admin = User.query.filter_by(username='admin').first()
+        project = _make_project(admin, 7)
+        for issue in Issue.query.filter(Issue.key.in_(['PAGE-2', 'PAGE-5', 'PAGE-6'])):
+            issue.position = None
+        db.session.commit()
+        query = Issue.query.filter_by(project_id=project.id)
+
+        seen, cursor = [], None
+        while True:
+            page = KeysetPaginator(query, [Issue.position, Issue.id], cursor=cursor, per_page=2,
+                                   descending=descending)
+            seen.extend(i.key for i in page)
+            cursor = page.next_cursor
+            if not page.has_more:
+                break
+
+        expected = ['PAGE-1', 'PAGE-3', 'PAGE-4', 'PAGE-7', 'PAGE-2', 'PAGE-5', 'PAGE-6']
+        assert seen == (expected[::-1] if descending else expected)
+
+
+class TestListAPI:
+    """Test streamed v1 list endpoints."""
+
+    def test_issue_listing_with_cursor_and_fields(self, app, client, admin_user):
+        """Test limit, next_cursor and fields on the issues endpoint."""
+        from app.models import User
+
+        admin = User.query.filter_by(username='admin').first()
+        project = _make_project(admin, 5)
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+
+        url = f'/api/v1/project/{project.id}/issues'
+        first = client.get(url, query_string={'limit': 3, 'fields': 'key,assignee'}).get_json()
+
+        assert [i['key'] for i in first['data']] == ['PAGE-1', 'PAGE-2', 'PAGE-3']
+        assert set(first['data'][0]) == {'key', 'assignee'}
+        assert first['data'][0]['assignee'] == 'admin'
+        assert first['pagination']['has_more'] is True
+
+        second = client.get(url, query_string={
+            'limit': 3, 'fields': 'key', 'cursor': first['pagination']['next_cursor']
+        }).get_json()
+        assert [i['key'] for i in second['data']] == ['PAGE-4', 'PAGE-5']
+        assert second['pagination'] == {'limit': 3, 'has_more': False, 'next_cursor': None}
+
+        bad = client.get(url, query_string={'fields': 'password_hash'})
+        assert bad.status_code == 400
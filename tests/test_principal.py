@@ -0,0 +1,112 @@
+# tests/test_principal.py
+"""
+Request principal tests - per-request user, permission bits and cached project access.
+"""
+
+from flask import g
+
+
+def _setup_teams():
+    from app.models import User, Team, Project, db
+
+    red, blue = Team(name='Red'), Team(name='Blue')
+    db.session.add_all([red, blue])
+    db.session.flush()
+
+    member = User.query.filter_by(username='testuser').first()
+    member.team_id = red.id
+    manager = User(username='boss', email='boss@example.com', role='manager')
+    manager.set_password('BossPass123!')
+    db.session.add(manager)
+    db.session.flush()
+
+    ours = Project(name='Ours', key='OURS', status='Active', team_id=red.id)
+    theirs = Project(name='Theirs', key='THRS', status='Active', team_id=blue.id,
+                     created_by=manager.id)
+    db.session.add_all([ours, theirs])
+    db.session.commit()
+    return member, manager, red, blue, ours, theirs
+
+
+class TestPrincipal:
+    """Test the principal is loaded once and answers role checks."""
+
+    def test_loaded_once_per_request(self, app, auth_user):
+        """Test the user row and permission bits are resolved once."""
+        from app.middleware import get_principal, get_current_user
+        from app.models import User
+
+        with app.app_context():
+            user = User.query.filter_by(username='testuser').first()
+            with app.test_request_context('/'):
+                from flask import session
+                session['user_id'] = user.id
+
+                principal = get_principal()
+                assert get_principal() is principal and g.principal is principal
+                assert get_current_user().username == 'testuser'
+                assert principal.can('issue.create') and not principal.can('project.delete')
+                assert not principal.can('no.such.permission')
+                assert principal.has_role_level('viewer') and not principal.has_role_level('manager')
+
+            with app.test_request_context('/'):
+                assert get_principal() is None
+
+
+class TestProjectAccess:
+    """Test the cached accessible-project set."""
+
+    def test_team_and_manager_projects(self, app, auth_user, admin_user):
+        """Test team members, managing creators and admins see the right projects."""
+        from app.middleware import accessible_project_ids
+        from app.models import User
+        from app.services.project_service import ProjectService
+
+        with app.app_context():
+            member, manager, red, blue, ours, theirs = _setup_teams()
+
+            assert accessible_project_ids(member) == {ours.id}
+            assert accessible_project_ids(manager) == {theirs.id}
+            assert accessible_project_ids(User.query.filter_by(username='admin').first()) is None
+            assert [p.id for p in ProjectService.get_user_accessible_projects(member)] == [ours.id]
+
+            # Moving a project between teams invalidates the cached sets
+            ProjectService.update_project(theirs.id, {'team_id': red.id})
+            assert accessible_project_ids(member) == {ours.id, theirs.id}
+
+            # A team change is a new cache key
+            member.team_id = blue.id
+            assert accessible_project_ids(member) == set()
+
+    def test_project_access_decorator(self, app, client, auth_user):
+        """Test the decorator admits team members and rejects others."""
+        from app.models import User
+
+        with app.app_context():
+            member, manager, red, blue, ours, theirs = _setup_teams()
+            ours_id, theirs_id = ours.id, theirs.id
+            user_id = User.query.filter_by(username='testuser').first().id
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+            sess['role'] = 'employee'
+
+        assert client.get(f'/project/{theirs_id}').status_code == 403
+        assert client.get(f'/project/{ours_id}').status_code != 403
+        assert client.get('/project/99999').status_code == 404
+
+    def test_admins_get_404_for_missing_projects(self, app, client, auth_user, admin_user):
+        """Test admins skip the access lookup but not the existence check."""
+        from app.models import User
+
+        with app.app_context():
+            _, _, _, _, ours, _ = _setup_teams()
+            ours_id = ours.id
+            admin_id = User.query.filter_by(username='admin').first().id
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin_id
+            sess['role'] = 'admin'
+
+        assert client.get(f'/project/{ours_id}').status_code == 200
+        assert client.get('/project/99999').status_code == 404
@@ -0,0 +1,101 @@
+# tests/test_rate_limiting.py
+"""
+Rate limiting tests - GCRA engine, backends and per-route policies.
+"""
+
+import pytest
+
+
+class TestGCRA:
+    """Test the in-memory GCRA backend."""
+
+    def test_burst_then_refill(self):
+        """Test the full limit is available as a burst and refills evenly."""
+        from app.security.rate_limiting import MemoryBackend, RateLimit
+
+        backend = MemoryBackend()
+        policy = RateLimit(5, 60)
+        checks = [('k', policy)]
+
+        results = [backend.hit(checks, now=1000.0)[0] for _ in range(6)]
+        assert [r.allowed for r in results] == [True] * 5 + [False]
+        assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+        assert results[5].retry_after == pytest.approx(12.0)
+
+        # One emission interval (60/5 s) later exactly one more request fits
+        assert backend.hit(checks, now=1012.0)[0].allowed is True
+        assert backend.hit(checks, now=1012.0)[0].allowed is False
+
+    def test_policies_are_checked_atomically(self):
+        """Test a request denied by one policy consumes none of the others."""
+        from app.security.rate_limiting import MemoryBackend, RateLimit
+
+        backend = MemoryBackend()
+        minute, hour = RateLimit(2, 60, 'm'), RateLimit(100, 3600, 'h')
+        checks = [('m:k', minute), ('h:k', hour)]
+
+        for _ in range(2):
+            backend.hit(checks, now=0.0)
+        denied = backend.hit(checks, now=0.0)
+
+        assert [r.allowed for r in denied] == [False, False]
+        assert denied[1].remaining == 98
+
+    def test_state_is_one_value_per_key_and_expires(self):
+        """Test memory stays O(keys) and idle keys are swept."""
+        from app.security.rate_limiting import MemoryBackend, RateLimit
+
+        backend = MemoryBackend()
+        policy = RateLimit(3, 1)
+        for _ in range(50):
+            backend.hit([('k', policy)])
+
+        assert len(backend) == 1
+        backend._sweep(now=10 ** 10)
+        assert len(backend) == 0
+
+    def test_parse(self):
+        """Test policy strings."""
+        from app.security.rate_limiting import RateLimit
+
+        assert RateLimit.parse('3000/hour').period == 3600
+        assert RateLimit.parse('5 per minute').limit == 5
+        with pytest.raises(ValueError):
+            RateLimit.parse('lots')
+
+
+class TestRoutePolicies:
+    """Test per-route policies and headers."""
+
+    def test_api_policy_headers_and_429(self, app, client):
+        """Test X-RateLimit-* headers and denial on the /api/ policy."""
+        app.config['RATELIMIT_ENABLED'] = True
+        try:
+            first = client.get('/api/v1/projects')
+            assert first.headers['X-RateLimit-Limit'] == '100'
+            assert first.headers['X-RateLimit-Remaining'] == '99'
+
+            for _ in range(99):
+                client.get('/api/v1/projects')
+            denied = client.get('/api/v1/projects')
+
+            assert denied.status_code == 429
+            assert denied.headers['X-RateLimit-Remaining'] == '0'
+            assert int(denied.headers['Retry-After']) >= 1
+        finally:
+            app.config['RATELIMIT_ENABLED'] = False
+
+    def test_login_policy_limits_attempts_only(self, app, client):
+        """Test the /login policy counts POSTs and leaves page views alone."""
+        app.config['RATELIMIT_ENABLED'] = True
+        try:
+            for _ in range(10):
+                page = client.get('/login')
+                assert page.status_code != 429 and 'X-RateLimit-Limit' not in page.headers
+
+            attempts = [client.post('/login', data={'username': 'nobody', 'password': 'wrong'})
+                        for _ in range(6)]
+            assert attempts[0].headers['X-RateLimit-Limit'] == '5'
+            assert attempts[-1].status_code == 429
+        finally:
+            app.config['RATELIMIT_ENABLED'] = False
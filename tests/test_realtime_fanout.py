@@ -0,0 +1,198 @@
+# tests/test_realtime_fanout.py
+"""
+Realtime fanout tests - cross-worker delivery, coalescing and presence diffs.
+"""
+
+import time
+
+from app.websocket.fanout import FanoutBus, LocalBackend, LocalHub, project_room
+
+
+def _workers(count, coalesce_ms=10000):
+    """Buses sharing one hub, standing in for separate gunicorn workers."""
+    hub = LocalHub()
+    workers = []
+    for _ in range(count):
+        frames = []
+        bus = FanoutBus(LocalBackend(hub), coalesce_ms=coalesce_ms, heartbeat_s=0,
+                        deliver=lambda event, payload, room, frames=frames: frames.append((event, payload, room)))
+        bus.frames = frames
+        workers.append(bus)
+    return workers
+
+
+def _frames(bus, event):
+    return [payload for name, payload, _ in bus.frames if name == event]
+
+
+class TestFanout:
+    """Test events reach clients on every worker."""
+
+    def test_room_events_reach_other_workers(self):
+        """Test a room event is delivered only by workers with clients in the room."""
+        a, b, c = _workers(3, coalesce_ms=0)
+        a.connect('a1', '1')
+        b.connect('b1', '2')
+        a.join('a1', project_room(7))
+        b.join('b1', project_room(7))
+
+        c.publish('comment_added', {'issue_id': 5}, room=project_room(7))
+
+        assert _frames(a, 'comment_added') == [{'issue_id': 5}]
+        assert _frames(b, 'comment_added') == [{'issue_id': 5}]
+        assert _frames(c, 'comment_added') == []
+
+    def test_issue_updates_coalesce_into_one_frame(self):
+        """Test a burst of updates becomes one frame per room with the latest fields."""
+        a, b = _workers(2)
+        b.connect('b1', '2')
+        b.join('b1', project_room(1))
+        b.join('b1', project_room(2))
+
+        for n in range(100):
+            a.publish_coalesced(project_room(1), n % 3, 'issue_updated', {'id': n % 3, 'n': n})
+        a.publish_coalesced(project_room(2), 9, 'issue_created', {'id': 9})
+        assert _frames(b, 'room_updates') == []
+
+        a.flush()
+        frames = {f['room']: f['events'] for f in _frames(b, 'room_updates')}
+        assert len(frames) == 2
+        assert sorted(e['data']['n'] for e in frames[project_room(1)]) == [97, 98, 99]
+        assert frames[project_room(2)] == [{'event': 'issue_created', 'key': 9, 'data': {'id': 9}}]
+        assert a.stats['coalesced'] == 97
+
+
+class TestPresence:
+    """Test presence is replicated as versioned diffs."""
+
+    def test_join_and_leave_diffs(self):
+        """Test snapshots, diffs and multi-tab users across workers."""
+        a, b = _workers(2)
+        room = project_room(3)
+        a.connect('a1', '1')
+        a.join('a1', room)
+        a.flush()
+        b.flush()
+
+        b.connect('b1', '2')
+        snapshot = b.join('b1', room)
+        assert snapshot == {'room': room, 'version': 1, 'members': ['1']}
+
+        # User 2 reaches worker a as a diff; their second tab there changes nothing
+        a.connect('a2', '2')
+        a.join('a2', room)
+        a.flush()
+        assert _frames(a, 'presence_diff')[-1] == {
+            'room': room, 'from_version': 1, 'version': 2, 'joined': ['2'], 'left': []
+        }
+        assert a.snapshot(room) == b.snapshot(room) == {'room': room, 'version': 2, 'members': ['1', '2']}
+
+        b.disconnect('b1')
+        assert sorted(a.members(room)) == ['1', '2']
+
+        a.disconnect('a2')
+        a.flush()
+        assert _frames(a, 'presence_diff')[-1]['left'] == ['2']
+        assert sorted(b.members(room)) == ['1'] and b.snapshot(room)['version'] == 3
+
+    def test_new_and_stopped_workers(self):
+        """Test a new worker learns existing presence and a stopped one is withdrawn."""
+        a, b = _workers(2)
+        a.connect('a1', '1')
+        a.join('a1', project_room(4))
+
+        b.connect('b1', '2')
+        assert sorted(b.members(project_room(4))) == ['1']
+        assert sorted(b.members('online')) == ['1', '2']
+
+        a.shutdown()
+        assert b.members(project_room(4)) == []
+        assert b.members('online') == ['2']
+
+    def test_silent_worker_is_expired(self):
+        """Test a worker killed without worker_down loses its presence after the TTL."""
+        a, b, c = _workers(3)
+        c.connect('c1', '3')
+        a.connect('a1', '1')
+        a.join('a1', project_room(5))
+        b.connect('b1', '2')
+        assert sorted(b.members(project_room(5))) == ['1']
+
+        a.backend.stop()
+        c._beat(now=time.monotonic() + c.worker_ttl + 1)
+        assert b.members(project_room(5)) == c.members(project_room(5)) == []
+        assert sorted(b.members('online')) == ['2', '3']
+        assert b.snapshot(project_room(5))['version'] == c.snapshot(project_room(5))['version']
+
+    def test_paused_worker_reannounces(self):
+        """Test a worker expired while still running restores its presence."""
+        a, b = _workers(2)
+        b.connect('b1', '2')
+        a.connect('a1', '1')
+        a.join('a1', project_room(6))
+
+        b._beat(now=time.monotonic() + b.worker_ttl + 1)
+        assert b.members(project_room(6)) == a.members(project_room(6)) == ['1']
+        assert a.snapshot(project_room(6)) == b.snapshot(project_room(6))
+
+
+class TestIssueEvents:
+    """Test issue changes are published to the project room."""
+
+    def test_issue_changes_reach_the_board(self, app, admin_user):
+        """Test create and update frames for a project's viewers."""
+        from app.models import User, Project, db
+        from app.services.issue_service import IssueService
+        from app.websocket import get_connected_users, get_fanout_bus
+
+        with app.app_context():
+            admin = User.query.filter_by(username='admin').first()
+            project = Project(name='Live', key='LIVE', status='Active', created_by=admin.id)
+            db.session.add(project)
+            db.session.commit()
+
+            bus = get_fanout_bus()
+            frames = []
+            bus.deliver = lambda event, payload, room: frames.append((event, payload, room))
+            bus.connect('sid-1', str(admin.id))
+            bus.join('sid-1', project_room(project.id))
+            assert get_connected_users() == [str(admin.id)]
+
+            ok, issue, _ = IssueService.create_issue(project.id, 'Watch me', reporter_id=admin.id)
+            IssueService.update_status(issue.id, 'in_progress')
+
+            updates = [p for e, p, r in frames if e == 'room_updates' and r == project_room(project.id)]
+            events = [(e['event'], e['key'], e['data']['status']) for u in updates for e in u['events']]
+            assert events[-1] == ('issue_updated', issue.id, 'in_progress')
+            assert [e[0] for e in events] == ['issue_created', 'issue_updated']
+            bus.disconnect('sid-1')
+
+
+class TestRoomAccess:
+    """Test sockets only join rooms their user may see."""
+
+    def test_join_requires_access(self, app, auth_user, admin_user):
+        """Test own user room, accessible projects and admins."""
+        from app.models import Project, Team, User, db
+        from app.websocket.realtime import can_join_room
+
+        with app.app_context():
+            user = User.query.filter_by(username='testuser').first()
+            admin = User.query.filter_by(username='admin').first()
+            team = Team(name='Room')
+            db.session.add(team)
+            db.session.flush()
+            user.team_id = team.id
+            mine = Project(name='Mine', key='MINE', status='Active', team_id=team.id)
+            other = Project(name='Other', key='OTHR', status='Active')
+            db.session.add_all([mine, other])
+            db.session.commit()
+
+            uid = str(user.id)
+            assert can_join_room(uid, f'user_{uid}')
+            assert not can_join_room(uid, f'user_{admin.id}')
+            assert can_join_room(uid, project_room(mine.id))
+            assert not can_join_room(uid, project_room(other.id))
+            assert not can_join_room(uid, 'issue_1')
+            assert not can_join_room(None, 'online')
+            assert can_join_room(str(admin.id), project_room(other.id))
@@ -0,0 +1,127 @@
+# tests/test_recommendations.py
+"""
+Recommendation tests - vectorized issue similarity and user-issue matrix.
+"""
+
+import random
+import pytest
+
+
+def _issues(count, seed=7):
+    rng = random.Random(seed)
+    tags = ['login', 'api', 'ui', 'db', 'perf', 'auth']
+    return [{
+        'id': i,
+        'priority': rng.choice(['low', 'medium', 'high']),
+        'type': rng.choice(['bug', 'task', 'story']),
+        'tags': rng.sample(tags, rng.randint(0, 3)),
+        'components': rng.sample(['web', 'backend', 'mobile'], rng.randint(0, 2)),
+        'title': ''
+    } for i in range(count)]
+
+
+class TestIssueSimilarityIndex:
+    """Test the sparse issue index."""
+
+    def test_matches_pairwise_similarity(self):
+        """Test vectorized scores equal the original pairwise computation."""
+        from app.ml.recommendations import ContentBasedRecommender
+        from app.ml.similarity_index import IssueSimilarityIndex
+
+        issues = _issues(200)
+        index = IssueSimilarityIndex()
+        index.add_issues(issues)
+
+        query = issues[0]
+        scores = index.score(query)
+        features = ContentBasedRecommender.extract_issue_features(query)
+        for other in issues:
+            expected = ContentBasedRecommender.calculate_similarity(
+                features, ContentBasedRecommender.extract_issue_features(other)
+            )
+            assert scores[other['id']] == pytest.approx(expected, abs=1e-6)
+
+    def test_incremental_update_and_remove(self):
+        """Test updates replace the old vector and removals drop out of results."""
+        from app.ml.similarity_index import IssueSimilarityIndex
+
+        index = IssueSimilarityIndex()
+        base = {'priority': 'high', 'type': 'bug', 'tags': ['api'], 'components': ['backend']}
+        index.add_issues([dict(base, id=1, title='API timeout on export'),
+                          dict(base, id=2, title='Slow dashboard'),
+                          dict(base, id=3, priority='low', type='task', tags=[], title='Docs')])
+
+        assert index.add_issue(dict(base, id=2, title='Slow dashboard')) is False
+        query = dict(base, id=99, title='Export API timeout')
+        assert [i['id'] for i, _ in index.most_similar(query, top_n=2)] == [1, 2]
+
+        index.remove_issue(1)
+        assert [i['id'] for i, _ in index.most_similar(query, top_n=2)] == [2, 3]
+        assert len(index) == 2
+
+    def test_candidates_bound_results(self):
+        """Test recommendations only come from the issues passed in."""
+        from app.ml.recommendations import ContentBasedRecommender
+
+        recommender = ContentBasedRecommender()
+        issues = _issues(50)
+        recommender.recommend_similar_issues(issues[0], issues)
+
+        subset = issues[:10]
+        recs = recommender.recommend_similar_issues(issues[0], subset, top_n=20)
+        assert {r.id for r in recs} <= {i['id'] for i in subset[1:]}
+
+    def test_candidate_indexes_are_bounded(self):
+        """Test per-project indexes hold only the last candidates and are evicted LRU."""
+        from app.ml.recommendations import ContentBasedRecommender
+
+        recommender = ContentBasedRecommender()
+        issues = _issues(50)
+        for project_id in range(ContentBasedRecommender.MAX_SCOPED_INDEXES + 5):
+            query = dict(issues[0], project_id=project_id)
+            recommender.recommend_similar_issues(query, issues)
+            recommender.recommend_similar_issues(query, issues[:10])
+
+        assert len(recommender._scoped) == ContentBasedRecommender.MAX_SCOPED_INDEXES
+        assert all(len(index) == 10 for index in recommender._scoped.values())
+        assert len(recommender.index) == 0
+
+    def test_concurrent_candidate_sets_stay_separate(self):
+        """Test requests sharing a project index only get their own candidates."""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.ml.recommendations import ContentBasedRecommender
+
+        recommender = ContentBasedRecommender()
+        issues = _issues(200)
+        halves = (issues[:100], [issues[0]] + issues[100:])
+
+        def run(n):
+            candidates = halves[n % 2]
+            recs = recommender.recommend_similar_issues(issues[0], candidates, top_n=50)
+            return {r.id for r in recs} <= {i['id'] for i in candidates}
+
+        with ThreadPoolExecutor(8) as pool:
+            assert all(pool.map(run, range(200)))
+
+
+class TestUserIssueMatrix:
+    """Test the CSR user-issue matrix."""
+
+    def test_similar_users_jaccard(self):
+        """Test Jaccard similarity between users' issue sets."""
+        from app.ml.recommendations import CollaborativeRecommender
+
+        users = [{'id': u} for u in ('ann', 'bob', 'cid', 'dee')]
+        issues = [
+            {'id': 1, 'assignees': ['ann', 'bob'], 'status': 'closed'},
+            {'id': 2, 'assignees': ['ann', 'cid']},
+            {'id': 3, 'assignees': ['bob']},
+        ]
+        recommender = CollaborativeRecommender()
+        matrix = recommender.build_user_issue_matrix(users, issues)
+
+        assert matrix.row('ann') == {1: 1.5, 2: 1.0}
+        assert recommender.find_similar_users('ann', matrix) == [('cid', 0.5), ('bob', pytest.approx(1 / 3))]
+        assert recommender.find_similar_users('ann', matrix.to_dict()) == \
+            recommender.find_similar_users('ann', matrix)
+        assert recommender.find_similar_users('dee', matrix) == []
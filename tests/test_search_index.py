@@ -0,0 +1,144 @@
+# tests/test_search_index.py
+"""
+Search index tests - FTS5 inverted index over encrypted issue fields.
+"""
+
+import pytest
+from types import SimpleNamespace
+
+
+def make_issue(issue_id, title, description='', project_id=1, status='todo',
+               priority='medium', key=None, comments=()):
+    """Build a lightweight stand-in for an Issue row."""
+    return SimpleNamespace(
+        id=issue_id,
+        key=key or f'PROJ-{issue_id}',
+        title=title,
+        description=description,
+        project_id=project_id,
+        status=status,
+        priority=priority,
+        assignee_id=None,
+        comments=list(comments)
+    )
+
+
+@pytest.fixture
+def index():
+    from app.search.index import SearchIndex
+    idx = SearchIndex(':memory:')
+    yield idx
+    idx.close()
+
+
+class TestSearchIndex:
+    """Test the inverted index."""
+
+    def test_matches_description_text(self, index):
+        """Test decrypted description text is searchable."""
+        index.index_issue(make_issue(1, 'Login page', 'Crash when password contains unicode'))
+        index.index_issue(make_issue(2, 'Dashboard', 'Slow chart rendering'))
+
+        results = index.search('unicode password')
+
+        assert [r[0] for r in results] == [1]
+
+    def test_title_outranks_body(self, index):
+        """Test BM25 column weights favour title matches."""
+        index.index_issue(make_issue(1, 'Refactor exporter', 'mentions timeout once'))
+        index.index_issue(make_issue(2, 'Timeout on export', 'nothing else'))
+
+        results = index.search('timeout', prefix=False)
+
+        assert results[0][0] == 2
+
+    def test_comment_matches_parent_issue(self, index):
+        """Test comment hits are attributed to their issue."""
+        issue = make_issue(7, 'Billing')
+        index.index_issue(issue)
+        index.index_comment(SimpleNamespace(id=70, text='reproduced on staging'), issue)
+
+        assert [r[0] for r in index.search('staging')] == [7]
+
+        index.remove_comment(70)
+        assert index.search('staging') == []
+
+    def test_reindex_tombstones_old_text(self, index):
+        """Test re-indexing replaces the previous postings."""
+        index.index_issue(make_issue(1, 'Old title'))
+        index.index_issue(make_issue(1, 'New title'))
+
+        assert index.search('old') == []
+        assert [r[0] for r in index.search('new')] == [1]
+        assert index.get_stats()['tombstones'] == 1
+
+    def test_filters_and_field_sync(self, index):
+        """Test status filter follows update_issue_fields."""
+        issue = make_issue(1, 'Memory leak', project_id=3)
+        index.index_issue(issue)
+
+        assert index.search('leak', status='done') == []
+
+        issue.status = 'done'
+        index.update_issue_fields(issue)
+
+        assert [r[0] for r in index.search('leak', status='done', project_ids=[3])] == [1]
+        assert index.search('leak', project_ids=[4]) == []
+
+    def test_prefix_and_key_match(self, index):
+        """Test type-ahead on issue keys."""
+        index.index_issue(make_issue(1, 'Anything', key='NUC-342'))
+
+        assert [r[0] for r in index.search('NUC-34')] == [1]
+
+    def test_query_syntax_is_escaped(self, index):
+        """Test FTS operators in user input are treated literally."""
+        index.index_issue(make_issue(1, 'Null pointer'))
+
+        from app.search.index import SearchIndex
+        
+        assert index.search('pointer" OR title:*') == []
+        assert SearchIndex.build_match_query('a"b NEAR(c)') == '"a" "b" "near" "c"*'
+
+    def test_rebuild_drops_tombstones(self, index):
+        """Test rebuild compacts the index."""
+        issue = make_issue(1, 'Flaky test', comments=[SimpleNamespace(id=5, text='seen in CI')])
+        index.index_issue(issue)
+        index.index_issue(issue)
+
+        assert index.rebuild([issue]) == 1
+
+        stats = index.get_stats()
+        assert stats['tombstones'] == 0
+        assert stats['live_documents'] == 2
+        assert [r[0] for r in index.search('ci')] == [1]
+
+
+class TestIssueServiceIndexing:
+    """Test IssueService keeps the index in sync."""
+
+    def test_create_update_comment_are_indexed(self, app, auth_user):
+        """Test create, update, comment and delete keep the index current."""
+        from app.models import db, Project, User
+        from app.services import IssueService
+        from app.search import SearchEngine
+
+        project = Project(name='Search Project', key='SRCH', status='active')
+        db.session.add(project)
+        db.session.commit()
+        user = User.query.filter_by(username='testuser').first()
+
+        ok, issue, _ = IssueService.create_issue(
+            project.id, 'Checkout fails', description='Card declined for amex', reporter_id=user.id
+        )
+        assert ok
+        assert [r['id'] for r in SearchEngine.search_issues('amex')] == [issue.id]
+
+        IssueService.update_issue(issue.id, {'description': 'Card declined for visa'})
+        assert SearchEngine.search_issues('amex') == []
+
+        IssueService.add_comment(issue.id, user.id, 'Gateway returns 402')
+        assert [i.id for i in SearchEngine.autocomplete_issues('gatew')] == [issue.id]
+
+        IssueService.delete_issue(issue.id)
+        assert SearchEngine.search_issues('visa') == []
@@ -0,0 +1,118 @@
+# tests/test_stats_service.py
+"""
+Stats tests - grouped aggregates, cached snapshots and commit invalidation.
+"""
+
+from datetime import datetime, timedelta
+
+
+def _setup():
+    from app.models import Issue, Project, Team, User, db
+
+    team = Team(name='Core')
+    db.session.add(team)
+    db.session.flush()
+    member = User(username='member', email='m@example.com', password='x', role='employee',
+                  team_id=team.id, last_activity=datetime.utcnow())
+    boss = User(username='boss', email='b@example.com', password='x', role='admin',
+                last_login=datetime.utcnow() - timedelta(hours=2))
+    db.session.add_all([member, boss])
+    db.session.flush()
+    projects = [
+        Project(name='A', key='AAA', status='Active', team_id=team.id, created_by=boss.id),
+        Project(name='B', key='BBB', status='Completed', team_id=team.id),
+        Project(name='C', key='CCC', status='On Hold'),
+        Project(name='D', key='DDD', status='Not Started', team_id=team.id),
+    ]
+    db.session.add_all(projects)
+    db.session.flush()
+    db.session.add_all([
+        Issue(key='AAA-1', title='One', project_id=projects[0].id, status='todo',
+              assignee_id=member.id, reporter_id=boss.id),
+        Issue(key='AAA-2', title='Two', project_id=projects[0].id, status='done',
+              assignee_id=member.id, reporter_id=member.id),
+        Issue(key='BBB-1', title='Three', project_id=projects[1].id, status='done'),
+    ])
+    db.session.commit()
+    return member, boss, projects
+
+
+class TestStatsService:
+    """Test snapshots match the data and follow commits."""
+
+    def test_admin_snapshot(self, app):
+        """Test instance-wide counts and breakdowns."""
+        from app.services import StatsService
+
+        _setup()
+        stats = StatsService.get_admin_stats()
+
+        assert (stats.user_count, stats.team_count, stats.project_count, stats.issue_count) == (2, 1, 4, 3)
+        assert (stats.online_users_count, stats.active_users_count) == (1, 1)
+        assert stats.users_by_role == {'employee': 1, 'admin': 1}
+        assert stats.project_status == {'Active': 1, 'Completed': 1, 'On Hold': 1, 'Not Started': 1}
+        assert stats.issue_status == {'todo': 1, 'done': 2}
+
+    def test_project_and_user_snapshots(self, app):
+        """Test dashboard buckets follow project access and user counts are attributed."""
+        from app.services import StatsService
+
+        member, boss, _ = _setup()
+
+        assert StatsService.get_project_stats(member).to_dict() == \
+            {'total': 3, 'not_started': 1, 'in_progress': 1, 'on_hold': 0, 'completed': 1}
+        assert StatsService.get_project_stats(boss).total == 4
+
+        assert StatsService.get_user_stats(member.id).to_dict() == {
+            'total_issues_assigned': 2, 'total_issues_created': 1, 'completed_issues': 1,
+            'total_projects': 0, 'total_updates': 0
+        }
+        assert StatsService.get_user_stats(boss.id).total_projects == 1
+
+    def test_commits_invalidate_cached_snapshots(self, app):
+        """Test cached snapshots are dropped by relevant commits only."""
+        from app.models import Project, db
+        from app.services import StatsService
+        import app.services.stats_service as stats_service
+
+        member, _, projects = _setup()
+        computed = []
+        compute = stats_service.StatsService._compute_admin_stats
+
+        def counting():
+            computed.append(1)
+            return compute()
+
+        stats_service.StatsService._compute_admin_stats = staticmethod(counting)
+        try:
+            assert StatsService.get_admin_stats().project_count == 4
+            member.last_activity = datetime.utcnow()
+            db.session.commit()
+            assert StatsService.get_admin_stats().project_count == 4
+            assert len(computed) == 1
+
+            projects[2].status = 'Completed'
+            db.session.add(Project(name='E', key='EEE', status='Active'))
+            db.session.commit()
+            stats = StatsService.get_admin_stats()
+            assert len(computed) == 2
+            assert stats.project_count == 5 and stats.project_status['Completed'] == 2
+        finally:
+            stats_service.StatsService._compute_admin_stats = staticmethod(compute)
+
+    def test_admin_dashboard_renders_counts(self, app, client, admin_user):
+        """Test the admin dashboard and stats endpoint use the snapshot."""
+        from app.models import User
+
+        with app.app_context():
+            _setup()
+            admin_id = User.query.filter_by(username='admin').first().id
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin_id
+            sess['role'] = 'admin'
+
+        assert client.get('/admin/').status_code == 200
+        response = client.get('/admin/stats')
+        assert response.status_code == 200
+        assert response.get_json()['data']['project_count'] == 4
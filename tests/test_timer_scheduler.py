@@ -0,0 +1,176 @@
+# tests/test_timer_scheduler.py
+"""
+Timer scheduler tests - durable timers, incremental arming and leader election.
+"""
+
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from app.automation.workflow import Trigger, Action, TriggerType, ActionType
+
+
+def _make_issue(due_in_days):
+    from app.models import User, Project, db
+    from app.services.issue_service import IssueService
+
+    admin = User.query.filter_by(username='admin').first()
+    project = Project(name='Timers', key='TIME', status='Active', created_by=admin.id)
+    db.session.add(project)
+    db.session.commit()
+
+    due = (datetime.utcnow() + timedelta(days=due_in_days)).strftime('%Y-%m-%d')
+    ok, issue, message = IssueService.create_issue(project.id, 'Ship it', due_date=due,
+                                                   reporter_id=admin.id)
+    assert ok, message
+    return issue
+
+
+class TestTimerArming:
+    """Test timers follow issue due dates."""
+
+    def test_due_date_changes_move_the_timer(self, app, admin_user):
+        """Test create, close, reopen and reschedule keep one timer in step."""
+        from app.models import ScheduledTimer
+        from app.services.issue_service import IssueService
+
+        with app.app_context():
+            issue = _make_issue(3)
+            key = f'issue_deadline:{issue.id}'
+            timer = ScheduledTimer.query.filter_by(key=key).one()
+            assert timer.fire_at == issue.due_date - timedelta(hours=24)
+
+            IssueService.update_status(issue.id, 'done')
+            assert ScheduledTimer.query.filter_by(key=key).count() == 0
+
+            IssueService.update_issue(issue.id, {'status': 'todo', 'due_date': ''})
+            assert ScheduledTimer.query.filter_by(key=key).count() == 0
+
+            later = (datetime.utcnow() + timedelta(days=10)).strftime('%Y-%m-%d')
+            IssueService.update_issue(issue.id, {'due_date': later})
+            assert ScheduledTimer.query.filter_by(key=key).one().fire_at > datetime.utcnow() + timedelta(days=8)
+
+
+class TestTimerFiring:
+    """Test the lease holder fires due timers."""
+
+    def test_fires_deadline_and_repeats_interval_timers(self, app, admin_user):
+        """Test one-shot timers are removed and interval timers move forward."""
+        from app.automation import workflow_engine
+        from app.models import ScheduledTimer, db
+        from app.scheduling import get_scheduler
+
+        trigger = Trigger(id=str(uuid.uuid4()), type=TriggerType.DEADLINE_APPROACHING, conditions={})
+        action = Action(id=str(uuid.uuid4()), type=ActionType.SEND_NOTIFICATION, params={})
+        workflow = workflow_engine.create_workflow('Remind', '', trigger, [action])
+        try:
+            with app.app_context():
+                issue = _make_issue(2)
+                start = datetime.utcnow()
+
+                # Taking the lease arms the four PWA sync schedules and the upload sweep
+                scheduler = get_scheduler()
+                assert scheduler.run_pending(start) == 0
+                assert ScheduledTimer.query.filter_by(kind='sync').count() == 4
+                assert ScheduledTimer.query.filter_by(kind='upload_sweep').count() == 1
+
+                later = start + timedelta(days=1, minutes=16)
+                assert scheduler.run_pending(later) == 6
+                assert ScheduledTimer.query.filter_by(key=f'issue_deadline:{issue.id}').count() == 0
+
+                sync = ScheduledTimer.query.filter_by(key='sync:data-sync').one()
+                assert later < sync.fire_at <= later + timedelta(seconds=300)
+                assert scheduler.next_fire_at() == min(t.fire_at for t in ScheduledTimer.query.all())
+                db.session.remove()
+
+            runs = [e for e in workflow_engine.get_execution_history() if e['workflow_id'] == workflow.id]
+            assert len(runs) == 1
+        finally:
+            workflow_engine.delete_workflow(workflow.id)
+
+    def test_only_the_lease_holder_fires(self, app):
+        """Test leader election and that cancelled timers are not fired."""
+        from app.models import db
+        from app.scheduling import TimerScheduler, schedule_timer
+
+        with app.app_context():
+            fired = []
+            first = TimerScheduler(app, lease_seconds=30)
+            second = TimerScheduler(app, lease_seconds=30)
+            for scheduler in (first, second):
+                scheduler.register('ping', fired.append)
+
+            now = datetime.utcnow()
+            schedule_timer('ping:1', 'ping', now, {'n': 1})
+            schedule_timer('ping:2', 'ping', now, {'n': 2})
+            db.session.commit()
+
+            assert first.acquire_lease(now) and not second.acquire_lease(now)
+            schedule_timer('ping:2', 'ping', None)  # cancelled after the heap was loaded
+            db.session.commit()
+
+            assert second.run_pending(now) == 0
+            assert first.run_pending(now) == 1 and fired == [{'n': 1}]
+
+            # The lease expires unless renewed
+            later = now + timedelta(seconds=31)
+            assert second.acquire_lease(later) and not first.acquire_lease(later)
+
+
+class TestReportTimers:
+    """Test report schedules are driven by timers."""
+
+    def test_report_timer_delivers_and_rearms(self, app):
+        """Test firing a report timer delivers it; deleting the schedule cancels it."""
+        from app.models import ScheduledTimer, db
+        from app.reporting import ReportScheduler, ScheduleFrequency
+        from app.scheduling import get_scheduler
+        import app.reporting as reporting
+
+        scheduler_backup = reporting.report_scheduler
+        reporting.report_scheduler = ReportScheduler()
+        try:
+            with app.app_context():
+                schedule = reporting.report_scheduler.create_schedule('cfg-1', ScheduleFrequency.DAILY)
+                db.session.commit()
+                timer = ScheduledTimer.query.filter_by(key=f'report:{schedule.id}').one()
+
+                get_scheduler().run_pending(timer.fire_at + timedelta(seconds=1))
+                assert len(reporting.report_scheduler.delivery_log) == 1
+                assert schedule.last_run is not None
+
+                reporting.report_scheduler.delete_schedule(schedule.id)
+                db.session.commit()
+                assert ScheduledTimer.query.filter_by(key=f'report:{schedule.id}').count() == 0
+        finally:
+            reporting.report_scheduler = scheduler_backup
+
+    def test_schedule_from_another_worker_fires(self, app):
+        """Test the leader delivers a schedule it never saw, and keeps timers it cannot resolve."""
+        from app.models import ScheduledTimer, db
+        from app.reporting import ReportScheduler, ScheduleFrequency
+        from app.scheduling import get_scheduler, schedule_timer
+        import app.reporting as reporting
+
+        scheduler_backup = reporting.report_scheduler
+        try:
+            with app.app_context():
+                # Created on another worker, fired by a leader with no schedules in memory
+                schedule = ReportScheduler().create_schedule('cfg-1', ScheduleFrequency.WEEKLY,
+                                                             recipients=['a@example.com'])
+                schedule_timer('report:legacy', 'report', datetime.utcnow(), {'schedule_id': 'legacy'})
+                db.session.commit()
+                reporting.report_scheduler = ReportScheduler()
+
+                timer = ScheduledTimer.query.filter_by(key=f'report:{schedule.id}').one()
+                fired_at = timer.fire_at
+                get_scheduler().run_pending(fired_at + timedelta(seconds=1))
+
+                (delivery,) = reporting.report_scheduler.delivery_log
+                assert delivery['schedule_id'] == schedule.id and delivery['recipients'] == 1
+                db.session.expire_all()
+                rearmed = ScheduledTimer.query.filter_by(key=f'report:{schedule.id}').one()
+                assert json.loads(rearmed.payload)['schedule']['last_run'] is not None
+                assert ScheduledTimer.query.filter_by(key='report:legacy').one().fire_at > datetime.utcnow()
+        finally:
+            reporting.report_scheduler = scheduler_backup
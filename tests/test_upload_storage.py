@@ -0,0 +1,234 @@
+# tests/test_upload_storage.py
+"""
+Upload storage tests - content-addressed blobs and resumable uploads.
+"""
+
+import base64
+import io
+import os
+
+import pytest
+
+PDF = b'%PDF-1.4\n' + b'0123456789abcdef' * 64
+
+
+@pytest.fixture
+def store(app, tmp_path):
+    from app.upload.storage import init_blob_store
+
+    return init_blob_store(str(tmp_path), chunk_size=100, max_size=4096)
+
+
+def _make_issue(admin):
+    from app.models import Project, Issue, db
+
+    project = Project(name='Files', key='FILE', status='Active', created_by=admin.id)
+    db.session.add(project)
+    db.session.flush()
+    issue = Issue(key='FILE-1', title='Attach here', project_id=project.id)
+    db.session.add(issue)
+    db.session.commit()
+    return project, issue
+
+
+class TestBlobStore:
+    """Test content-addressed storage."""
+
+    def test_identical_uploads_share_one_blob(self, store, auth_user):
+        """Test dedup by digest, reference counting and cleanup."""
+        from app.models import db
+
+        first = store.ingest(io.BytesIO(PDF), 'report.pdf')
+        db.session.commit()
+        second = store.ingest(io.BytesIO(PDF), 'copy-of-report.pdf')
+        db.session.commit()
+
+        assert first.id == second.id and second.ref_count == 2
+        assert os.listdir(os.path.join(store.root, 'tmp')) == []
+        path = store.blob_path(first.sha256)
+        with open(path, 'rb') as f:
+            assert f.read() == PDF
+
+        assert store.release(first) is None
+        sha = store.release(first)
+        db.session.commit()
+        assert store.remove_unreferenced(sha) and not os.path.exists(path)
+
+    def test_rejects_oversized_and_disallowed_files(self, store, auth_user):
+        """Test limits are enforced while streaming."""
+        from app.upload import UploadError
+
+        with pytest.raises(UploadError) as exc:
+            store.ingest(io.BytesIO(b'x' * 5000), 'big.txt')
+        assert exc.value.status == 413
+
+        with pytest.raises(UploadError):
+            store.ingest(io.BytesIO(b'MZ'), 'tool.exe')
+        assert os.listdir(os.path.join(store.root, 'tmp')) == []
+
+    def test_deleting_issues_and_projects_releases_blobs(self, store, admin_user):
+        """Test attachments removed by cascade drop their blob references and files."""
+        from app.models import Attachment, Blob, Issue, User, db
+        from app.services import IssueService, ProjectService
+
+        admin = User.query.filter_by(username='admin').first()
+        project, issue = _make_issue(admin)
+        other = Issue(key='FILE-2', title='Also here', project_id=project.id)
+        db.session.add(other)
+        for target in (issue, issue, other):
+            blob = store.ingest(io.BytesIO(PDF), 'report.pdf')
+            db.session.add(Attachment(issue=target, user_id=admin.id, filename='report.pdf',
+                                      file_path=store.blob_path(blob.sha256), file_size=blob.size, blob=blob))
+        db.session.commit()
+        blob_id, path = blob.id, store.blob_path(blob.sha256)
+
+        assert IssueService.delete_issue(issue.id)[0]
+        assert Attachment.query.count() == 1
+        assert db.session.get(Blob, blob_id).ref_count == 1 and os.path.exists(path)
+
+        assert ProjectService.delete_project(project.id)[0]
+        assert Attachment.query.count() == 0 and Blob.query.count() == 0
+        assert not os.path.exists(path)
+
+
+class TestResumableUpload:
+    """Test the tus-style upload endpoints."""
+
+    def test_chunked_upload_resumes_at_offset(self, app, client, store, admin_user):
+        """Test create, partial PATCH, HEAD, offset conflict and completion."""
+        from app.models import User, Attachment, UploadSession
+
+        admin = User.query.filter_by(username='admin').first()
+        project, issue = _make_issue(admin)
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+            sess['csrf_token'] = 'token'
+
+        base = f'/project/{project.id}/issue/{issue.id}/uploads'
+        headers = {'X-CSRFToken': 'token', 'Tus-Resumable': '1.0.0'}
+        created = client.post(base, headers={
+            **headers, 'Upload-Length': str(len(PDF)),
+            'Upload-Metadata': 'filename ' + base64.b64encode(b'spec.pdf').decode()
+        })
+        assert created.status_code == 201
+        location = created.headers['Location']
+
+        patch = {**headers, 'Content-Type': 'application/offset+octet-stream'}
+        response = client.patch(location, data=PDF[:600], headers={**patch, 'Upload-Offset': '0'})
+        assert response.status_code == 204 and response.headers['Upload-Offset'] == '600'
+
+        assert client.head(location).headers['Upload-Offset'] == '600'
+        stale = client.patch(location, data=PDF[:600], headers={**patch, 'Upload-Offset': '0'})
+        assert stale.status_code == 409
+
+        done = client.patch(location, data=PDF[600:], headers={**patch, 'Upload-Offset': '600'})
+        assert done.status_code == 204
+
+        attachment = Attachment.query.get(int(done.headers['X-Attachment-Id']))
+        assert attachment.filename == 'spec.pdf' and attachment.file_size == len(PDF)
+        assert attachment.blob.ref_count == 1
+        assert UploadSession.query.count() == 0
+        with open(attachment.file_path, 'rb') as f:
+            assert f.read() == PDF
+
+    def test_expired_upload_is_gone(self, app, client, store, admin_user):
+        """Test an idle upload answers 410 and is cleaned up."""
+        from datetime import datetime, timedelta
+        from app.models import User, UploadSession, db
+
+        admin = User.query.filter_by(username='admin').first()
+        project, issue = _make_issue(admin)
+        upload = store.create_upload(admin.id, issue.id, 'spec.pdf', len(PDF))
+        upload.updated_at = datetime.utcnow() - store.upload_ttl - timedelta(minutes=1)
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+            sess['csrf_token'] = 'token'
+
+        response = client.patch(f'/project/{project.id}/issue/{issue.id}/uploads/{upload.id}', data=PDF,
+                                headers={'X-CSRFToken': 'token', 'Upload-Offset': '0',
+                                         'Content-Type': 'application/offset+octet-stream'})
+        assert response.status_code == 410
+        assert UploadSession.query.count() == 0
+        assert os.listdir(os.path.join(store.root, 'tmp')) == []
+
+    def test_sweep_removes_stale_uploads(self, store, admin_user):
+        """Test the sweeper drops idle sessions, their files and orphaned parts only."""
+        from datetime import datetime, timedelta
+        from app.models import User, UploadSession
+
+        admin = User.query.filter_by(username='admin').first()
+        _, issue = _make_issue(admin)
+        stale = store.create_upload(admin.id, issue.id, 'old.pdf', len(PDF))
+        store.append_upload(stale, io.BytesIO(PDF[:100]), 0)
+        fresh = store.create_upload(admin.id, issue.id, 'new.pdf', len(PDF))
+        orphan = os.path.join(store.root, 'tmp', 'crashed.part')
+        open(orphan, 'wb').close()
+        os.utime(orphan, (0, 0))
+        stale_id, fresh_id = stale.id, fresh.id
+        assert stale_id in store._hashers
+
+        later = datetime.utcnow() + store.upload_ttl + timedelta(minutes=1)
+        UploadSession.query.filter_by(id=fresh_id).update({'updated_at': later})
+        assert store.sweep_expired_uploads(now=later) == 1
+
+        assert [u.id for u in UploadSession.query.all()] == [fresh_id]
+        assert os.listdir(os.path.join(store.root, 'tmp')) == [f'{fresh_id}.part']
+        assert stale_id not in store._hashers
+
+
+class TestAttachmentDownload:
+    """Test the attachment download path."""
+
+    @pytest.fixture
+    def download_url(self, client, store, admin_user):
+        from app.models import User, Attachment, db
+
+        admin = User.query.filter_by(username='admin').first()
+        project, issue = _make_issue(admin)
+        blob = store.ingest(io.BytesIO(PDF), 'spec.pdf')
+        attachment = Attachment(issue_id=issue.id, user_id=admin.id, filename='spec.pdf',
+                                file_path=store.blob_path(blob.sha256), file_size=blob.size,
+                                mime_type='application/pdf', blob=blob)
+        db.session.add(attachment)
+        db.session.commit()
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+        return f'/project/{project.id}/issue/{issue.id}/attachment/{attachment.id}', blob.sha256
+
+    def test_range_and_etag(self, client, download_url):
+        """Test full, partial and conditional downloads."""
+        url, sha = download_url
+
+        full = client.get(url)
+        assert full.status_code == 200 and full.data == PDF
+        assert full.headers['ETag'] == f'"{sha}"'
+        assert full.headers['Accept-Ranges'] == 'bytes'
+        assert 'private' in full.headers['Cache-Control'] and 'immutable' in full.headers['Cache-Control']
+        assert full.headers['Content-Disposition'].startswith('inline')
+
+        part = client.get(url, headers={'Range': 'bytes=100-199'})
+        assert part.status_code == 206 and part.data == PDF[100:200]
+        assert part.headers['Content-Range'] == f'bytes 100-199/{len(PDF)}'
+
+        cached = client.get(url, headers={'If-None-Match': f'"{sha}"'})
+        assert cached.status_code == 304 and cached.data == b''
+
+        forced = client.get(url + '?download=1')
+        assert forced.headers['Content-Disposition'].startswith('attachment')
+
+    def test_offload_to_front_server(self, app, client, download_url):
+        """Test X-Accel-Redirect hands the file to the proxy."""
+        url, sha = download_url
+        app.config['ATTACHMENT_SENDFILE'] = 'x-accel'
+        try:
+            response = client.get(url)
+            cached = client.get(url, headers={'If-None-Match': f'"{sha}"'})
+        finally:
+            app.config['ATTACHMENT_SENDFILE'] = None
+
+        assert response.data == b''
+        assert response.headers['X-Accel-Redirect'] == f'/protected-uploads/blobs/{sha[:2]}/{sha[2:4]}/{sha}'
+        assert response.headers['Content-Type'] == 'application/pdf'
+        assert cached.status_code == 304 and 'X-Accel-Redirect' not in cached.headers
@@ -0,0 +1,248 @@
+# tests/test_webhook_delivery.py
+"""
+Webhook delivery tests - outbox fan-out, signing, retries and circuit breaking
+against a local HTTP stub server.
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append((self.path, dict(self.headers), body))
+        status = self.server.status
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.received = []
+    server.status = 200
+    server.base = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dispatcher(app):
+    from app.integrations.webhook_delivery import WebhookDispatcher
+
+    # The stub listens on loopback
+    return WebhookDispatcher(app, per_host=1, coalesce_max=10, max_attempts=3,
+                             backoff_base=30, breaker_threshold=2, breaker_cooldown=0.2,
+                             allow_private=True)
+
+
+def _make_due():
+    from app.models import WebhookDelivery, db
+
+    WebhookDelivery.query.update({'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+
+class TestWebhookFanOut:
+    """Test outbox fan-out and coalesced, signed delivery."""
+
+    def test_events_fan_out_coalesced_and_signed(self, app, stub, dispatcher):
+        """Test one request per endpoint carries all its pending events."""
+        from app.integrations.webhook_delivery import sign_payload
+        from app.models import WebhookDelivery, db
+
+        for i in range(3):
+            dispatcher.add_endpoint(f'hook_{i}', f'{stub.base}/hook/{i}', 'issue', secret=f'secret-{i}')
+        dispatcher.add_endpoint('hook_off', f'{stub.base}/off', 'issue')
+        dispatcher.set_endpoint_active('hook_off', False)
+        dispatcher.add_endpoint('hook_comment', f'{stub.base}/comment', 'comment')
+
+        dispatcher.enqueue('issue', {'action': 'created', 'id': 1})
+        dispatcher.enqueue('issue', {'action': 'updated', 'id': 1})
+        db.session.commit()
+        assert WebhookDelivery.query.count() == 0  # nothing fans out in the request
+
+        assert dispatcher.run_once() == 6
+        assert sorted(path for path, _, _ in stub.received) == ['/hook/0', '/hook/1', '/hook/2']
+
+        for path, headers, body in stub.received:
+            index = path.rsplit('/', 1)[1]
+            assert headers['X-Webhook-Signature'] == sign_payload(f'secret-{index}', body)
+            events = json.loads(body)['events']
+            assert [e['payload']['action'] for e in events] == ['created', 'updated']
+
+        assert WebhookDelivery.query.filter_by(status='delivered').count() == 6
+        # Three requests to one host over a single keep-alive connection
+        assert dispatcher.stats['connections'] == 1 and dispatcher.stats['requests'] == 3
+        assert dispatcher.run_once() == 0
+
+    def test_issue_changes_are_queued_with_the_write(self, app, auth_user):
+        """Test IssueService adds one outbox row per change, whatever the subscriber count."""
+        from app.integrations.webhook_delivery import get_webhook_dispatcher
+        from app.models import User, Project, WebhookOutbox, db
+        from app.services import IssueService
+
+        assert get_webhook_dispatcher() is not None
+        user = User.query.filter_by(username='testuser').first()
+        project = Project(name='Hooks', key='HOOK', status='Active', created_by=user.id)
+        db.session.add(project)
+        db.session.commit()
+
+        ok, issue, _ = IssueService.create_issue(project.id, 'Ship it', reporter_id=user.id)
+        assert ok
+        IssueService.update_status(issue.id, 'done', user.id)
+
+        events = [json.loads(row.payload) for row in WebhookOutbox.query.order_by(WebhookOutbox.id)]
+        assert [e['action'] for e in events] == ['created', 'updated']
+        assert events[1]['issue']['status'] == 'done'
+
+
+class TestWebhookRetries:
+    """Test backoff, circuit breaking and giving up."""
+
+    def test_backoff_and_circuit_breaker(self, app, stub, dispatcher):
+        """Test failures back off, an open circuit defers without requests, then recovers."""
+        import time
+        from app.models import WebhookDelivery, db
+
+        dispatcher.add_endpoint('flaky', f'{stub.base}/flaky', 'issue')
+        dispatcher.add_endpoint('flaky2', f'{stub.base}/flaky2', 'issue')
+        stub.status = 503
+        dispatcher.enqueue('issue', {'id': 1})
+        db.session.commit()
+
+        before = datetime.utcnow()
+        dispatcher.run_once()
+        delivery = WebhookDelivery.query.first()
+        assert delivery.status == 'pending' and delivery.attempts == 1
+        assert delivery.next_attempt_at >= before + timedelta(seconds=30)
+        assert delivery.last_error == 'HTTP 503'
+        assert dispatcher.run_once() == 0  # not due yet
+
+        # Two host failures opened the circuit: due deliveries wait without a request
+        _make_due()
+        sent = len(stub.received)
+        dispatcher.run_once()
+        assert len(stub.received) == sent
+        assert WebhookDelivery.query.filter_by(attempts=1, last_error='Circuit open').count() == 2
+
+        stub.status = 200
+        time.sleep(0.25)
+        _make_due()
+        dispatcher.run_once()  # the probe succeeds and closes the circuit
+        _make_due()
+        dispatcher.run_once()
+        assert WebhookDelivery.query.filter_by(status='delivered').count() == 2
+
+    def test_gives_up_after_max_attempts(self, app, stub, dispatcher):
+        """Test a delivery is marked failed after its last attempt."""
+        from app.models import WebhookDelivery, db
+
+        dispatcher.breaker_threshold = 100
+        dispatcher.add_endpoint('broken', f'{stub.base}/broken', 'issue')
+        stub.status = 500
+        dispatcher.enqueue('issue', {'id': 1})
+        db.session.commit()
+
+        for _ in range(3):
+            _make_due()
+            dispatcher.run_once()
+
+        delivery = WebhookDelivery.query.one()
+        assert delivery.status == 'failed' and delivery.attempts == 3
+        assert len(stub.received) == 3
+
+        # Finished deliveries and their events are purged after retention
+        assert dispatcher.purge(datetime.utcnow() + timedelta(seconds=1)) == 1
+
+
+class TestWebhookManager:
+    """Test subscriptions are shared by every worker through the endpoint table."""
+
+    def test_webhooks_visible_across_workers(self, app):
+        """Test a webhook registered on one worker is read and deleted on another."""
+        from app.integrations import WebhookEvent, WebhookManager
+        from app.models import WebhookEndpoint
+
+        first, second = WebhookManager(), WebhookManager()
+        with pytest.raises(ValueError):
+            first.register_webhook('ftp://example.com/hook', WebhookEvent.ISSUE)
+        assert first.webhooks == {} and WebhookEndpoint.query.count() == 0
+
+        webhook = first.register_webhook('https://example.com/hook', WebhookEvent.ISSUE)
+        assert [w.id for w in second.list_webhooks()] == [webhook.id]
+        found = second.get_webhook(webhook.id)
+        assert (found.url, found.event, found.secret) == (webhook.url, WebhookEvent.ISSUE, webhook.secret)
+
+        assert second.delete_webhook(webhook.id)
+        assert first.get_webhook(webhook.id) is None and WebhookEndpoint.query.count() == 0
+
+        ids = {first.register_webhook('https://example.com/hook', WebhookEvent.ISSUE).id for _ in range(5)}
+        assert len(ids) == 5 and WebhookEndpoint.query.count() == 5
+
+
+class TestWebhookDestinations:
+    """Test webhooks cannot be pointed at internal addresses."""
+
+    @pytest.mark.parametrize('url', [
+        'http://127.0.0.1/hook', 'http://localhost:8080/hook', 'http://10.1.2.3/hook',
+        'http://192.168.0.10/hook', 'http://169.254.169.254/latest/meta-data', 'http://[::1]/hook',
+        'http://[::ffff:127.0.0.1]/hook', 'http://0.0.0.0/hook'
+    ])
+    def test_private_destinations_are_rejected(self, app, url):
+        """Test loopback, private and link-local targets are refused at registration."""
+        from app.integrations import WebhookEvent, WebhookManager
+        from app.integrations.webhook_delivery import get_webhook_dispatcher
+        from app.models import WebhookEndpoint
+
+        with pytest.raises(ValueError):
+            WebhookManager().register_webhook(url, WebhookEvent.ISSUE)
+        with pytest.raises(ValueError):
+            get_webhook_dispatcher().add_endpoint('internal', url, 'issue')
+        assert WebhookEndpoint.query.count() == 0
+
+    def test_connect_refuses_private_addresses(self, app, stub):
+        """Test the worker re-checks the resolved address before connecting."""
+        import asyncio
+        from app.integrations.webhook_delivery import HTTPPool
+
+        async def post(pool):
+            try:
+                return await pool.post(f'{stub.base}/hook', b'{}', {})
+            finally:
+                await pool.close()
+
+        with pytest.raises(ConnectionRefusedError):
+            asyncio.run(post(HTTPPool()))
+        assert asyncio.run(post(HTTPPool(allow_private=True))) == 200
+        assert len(stub.received) == 1
+
+    def test_registration_requires_admin(self, app, client, auth_user, admin_user):
+        """Test anonymous and non-admin users cannot register webhooks or workflows."""
+        from app.models import User, WebhookEndpoint
+
+        body = {'event_type': 'issue', 'target_url': 'https://example.com/hook'}
+        assert client.post('/api/v1/integrations/webhooks', json=body).status_code == 401
+        assert client.get('/api/v1/automation/workflows',
+                          headers={'Authorization': 'anything'}).status_code == 401
+
+        for username, status in (('testuser', 403), ('admin', 201)):
+            with client.session_transaction() as sess:
+                sess['user_id'] = User.query.filter_by(username=username).first().id
+            assert client.post('/api/v1/integrations/webhooks', json=body).status_code == status
+        assert WebhookEndpoint.query.count() == 1
@@ -0,0 +1,125 @@
+# tests/test_workflow_engine.py
+"""
+Workflow engine tests - trigger index, compiled conditions and the event queue.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+from app.automation.workflow import (
+    WorkflowEngine, Trigger, Action, TriggerType, ActionType
+)
+
+
+def _add(engine, trigger_type, conditions, label='x'):
+    trigger = Trigger(id=str(uuid.uuid4()), type=trigger_type, conditions=conditions)
+    action = Action(id=str(uuid.uuid4()), type=ActionType.ADD_LABEL, params={'label': label})
+    return engine.create_workflow(label, '', trigger, [action])
+
+
+class TestTriggerIndex:
+    """Test candidate selection and compiled conditions."""
+
+    def test_status_change_evaluates_only_candidates(self):
+        """Test thousands of rules reduce to the indexed bucket plus wildcards."""
+        engine = WorkflowEngine()
+        for i in range(1000):
+            _add(engine, TriggerType.ISSUE_STATUS_CHANGED, {'project_id': i, 'status': 'done'})
+        for i in range(1000):
+            _add(engine, TriggerType.ISSUE_STATUS_CHANGED, {'project': i})
+        _add(engine, TriggerType.ISSUE_STATUS_CHANGED, {}, label='any')
+        _add(engine, TriggerType.ISSUE_CREATED, {}, label='created')
+
+        results = engine.trigger_workflow(TriggerType.ISSUE_STATUS_CHANGED,
+                                          {'status': 'done', 'project_id': '7'})
+
+        assert [r['workflow_name'] for r in results] == ['x', 'x', 'any']
+        assert engine.stats['candidates'] == 3
+
+        engine.stats['candidates'] = 0
+        results = engine.trigger_workflow(TriggerType.ISSUE_STATUS_CHANGED,
+                                          {'status': 'in_progress', 'project_id': 7})
+        assert len(results) == 2 and engine.stats['candidates'] == 3
+
+    def test_conditions_and_enable_state(self):
+        """Test priority floors, days_open, disable/enable and delete."""
+        engine = WorkflowEngine()
+        urgent = _add(engine, TriggerType.ISSUE_CREATED, {'priority': 'high', 'is_higher_than': True})
+        stale = _add(engine, TriggerType.ISSUE_CREATED, {'days_open': 3})
+        old = (datetime.now() - timedelta(days=5)).isoformat()
+
+        def matched(event):
+            return {r['workflow_id'] for r in engine.trigger_workflow(TriggerType.ISSUE_CREATED, event)}
+
+        assert matched({'priority': 'critical', 'created_at': old}) == {urgent.id, stale.id}
+        assert matched({'priority': 'medium', 'created_at': datetime.now().isoformat()}) == set()
+
+        engine.disable_workflow(urgent.id)
+        assert matched({'priority': 'critical'}) == set()
+        engine.enable_workflow(urgent.id)
+        assert matched({'priority': 'high'}) == {urgent.id}
+
+        engine.delete_workflow(urgent.id)
+        engine.delete_workflow(stale.id)
+        assert engine.get_stats()['index_entries'] == 0
+
+    def test_history_is_bounded(self):
+        """Test the execution ring buffer keeps the newest entries."""
+        engine = WorkflowEngine(history_size=5)
+        _add(engine, TriggerType.MANUAL, {})
+        for i in range(12):
+            engine.trigger_workflow(TriggerType.MANUAL, {'n': i})
+
+        history = engine.get_execution_history(limit=100)
+        assert len(history) == 5
+        assert len(engine.get_execution_history(limit=2)) == 2
+
+
+class TestWorkflowDispatch:
+    """Test queued events and persisted summaries."""
+
+    def test_batched_dispatch_persists_summaries(self, app):
+        """Test queued events run in one batch and summaries are inserted."""
+        from app.models import WorkflowExecution
+
+        engine = WorkflowEngine(batch_size=50)
+        engine.init_app(app)
+        engine._start = lambda: None  # run the batch from the test instead of the worker
+        workflow = _add(engine, TriggerType.ISSUE_ASSIGNED, {'status': 'todo'})
+
+        assert not engine.dispatch(TriggerType.COMMENT_ADDED, {'status': 'todo'})
+        for i in range(3):
+            assert engine.dispatch(TriggerType.ISSUE_ASSIGNED, {'status': 'todo', 'issue_id': i})
+        assert engine.get_stats()['pending'] == 3
+
+        assert engine.flush() == 3
+        assert engine.stats['batches'] == 1
+
+        with app.app_context():
+            rows = WorkflowExecution.query.filter_by(workflow_id=workflow.id).all()
+            assert len(rows) == 3
+            assert all(row.success and row.actions_executed == 1 for row in rows)
+
+    def test_issue_status_change_triggers_workflow(self, app, admin_user):
+        """Test IssueService raises indexed status-change events."""
+        from app.automation import workflow_engine
+        from app.models import User, Project, db
+        from app.services.issue_service import IssueService
+
+        workflow = _add(workflow_engine, TriggerType.ISSUE_STATUS_CHANGED, {'status': 'done'})
+        try:
+            with app.app_context():
+                admin = User.query.filter_by(username='admin').first()
+                project = Project(name='Auto', key='AUTO', status='Active', created_by=admin.id)
+                db.session.add(project)
+                db.session.commit()
+
+                ok, issue, _ = IssueService.create_issue(project.id, 'Automate me', reporter_id=admin.id)
+                assert ok
+                IssueService.update_status(issue.id, 'in_progress')
+                IssueService.update_status(issue.id, 'done')
+
+            runs = [e for e in workflow_engine.get_execution_history() if e['workflow_id'] == workflow.id]
+            assert len(runs) == 1
+        finally:
+            workflow_engine.delete_workflow(workflow.id)